@@ -67,8 +67,7 @@ def create_financial_agent() -> Agent:
             "Ask clarifying questions when the user's request needs more specificity.",
         ],
         
-        # Enable debugging for development
-        debug_mode=True,
+        # Agno debug output stays off; set AGNO_DEBUG=true in .env while developing
     )
     
     return financial_agent
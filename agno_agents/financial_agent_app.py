@@ -50,8 +50,7 @@ def create_financial_agent() -> Agent:
             "Be objective and mention both opportunities and risks.",
         ],
         
-        # Enable debugging for development
-        debug_mode=True,
+        # Agno debug output stays off; set AGNO_DEBUG=true in .env while developing
     )
     
     return financial_agent
@@ -62,8 +62,7 @@ def create_agent() -> Agent:
             "Be objective and mention both opportunities and risks.",
         ],
         
-        # Enable debugging for development
-        debug_mode=True,
+        # Agno debug output stays off; set AGNO_DEBUG=true in .env while developing
     )
 
 
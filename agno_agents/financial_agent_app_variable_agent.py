@@ -59,8 +59,7 @@ agent = Agent(
         "Be objective and mention both opportunities and risks.",
     ],
     
-    # Enable debugging for development
-    debug_mode=True,
+    # Agno debug output stays off; set AGNO_DEBUG=true in .env while developing
 )
 
 # Optional: Export list to explicitly specify what should be used
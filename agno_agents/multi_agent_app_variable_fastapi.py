@@ -60,8 +60,7 @@ def _create_financial_analysis_agent() -> Agent:
             "Focus on thorough analysis rather than specific trading recommendations.",
         ],
         
-        # Enable debugging for development
-        debug_mode=True,
+        # Agno debug output stays off; set AGNO_DEBUG=true in .env while developing
     )
 
 
@@ -109,8 +108,7 @@ def _create_trading_strategy_agent() -> Agent:
             "Always remind users that trading involves risk and past performance doesn't guarantee future results.",
         ],
         
-        # Enable debugging for development
-        debug_mode=True,
+        # Agno debug output stays off; set AGNO_DEBUG=true in .env while developing
     )
 
 
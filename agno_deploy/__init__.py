@@ -0,0 +1,40 @@
+"""
+Agno Modal Deploy Runtime Package
+
+This package contains the production runtime helpers shared by the
+agno_modal_deploy.py and agno_modal_deploy_agui.py deployment scripts.
+Everything here is imported lazily from inside the Modal functions, so the
+deployment scripts stay importable on machines without the agent stack.
+
+Runtime Modules:
+- logs.py - Production logging mode (buffered, asynchronous, sampled JSON logs)
+- metrics.py - In-process counters, gauges and histograms served from /metrics
+- watchdog.py - Event-loop stall detector with stack capture
+- config.py - deploy_config.json loading with environment variable overrides
+- planner.py - Capacity planner CLI (python -m agno_deploy.planner)
+- admission.py - Admission control middleware (in-flight cap, queue deadline, rate limits)
+- scheduler.py - Weighted fair queuing of agent runs across tenants and priority classes
+- cancellation.py - Cancels in-flight agent runs when the client disconnects
+- jobs.py - Asynchronous job API: job store, worker entry point and /jobs routes
+- batch.py - Batch endpoint with bounded parallelism and a shared tool cache
+- fanout.py - Fan-out endpoint asking several agents concurrently with merged responses
+- routing.py - Zero-LLM intent router (keyword rules + TF-IDF) in front of the agents
+- tiering.py - Model tiering and cascade: a light model for simple lookups
+- http_pool.py - Shared pooled keep-alive HTTP clients for model and market-data traffic
+- resilience.py - Hedged model requests and jittered retries within a retry budget
+- circuit_breaker.py - Circuit breaker with stale-cache fallback for YFinanceTools
+- compaction.py - Token-budgeted compaction of YFinanceTools outputs
+- market_data.py - Local columnar market-data store with incremental price history
+- warmup.py - Scheduled warm-up of the market-data store for the most-requested tickers
+- screening.py - Vectorised multi-ticker screening tool (one call, top-N rows)
+- cache.py - Two-tier response and tool-result cache (in-process LRU + modal.Dict)
+- semantic_cache.py - Semantic response cache (local embeddings + NumPy vector index)
+- session_memory.py - Byte-bounded in-memory session history with LRU eviction
+- admin.py - Token guard for the admin endpoints
+- memory_profiler.py - tracemalloc snapshots, diffs and per-module reports (/admin/memory)
+- cpu_profiler.py - Sampling CPU profiler with collapsed-stack output (/admin/profile)
+- streaming.py - Unbuffered SSE/NDJSON run streaming with backpressure (POST /stream)
+- agui_coalescing.py - Merging of consecutive AG-UI text deltas into fewer events
+"""
+
+__version__ = "1.0.0"
@@ -0,0 +1,44 @@
+"""
+Admin endpoint protection shared by the diagnostic endpoints.
+
+Admin endpoints (memory and CPU profiling, cache statistics and
+invalidation) must never be reachable without the deployment's
+AUTH_TOKEN, even when ENABLE_AUTH is off for the agent endpoints.
+admin_guard returns a FastAPI dependency that checks the same
+`Authorization: Bearer <token>` header TokenAuthMiddleware checks; mount
+functions add it to every admin route and refuse to mount without a token.
+
+Usage:
+    guard = admin_guard(os.getenv("AUTH_TOKEN"))
+    app.add_api_route("/admin/...", handler, dependencies=[Depends(guard)])
+"""
+
+import hmac
+import os
+import socket
+from typing import Optional
+
+
+def container_id() -> str:
+    """This container's id (MODAL_TASK_ID inside Modal), reported by admin endpoints."""
+    return os.environ.get("MODAL_TASK_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+
+def admin_guard(token: Optional[str]):
+    """FastAPI dependency accepting only `Authorization: Bearer <token>`."""
+    from fastapi import HTTPException, Request
+
+    if not token:
+        raise ValueError("❌ Admin endpoints need AUTH_TOKEN (set it in .env)")
+    expected = f"Bearer {token}".encode("utf-8")
+
+    async def require_admin(request: Request) -> None:
+        provided = request.headers.get("authorization", "").encode("utf-8")
+        if not hmac.compare_digest(provided, expected):
+            raise HTTPException(
+                status_code=401,
+                detail="Admin endpoints require 'Authorization: Bearer <your-token>'",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+    return require_admin
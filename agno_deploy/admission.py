@@ -0,0 +1,218 @@
+"""
+Admission control and load shedding for Agno Modal deployments.
+
+AdmissionControlMiddleware sits next to TokenAuthMiddleware and decides, per
+request, whether it may use one of the container's concurrent slots:
+
+- a global in-flight cap; requests beyond it wait in a bounded queue that is
+  served in weighted-fair order across tenants and priority classes
+  (see scheduler.py);
+- a queue-time deadline; requests that cannot start in time are shed;
+- a token-bucket rate limit per API token (or client address when
+  authentication is disabled).
+
+The tenant and priority class of a request come from its bearer token:
+`tenants` maps client tokens to a (tenant, class) pair; any other caller is
+its own tenant in the default class. The X-Tenant-ID and X-Priority-Class
+headers are client-supplied, so they are honoured only with
+`trust_headers=True` (behind a gateway that sets them).
+
+Shed requests get an immediate 429 with a Retry-After header instead of
+holding a slot until the Modal TIMEOUT. Outcomes, queue depth, queue wait and
+end-to-end latency (per priority class) are reported through the metrics
+registry.
+"""
+
+import asyncio
+import collections
+import hashlib
+import json
+import math
+import time
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+from agno_deploy.metrics import REGISTRY, MetricsRegistry
+from agno_deploy.scheduler import FairScheduler
+
+# Endpoints that never count against admission limits
+DEFAULT_EXEMPT_PATHS = {"/health", "/status", "/docs", "/redoc", "/openapi.json", "/metrics", "/metrics/stalls"}
+
+
+def token_key(token: str) -> str:
+    """The client key of a bearer token (a hash, so raw tokens are never kept or reported)."""
+    return "token:" + hashlib.sha256(token.encode("latin-1")).hexdigest()[:16]
+
+
+def client_key(scope) -> str:
+    """Identify the caller: a hash of the bearer token, else the client address."""
+    for name, value in scope.get("headers", []):
+        if name == b"authorization" and value.startswith(b"Bearer "):
+            return token_key(value[7:].decode("latin-1"))
+    client = scope.get("client")
+    return f"addr:{client[0]}" if client else "anonymous"
+
+
+def _header(scope, name: bytes) -> str:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1").strip()
+    return ""
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, up to `burst` saved."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take one token; return 0 when allowed, else seconds until a token is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware enforcing an in-flight cap, a bounded queue and per-token rate limits."""
+
+    def __init__(
+        self,
+        app,
+        max_in_flight: int = 50,
+        max_queue: int = 50,
+        queue_timeout: float = 10.0,
+        rate_per_token: float = 0.0,
+        burst: float = 10.0,
+        priority_classes: Optional[Dict[str, float]] = None,
+        default_priority_class: Optional[str] = None,
+        tenants: Optional[Mapping[str, Tuple[str, Optional[str]]]] = None,
+        trust_headers: bool = False,
+        exempt_paths: Optional[Iterable[str]] = None,
+        max_buckets: int = 10000,
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.rate_per_token = rate_per_token
+        self.burst = burst
+        self.exempt_paths = set(DEFAULT_EXEMPT_PATHS if exempt_paths is None else exempt_paths)
+        self.max_buckets = max_buckets
+        # Client token -> (tenant, priority class), looked up by token hash
+        self.tenants = {token_key(token): tenant for token, tenant in (tenants or {}).items()}
+        self.trust_headers = trust_headers
+
+        self.scheduler = FairScheduler(max_in_flight, priority_classes, default_priority_class)
+        self._buckets: "collections.OrderedDict[str, TokenBucket]" = collections.OrderedDict()
+        self._in_flight = 0
+        self._avg_duration = 5.0  # Seconds; EWMA of admitted request duration, seeds Retry-After
+
+        self.outcomes = registry.counter("admission_requests_total", "Admission decisions by outcome")
+        self.in_flight_gauge = registry.gauge("admission_in_flight", "Requests holding an admission slot")
+        self.queue_gauge = registry.gauge("admission_queue_depth", "Requests waiting for a slot, by priority class")
+        self.queue_wait = registry.histogram("admission_queue_wait_seconds", "Time spent waiting for a slot, by priority class")
+        self.latency = registry.histogram("admission_request_seconds", "End-to-end latency (queue + run), by priority class")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        key = client_key(scope)
+        if self.rate_per_token > 0:
+            wait = self._bucket(key).take()
+            if wait > 0:
+                await self._shed(send, "rate_limited", wait, "Rate limit exceeded for this API token")
+                return
+
+        tenant, priority_class = self._identify(scope, key)
+
+        started = time.monotonic()
+        if self.scheduler.is_saturated() and self.scheduler.waiting >= self.max_queue:
+            await self._shed(send, "queue_full", self._retry_after(), "Server is at capacity")
+            return
+        self.queue_gauge.inc(priority_class=priority_class)
+        try:
+            await self.scheduler.acquire(tenant, priority_class, timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.queue_wait.observe(time.monotonic() - started, priority_class=priority_class)
+            await self._shed(send, "queue_timeout", self._retry_after(), "Request could not start in time")
+            return
+        finally:
+            self.queue_gauge.dec(priority_class=priority_class)
+        self.queue_wait.observe(time.monotonic() - started, priority_class=priority_class)
+
+        self.outcomes.inc(outcome="admitted")
+        self._in_flight += 1
+        self.in_flight_gauge.set(self._in_flight)
+        run_started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            finished = time.monotonic()
+            self._avg_duration = 0.9 * self._avg_duration + 0.1 * (finished - run_started)
+            self.latency.observe(finished - started, priority_class=priority_class)
+            self._in_flight -= 1
+            self.in_flight_gauge.set(self._in_flight)
+            self.scheduler.release()
+
+    def _identify(self, scope, key: str) -> Tuple[str, str]:
+        """Tenant and priority class: from the token map, else the trusted headers, else the caller itself."""
+        mapped = self.tenants.get(key)
+        if mapped is not None:
+            tenant, requested = mapped
+        elif self.trust_headers:
+            tenant, requested = _header(scope, b"x-tenant-id") or key, _header(scope, b"x-priority-class")
+        else:
+            tenant, requested = key, None
+        return tenant, self.scheduler.resolve_class(requested)
+
+    def _bucket(self, key: str) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.rate_per_token, self.burst)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def _retry_after(self) -> float:
+        """Estimate when a slot frees up from the queue length and average request duration."""
+        return self._avg_duration * (self.scheduler.waiting + 1) / max(1, self.max_in_flight)
+
+    async def _shed(self, send, reason: str, retry_after: float, message: str):
+        """Send 429 Too Many Requests with a Retry-After header"""
+        self.outcomes.inc(outcome=reason)
+        seconds = max(1, min(300, math.ceil(retry_after)))
+        response = {
+            "error": "Too many requests",
+            "reason": reason,
+            "message": message,
+            "hint": f"Retry after {seconds} seconds",
+        }
+
+        response_body = json.dumps(response).encode("utf-8")
+
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                [b"content-type", b"application/json"],
+                [b"content-length", str(len(response_body)).encode()],
+                [b"retry-after", str(seconds).encode()],
+            ],
+        })
+        await send({
+            "type": "http.response.body",
+            "body": response_body,
+        })
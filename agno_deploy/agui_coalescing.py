@@ -0,0 +1,215 @@
+"""
+Coalescing of AG-UI text deltas into fewer, larger events.
+
+The AG-UI endpoint sends one Server-Sent Event per model token:
+`data: {"type":"TEXT_MESSAGE_CONTENT","messageId":"...","delta":" the"}`.
+At high token rates the per-event framing, JSON and network writes outweigh
+the few bytes of content they carry. AGUICoalescingMiddleware sits between
+the AG-UI app and the client and merges consecutive text deltas of the same
+message:
+
+- window: a merged event is sent when `max_delay` seconds have passed since
+  its first delta, or when its delta reaches `max_bytes`, whichever comes
+  first. The first delta of a message is held for at most `max_delay`, so
+  the front end still renders text smoothly;
+- pass-through: every other event (run started/finished/error, message
+  start/end, tool call start/args/end, state snapshots and deltas) flushes
+  any pending text first and is sent at once, so ordering is kept and tool
+  and lifecycle events are never delayed;
+- reporting: events and bytes in and out, and the bytes saved, are counted
+  in /metrics. Per stream, a log event records events per second before and
+  after coalescing.
+
+The middleware works on the encoded event stream and needs no ag_ui import.
+Responses that are not `text/event-stream` pass through untouched.
+
+Usage:
+    app = AGUICoalescingMiddleware(app, max_delay=0.03, max_bytes=1024)
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from agno_deploy.logs import log_event
+from agno_deploy.metrics import REGISTRY, MetricsRegistry
+
+TEXT_CONTENT = "TEXT_MESSAGE_CONTENT"
+_TEXT_MARKER = b'"TEXT_MESSAGE_CONTENT"'
+
+
+def _encode(event: Dict[str, Any]) -> bytes:
+    return b"data: " + json.dumps(event, separators=(",", ":"), ensure_ascii=False).encode("utf-8") + b"\n\n"
+
+
+def _text_delta(frame: bytes) -> Optional[Dict[str, Any]]:
+    """The event of a single-line `data:` frame if it is a text delta, else None."""
+    if _TEXT_MARKER not in frame or not frame.startswith(b"data: ") or b"\n" in frame.rstrip(b"\n"):
+        return None
+    try:
+        event = json.loads(frame[6:])
+    except ValueError:
+        return None
+    if event.get("type") != TEXT_CONTENT or not isinstance(event.get("delta"), str):
+        return None
+    return event
+
+
+class _Stream:
+    """Coalescing state of one AG-UI response."""
+
+    def __init__(self, send, max_delay: float, max_bytes: int):
+        self.send = send
+        self.max_delay = max_delay
+        self.max_bytes = max_bytes
+        self.buffer = b""
+        self.pending: Optional[Dict[str, Any]] = None
+        self.pending_parts: List[str] = []
+        self.pending_size = 0
+        self.timer: Optional[asyncio.Task] = None
+        self.lock = asyncio.Lock()
+        self.closed = False
+        self.started = time.perf_counter()
+        self.events_in = self.events_out = self.bytes_in = self.bytes_out = 0
+
+    def _take_pending(self) -> bytes:
+        if self.pending is None:
+            return b""
+        event = dict(self.pending, delta="".join(self.pending_parts))
+        self.pending, self.pending_parts, self.pending_size = None, [], 0
+        if self.timer is not None and self.timer is not asyncio.current_task():
+            self.timer.cancel()
+        self.timer = None
+        self.events_out += 1
+        return _encode(event)
+
+    def _add_delta(self, event: Dict[str, Any]) -> bytes:
+        """Merge a text delta; returns bytes to send now (a flushed merged event, if any)."""
+        out = b""
+        if self.pending is not None and self.pending.get("messageId") != event.get("messageId"):
+            out += self._take_pending()
+        if self.pending is None:
+            self.pending = event
+            self.timer = asyncio.create_task(self._flush_later())
+        self.pending_parts.append(event["delta"])
+        self.pending_size += len(event["delta"].encode("utf-8"))
+        if self.pending_size >= self.max_bytes:
+            out += self._take_pending()
+        return out
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.max_delay)
+        async with self.lock:
+            if self.closed or self.timer is not asyncio.current_task():
+                return
+            body = self._take_pending()
+            if body:
+                try:
+                    await self._write(body, more_body=True)
+                except Exception:
+                    # The client went away; the app's next send fails and ends the response
+                    self.closed = True
+
+    async def _write(self, body: bytes, more_body: bool) -> None:
+        self.bytes_out += len(body)
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    async def body(self, message: Dict[str, Any]) -> None:
+        async with self.lock:
+            self.buffer += message.get("body", b"")
+            out = b""
+            while b"\n\n" in self.buffer:
+                frame, self.buffer = self.buffer.split(b"\n\n", 1)
+                frame += b"\n\n"
+                self.events_in += 1
+                self.bytes_in += len(frame)
+                event = _text_delta(frame)
+                if event is not None:
+                    out += self._add_delta(event)
+                else:
+                    # Tool call, lifecycle or state event: pending text first, then this event at once
+                    out += self._take_pending() + frame
+                    self.events_out += 1
+            more_body = message.get("more_body", False)
+            if not more_body:
+                out += self._take_pending() + self.buffer
+                self.buffer = b""
+                self.closed = True
+            if out or not more_body:
+                await self._write(out, more_body)
+
+    def close(self) -> None:
+        self.closed = True
+        if self.timer is not None:
+            self.timer.cancel()
+
+
+class AGUICoalescingMiddleware:
+    """ASGI middleware merging consecutive AG-UI text deltas within a time and size window."""
+
+    def __init__(
+        self,
+        app,
+        max_delay: float = 0.03,
+        max_bytes: int = 1024,
+        path_suffix: str = "/agui",
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.app = app
+        self.max_delay = max_delay
+        self.max_bytes = max_bytes
+        self.path_suffix = path_suffix
+
+        self.events = registry.counter("agui_events_total", "AG-UI events by direction (in: from the app, out: to the client)")
+        self.bytes = registry.counter("agui_bytes_total", "AG-UI event bytes by direction (in: from the app, out: to the client)")
+        self.saved = registry.counter("agui_coalesced_bytes_saved_total", "Bytes not sent thanks to merging text deltas")
+        self.rate = registry.histogram(
+            "agui_events_per_second", "Events per second of a stream by direction",
+            buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000),
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].endswith(self.path_suffix):
+            await self.app(scope, receive, send)
+            return
+
+        stream: Optional[_Stream] = None
+
+        async def coalescing_send(message):
+            nonlocal stream
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers") or [])
+                if headers.get(b"content-type", b"").startswith(b"text/event-stream"):
+                    stream = _Stream(send, self.max_delay, self.max_bytes)
+                await send(message)
+            elif message["type"] == "http.response.body" and stream is not None:
+                await stream.body(message)
+            else:
+                await send(message)
+
+        try:
+            await self.app(scope, receive, coalescing_send)
+        finally:
+            if stream is not None:
+                stream.close()
+                self._report(stream)
+
+    def _report(self, stream: _Stream) -> None:
+        duration = max(time.perf_counter() - stream.started, 1e-6)
+        self.events.inc(stream.events_in, direction="in")
+        self.events.inc(stream.events_out, direction="out")
+        self.bytes.inc(stream.bytes_in, direction="in")
+        self.bytes.inc(stream.bytes_out, direction="out")
+        self.saved.inc(max(0, stream.bytes_in - stream.bytes_out))
+        self.rate.observe(stream.events_in / duration, direction="in")
+        self.rate.observe(stream.events_out / duration, direction="out")
+        log_event(
+            "agui.stream",
+            events_in=stream.events_in,
+            events_out=stream.events_out,
+            events_per_s_in=round(stream.events_in / duration, 1),
+            events_per_s_out=round(stream.events_out / duration, 1),
+            bytes_saved=max(0, stream.bytes_in - stream.bytes_out),
+            duration_ms=round(duration * 1000, 1),
+        )
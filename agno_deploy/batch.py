@@ -0,0 +1,179 @@
+"""
+Batch endpoint: many prompts for one agent in a single request.
+
+Nightly portfolio reviews send hundreds of "analyse ticker X" prompts. Instead
+of one HTTP request per prompt, POST them together:
+
+    POST /batch?agent_id=financial-analysis-agent
+    {"prompts": ["Analyse AAPL", "Analyse MSFT", ...], "parallelism": 8}
+
+Prompts run concurrently, at most `parallelism` at a time. Each run gets its
+own copy of the agent, and all copies share one tool cache for the batch, so
+repeated calls (the same quote, the same analyst recommendations) hit
+yfinance once. Results are streamed back as NDJSON, one line per prompt in
+completion order, followed by a summary line. A failing prompt produces an
+error line and does not stop the rest of the batch.
+"""
+
+import asyncio
+import inspect
+import json
+import threading
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from agno_deploy.logs import log_event
+from agno_deploy.metrics import REGISTRY, MetricsRegistry
+
+
+class SharedToolCache:
+    """
+    Tool results memoised for the lifetime of one batch or fan-out request.
+
+    Installed as an Agno tool hook. Concurrent calls with the same arguments
+    wait for the first one instead of fetching again. Only synchronous tools
+    (such as YFinanceTools) are cached; async tool results pass through.
+    """
+
+    def __init__(self):
+        self._results: Dict[Any, Any] = {}
+        self._pending: Dict[Any, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hook(self, function_name: str, function_call, arguments: Dict[str, Any]):
+        key = (function_name, json.dumps(arguments, sort_keys=True, default=str))
+        with self._lock:
+            if key in self._results:
+                self.hits += 1
+                return self._results[key]
+            event = self._pending.get(key)
+            owner = event is None
+            if owner:
+                event = self._pending[key] = threading.Event()
+
+        if not owner:
+            # Tool calls run in worker threads, so blocking here does not stall the event loop
+            event.wait()
+            with self._lock:
+                if key in self._results:
+                    self.hits += 1
+                    return self._results[key]
+            return function_call(**arguments)  # The first call failed; try again
+
+        try:
+            result = function_call(**arguments)
+            if not (inspect.isawaitable(result) or inspect.isgenerator(result)):
+                with self._lock:
+                    self._results[key] = result
+                    self.misses += 1
+            return result
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            event.set()
+
+
+def with_tool_cache(agent, cache: SharedToolCache):
+    """Copy `agent` for one run with `cache` installed in front of its own tool hooks."""
+    return agent.deep_copy(update={"tool_hooks": [cache.hook] + list(agent.tool_hooks or [])})
+
+
+async def run_batch(
+    agent,
+    prompts: List[str],
+    parallelism: int = 8,
+    user_id: Optional[str] = None,
+    registry: MetricsRegistry = REGISTRY,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Run every prompt on a copy of `agent`, yielding one result dict per prompt as it finishes."""
+    items = registry.counter("batch_items_total", "Batch prompts processed, by status")
+    cache_calls = registry.counter("batch_tool_cache_total", "Tool calls in batches served from the shared cache")
+
+    batch_id = uuid.uuid4().hex
+    cache = SharedToolCache()
+    semaphore = asyncio.Semaphore(parallelism)
+    results: asyncio.Queue = asyncio.Queue()
+    started = time.monotonic()
+
+    async def run_item(index: int, prompt: str):
+        async with semaphore:
+            item_started = time.monotonic()
+            try:
+                worker = with_tool_cache(agent, cache)
+                response = await worker.arun(prompt, session_id=f"{batch_id}-{index}", user_id=user_id)
+                result = {
+                    "index": index,
+                    "status": "ok",
+                    "prompt": prompt,
+                    "content": response.to_dict().get("content"),
+                    "run_id": response.run_id,
+                }
+            except Exception as e:
+                result = {"index": index, "status": "error", "prompt": prompt, "error": str(e)}
+            result["duration_s"] = round(time.monotonic() - item_started, 3)
+            items.inc(status=result["status"])
+            await results.put(result)
+
+    tasks = [asyncio.ensure_future(run_item(i, p)) for i, p in enumerate(prompts)]
+    failed = 0
+    try:
+        for _ in range(len(tasks)):
+            result = await results.get()
+            failed += result["status"] == "error"
+            yield result
+    finally:
+        # The client went away or the stream was closed early: stop the remaining runs
+        for task in tasks:
+            task.cancel()
+
+    cache_calls.inc(cache.hits, result="hit")
+    cache_calls.inc(cache.misses, result="miss")
+    summary = {
+        "batch_id": batch_id,
+        "total": len(prompts),
+        "ok": len(prompts) - failed,
+        "failed": failed,
+        "duration_s": round(time.monotonic() - started, 3),
+        "tool_cache_hits": cache.hits,
+        "tool_cache_misses": cache.misses,
+    }
+    log_event("batch.completed", **summary)
+    yield {"summary": summary}
+
+
+def mount_batch(
+    app,
+    agents: List[Any],
+    default_parallelism: int = 8,
+    max_parallelism: int = 32,
+    max_prompts: int = 500,
+) -> None:
+    """Add POST /batch to a FastAPI app serving `agents`."""
+    from fastapi import HTTPException, Query
+    from fastapi.responses import StreamingResponse
+    from pydantic import BaseModel
+
+    class BatchRequest(BaseModel):
+        prompts: List[str]
+        parallelism: Optional[int] = None
+        user_id: Optional[str] = None
+
+    @app.post("/batch")
+    async def create_batch(request: BatchRequest, agent_id: str = Query(...)):
+        agent = next((a for a in agents if getattr(a, "agent_id", None) == agent_id), None)
+        if agent is None:
+            raise HTTPException(status_code=404, detail=f"Agent '{agent_id}' not found")
+        if not request.prompts:
+            raise HTTPException(status_code=400, detail="'prompts' must not be empty")
+        if len(request.prompts) > max_prompts:
+            raise HTTPException(status_code=400, detail=f"At most {max_prompts} prompts per batch")
+        parallelism = max(1, min(max_parallelism, request.parallelism or default_parallelism))
+
+        async def ndjson():
+            async for result in run_batch(agent, request.prompts, parallelism, request.user_id):
+                yield json.dumps(result, default=str) + "\n"
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
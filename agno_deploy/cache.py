@@ -0,0 +1,481 @@
+"""
+Two-tier cache for agent responses and tool results.
+
+Each container used to keep its own cold cache, so the hit rate fell as
+Modal scaled out to more containers. TwoTierCache puts a shared tier behind
+the in-process one:
+
+- L1: a bounded in-process LRU (entries and bytes), holding decoded values;
+- L2: a shared store, a modal.Dict in production and a plain dict (the
+  local stand-in) in tests. Values are stored as JSON, zlib-compressed
+  above `compress_over` bytes, with their absolute expiry time;
+- TTL propagation: an entry keeps its original expiry in every tier; an L2
+  hit is copied to L1 with the remaining TTL, capped at `l1_ttl` so that
+  other containers pick up deletions within that time;
+- invalidation: invalidate(scope) bumps a generation number for the scope
+  (or for the whole cache) in L2. Generations are part of every key, so
+  older entries become unreachable everywhere; containers re-read the
+  generations at most every `generation_ttl` seconds.
+
+On top of it, ToolResultCache is an Agno tool hook caching YFinance results
+per function TTL (scope "tool:<SYMBOL>"), and ResponseCache wraps an
+agent's arun() to answer repeated questions that do not depend on a
+conversation (scope "agent:<agent_id>"), streaming or not. Lookups per tier,
+per-tier hit ratios and the L1 size are reported in /metrics; GET /cache
+shows them per cache and POST /cache/invalidate drops a scope (both need
+AUTH_TOKEN, see agno_deploy.admin).
+
+Usage:
+    responses = TwoTierCache("responses", backend=modal.Dict.from_name("my-app-cache", create_if_missing=True))
+    apply_response_cache(deployed_agents, responses, ttl=300)
+    mount_cache(app, [responses], token=os.getenv("AUTH_TOKEN"))
+"""
+
+import asyncio
+import collections
+import hashlib
+import json
+import re
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from agno_deploy.circuit_breaker import ERROR_PREFIXES
+from agno_deploy.logs import iter_agents, log_event
+from agno_deploy.metrics import REGISTRY, MetricsRegistry
+
+ALL = "*"
+
+# Seconds a tool result stays valid; tools not listed here are not cached
+DEFAULT_TOOL_TTLS = {
+    "get_current_stock_price": 60,
+    "get_company_info": 6 * 3600,
+    "get_stock_fundamentals": 6 * 3600,
+    "get_key_financial_ratios": 6 * 3600,
+    "get_income_statements": 24 * 3600,
+    "get_analyst_recommendations": 6 * 3600,
+    "get_company_news": 900,
+    "get_historical_stock_prices": 900,
+    "get_technical_indicators": 900,
+    "screen_stocks": 900,
+}
+# Results that must not be cached: toolkit errors and the circuit breaker's stale answers
+UNCACHEABLE_PREFIXES = ERROR_PREFIXES + ("[STALE DATA",)
+
+
+class TwoTierCache:
+    """In-process LRU (L1) in front of a store shared by all containers (L2)."""
+
+    def __init__(
+        self,
+        name: str,
+        backend: Any = None,
+        l1_entries: int = 2048,
+        l1_max_bytes: int = 64 * 1024 * 1024,
+        l1_ttl: float = 60.0,
+        generation_ttl: float = 5.0,
+        compress_over: int = 1024,
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.name = name
+        self._backend = {} if backend is None else backend
+        self.l1_entries = l1_entries
+        self.l1_max_bytes = l1_max_bytes
+        self.l1_ttl = l1_ttl
+        self.generation_ttl = generation_ttl
+        self.compress_over = compress_over
+
+        self._l1: "collections.OrderedDict[str, Tuple[float, int, Any]]" = collections.OrderedDict()
+        self._l1_bytes = 0
+        self._generations: "collections.OrderedDict[str, Tuple[float, int]]" = collections.OrderedDict()
+        self._counts = {"l1": 0, "l2": 0, "miss": 0}
+        self._lock = threading.Lock()
+
+        self.lookups = registry.counter("cache_lookups_total", "Cache lookups by the tier that answered (l1, l2, miss)")
+        self.hit_ratio = registry.gauge("cache_hit_ratio", "Hit ratio per tier (l2: of the L1 misses) and in total")
+        self.l1_size = registry.gauge("cache_l1_entries", "Entries held in the in-process tier")
+        self.l1_bytes = registry.gauge("cache_l1_bytes", "Serialized (uncompressed) bytes held in the in-process tier")
+        self.invalidations = registry.counter("cache_invalidations_total", "Scopes invalidated")
+        self.errors = registry.counter("cache_l2_errors_total", "Failed reads or writes of the shared tier")
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    @property
+    def remote(self) -> bool:
+        return not isinstance(self._backend, dict)
+
+    # Shared tier ------------------------------------------------------------
+
+    def _l2(self, operation: str, fn: Callable, *args, default=None):
+        # The shared tier is an optimisation: a failure is a miss, never an error for the caller
+        try:
+            return fn(*args)
+        except KeyError:
+            return default
+        except Exception as e:
+            self.errors.inc(cache=self.name, operation=operation)
+            log_event("cache.l2_error", cache=self.name, operation=operation, error=str(e))
+            return default
+
+    def _generation(self, scope: str) -> int:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._generations.get(scope)
+        if cached is not None and now - cached[0] < self.generation_ttl:
+            return cached[1]
+        generation = self._l2("generation", self._backend.get, f"{self.name}|gen|{scope}", 0, default=0) or 0
+        with self._lock:
+            self._generations[scope] = (now, generation)
+            self._generations.move_to_end(scope)
+            while len(self._generations) > 4 * self.l1_entries:
+                self._generations.popitem(last=False)
+        return generation
+
+    def _key(self, scope: str, key: str) -> str:
+        digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+        return f"{self.name}|{scope}|{self._generation(ALL)}.{self._generation(scope)}|{digest}"
+
+    def _encode(self, value: Any, expires_at: float) -> Tuple[Tuple[float, bool, bytes], int]:
+        """The L2 entry for `value`, and its uncompressed size for the L1 byte budget."""
+        blob = json.dumps(value, separators=(",", ":")).encode()
+        compressed = len(blob) > self.compress_over
+        return (expires_at, compressed, zlib.compress(blob, 6) if compressed else blob), len(blob)
+
+    @staticmethod
+    def _decode(entry: Tuple[float, bool, bytes]) -> Tuple[Any, int]:
+        _, compressed, blob = entry
+        blob = zlib.decompress(blob) if compressed else blob
+        return json.loads(blob), len(blob)
+
+    # In-process tier --------------------------------------------------------
+
+    def _l1_put(self, full_key: str, value: Any, expires_at: float, size: int) -> None:
+        with self._lock:
+            previous = self._l1.pop(full_key, None)
+            if previous is not None:
+                self._l1_bytes -= previous[1]
+            if size <= self.l1_max_bytes:
+                self._l1[full_key] = (min(expires_at, time.time() + self.l1_ttl), size, value)
+                self._l1_bytes += size
+            while self._l1 and (len(self._l1) > self.l1_entries or self._l1_bytes > self.l1_max_bytes):
+                _, (_, evicted_size, _) = self._l1.popitem(last=False)
+                self._l1_bytes -= evicted_size
+            self.l1_size.set(len(self._l1), cache=self.name)
+            self.l1_bytes.set(self._l1_bytes, cache=self.name)
+
+    def _l1_get(self, full_key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._l1.get(full_key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._l1[full_key]
+                self._l1_bytes -= entry[1]
+                return None
+            self._l1.move_to_end(full_key)
+            return entry[2]
+
+    def _count(self, tier: str) -> None:
+        self.lookups.inc(cache=self.name, tier=tier)
+        with self._lock:
+            self._counts[tier] += 1
+            total = sum(self._counts.values())
+            l1_misses = total - self._counts["l1"]
+            ratios = {
+                "l1": self._counts["l1"] / total,
+                "l2": self._counts["l2"] / l1_misses if l1_misses else 0.0,
+                "total": (self._counts["l1"] + self._counts["l2"]) / total,
+            }
+        for name, ratio in ratios.items():
+            self.hit_ratio.set(round(ratio, 4), cache=self.name, tier=name)
+
+    # Public API -------------------------------------------------------------
+
+    def get(self, scope: str, key: str) -> Optional[Any]:
+        """The cached value for `key` in `scope`, or None."""
+        full_key = self._key(scope, key)
+        value = self._l1_get(full_key)
+        if value is not None:
+            self._count("l1")
+            return value
+        entry = self._l2("get", self._backend.get, full_key)
+        if entry is None:
+            self._count("miss")
+            return None
+        if entry[0] <= time.time():
+            self._l2("delete", self._backend.pop, full_key)
+            self._count("miss")
+            return None
+        value, size = self._decode(entry)
+        self._l1_put(full_key, value, entry[0], size)
+        self._count("l2")
+        return value
+
+    def set(self, scope: str, key: str, value: Any, ttl: float) -> None:
+        """Store a JSON-serialisable `value` in both tiers for `ttl` seconds."""
+        full_key = self._key(scope, key)
+        entry, size = self._encode(value, time.time() + ttl)
+        self._l1_put(full_key, value, entry[0], size)
+        self._l2("set", self._backend.__setitem__, full_key, entry)
+
+    def delete(self, scope: str, key: str) -> None:
+        """Remove one entry; other containers drop their L1 copy within `l1_ttl`."""
+        full_key = self._key(scope, key)
+        with self._lock:
+            entry = self._l1.pop(full_key, None)
+            if entry is not None:
+                self._l1_bytes -= entry[1]
+        self._l2("delete", self._backend.pop, full_key)
+
+    def invalidate(self, scope: str = ALL) -> None:
+        """Drop every entry of `scope` (ALL: the whole cache) in all containers."""
+        generation = time.time_ns()  # Unique without a read-modify-write on the shared store
+        self._l2("invalidate", self._backend.__setitem__, f"{self.name}|gen|{scope}", generation)
+        with self._lock:
+            self._generations[scope] = (time.monotonic(), generation)
+        self.invalidations.inc(cache=self.name)
+        log_event("cache.invalidated", cache=self.name, scope=scope)
+
+    async def _call(self, fn, *args):
+        # modal.Dict calls go over the network; keep them off the event loop
+        if not self.remote:
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    async def aget(self, scope: str, key: str) -> Optional[Any]:
+        return await self._call(self.get, scope, key)
+
+    async def aset(self, scope: str, key: str, value: Any, ttl: float) -> None:
+        await self._call(self.set, scope, key, value, ttl)
+
+    async def ainvalidate(self, scope: str = ALL) -> None:
+        await self._call(self.invalidate, scope)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+            entries, size = len(self._l1), self._l1_bytes
+        total = sum(counts.values())
+        return {
+            "lookups": total,
+            "l1_hits": counts["l1"],
+            "l2_hits": counts["l2"],
+            "misses": counts["miss"],
+            "l1_hit_ratio": round(counts["l1"] / total, 4) if total else 0.0,
+            "l2_hit_ratio": round(counts["l2"] / (total - counts["l1"]), 4) if total > counts["l1"] else 0.0,
+            "hit_ratio": round((counts["l1"] + counts["l2"]) / total, 4) if total else 0.0,
+            "l1_entries": entries,
+            "l1_bytes": size,
+            "shared_tier": "modal.Dict" if self.remote else "local",
+        }
+
+
+class ToolResultCache:
+    """Agno tool hook caching tool results per function TTL, scoped by ticker."""
+
+    def __init__(self, cache: TwoTierCache, ttls: Optional[Dict[str, float]] = None):
+        self.cache = cache
+        self.ttls = dict(DEFAULT_TOOL_TTLS, **(ttls or {}))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def hook(self, function_name: str, function_call: Callable, arguments: Dict[str, Any]):
+        ttl = self.ttls.get(function_name)
+        if not ttl:
+            return function_call(**arguments)
+        symbol = arguments.get("symbol")
+        scope = f"tool:{symbol.strip().upper()}" if isinstance(symbol, str) else "tool:-"
+        key = f"{function_name}:{json.dumps(arguments, sort_keys=True, default=str)}"
+        cached = self.cache.get(scope, key)
+        if cached is not None:
+            return cached
+        result = function_call(**arguments)
+        if isinstance(result, str) and result and not result.startswith(UNCACHEABLE_PREFIXES):
+            self.cache.set(scope, key, result, ttl)
+        return result
+
+
+def apply_tool_cache(agents: Iterable[Any], tool_cache: ToolResultCache) -> int:
+    """Put `tool_cache` in front of the tool hooks of every agent with YFinanceTools; returns how many agents."""
+    cached = 0
+    for agent in iter_agents(agents):
+        if any(type(t).__module__ == "agno.tools.yfinance" for t in getattr(agent, "tools", None) or []):
+            # Outermost so far: a hit skips compaction and the market data store
+            agent.tool_hooks = [tool_cache.hook] + list(agent.tool_hooks or [])
+            cached += 1
+    return cached
+
+
+def normalize_message(message: str) -> str:
+    return re.sub(r"\s+", " ", message).strip().lower()
+
+
+class ResponseCache:
+    """Answers repeated, conversation-independent questions to one agent or team from the cache."""
+
+    def __init__(self, entity, cache: TwoTierCache, ttl: float = 300.0):
+        self.entity = entity
+        self.cache = cache
+        self.ttl = ttl
+        self.entity_id = getattr(entity, "agent_id", None) or getattr(entity, "team_id", None)
+        self.scope = f"agent:{self.entity_id}"
+        self.full_arun = entity.arun
+
+    def install(self) -> None:
+        self.entity.arun = self.arun
+
+    def _key(self, message: Any, kwargs: Dict[str, Any]) -> Optional[str]:
+        """Cache key for a run, or None when the answer may depend on more than the message."""
+        if not isinstance(message, str) or not message.strip():
+            return None
+        if any(kwargs.get(k) for k in ("images", "audio", "videos", "files", "messages", "knowledge_filters")):
+            return None
+        key = {"message": normalize_message(message), "model": getattr(getattr(self.entity, "model", None), "id", None)}
+        if getattr(self.entity, "enable_user_memories", False) or getattr(self.entity, "enable_agentic_memory", False):
+            key["user_id"] = kwargs.get("user_id")
+        return json.dumps(key, sort_keys=True)
+
+    async def _in_conversation(self, kwargs: Dict[str, Any]) -> bool:
+        """Whether the run continues a session that already has runs, so its answer depends on the conversation."""
+        history = getattr(self.entity, "add_history_to_messages", False) or getattr(self.entity, "enable_team_history", False)
+        session_id = kwargs.get("session_id")
+        if not history or not session_id:
+            return False
+        # The /runs router and AG-UI always pass a session id; only a session with earlier runs has history
+        memory = getattr(self.entity, "memory", None)
+        if callable(getattr(memory, "get_runs", None)):
+            if memory.get_runs(session_id):
+                return True
+        elif getattr(memory, "runs", None) and getattr(self.entity, "session_id", None) == session_id:
+            return True  # AgentMemory / TeamMemory hold the runs of the current session only
+        storage = getattr(self.entity, "storage", None)
+        if storage is not None:
+            return await asyncio.to_thread(storage.read, session_id) is not None
+        return False
+
+    def _response(self, cached: Dict[str, Any], kwargs: Dict[str, Any], event: str):
+        fields = dict(
+            content=cached["content"],
+            event=event,
+            model=cached.get("model"),
+            run_id=str(uuid.uuid4()),
+            session_id=kwargs.get("session_id") or getattr(self.entity, "session_id", None),
+            metrics={"cache_hit": [True]},
+        )
+        if hasattr(self.entity, "team_id") and not hasattr(self.entity, "agent_id"):
+            from agno.run.team import TeamRunResponse
+
+            return TeamRunResponse(team_id=self.entity_id, **fields)
+        from agno.run.response import RunResponse
+
+        return RunResponse(agent_id=self.entity_id, **fields)
+
+    def _replay(self, cached: Dict[str, Any], kwargs: Dict[str, Any], stream: bool):
+        from agno.run.response import RunEvent
+
+        if not stream:
+            return self._response(cached, kwargs, RunEvent.run_response.value)
+
+        async def events():
+            yield self._response(dict(cached, content=None), kwargs, RunEvent.run_started.value)
+            yield self._response(cached, kwargs, RunEvent.run_response.value)
+            yield self._response(cached, kwargs, RunEvent.run_completed.value)
+
+        return events()
+
+    async def _lookup(self, message: str, key: str) -> Optional[Dict[str, Any]]:
+        cached = await self.cache.aget(self.scope, key)
+        if cached is not None:
+            log_event("cache.response_hit", entity_id=self.entity_id)
+        return cached
+
+    async def _remember(self, message: str, key: str, value: Dict[str, Any]) -> None:
+        await self.cache.aset(self.scope, key, value, self.ttl)
+
+    async def arun(self, message=None, **kwargs):
+        key = self._key(message, kwargs)
+        if key is None or await self._in_conversation(kwargs):
+            return await self.full_arun(message, **kwargs)
+        stream = kwargs.get("stream")
+        if stream is None:
+            stream = bool(getattr(self.entity, "stream", False))
+
+        cached = await self._lookup(message, key)
+        if cached is not None:
+            return self._replay(cached, kwargs, stream)
+
+        if not stream:
+            response = await self.full_arun(message, **kwargs)
+            content = getattr(response, "content", None)
+            if isinstance(content, str) and content.strip():
+                await self._remember(message, key, {"content": content, "model": response.model})
+            return response
+
+        from agno.run.response import RunEvent
+
+        response_stream = await self.full_arun(message, **kwargs)
+
+        async def recording():
+            parts: List[str] = []
+            model, failed = None, False
+            async for chunk in response_stream:
+                event = getattr(chunk, "event", None)
+                if event == RunEvent.run_response.value and isinstance(chunk.content, str):
+                    parts.append(chunk.content)
+                    model = chunk.model or model
+                elif event in (RunEvent.run_error.value, RunEvent.run_cancelled.value):
+                    failed = True
+                yield chunk
+            content = "".join(parts)
+            if not failed and content.strip():
+                await self._remember(message, key, {"content": content, "model": model})
+
+        return recording()
+
+
+def apply_response_cache(agents: Iterable[Any], cache: TwoTierCache, ttl: float = 300.0) -> int:
+    """Cache the answers of the deployed agents and teams (not their members); returns how many."""
+    cached = 0
+    for entity in agents or []:
+        if entity is None or not (getattr(entity, "agent_id", None) or getattr(entity, "team_id", None)):
+            continue
+        ResponseCache(entity, cache, ttl).install()
+        cached += 1
+    return cached
+
+
+def mount_cache(app, caches: List[TwoTierCache], token: Optional[str]) -> None:
+    """Add the token-protected GET /cache (per-cache statistics) and POST /cache/invalidate to a FastAPI app."""
+    from fastapi import Depends, HTTPException, Query
+
+    from agno_deploy.admin import admin_guard
+
+    by_name = {cache.name: cache for cache in caches}
+    # Invalidation flushes the caches of every container, so it is an admin operation even without ENABLE_AUTH
+    admin = [Depends(admin_guard(token))]
+
+    @app.get("/cache", tags=["Cache"], dependencies=admin)
+    async def cache_stats():
+        return {name: cache.stats() for name, cache in by_name.items()}
+
+    @app.post("/cache/invalidate", tags=["Cache"], dependencies=admin)
+    async def invalidate_cache(
+        cache: Optional[str] = Query(None, description="Cache name; all caches when omitted"),
+        scope: str = Query(ALL, description="e.g. tool:AAPL or agent:financial-analysis-agent; * for everything"),
+    ):
+        if cache is not None and cache not in by_name:
+            raise HTTPException(status_code=404, detail=f"Unknown cache '{cache}'. Known: {', '.join(by_name)}")
+        targets = [by_name[cache]] if cache else list(by_name.values())
+        for target in targets:
+            await target.ainvalidate(scope)
+        return {"invalidated": [t.name for t in targets], "scope": scope}
@@ -0,0 +1,165 @@
+"""
+Client-disconnect cancellation for Agno Modal deployments.
+
+When a browser tab using the AG-UI endpoint closes or an API client times out,
+Starlette keeps running a non-streaming endpoint to completion, so GPT-4o
+keeps generating and tools keep fetching while the run holds one of the
+container's concurrent slots.
+
+DisconnectCancellationMiddleware runs each agent request as a task and
+watches the connection for http.disconnect. When the client goes away before
+the response is complete, the task is cancelled: the model stream is closed
+and awaiting tool calls are abandoned (synchronous tools already running in a
+worker thread finish in the background, but their results are discarded).
+
+The request body has to be read before the connection can be watched, so
+only bodies up to `max_body_bytes` are buffered. Larger uploads, and chunked
+bodies that grow past the limit, are passed through unsupervised.
+
+Cancelled runs are counted, along with estimates of the slot time freed and
+the completion tokens avoided, based on the average completed run.
+"""
+
+import asyncio
+import time
+from typing import Iterable, Optional
+
+from agno_deploy.logs import log_event
+from agno_deploy.metrics import REGISTRY, MetricsRegistry
+
+# Only requests that start agent runs are supervised
+DEFAULT_METHODS = {"POST"}
+
+# Rough characters per completion token, used to estimate avoided tokens
+CHARS_PER_TOKEN = 4
+
+# Largest request body held in memory to supervise a request (a prompt, not a file upload)
+DEFAULT_MAX_BODY_BYTES = 1024 * 1024
+
+
+def _content_length(scope) -> Optional[int]:
+    for name, value in scope.get("headers") or []:
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+class DisconnectCancellationMiddleware:
+    """ASGI middleware that cancels the request task when the client disconnects."""
+
+    def __init__(
+        self,
+        app,
+        methods: Optional[Iterable[str]] = None,
+        max_body_bytes: int = DEFAULT_MAX_BODY_BYTES,
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.app = app
+        self.methods = set(DEFAULT_METHODS if methods is None else methods)
+        self.max_body_bytes = max_body_bytes
+        self._avg_duration = 0.0  # Seconds, EWMA over completed runs
+        self._avg_bytes = 0.0     # Response bytes, EWMA over completed runs
+
+        self.cancelled = registry.counter("disconnect_cancelled_runs_total", "Runs cancelled after a client disconnect")
+        self.freed_seconds = registry.counter(
+            "disconnect_freed_slot_seconds_total", "Estimated slot-seconds freed by cancelling runs"
+        )
+        self.avoided_tokens = registry.counter(
+            "disconnect_avoided_tokens_total", "Estimated completion tokens not generated because of cancellation"
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") not in self.methods:
+            await self.app(scope, receive, send)
+            return
+
+        length = _content_length(scope)
+        if length is not None and length > self.max_body_bytes:
+            await self.app(scope, receive, send)
+            return
+
+        # Read the request body up front so the connection can be watched while the app runs
+        body_messages = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body_messages.append(message)
+            if not message.get("more_body", False):
+                break
+            size += len(message.get("body", b""))
+            if size > self.max_body_bytes:
+                # Chunked upload past the limit: replay what was read and stream the rest unsupervised
+                async def chained_receive():
+                    if body_messages:
+                        return body_messages.pop(0)
+                    return await receive()
+
+                await self.app(scope, chained_receive, send)
+                return
+
+        disconnected = asyncio.Event()
+        state = {"bytes": 0, "complete": False}
+
+        async def replay_receive():
+            if body_messages:
+                return body_messages.pop(0)
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def tracking_send(message):
+            if message["type"] == "http.response.body":
+                state["bytes"] += len(message.get("body", b""))
+                if not message.get("more_body", False):
+                    state["complete"] = True
+            await send(message)
+
+        async def watch_disconnect():
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    disconnected.set()
+                    return
+
+        started = time.monotonic()
+        task = asyncio.ensure_future(self.app(scope, replay_receive, tracking_send))
+        watcher = asyncio.ensure_future(watch_disconnect())
+        try:
+            await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            task.cancel()
+            watcher.cancel()
+            raise
+
+        if not task.done() and not state["complete"]:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            self._record_cancel(scope, time.monotonic() - started, state["bytes"])
+            return
+
+        watcher.cancel()
+        await task  # Re-raise application errors
+        duration = time.monotonic() - started
+        if self._avg_duration:
+            self._avg_duration = 0.9 * self._avg_duration + 0.1 * duration
+            self._avg_bytes = 0.9 * self._avg_bytes + 0.1 * state["bytes"]
+        else:
+            self._avg_duration, self._avg_bytes = duration, float(state["bytes"])
+
+    def _record_cancel(self, scope, elapsed: float, sent_bytes: int) -> None:
+        freed = max(0.0, self._avg_duration - elapsed)
+        avoided = max(0.0, self._avg_bytes - sent_bytes) / CHARS_PER_TOKEN
+        path = scope["path"]
+        self.cancelled.inc(path=path)
+        self.freed_seconds.inc(freed, path=path)
+        self.avoided_tokens.inc(avoided, path=path)
+        log_event(
+            "run.cancelled", path=path, elapsed_s=round(elapsed, 3), freed_s=round(freed, 3), avoided_tokens=int(avoided)
+        )
@@ -0,0 +1,229 @@
+"""
+Circuit breaker with stale-cache fallback for YFinanceTools.
+
+When Yahoo Finance throttles or times out, every tool call in every agent run
+waits for its own timeout, and latency jumps across the whole container.
+CircuitBreaker is installed as an Agno tool hook in front of the YFinance
+toolkit functions and tracks the upstream's health:
+
+- closed: calls go through. A call that raises, returns one of the toolkit's
+  "Error ..." or "Could not fetch ..." messages or takes longer than
+  `slow_call_s` is a failure;
+  `failure_threshold` failures in a row open the circuit;
+- open: calls fail fast. The last good result for the same function and
+  arguments is served instead, marked as stale with its age; without one the
+  model gets a short "temporarily unavailable" message at once;
+- recovery: while open, a background thread repeats the last failed call
+  every `probe_interval` seconds (half-open). The first success closes the
+  circuit.
+
+Good results are kept for `stale_ttl` seconds (at most `max_entries`), so a
+failed call can also fall back to them while the circuit is still closed.
+The circuit state and call outcomes are reported in /metrics.
+
+Usage:
+    breaker = CircuitBreaker("yahoo")
+    apply_circuit_breaker(deployed_agents, breaker)
+"""
+
+import collections
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from agno_deploy.logs import iter_agents, log, log_event
+from agno_deploy.metrics import REGISTRY, MetricsRegistry
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# YFinanceTools catches its own exceptions and returns them as text; an empty
+# reply from Yahoo (the usual answer to a 429) becomes "Could not fetch ..."
+ERROR_PREFIXES = ("Error", "Could not")
+
+
+def _age(seconds: float) -> str:
+    if seconds < 120:
+        return f"{seconds:.0f}s"
+    if seconds < 7200:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f} h"
+
+
+class CircuitBreaker:
+    """Fail-fast circuit for one upstream, usable as an Agno tool hook."""
+
+    def __init__(
+        self,
+        name: str = "yahoo",
+        failure_threshold: int = 5,
+        probe_interval: float = 15.0,
+        slow_call_s: float = 10.0,
+        stale_ttl: float = 24 * 3600,
+        max_entries: int = 2048,
+        functions: Optional[Iterable[str]] = None,
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.slow_call_s = slow_call_s
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        # Tool functions guarded by this circuit (None: every function the hook sees)
+        self.functions = set(functions) if functions is not None else None
+
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._cache: "collections.OrderedDict[Tuple[str, str], Tuple[float, Any]]" = collections.OrderedDict()
+        self._probe: Optional[Tuple[Callable, Dict[str, Any]]] = None
+        self._prober: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self.calls = registry.counter("circuit_calls_total", "Guarded tool calls by outcome (ok, slow, failure, rejected, stale)")
+        self.transitions = registry.counter("circuit_transitions_total", "Circuit state changes")
+        self.state_gauge = registry.gauge("circuit_state", "Circuit state: 0 closed, 1 half-open, 2 open")
+        self.state_gauge.set(STATE_VALUES[CLOSED], circuit=name)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        # Agent.deep_copy() copies tool_hooks; every copy must report to the same circuit
+        return self
+
+    def guards(self, function_name: str) -> bool:
+        return self.functions is None or function_name in self.functions
+
+    def _set_state(self, state: str) -> None:
+        # Called with the lock held
+        if state == self.state:
+            return
+        previous, self.state = self.state, state
+        if previous == CLOSED:
+            self.opened_at = time.time()
+        elif state == CLOSED:
+            self.opened_at = None
+        self.state_gauge.set(STATE_VALUES[state], circuit=self.name)
+        self.transitions.inc(circuit=self.name, state=state)
+        # Only opening is a warning; failed probes (half_open -> open) are routine while Yahoo is down
+        level = logging.WARNING if previous == CLOSED else logging.INFO
+        log(f"🔌 Circuit '{self.name}': {previous} -> {state}", event="circuit.state", level=level, circuit=self.name, state=state)
+
+    def _remember(self, key: Tuple[str, str], result: Any) -> None:
+        with self._lock:
+            self._cache[key] = (time.time(), result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _stale(self, key: Tuple[str, str], reason: str) -> Optional[str]:
+        """The last good result for `key`, marked as stale, or None."""
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is None or time.time() - entry[0] > self.stale_ttl:
+            return None
+        cached_at, result = entry
+        stamp = time.strftime("%Y-%m-%d %H:%M UTC", time.gmtime(cached_at))
+        return f"[STALE DATA: {reason}; this is the last known value, cached {_age(time.time() - cached_at)} ago at {stamp}]\n{result}"
+
+    @staticmethod
+    def _is_failure(result: Any) -> bool:
+        return isinstance(result, str) and result.startswith(ERROR_PREFIXES)
+
+    def _record(self, ok: bool, probe: Optional[Tuple[Callable, Dict[str, Any]]] = None) -> None:
+        with self._lock:
+            if ok:
+                self.failures = 0
+                self._set_state(CLOSED)
+                return
+            self.failures += 1
+            self._probe = probe or self._probe
+            if self.state == CLOSED and self.failures >= self.failure_threshold:
+                self._set_state(OPEN)
+                self._start_prober()
+
+    def _start_prober(self) -> None:
+        # Called with the lock held
+        if self._prober is not None and self._prober.is_alive():
+            return
+        self._prober = threading.Thread(target=self._probe_loop, name=f"circuit-probe-{self.name}", daemon=True)
+        self._prober.start()
+
+    def _probe_loop(self) -> None:
+        while True:
+            time.sleep(self.probe_interval)
+            with self._lock:
+                if self.state == CLOSED or self._probe is None:
+                    return
+                self._set_state(HALF_OPEN)
+                function_call, arguments = self._probe
+            try:
+                ok, _ = self._call(function_call, arguments)
+            except Exception:
+                ok = False
+            with self._lock:
+                if ok:
+                    self.failures = 0
+                    self._set_state(CLOSED)
+                    return
+                self._set_state(OPEN)
+
+    def _call(self, function_call: Callable, arguments: Dict[str, Any]) -> Tuple[bool, Any]:
+        started = time.monotonic()
+        result = function_call(**arguments)
+        ok = not self._is_failure(result) and time.monotonic() - started <= self.slow_call_s
+        return ok, result
+
+    def hook(self, function_name: str, function_call: Callable, arguments: Dict[str, Any]):
+        if not self.guards(function_name):
+            return function_call(**arguments)
+        key = (function_name, json.dumps(arguments, sort_keys=True, default=str))
+
+        if self.state != CLOSED:
+            stale = self._stale(key, f"{self.name} is unavailable")
+            self.calls.inc(circuit=self.name, outcome="stale" if stale else "rejected")
+            return stale or (
+                f"Error: {function_name} is temporarily unavailable ({self.name} circuit open after repeated "
+                "failures; recovery is being checked in the background). Answer without this data or try later."
+            )
+
+        try:
+            ok, result = self._call(function_call, arguments)
+        except Exception as e:
+            ok, result = False, e
+        self._record(ok, None if ok else (function_call, arguments))
+        if ok or (not self._is_failure(result) and not isinstance(result, Exception)):
+            # Slow but successful calls count against the circuit and still return their data
+            self._remember(key, result)
+            self.calls.inc(circuit=self.name, outcome="ok" if ok else "slow")
+            return result
+
+        stale = self._stale(key, f"{function_name} failed")
+        self.calls.inc(circuit=self.name, outcome="stale" if stale else "failure")
+        if stale:
+            return stale
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def apply_circuit_breaker(agents: Iterable[Any], breaker: CircuitBreaker) -> int:
+    """Put `breaker` in front of the YFinanceTools functions of every agent; returns how many agents were guarded."""
+    guarded = 0
+    names = set(breaker.functions or ())
+    for agent in iter_agents(agents):
+        toolkits = [t for t in getattr(agent, "tools", None) or [] if type(t).__module__ == "agno.tools.yfinance"]
+        if not toolkits:
+            continue
+        for toolkit in toolkits:
+            names.update(toolkit.functions)
+        agent.tool_hooks = [breaker.hook] + list(agent.tool_hooks or [])
+        guarded += 1
+    if guarded:
+        breaker.functions = names
+        log_event("circuit.installed", circuit=breaker.name, agents=guarded, functions=sorted(names))
+    return guarded
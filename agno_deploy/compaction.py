@@ -0,0 +1,338 @@
+"""
+Token-budgeted compaction of YFinanceTools outputs.
+
+YFinanceTools returns raw JSON dumps of dataframes and dicts: income
+statements with every line item to the cent, the full Yahoo `info` dict for
+key ratios, news items with thumbnails and tracking URLs. All of it goes into
+the model context and is sent again on every later turn of the session.
+ToolOutputCompactor is an Agno tool hook that reshapes each result before
+the model sees it:
+
+- projection: only the fields an analyst needs (company profile, ratios,
+  main income statement lines, OHLCV columns);
+- numbers: rounded, with large values as 394.3B / 12.5M;
+- tables: compact CSV-like rows with ISO dates instead of JSON objects
+  keyed by epoch milliseconds;
+- news: duplicate stories (same link or title) dropped, one line each;
+- budget: at most `budgets[function]` tokens per result; long tables keep
+  evenly spaced rows including the first and last, text is truncated with a
+  marker.
+
+Only functions with a budget are touched. Error messages ("Error fetching
+...", "Could not fetch ...") pass through unchanged, so the circuit breaker
+and the cache still recognise them; other results that cannot be parsed are
+only held to the budget. Tokens are counted with tiktoken when it is
+installed and estimated at 4 characters per token otherwise. Before/after
+token counts per tool are reported in /metrics.
+
+Usage:
+    compactor = ToolOutputCompactor(budgets={"get_income_statements": 800})
+    apply_tool_compaction(deployed_agents, compactor)
+"""
+
+import functools
+import json
+import math
+import re
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from agno_deploy.circuit_breaker import ERROR_PREFIXES
+from agno_deploy.logs import iter_agents, log_event
+from agno_deploy.metrics import REGISTRY, MetricsRegistry
+
+CHARS_PER_TOKEN = 4
+
+# Tool budgets in tokens; tools not listed here are not compacted
+DEFAULT_BUDGETS = {
+    "get_current_stock_price": 50,
+    "get_company_info": 400,
+    "get_stock_fundamentals": 200,
+    "get_key_financial_ratios": 350,
+    "get_income_statements": 600,
+    "get_analyst_recommendations": 250,
+    "get_company_news": 400,
+    "get_historical_stock_prices": 800,
+    "get_technical_indicators": 800,
+}
+
+COMPANY_INFO_FIELDS = (
+    "Name", "Symbol", "Current Stock Price", "Market Cap", "Sector", "Industry", "Country", "EPS", "P/E Ratio",
+    "52 Week Low", "52 Week High", "50 Day Average", "200 Day Average", "Analyst Recommendation",
+    "Number Of Analyst Opinions", "Employees", "Total Cash", "Free Cash flow", "Operating Cash flow", "EBITDA",
+    "Revenue Growth", "Gross Margins", "Ebitda Margins", "Summary",
+)
+
+RATIO_FIELDS = (
+    "currency", "marketCap", "enterpriseValue", "trailingPE", "forwardPE", "pegRatio", "trailingPegRatio",
+    "priceToBook", "priceToSalesTrailing12Months", "enterpriseToRevenue", "enterpriseToEbitda", "grossMargins",
+    "operatingMargins", "profitMargins", "ebitdaMargins", "returnOnAssets", "returnOnEquity", "revenueGrowth",
+    "earningsGrowth", "currentRatio", "quickRatio", "debtToEquity", "totalCash", "totalDebt", "freeCashflow",
+    "dividendYield", "payoutRatio", "beta", "trailingEps", "forwardEps",
+)
+
+INCOME_STATEMENT_LINES = (
+    "Total Revenue", "Cost Of Revenue", "Gross Profit", "Research And Development",
+    "Selling General And Administration", "Operating Expense", "Operating Income", "EBITDA", "EBIT",
+    "Interest Expense", "Pretax Income", "Tax Provision", "Net Income", "Diluted EPS", "Basic EPS",
+    "Diluted Average Shares",
+)
+
+PRICE_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+SUMMARY_SENTENCES = 2
+NEWS_SUMMARY_CHARS = 200
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in `text` (tiktoken when installed, otherwise about 4 characters per token)."""
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def format_number(value: Any) -> str:
+    """Round a number for the model: 394328000000 -> 394.3B, 0.246891 -> 0.2469, 198.9512 -> 198.95."""
+    if value is None or isinstance(value, bool):
+        return "" if value is None else str(value)
+    if not isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+        return ""
+    magnitude = abs(value)
+    for threshold, suffix in ((1e12, "T"), (1e9, "B"), (1e6, "M")):
+        if magnitude >= threshold:
+            return f"{value / threshold:.1f}{suffix}"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    if magnitude >= 1000:
+        return f"{value:.1f}"
+    if magnitude >= 1:
+        return f"{value:.2f}"
+    return f"{value:.4g}"
+
+
+def _date(key: Any) -> str:
+    """Epoch milliseconds (pandas to_json keys) as an ISO date; other keys unchanged."""
+    text = str(key)
+    if text.isdigit() and len(text) >= 12:
+        return datetime.fromtimestamp(int(text) / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+    return text
+
+
+def _rows(header: Sequence[str], rows: Iterable[Sequence[Any]]) -> List[str]:
+    lines = [",".join(header)]
+    for row in rows:
+        lines.append(",".join(format_number(v).replace(",", ";") for v in row))
+    return lines
+
+
+def _key_values(data: Dict[str, Any], fields: Optional[Sequence[str]] = None) -> str:
+    keys = [f for f in fields if f in data] if fields else list(data)
+    lines = []
+    for key in keys:
+        value = data[key]
+        if value in (None, "", "N/A", "None") or (isinstance(value, str) and value.strip() in ("None USD", "None")):
+            continue
+        lines.append(f"{key}: {format_number(value)}")
+    return "\n".join(lines)
+
+
+def _first_sentences(text: str, count: int) -> str:
+    sentences = re.split(r"(?<=[.!?])\s+", text.strip())
+    return " ".join(sentences[:count])
+
+
+def shape_company_info(data: Dict[str, Any]) -> str:
+    data = dict(data)
+    if isinstance(data.get("Summary"), str):
+        data["Summary"] = _first_sentences(data["Summary"], SUMMARY_SENTENCES)
+    return _key_values(data, COMPANY_INFO_FIELDS)
+
+
+def shape_fundamentals(data: Dict[str, Any]) -> str:
+    return _key_values(data)
+
+
+def shape_ratios(data: Dict[str, Any]) -> str:
+    return _key_values(data, RATIO_FIELDS)
+
+
+def shape_income_statement(data: Dict[str, Dict[str, Any]]) -> List[str]:
+    """{line item: {epoch ms: value}} -> one row per selected line item, one column per fiscal year."""
+    lines = [item for item in INCOME_STATEMENT_LINES if item in data] or list(data)
+    periods = sorted({p for item in lines for p in data[item]}, reverse=True)
+    # Drop periods without any value (Yahoo pads the oldest year with nulls)
+    periods = [p for p in periods if any(data[item].get(p) is not None for item in lines)]
+    return _rows(["Item"] + [_date(p) for p in periods], ([item] + [data[item].get(p) for p in periods] for item in lines))
+
+
+def shape_price_table(data: Dict[str, Dict[str, Any]]) -> List[str]:
+    """{epoch ms: {Open, High, ...}} -> Date,Open,High,Low,Close,Volume rows, oldest first."""
+    dates = sorted(data, key=lambda k: int(k) if str(k).isdigit() else str(k))
+    columns = [c for c in PRICE_COLUMNS if any(c in data[d] for d in dates)]
+    return _rows(["Date"] + columns, ([_date(d)] + [data[d].get(c) for c in columns] for d in dates))
+
+
+def shape_records(data: Dict[str, Dict[str, Any]]) -> List[str]:
+    """{row: {column: value}} (e.g. analyst recommendations) -> CSV-like rows."""
+    rows = list(data.values())
+    columns = list(dict.fromkeys(c for row in rows for c in row))
+    return _rows(columns, ([row.get(c) for c in columns] for row in rows))
+
+
+def _news_fields(item: Dict[str, Any]) -> Dict[str, Any]:
+    # yfinance >= 0.2.50 nests the story under "content"; older versions are flat
+    content = item.get("content") if isinstance(item.get("content"), dict) else item
+    provider = content.get("provider")
+    link = content.get("canonicalUrl") or content.get("clickThroughUrl")
+    published = content.get("pubDate") or content.get("providerPublishTime")
+    if isinstance(published, (int, float)):
+        published = datetime.fromtimestamp(published, tz=timezone.utc).isoformat()
+    return {
+        "title": (content.get("title") or "").strip(),
+        "summary": (content.get("summary") or content.get("description") or "").strip(),
+        "publisher": provider.get("displayName") if isinstance(provider, dict) else content.get("publisher"),
+        "date": str(published or "")[:10],
+        "link": link.get("url") if isinstance(link, dict) else (link or content.get("link")),
+    }
+
+
+def shape_news(items: List[Dict[str, Any]]) -> str:
+    seen = set()
+    lines = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        story = _news_fields(item)
+        title_key = _NON_WORD.sub(" ", story["title"].lower()).strip()
+        if not title_key or title_key in seen or (story["link"] and story["link"] in seen):
+            continue
+        seen.update(k for k in (title_key, story["link"]) if k)
+        summary = story["summary"]
+        if len(summary) > NEWS_SUMMARY_CHARS:
+            summary = summary[:NEWS_SUMMARY_CHARS].rsplit(" ", 1)[0] + "…"
+        parts = [p for p in (story["date"], story["publisher"], story["title"]) if p]
+        line = "- " + " | ".join(parts)
+        if summary:
+            line += f": {summary}"
+        if story["link"]:
+            line += f" ({story['link']})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+# Function name -> (shaper, output kind); "rows" results can be thinned row by row
+SHAPERS: Dict[str, tuple] = {
+    "get_company_info": (shape_company_info, "text"),
+    "get_stock_fundamentals": (shape_fundamentals, "text"),
+    "get_key_financial_ratios": (shape_ratios, "text"),
+    "get_income_statements": (shape_income_statement, "rows"),
+    "get_historical_stock_prices": (shape_price_table, "rows"),
+    "get_technical_indicators": (shape_price_table, "rows"),
+    "get_analyst_recommendations": (shape_records, "rows"),
+    "get_company_news": (shape_news, "text"),
+}
+
+
+def fit_rows(lines: List[str], budget: int) -> str:
+    """Keep the header and evenly spaced rows (first and last included) within `budget` tokens."""
+    text = "\n".join(lines)
+    if count_tokens(text) <= budget or len(lines) <= 3:
+        return text
+    header, rows = lines[0], lines[1:]
+    per_row = max(1, count_tokens("\n".join(rows)) // len(rows))
+    keep = max(2, (budget - count_tokens(header) - 10) // per_row)
+    if keep >= len(rows):
+        return text
+    step = (len(rows) - 1) / (keep - 1)
+    picked = [rows[round(i * step)] for i in range(keep)]
+    return "\n".join([header] + picked + [f"[{len(rows) - keep} of {len(rows)} rows omitted to fit the token budget]"])
+
+
+def fit_text(text: str, budget: int) -> str:
+    """Truncate `text` to about `budget` tokens at a line or word boundary."""
+    tokens = count_tokens(text)
+    if tokens <= budget:
+        return text
+    cut = text[: max(1, int(len(text) * budget / tokens))]
+    boundary = max(cut.rfind("\n"), cut.rfind(" "))
+    if boundary > len(cut) // 2:
+        cut = cut[:boundary]
+    return cut.rstrip() + f"\n[truncated to fit the {budget}-token budget]"
+
+
+class ToolOutputCompactor:
+    """Tool hook that shapes YFinanceTools results and enforces a token budget per tool."""
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, int]] = None,
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.budgets = dict(DEFAULT_BUDGETS, **(budgets or {}))
+        self.tokens = registry.counter("tool_output_tokens_total", "Tool output tokens before and after compaction")
+        self.calls = registry.counter("tool_compactions_total", "Tool results compacted, by function and outcome")
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def compact(self, function_name: str, result: str) -> str:
+        """Shaped and budgeted version of one tool result (unchanged if it cannot be parsed)."""
+        budget = self.budgets[function_name]
+        shaper, kind = SHAPERS.get(function_name, (None, "text"))
+        if shaper is not None:
+            try:
+                shaped = shaper(json.loads(result))
+            except (ValueError, TypeError, AttributeError, KeyError):
+                shaped = None
+            if shaped is not None and kind == "rows":
+                return fit_rows(shaped, budget)
+            if shaped:
+                return fit_text(shaped, budget)
+        return fit_text(result, budget)
+
+    def hook(self, function_name: str, function_call: Callable, arguments: Dict[str, Any]):
+        result = function_call(**arguments)
+        if function_name not in self.budgets or not isinstance(result, str) or not result:
+            return result
+        if result.startswith(ERROR_PREFIXES):
+            return result
+        compacted = self.compact(function_name, result)
+        before, after = count_tokens(result), count_tokens(compacted)
+        self.tokens.inc(before, function=function_name, stage="before")
+        self.tokens.inc(after, function=function_name, stage="after")
+        self.calls.inc(function=function_name, outcome="shaped" if compacted != result else "unchanged")
+        log_event("tool.compacted", function=function_name, tokens_before=before, tokens_after=after)
+        return compacted
+
+
+def apply_tool_compaction(agents: Iterable[Any], compactor: ToolOutputCompactor) -> int:
+    """
+    Put `compactor` in front of the model for every agent with YFinanceTools; returns how many agents.
+
+    The hook is added innermost (closest to the tool), so hooks installed
+    afterwards, such as the circuit breaker's stale cache, see compacted results.
+    """
+    compacted = 0
+    for agent in iter_agents(agents):
+        if any(type(t).__module__ == "agno.tools.yfinance" for t in getattr(agent, "tools", None) or []):
+            agent.tool_hooks = list(agent.tool_hooks or []) + [compactor.hook]
+            compacted += 1
+    return compacted
@@ -0,0 +1,72 @@
+"""
+Deployment config file shared by the deployment scripts.
+
+The capacity planner (python -m agno_deploy.planner) writes its
+recommendations to deploy_config.json. The deployment scripts read that file
+for their @app.function settings; environment variables still take
+precedence, and built-in defaults apply when neither is set.
+
+Example deploy_config.json:
+    {
+      "max_containers": 6,
+      "min_containers": 1,
+      "timeout": 120,
+      "max_concurrent": 40,
+      "cpu": 1.0,
+      "memory": 1024
+    }
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Keys understood by the deployment scripts and the environment variable that overrides each one
+CONFIG_ENV_VARS = {
+    "max_containers": "MAX_CONTAINERS",
+    "min_containers": "MIN_CONTAINERS",
+    "timeout": "TIMEOUT",
+    "max_concurrent": "MAX_CONCURRENT",
+    "cpu": "CPU",
+    "memory": "MEMORY",
+}
+
+
+def load_deploy_config(path: Path) -> Dict[str, Any]:
+    """Load deploy_config.json, returning an empty dict when the file does not exist."""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    try:
+        with open(path, "r") as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(
+            f"❌ Could not read deployment config {path}: {e}\n"
+            f"   Fix the file or regenerate it with: python -m agno_deploy.planner --write {path}"
+        )
+    unknown = set(config) - set(CONFIG_ENV_VARS) - {"_planner"}
+    if unknown:
+        raise ValueError(f"❌ Unknown keys in {path}: {sorted(unknown)}. Expected: {sorted(CONFIG_ENV_VARS)}")
+    return config
+
+
+def write_deploy_config(path: Path, settings: Dict[str, Any]) -> None:
+    """Write settings to deploy_config.json, keeping unrelated keys already in the file."""
+    path = Path(path)
+    config = load_deploy_config(path)
+    config.update(settings)
+    with open(path, "w") as f:
+        json.dump(config, f, indent=2)
+        f.write("\n")
+
+
+def get_setting(config: Dict[str, Any], key: str, default: Optional[float] = None, cast=int):
+    """Resolve one setting: environment variable first, then the config file, then the default."""
+    env_value = os.getenv(CONFIG_ENV_VARS[key])
+    if env_value is not None:
+        return cast(env_value)
+    if config.get(key) is not None:
+        return cast(config[key])
+    return default
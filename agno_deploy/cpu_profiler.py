@@ -0,0 +1,259 @@
+"""
+On-demand CPU profiling of live containers with a sampling profiler.
+
+Some requests spend much of their time in pandas, JSON encoding and tool
+post-processing inside the container. SamplingProfiler finds those hot
+paths under real traffic without a redeploy or any native dependency: a
+background thread reads the Python stack of every thread
+(sys._current_frames) at a fixed interval and counts identical stacks.
+
+- window: for N seconds, or until the next N requests have completed
+  (counted by CPUProfileMiddleware; the stacks are those of the whole
+  container during that window, since concurrent requests share threads);
+- output: collapsed stacks, one "frame;frame;frame count" line per distinct
+  stack, the input format of flamegraph.pl, speedscope and inferno; or JSON
+  with the functions taking the most samples (self and total);
+- idle: samples of threads waiting in the selector, on locks or on queues
+  are dropped unless `idle=true`, so the profile shows where the CPU goes.
+
+Stacks are rooted at the thread name, so the event loop (MainThread) and
+worker threads (asyncio.to_thread tools) are told apart. Sampling costs a
+stack walk per thread and interval; the default 10 ms interval keeps the
+overhead around one percent. One profile runs at a time per container.
+
+mount_cpu_profiler adds the admin endpoint (token-protected, see
+agno_deploy.admin):
+
+    POST /admin/profile?seconds=10                    profile for 10 s, returns collapsed stacks
+    POST /admin/profile?requests=20&max_seconds=120   profile the next 20 requests
+    POST /admin/profile?seconds=10&format=json        top functions instead of stacks
+
+Usage:
+    profiler = SamplingProfiler()
+    mount_cpu_profiler(app, profiler, token=os.getenv("AUTH_TOKEN"))
+    app = CPUProfileMiddleware(app, profiler)
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from agno_deploy.admin import admin_guard, container_id
+from agno_deploy.logs import log_event
+
+# Innermost Python frames of a thread that is waiting rather than computing
+IDLE_FRAMES = {
+    ("select", "selectors.py"),               # Event loop waiting for I/O
+    ("wait", "threading.py"),
+    ("_wait_for_tstate_lock", "threading.py"),
+    ("get", "queue.py"),
+    ("_worker", "thread.py"),                 # Idle executor thread (asyncio.to_thread)
+    ("accept", "socket.py"),
+}
+_SITE_MARKERS = ("site-packages" + os.sep, "dist-packages" + os.sep)
+_DEPLOY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+
+def _short_path(filename: str) -> str:
+    for marker in _SITE_MARKERS:
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    if filename.startswith(_DEPLOY_ROOT):
+        return filename[len(_DEPLOY_ROOT):]
+    return os.path.basename(filename)
+
+
+class SamplingProfiler:
+    """Stack sampler over all threads of this process, one profile at a time."""
+
+    def __init__(self, interval: float = 0.01, max_seconds: float = 300.0, max_depth: int = 128):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.max_depth = max_depth
+        self._labels: Dict[Any, str] = {}
+        self._lock = threading.Lock()
+        self._active: Optional[Dict[str, Any]] = None
+
+    @property
+    def running(self) -> bool:
+        return self._active is not None
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            label = self._labels[code] = f"{name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def _stack(self, frame) -> Tuple[List[str], bool]:
+        """Frame labels root first, and whether the thread is idle."""
+        idle = (frame.f_code.co_name, os.path.basename(frame.f_code.co_filename)) in IDLE_FRAMES
+        labels = []
+        while frame is not None and len(labels) < self.max_depth:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        labels.reverse()
+        return labels, idle
+
+    def _sample(self, profile: Dict[str, Any]) -> None:
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        stacks = profile["stacks"]
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            labels, idle = self._stack(frame)
+            if idle and not profile["idle"]:
+                profile["idle_samples"] += 1
+                continue
+            stacks[(f"thread:{names.get(ident, ident)}",) + tuple(labels)] += 1
+        profile["samples"] += 1
+
+    def _run(self, profile: Dict[str, Any]) -> None:
+        next_at = time.perf_counter()
+        while not profile["done"].is_set():
+            started = time.perf_counter()
+            self._sample(profile)
+            profile["sampling_seconds"] += time.perf_counter() - started
+            next_at += self.interval
+            delay = next_at - time.perf_counter()
+            if delay < 0:
+                next_at = time.perf_counter()  # Fell behind: skip the missed samples
+                delay = 0
+            profile["done"].wait(delay)
+
+    def start(self, requests: Optional[int] = None, idle: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            if self._active is not None:
+                raise RuntimeError("A profile is already running in this container")
+            profile = {
+                "stacks": Counter(),
+                "samples": 0,
+                "idle_samples": 0,
+                "sampling_seconds": 0.0,
+                "idle": idle,
+                "requests": requests,
+                "requests_seen": 0,
+                "started_at": time.time(),
+                "started": time.perf_counter(),
+                "done": threading.Event(),
+            }
+            self._active = profile
+        profile["thread"] = threading.Thread(target=self._run, args=(profile,), name="cpu-profiler", daemon=True)
+        profile["thread"].start()
+        log_event("cpu_profiler.started", requests=requests, interval_ms=self.interval * 1000)
+        return profile
+
+    def request_finished(self) -> None:
+        """Count a completed request toward a `requests` window (called by CPUProfileMiddleware)."""
+        profile = self._active
+        if profile is not None and profile["requests"]:
+            profile["requests_seen"] += 1
+            if profile["requests_seen"] >= profile["requests"]:
+                profile["done"].set()
+
+    def stop(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        profile["done"].set()
+        profile["thread"].join()
+        with self._lock:
+            if self._active is profile:
+                self._active = None
+        profile["seconds"] = time.perf_counter() - profile["started"]
+        log_event("cpu_profiler.stopped", samples=profile["samples"], seconds=round(profile["seconds"], 2))
+        return profile
+
+    async def profile(self, seconds: Optional[float] = None, requests: Optional[int] = None, idle: bool = False):
+        """Profile for `seconds`, or until `requests` requests completed (at most `max_seconds`)."""
+        limit = min(seconds or self.max_seconds, self.max_seconds)
+        profile = self.start(requests=requests, idle=idle)
+        try:
+            await asyncio.to_thread(profile["done"].wait, limit)
+        finally:
+            self.stop(profile)
+        return profile
+
+    @staticmethod
+    def collapsed(profile: Dict[str, Any]) -> str:
+        """Collapsed stacks: "frame;frame;frame count" per line (flamegraph.pl, speedscope, inferno)."""
+        lines = [f"{';'.join(stack)} {count}" for stack, count in profile["stacks"].most_common()]
+        return "\n".join(lines) + "\n"
+
+    def summary(self, profile: Dict[str, Any], limit: int = 30) -> Dict[str, Any]:
+        """Functions with the most samples, on top of the stack (self) and anywhere on it (total)."""
+        own, total = Counter(), Counter()
+        for stack, count in profile["stacks"].items():
+            own[stack[-1]] += count
+            for label in set(stack[1:]):
+                total[label] += count
+        busy = sum(profile["stacks"].values()) or 1
+        return {
+            "container": container_id(),
+            "seconds": round(profile["seconds"], 3),
+            "interval_ms": self.interval * 1000,
+            "samples": profile["samples"],
+            "busy_thread_samples": sum(profile["stacks"].values()),
+            "idle_thread_samples": profile["idle_samples"],
+            "requests": profile["requests_seen"] if profile["requests"] else None,
+            "overhead_pct": round(100 * profile["sampling_seconds"] / max(profile["seconds"], 1e-9), 2),
+            "self": [{"function": f, "samples": n, "pct": round(100 * n / busy, 1)} for f, n in own.most_common(limit)],
+            "total": [{"function": f, "samples": n, "pct": round(100 * n / busy, 1)} for f, n in total.most_common(limit)],
+        }
+
+
+class CPUProfileMiddleware:
+    """ASGI middleware counting completed requests for request-bounded profiles."""
+
+    def __init__(self, app, profiler: SamplingProfiler, prefix: str = "/admin"):
+        self.app = app
+        self.profiler = profiler
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.running or scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.request_finished()
+
+
+def mount_cpu_profiler(app, profiler: SamplingProfiler, token: Optional[str]) -> None:
+    """Add the token-protected POST /admin/profile endpoint to a FastAPI app."""
+    from fastapi import Depends, HTTPException, Query
+    from fastapi.responses import PlainTextResponse
+
+    async def run_profile(
+        seconds: Optional[float] = Query(None, gt=0, le=profiler.max_seconds, description="Profile for this long"),
+        requests: Optional[int] = Query(None, ge=1, description="Profile until this many requests completed"),
+        max_seconds: float = Query(60.0, gt=0, le=profiler.max_seconds, description="Longest wait for `requests`"),
+        format: str = Query("collapsed", description="collapsed (flamegraph input) or json (top functions)"),
+        idle: bool = Query(False, description="Keep samples of waiting threads"),
+    ):
+        if (seconds is None) == (requests is None):
+            raise HTTPException(status_code=422, detail="Pass exactly one of seconds or requests")
+        if format not in ("collapsed", "json"):
+            raise HTTPException(status_code=422, detail="format must be collapsed or json")
+        try:
+            profile = await profiler.profile(seconds=seconds or max_seconds, requests=requests, idle=idle)
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        summary = profiler.summary(profile)
+        if format == "json":
+            return summary
+        headers = {
+            "X-Container": summary["container"],
+            "X-Profile-Samples": str(summary["samples"]),
+            "X-Profile-Seconds": str(summary["seconds"]),
+        }
+        if requests:
+            headers["X-Profile-Requests"] = str(summary["requests"])
+        return PlainTextResponse(profiler.collapsed(profile), headers=headers)
+
+    app.add_api_route(
+        "/admin/profile", run_profile, methods=["POST"], dependencies=[Depends(admin_guard(token))], tags=["Admin"]
+    )
@@ -0,0 +1,151 @@
+"""
+Fan-out endpoint: one question to several agents at the same time.
+
+Multi-agent deployments expose each agent separately, so a client that wants
+both the analysis and the trading view calls them one after the other and
+waits twice. POST /fanout sends the question to every selected agent
+concurrently:
+
+    POST /fanout
+    {"message": "Should I buy NVDA?", "agent_ids": ["financial-analysis-agent", "trading-strategy-agent"]}
+
+The agents share one tool cache for the request (see batch.SharedToolCache),
+so market data both agents ask for is fetched once. Wall-clock latency is
+close to the slowest agent instead of the sum of all of them. An agent still
+running after `agent_timeout` seconds is stopped and reported as failed, so
+one stuck agent does not hold up the others' answers.
+
+Without "stream" the response is one JSON document with every agent's answer
+and a merged markdown answer. With "stream": true, NDJSON lines carry each
+agent's content deltas as they arrive (tagged with agent_id), a completion
+line per agent, and finally the merged result.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from agno_deploy.batch import SharedToolCache, with_tool_cache
+from agno_deploy.logs import log_event
+from agno_deploy.metrics import REGISTRY, MetricsRegistry
+
+# RunResponse.event of streamed content chunks (agno.run.response.RunEvent.run_response)
+CONTENT_EVENT = "RunResponse"
+
+
+def merge_responses(agents: List[Any], results: List[Dict[str, Any]]) -> str:
+    """Merge per-agent answers into one markdown document, in request order."""
+    sections = []
+    for agent, result in zip(agents, results):
+        title = getattr(agent, "name", None) or result["agent_id"]
+        body = result["content"] if result["status"] == "ok" else f"_Failed: {result['error']}_"
+        sections.append(f"## {title}\n\n{body}")
+    return "\n\n".join(sections)
+
+
+async def fan_out(
+    agents: List[Any],
+    message: str,
+    session_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    agent_timeout: Optional[float] = None,
+    registry: MetricsRegistry = REGISTRY,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Run `message` on every agent concurrently, yielding content deltas, per-agent results and the merged result."""
+    latency = registry.histogram("fanout_agent_seconds", "Per-agent latency within fan-out requests")
+    total_latency = registry.histogram("fanout_request_seconds", "Fan-out request latency (all agents)")
+
+    cache = SharedToolCache()
+    events: asyncio.Queue = asyncio.Queue()
+    started = time.monotonic()
+
+    async def run_agent(agent):
+        agent_id = agent.agent_id
+        agent_started = time.monotonic()
+        parts: List[str] = []
+        try:
+            async with asyncio.timeout(agent_timeout):
+                worker = with_tool_cache(agent, cache)
+                stream = await worker.arun(message, session_id=session_id, user_id=user_id, stream=True)
+                try:
+                    async for chunk in stream:
+                        if chunk.event == CONTENT_EVENT and isinstance(chunk.content, str) and chunk.content:
+                            parts.append(chunk.content)
+                            await events.put({"agent_id": agent_id, "content": chunk.content})
+                finally:
+                    await stream.aclose()
+            result = {"agent_id": agent_id, "status": "ok", "content": "".join(parts)}
+        except TimeoutError:
+            result = {"agent_id": agent_id, "status": "error", "error": f"Timed out after {agent_timeout:g}s"}
+        except Exception as e:
+            result = {"agent_id": agent_id, "status": "error", "error": str(e)}
+        result["duration_s"] = round(time.monotonic() - agent_started, 3)
+        latency.observe(result["duration_s"], agent_id=agent_id)
+        await events.put(result)
+        return result
+
+    tasks = [asyncio.ensure_future(run_agent(agent)) for agent in agents]
+    try:
+        finished = 0
+        while finished < len(tasks):
+            event = await events.get()
+            if "status" in event:
+                finished += 1
+            yield event
+        results = [task.result() for task in tasks]
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    duration = time.monotonic() - started
+    total_latency.observe(duration)
+    summary = {
+        "duration_s": round(duration, 3),
+        "sequential_s": round(sum(r["duration_s"] for r in results), 3),
+        "tool_cache_hits": cache.hits,
+        "tool_cache_misses": cache.misses,
+    }
+    log_event("fanout.completed", agents=[r["agent_id"] for r in results], **summary)
+    yield {"merged": merge_responses(agents, results), "responses": results, "summary": summary}
+
+
+def mount_fanout(app, agents: List[Any], agent_timeout: Optional[float] = None) -> None:
+    """Add POST /fanout to a FastAPI app serving `agents`; `agent_timeout` bounds each agent's run in seconds."""
+    from fastapi import HTTPException
+    from fastapi.responses import StreamingResponse
+    from pydantic import BaseModel
+
+    class FanOutRequest(BaseModel):
+        message: str
+        agent_ids: Optional[List[str]] = None  # Default: every deployed agent
+        stream: bool = False
+        session_id: Optional[str] = None
+        user_id: Optional[str] = None
+
+    agents_by_id = {agent.agent_id: agent for agent in agents if getattr(agent, "agent_id", None)}
+
+    @app.post("/fanout")
+    async def create_fanout(request: FanOutRequest):
+        agent_ids = request.agent_ids or list(agents_by_id)
+        unknown = [agent_id for agent_id in agent_ids if agent_id not in agents_by_id]
+        if unknown:
+            raise HTTPException(
+                status_code=404, detail=f"Unknown agents {unknown}. Available: {sorted(agents_by_id)}"
+            )
+        selected = [agents_by_id[agent_id] for agent_id in dict.fromkeys(agent_ids)]
+        events = fan_out(selected, request.message, request.session_id, request.user_id, agent_timeout)
+
+        if request.stream:
+            async def ndjson():
+                async for event in events:
+                    yield json.dumps(event, default=str) + "\n"
+
+            return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+        # Read the generator to the end (the merged result is its last event) so it finishes and closes
+        merged = None
+        async for event in events:
+            if "merged" in event:
+                merged = event
+        return merged
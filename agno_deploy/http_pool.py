@@ -0,0 +1,194 @@
+"""
+Shared, pooled HTTP clients per container.
+
+Agno's OpenAIChat builds a new AsyncOpenAI client with its own
+httpx.AsyncClient for every model call, so each run opens a fresh
+connection pool and pays a new TCP + TLS handshake to the API.
+HTTPClientPool keeps one keep-alive client per upstream per container
+(HTTP/2 when the h2 package is installed) and apply_shared_clients() injects
+it into every agent's model:
+
+- OpenAIChat and the OpenAI-compatible models built on it get the shared
+  httpx.AsyncClient for their base URL in get_async_client(), so Agno's
+  async run path (arun, used by the FastAPI and AG-UI routers) reuses its
+  connections. Their `http_client` field stays unset: Agno passes it to the
+  synchronous OpenAI client too, which needs an httpx.Client, so the sync
+  run path (Agent.run(), /runs without async) keeps working with its own
+  client. Copies made with Agent.deep_copy() share the same pool;
+- YFinanceTools: yfinance routes every Ticker through a process-wide YfData
+  session; the pool installs one explicitly configured curl_cffi session
+  there (connections are kept per worker thread) and instruments it.
+
+`wrap_transport` adds a layer around each upstream's transport; the deploy
+scripts use it for hedged, budgeted retries of model calls (resilience.py).
+
+Requests and newly opened connections per upstream are counted in /metrics,
+with http_connection_reuse_ratio = 1 - connections / requests.
+
+Usage:
+    pool = HTTPClientPool()
+    apply_shared_clients(deployed_agents, pool)
+"""
+
+import collections
+import importlib.util
+import threading
+import types
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import httpx
+
+from agno_deploy.logs import iter_agents
+from agno_deploy.metrics import REGISTRY, MetricsRegistry
+
+DEFAULT_OPENAI_BASE_URL = "https://api.openai.com/v1"
+
+# Model attributes that may hold a model needing a client
+MODEL_FIELDS = ("model", "reasoning_model")
+
+
+class SharedAsyncClient(httpx.AsyncClient):
+    """httpx.AsyncClient that copies as itself, so agent copies keep sharing one pool."""
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class HTTPClientPool:
+    """One pooled keep-alive client per upstream, with connection reuse metrics."""
+
+    def __init__(
+        self,
+        http2: bool = True,
+        max_connections: int = 200,
+        max_keepalive_connections: int = 100,
+        keepalive_expiry: float = 60.0,
+        wrap_transport: Optional[Callable[[httpx.AsyncBaseTransport, str], httpx.AsyncBaseTransport]] = None,
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        # HTTP/2 needs the optional h2 package (httpx[http2])
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # Optional layer around each upstream's transport, e.g. resilience.ResiliencePolicy.wrap
+        self.wrap_transport = wrap_transport
+        self._clients: Dict[str, SharedAsyncClient] = {}
+        self._yfinance_session = None
+
+        self.requests = registry.counter("http_requests_total", "Outgoing HTTP requests per upstream")
+        self.connections = registry.counter("http_connections_opened_total", "New upstream connections (TCP + TLS handshakes)")
+        self.reuse = registry.gauge("http_connection_reuse_ratio", "Share of requests served on an existing connection")
+
+    def _count(self, upstream: str, new_connections: int = 0) -> None:
+        self.requests.inc(upstream=upstream)
+        if new_connections:
+            self.connections.inc(new_connections, upstream=upstream)
+        requests = self.requests.value(upstream=upstream)
+        self.reuse.set(max(0.0, 1 - self.connections.value(upstream=upstream) / requests), upstream=upstream)
+
+    def async_client(self, base_url: str) -> SharedAsyncClient:
+        """The shared httpx.AsyncClient for `base_url`'s host, created on first use."""
+        upstream = httpx.URL(base_url).host or base_url
+        client = self._clients.get(upstream)
+        if client is None:
+            async def on_request(request: httpx.Request):
+                async def trace(event_name: str, info: Dict[str, Any]):
+                    if event_name == "connection.connect_tcp.complete":
+                        self.connections.inc(upstream=upstream)
+
+                request.extensions["trace"] = trace
+
+            async def on_response(response: httpx.Response):
+                self._count(upstream)
+
+            transport = httpx.AsyncHTTPTransport(http2=self.http2, limits=self.limits)
+            if self.wrap_transport is not None:
+                transport = self.wrap_transport(transport, upstream)
+            client = SharedAsyncClient(
+                transport=transport,
+                follow_redirects=True,
+                event_hooks={"request": [on_request], "response": [on_response]},
+            )
+            self._clients[upstream] = client
+        return client
+
+    def yfinance_session(self):
+        """Install one shared, instrumented curl_cffi session for all yfinance requests."""
+        if self._yfinance_session is not None:
+            return self._yfinance_session
+        from curl_cffi import requests as curl_requests
+        from yfinance.data import YfData
+
+        session = curl_requests.Session(impersonate="chrome")
+        send = session.request
+        seen_sockets: "collections.OrderedDict[tuple, None]" = collections.OrderedDict()
+        lock = threading.Lock()
+
+        def request(*args, **kwargs):
+            response = send(*args, **kwargs)
+            # curl resets its handle after each transfer; a local port not seen before means a new connection
+            socket = (response.primary_ip, response.primary_port, response.local_port)
+            with lock:
+                new_connection = socket not in seen_sockets
+                seen_sockets[socket] = None
+                seen_sockets.move_to_end(socket)
+                if len(seen_sockets) > 1024:
+                    seen_sockets.popitem(last=False)
+                self._count("yahoo", int(new_connection))
+            return response
+
+        session.request = request
+        YfData(session=session)
+        self._yfinance_session = session
+        return session
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+def _shared_async_client(model):
+    """get_async_client() of a wired model: its own client parameters on the pool's shared client."""
+    from openai import AsyncOpenAI
+
+    params = dict(model._get_client_params(), http_client=model.shared_http_client)
+    if model.shared_transport_retries:
+        params["max_retries"] = 0  # The wrapping transport retries; SDK retries on top would multiply attempts
+    return AsyncOpenAI(**params)
+
+
+def _uses_openai_chat_clients(model) -> bool:
+    """Whether `model` builds its clients with OpenAIChat's methods (not a provider-specific override)."""
+    try:
+        from agno.models.openai.chat import OpenAIChat
+    except ImportError:
+        return False
+    return isinstance(model, OpenAIChat) and type(model).get_async_client is OpenAIChat.get_async_client
+
+
+def apply_shared_clients(agents: Iterable[Any], pool: HTTPClientPool) -> Dict[str, int]:
+    """Inject the pool's clients into every agent's models and toolkits; returns what was wired."""
+    wired = {"models": 0, "yfinance_toolkits": 0}
+    for agent in iter_agents(agents):
+        for field in MODEL_FIELDS:
+            model = getattr(agent, field, None)
+            # Only OpenAI-compatible models that do not bring their own client
+            if model is None or not _uses_openai_chat_clients(model) or model.http_client is not None:
+                continue
+            # Async path only: http_client would also reach the sync OpenAI client, which rejects an AsyncClient
+            model.shared_http_client = pool.async_client(str(model.base_url or DEFAULT_OPENAI_BASE_URL))
+            model.shared_transport_retries = pool.wrap_transport is not None
+            model.get_async_client = types.MethodType(_shared_async_client, model)
+            wired["models"] += 1
+        for tool in getattr(agent, "tools", None) or []:
+            if type(tool).__module__ == "agno.tools.yfinance":
+                pool.yfinance_session()
+                wired["yfinance_toolkits"] += 1
+    return wired
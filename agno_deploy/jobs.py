@@ -0,0 +1,238 @@
+"""
+Asynchronous job API for long-running agent analyses.
+
+A deep analysis (income statements, ratios and news across several tickers)
+can take minutes. Instead of holding an HTTP connection and an interactive
+slot for the whole run, clients submit a job and get a job id back at once:
+
+    POST /jobs?agent_id=...     (form fields: message, session_id, user_id)
+    GET  /jobs/{job_id}         current status, and the result once finished
+    GET  /jobs/{job_id}/stream  Server-Sent Events with every status change
+
+Job records live in a JobStore. In production that is a modal.Dict shared with
+a separate Modal worker function that runs the agent; locally (and for
+testing) a plain dict and LocalJobRunner run the job in-process instead.
+Finished jobs are kept for `retention` seconds and then dropped: on read, on
+the next submit with a plain dict, and by a scheduled `purge_expired()`
+sweep with a modal.Dict. A job whose hand-off to the worker fails is marked
+failed with the error.
+
+Usage:
+    store = JobStore(retention=3600)
+    runner = LocalJobRunner(store, agents)
+    mount_jobs(app, agents, store, runner.submit)
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from agno_deploy.logs import log_event
+
+JOB_STATUSES = ("queued", "running", "completed", "failed")
+FINISHED_STATUSES = {"completed", "failed"}
+
+
+def _entity_id(entity) -> Optional[str]:
+    return getattr(entity, "agent_id", None) or getattr(entity, "team_id", None)
+
+
+def find_entity(agents: List[Any], entity_id: Optional[str]):
+    """Find a deployed agent or team by id; without an id, the only deployed one."""
+    if entity_id is None:
+        return agents[0] if len(agents) == 1 else None
+    for entity in agents:
+        if _entity_id(entity) == entity_id:
+            return entity
+    return None
+
+
+class JobStore:
+    """Job records keyed by job id, backed by a modal.Dict or a plain dict."""
+
+    def __init__(self, backend=None, retention: float = 3600.0, max_runtime: float = 1800.0):
+        self._backend = {} if backend is None else backend
+        self.retention = retention
+        self.max_runtime = max_runtime  # Unfinished jobs expire after retention + max_runtime
+
+    async def _call(self, fn, *args):
+        # modal.Dict calls go over the network; keep them off the event loop
+        if isinstance(self._backend, dict):
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    async def create(self, entity_id: str, message: str, session_id: Optional[str], user_id: Optional[str]) -> Dict[str, Any]:
+        now = time.time()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "entity_id": entity_id,
+            "message": message,
+            "session_id": session_id,
+            "user_id": user_id,
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "expires_at": now + self.retention + self.max_runtime,
+            "result": None,
+            "error": None,
+        }
+        await self.put(job)
+        if isinstance(self._backend, dict):
+            self._purge_expired(now)
+        return job
+
+    async def purge_expired(self) -> int:
+        """Drop every expired job (expired jobs that are never read again stay in a modal.Dict otherwise)."""
+        return await self._call(self._purge_expired, time.time())
+
+    async def put(self, job: Dict[str, Any]) -> None:
+        await self._call(self._backend.__setitem__, job["job_id"], job)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the job record, or None if it does not exist or has expired."""
+        job = await self._call(self._backend.get, job_id)
+        if job is not None and job["expires_at"] < time.time():
+            await self._call(self._delete, job_id)
+            return None
+        return job
+
+    def _delete(self, job_id: str) -> None:
+        # modal.Dict.pop takes no default; another container may have dropped the job already
+        try:
+            self._backend.pop(job_id)
+        except KeyError:
+            pass
+
+    async def update(self, job_id: str, **fields) -> Optional[Dict[str, Any]]:
+        job = await self.get(job_id)
+        if job is None:
+            return None
+        job.update(fields)
+        if fields.get("status") in FINISHED_STATUSES:
+            job["expires_at"] = job["finished_at"] + self.retention
+        await self.put(job)
+        return job
+
+    def _purge_expired(self, now: float) -> int:
+        expired = [job_id for job_id, job in self._backend.items() if job["expires_at"] < now]
+        for job_id in expired:
+            self._delete(job_id)
+        return len(expired)
+
+
+async def run_job(store: JobStore, job_id: str, agents: List[Any]) -> Optional[Dict[str, Any]]:
+    """Run one queued job to completion and store its result (used by the worker and LocalJobRunner)."""
+    job = await store.get(job_id)
+    if job is None:
+        log_event("job.missing", job_id=job_id)
+        return None
+    entity = find_entity(agents, job["entity_id"])
+    if entity is None:
+        return await store.update(
+            job_id, status="failed", finished_at=time.time(), error=f"Agent or team '{job['entity_id']}' not found"
+        )
+
+    started = time.time()
+    await store.update(job_id, status="running", started_at=started)
+    log_event("job.started", job_id=job_id, entity_id=job["entity_id"])
+    try:
+        response = await entity.arun(job["message"], session_id=job["session_id"], user_id=job["user_id"])
+    except Exception as e:
+        log_event("job.failed", job_id=job_id, error=str(e))
+        return await store.update(job_id, status="failed", finished_at=time.time(), error=str(e))
+
+    finished = time.time()
+    log_event("job.completed", job_id=job_id, duration_s=round(finished - started, 3))
+    return await store.update(job_id, status="completed", finished_at=finished, result=response.to_dict())
+
+
+class LocalJobRunner:
+    """In-process stand-in for the Modal worker function: runs jobs as background tasks."""
+
+    def __init__(self, store: JobStore, agents: List[Any]):
+        self.store = store
+        self.agents = agents
+        self._tasks = set()
+
+    async def submit(self, job_id: str) -> None:
+        task = asyncio.ensure_future(run_job(self.store, job_id, self.agents))
+        # Keep a reference so the task is not garbage collected mid-run
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+def mount_jobs(
+    app,
+    agents: List[Any],
+    store: JobStore,
+    submit: Callable[[str], Awaitable[None]],
+    poll_interval: float = 1.0,
+) -> None:
+    """Add the /jobs routes to a FastAPI app; `submit(job_id)` hands the job to a worker."""
+    from fastapi import Form, HTTPException, Query
+    from fastapi.responses import JSONResponse, StreamingResponse
+
+    @app.post("/jobs", status_code=202)
+    async def submit_job(
+        message: str = Form(...),
+        session_id: Optional[str] = Form(None),
+        user_id: Optional[str] = Form(None),
+        agent_id: Optional[str] = Query(None),
+        team_id: Optional[str] = Query(None),
+    ):
+        entity = find_entity(agents, agent_id or team_id)
+        if entity is None:
+            raise HTTPException(status_code=404, detail="Agent or team not found. Pass ?agent_id= or ?team_id=")
+        job = await store.create(_entity_id(entity), message, session_id, user_id)
+        try:
+            await submit(job["job_id"])
+        except Exception as e:
+            # Otherwise the job would stay "queued" until it expires
+            log_event("job.failed", job_id=job["job_id"], error=f"submit: {e}")
+            job = await store.update(
+                job["job_id"], status="failed", finished_at=time.time(), error=f"Could not start job: {e}"
+            )
+            return JSONResponse(
+                status_code=503, content={"job_id": job["job_id"], "status": job["status"], "error": job["error"]}
+            )
+        log_event("job.submitted", job_id=job["job_id"], entity_id=job["entity_id"])
+        return JSONResponse(
+            status_code=202,
+            content={
+                "job_id": job["job_id"],
+                "status": job["status"],
+                "poll_url": f"/jobs/{job['job_id']}",
+                "stream_url": f"/jobs/{job['job_id']}/stream",
+            },
+        )
+
+    @app.get("/jobs/{job_id}")
+    async def get_job(job_id: str):
+        job = await store.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found or expired")
+        return job
+
+    @app.get("/jobs/{job_id}/stream")
+    async def stream_job(job_id: str):
+        if await store.get(job_id) is None:
+            raise HTTPException(status_code=404, detail="Job not found or expired")
+
+        async def events():
+            last_status = None
+            while True:
+                job = await store.get(job_id)
+                if job is None:
+                    yield f"event: error\ndata: {json.dumps({'error': 'Job expired'})}\n\n"
+                    return
+                if job["status"] != last_status:
+                    last_status = job["status"]
+                    yield f"event: {last_status}\ndata: {json.dumps(job)}\n\n"
+                if last_status in FINISHED_STATUSES:
+                    return
+                await asyncio.sleep(poll_interval)
+
+        return StreamingResponse(events(), media_type="text/event-stream")
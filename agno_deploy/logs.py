@@ -0,0 +1,306 @@
+"""
+Production logging mode for Agno Modal deployments.
+
+Two modes are supported, selected by LOG_MODE in the deployment script:
+
+- "debug": the original behaviour. Agents keep their debug_mode setting and
+  deployment messages are printed to stdout with their emoji banners.
+- "production": agent debug output is switched off and every log record is
+  rendered as one JSON line by a background writer thread. Records are handed
+  over through a bounded in-memory queue, so logging never blocks the event
+  loop; the writer batches lines into a buffered stream and flushes them on a
+  short interval. High-volume events can be sampled with per-event rates.
+
+Usage:
+    from agno_deploy.logs import configure_logging, log
+
+    configure_logging("production")
+    log("🚀 Loading agent", event="deploy.load", agent_id="financial-analysis-agent")
+"""
+
+import atexit
+import io
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+from typing import Dict, Iterable, Optional
+
+LOG_MODES = ("debug", "production")
+
+# Events emitted on every request (or more often) are sampled in production.
+# Rates are keep-probabilities; events not listed here are always kept.
+DEFAULT_SAMPLE_RATES = {
+    "http.request": 0.1,
+    "tool.call": 0.1,
+    "tool.compacted": 0.1,
+    "model.chunk": 0.01,
+}
+
+# Loggers owned by Agno; their rich console handlers are replaced in production
+AGNO_LOGGER_NAMES = ("agno", "agno-team")
+
+logger = logging.getLogger("agno_deploy")
+
+_mode = "debug"
+_writer = None
+
+
+def get_log_mode() -> str:
+    """Return the active log mode ("debug" or "production")."""
+    return _mode
+
+
+def is_production() -> bool:
+    """Return True when the production logging mode is active."""
+    return _mode == "production"
+
+
+def _is_local() -> bool:
+    """Return True when running on the deploying machine rather than in a Modal container."""
+    try:
+        import modal
+        return modal.is_local()
+    except Exception:
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """Render a log record as a single JSON line with its structured fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": getattr(record, "event", None),
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            payload.update(fields)
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of high-volume events.
+
+    Warnings and errors are never sampled. The event name is taken from the
+    record's `event` attribute and falls back to the logger name.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.rates = dict(DEFAULT_SAMPLE_RATES if rates is None else rates)
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, "event", None) or record.name, 1.0)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class AsyncLogWriter:
+    """
+    Background thread that drains queued log records into a buffered stream.
+
+    Records are formatted on the writer thread, not on the caller, and written
+    in batches. When the queue is full new records are dropped and counted
+    instead of blocking the caller.
+    """
+
+    def __init__(
+        self,
+        stream=None,
+        formatter: Optional[logging.Formatter] = None,
+        max_queue: int = 10000,
+        batch_size: int = 256,
+        flush_interval: float = 0.5,
+    ):
+        if stream is None:
+            stream = io.TextIOWrapper(
+                io.BufferedWriter(io.FileIO(os.dup(sys.stdout.fileno()), "w"), buffer_size=64 * 1024),
+                encoding="utf-8",
+                line_buffering=False,
+            )
+        self.stream = stream
+        self.formatter = formatter or JSONFormatter()
+        self.queue: "queue.Queue[Optional[logging.LogRecord]]" = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self._thread = threading.Thread(target=self._run, name="agno-deploy-log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            lines = []
+            try:
+                record = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                record = None
+            else:
+                while True:
+                    if record is None:
+                        stopping = True
+                        break
+                    lines.append(self._format(record))
+                    if len(lines) >= self.batch_size:
+                        break
+                    try:
+                        record = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+            if lines:
+                self.stream.write("\n".join(lines) + "\n")
+                self.written += len(lines)
+            self.stream.flush()
+
+    def _format(self, record: logging.LogRecord) -> str:
+        try:
+            return self.formatter.format(record)
+        except Exception as e:
+            return json.dumps({"level": "error", "event": "log.format_error", "msg": str(e)})
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Flush pending records and stop the writer thread."""
+        if not self._thread.is_alive():
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+
+class AsyncQueueHandler(logging.Handler):
+    """Logging handler that hands records to an AsyncLogWriter without formatting them."""
+
+    def __init__(self, writer: AsyncLogWriter, level: int = logging.NOTSET):
+        super().__init__(level)
+        self.writer = writer
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # Resolve %-style args now; the record may reference mutable objects
+        record.msg = record.getMessage()
+        record.args = None
+        self.writer.submit(record)
+
+
+def configure_logging(
+    mode: str = "debug",
+    sample_rates: Optional[Dict[str, float]] = None,
+    level: Optional[str] = None,
+    stream=None,
+) -> None:
+    """
+    Select the log mode for this process.
+
+    In production mode the agno_deploy and Agno loggers are routed through a
+    single AsyncLogWriter. Set LOG_LEVEL (e.g. DEBUG) to change the level.
+    Calling this again with the same mode is a no-op.
+    """
+    global _mode, _writer
+
+    if mode not in LOG_MODES:
+        raise ValueError(f"❌ Unknown LOG_MODE '{mode}'. Expected one of: {', '.join(LOG_MODES)}")
+
+    if mode == _mode and (mode == "debug" or _writer is not None):
+        return
+    _mode = mode
+
+    if mode == "debug":
+        logger.setLevel(logging.DEBUG)
+        return
+
+    _writer = AsyncLogWriter(stream=stream)
+    handler = AsyncQueueHandler(_writer)
+    handler.addFilter(SamplingFilter(sample_rates))
+    log_level = getattr(logging, (level or os.getenv("LOG_LEVEL", "INFO")).upper(), logging.INFO)
+
+    for name in ("agno_deploy",) + AGNO_LOGGER_NAMES:
+        target = logging.getLogger(name)
+        target.handlers = [handler]
+        target.setLevel(log_level)
+        target.propagate = False
+
+    atexit.register(_writer.close)
+
+
+def log(message: str, event: str = "deploy", level: int = logging.DEBUG, **fields) -> None:
+    """
+    Emit a deployment message.
+
+    In debug mode this prints the message unchanged. In production mode the
+    message is printed only on the deploying machine; inside containers it
+    becomes a structured record. Deployment banners default to DEBUG so they
+    are dropped at the default level; pass level=logging.WARNING/ERROR for
+    messages that must always reach the container logs.
+    """
+    if _mode == "debug" or _is_local():
+        print(message)
+        return
+    if logger.isEnabledFor(level):
+        logger.log(level, message, extra={"event": event, "fields": fields or None})
+
+
+def log_event(event: str, level: int = logging.INFO, **fields) -> None:
+    """Emit a structured runtime event (request, tool call, ...) subject to sampling."""
+    if _mode == "debug":
+        if logger.isEnabledFor(logging.DEBUG):
+            print(f"📝 {event} {json.dumps(fields, default=str)}")
+        return
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"event": event, "fields": fields or None})
+
+
+def iter_agents(agents: Iterable) -> Iterable:
+    """Yield every agent and team, including nested team members."""
+    for agent in agents or []:
+        if agent is None:
+            continue
+        yield agent
+        members = getattr(agent, "members", None)
+        if members:
+            yield from iter_agents(members)
+
+
+def apply_log_mode(agents: Iterable) -> None:
+    """
+    Switch off Agno debug output on the given agents/teams in production mode.
+
+    Agno re-applies the log level from debug_mode on every run, so the flag
+    itself must be cleared rather than just the logger level.
+    """
+    if _mode != "production":
+        return
+    for agent in iter_agents(agents):
+        if getattr(agent, "debug_mode", False):
+            agent.debug_mode = False
+    os.environ["AGNO_DEBUG"] = "false"
+
+
+def flush_logs(timeout: float = 2.0) -> None:
+    """Flush and stop the production log writer (used on shutdown and in benchmarks)."""
+    global _writer
+    if _writer is not None:
+        _writer.close(timeout)
+        _writer = None
@@ -0,0 +1,410 @@
+"""
+Local columnar market-data store for the financial agents.
+
+Every YFinanceTools call goes to Yahoo Finance, so the same price history and
+company fundamentals are downloaded again and again by every container.
+MarketDataStore keeps them in a local directory (a Modal Volume in
+production, any plain directory in tests):
+
+    <root>/prices/AAPL.npy          float64 array, shape (6, days): date, open, high, low, close, volume
+    <root>/prices/AAPL.json         covered start date, first bar available, last refresh time
+    <root>/fundamentals/AAPL.json   tool results based on Yahoo's info dict, with fetch times
+
+- price history: each column is contiguous on disk and the file is opened
+  with numpy.memmap, so a read maps the file instead of copying or parsing
+  it; PriceSeries.between() returns views. Only missing date ranges are
+  fetched (older than the stored range, or newer than the last refresh) and
+  merged in; files are replaced atomically;
+- fundamentals: company info, fundamentals, ratios, income statements and
+  analyst recommendations are kept per ticker for `fundamentals_ttl`
+  seconds (they change at most daily).
+
+MarketDataStore.hook is an Agno tool hook: get_historical_stock_prices and
+get_technical_indicators with daily bars are answered from the store in the
+same JSON format as YFinanceTools, the fundamentals functions from the
+fundamentals cache. Everything else passes through. Reads, fetched rows and
+local vs network latency are reported in /metrics.
+
+Containers see each other's (and the warm-up job's) writes after a Volume
+reload; with `reload` set, the store reloads before going to the network,
+at most every `reload_interval` seconds.
+
+Usage:
+    store = MarketDataStore("/market-data", commit=volume.commit, reload=volume.reload)
+    apply_market_data_store(deployed_agents, store)
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from agno_deploy.logs import iter_agents, log_event
+from agno_deploy.metrics import REGISTRY, MetricsRegistry
+
+COLUMNS = ("date", "open", "high", "low", "close", "volume")
+# Column names in the YFinanceTools JSON output
+OUTPUT_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+PRICE_FUNCTIONS = {"get_historical_stock_prices": "1mo", "get_technical_indicators": "3mo"}  # name -> default period
+FUNDAMENTAL_FUNCTIONS = {
+    "get_company_info",
+    "get_stock_fundamentals",
+    "get_key_financial_ratios",
+    "get_income_statements",
+    "get_analyst_recommendations",
+}
+
+_PERIOD = re.compile(r"^(\d+)(d|wk|mo|y)$")
+_EPOCH = date(1970, 1, 1)
+_SYMBOL = re.compile(r"^[A-Z0-9.\-=^]{1,15}$")
+
+
+def _day(value: date) -> int:
+    return (value - _EPOCH).days
+
+
+def _from_day(day: int) -> date:
+    return _EPOCH + timedelta(days=int(day))
+
+
+def period_start(period: str, today: date) -> Tuple[Optional[date], Optional[int]]:
+    """Start date for a yfinance period, plus a row limit for trading-day periods ("5d" = last 5 bars)."""
+    if period == "ytd":
+        return date(today.year, 1, 1), None
+    match = _PERIOD.match(period)
+    if match is None:
+        return None, None  # "max" and unknown periods are not served from the store
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == "d":
+        # Enough calendar days to cover `count` trading days over weekends and holidays
+        return today - timedelta(days=count * 2 + 7), count
+    if unit == "wk":
+        return today - timedelta(weeks=count), None
+    if unit == "mo":
+        month = today.month - count
+        year = today.year + (month - 1) // 12
+        month = (month - 1) % 12 + 1
+        return date(year, month, min(today.day, 28)), None
+    return date(today.year - count, today.month, min(today.day, 28)), None
+
+
+class YFinanceSource:
+    """Network source: daily bars and fundamentals tool results from Yahoo Finance."""
+
+    def __init__(self):
+        self._tools = None
+
+    def history(self, symbol: str, start: date, end: date) -> np.ndarray:
+        """Daily bars for [start, end] as a (6, n) array in COLUMNS order."""
+        import yfinance as yf
+
+        frame = yf.Ticker(symbol).history(
+            start=start.isoformat(), end=(end + timedelta(days=1)).isoformat(), interval="1d", auto_adjust=True
+        )
+        if frame is None or frame.empty:
+            return np.empty((len(COLUMNS), 0))
+        days = np.array([_day(ts.date()) for ts in frame.index], dtype=np.float64)
+        return np.vstack([days] + [frame[c].to_numpy(dtype=np.float64) for c in OUTPUT_COLUMNS])
+
+    def fundamentals(self, symbol: str, function_name: str) -> str:
+        """The YFinanceTools result of a FUNDAMENTAL_FUNCTIONS function, for callers without an agent."""
+        if self._tools is None:
+            from agno.tools.yfinance import YFinanceTools
+
+            self._tools = YFinanceTools(
+                company_info=True,
+                stock_fundamentals=True,
+                income_statements=True,
+                key_financial_ratios=True,
+                analyst_recommendations=True,
+            )
+        return getattr(self._tools, function_name)(symbol)
+
+
+class PriceSeries:
+    """Memory-mapped daily bars of one ticker; columns are read-only views into the file."""
+
+    def __init__(self, data: np.ndarray):
+        self.data = data
+
+    def __len__(self) -> int:
+        return self.data.shape[1]
+
+    def column(self, name: str) -> np.ndarray:
+        return self.data[COLUMNS.index(name)]
+
+    def between(self, start: Optional[date] = None, end: Optional[date] = None) -> "PriceSeries":
+        dates = self.data[0]
+        lo = 0 if start is None else int(np.searchsorted(dates, _day(start), side="left"))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, _day(end), side="right"))
+        return PriceSeries(self.data[:, lo:hi])
+
+    def tail(self, rows: int) -> "PriceSeries":
+        return PriceSeries(self.data[:, max(0, len(self) - rows):])
+
+    def to_json(self) -> str:
+        """Same shape as YFinanceTools output: DataFrame.to_json(orient="index") keyed by epoch ms."""
+        rows = {}
+        for i in range(len(self)):
+            key = str(int(self.data[0, i]) * 86_400_000)
+            values = (float(self.data[c + 1, i]) for c in range(len(OUTPUT_COLUMNS)))
+            rows[key] = {name: (v if v == v else None) for name, v in zip(OUTPUT_COLUMNS, values)}  # NaN -> null
+        return json.dumps(rows)
+
+
+class MarketDataStore:
+    """Per-ticker price history and fundamentals on a local or Modal Volume directory."""
+
+    def __init__(
+        self,
+        root: str,
+        source: Any = None,
+        commit: Optional[Callable[[], None]] = None,
+        refresh_after: float = 900.0,
+        fundamentals_ttl: float = 6 * 3600,
+        reload: Optional[Callable[[], None]] = None,
+        reload_interval: float = 60.0,
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.root = Path(root)
+        self.source = source or YFinanceSource()
+        # Called after writes, e.g. modal.Volume.commit so other containers see the data
+        self.commit = commit
+        # Called before going to the network, e.g. modal.Volume.reload to pick up other containers' writes
+        self.reload = reload
+        self.reload_interval = reload_interval
+        self.refresh_after = refresh_after
+        self.fundamentals_ttl = fundamentals_ttl
+        self._reloaded_at = time.monotonic()
+        (self.root / "prices").mkdir(parents=True, exist_ok=True)
+        (self.root / "fundamentals").mkdir(parents=True, exist_ok=True)
+
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+        self.reads = registry.counter("market_data_reads_total", "Market data reads by kind and where they were served from")
+        self.rows_fetched = registry.counter("market_data_rows_fetched_total", "Daily bars downloaded into the store")
+        self.latency = registry.histogram("market_data_read_seconds", "Market data read latency (local or network)")
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def _lock(self, symbol: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    @staticmethod
+    def _symbol(symbol: str) -> str:
+        symbol = symbol.strip().upper()
+        if not _SYMBOL.match(symbol):
+            raise ValueError(f"❌ Invalid ticker symbol: {symbol!r}")
+        return symbol
+
+    def _write(self, path: Path, write: Callable[[Any], None], mode: str = "wb") -> None:
+        # Write next to the target and rename, so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, mode) as f:
+                write(f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _read_meta(self, symbol: str) -> Dict[str, Any]:
+        path = self.root / "prices" / f"{symbol}.json"
+        try:
+            return json.loads(path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _reload(self) -> bool:
+        """Pick up writes from other containers (at most every `reload_interval`); True if reloaded."""
+        if self.reload is None or time.monotonic() - self._reloaded_at < self.reload_interval:
+            return False
+        self._reloaded_at = time.monotonic()
+        try:
+            self.reload()
+            return True
+        except Exception as e:
+            log_event("market_data.reload_failed", error=str(e))
+            return False
+
+    def load(self, symbol: str) -> Optional[PriceSeries]:
+        """The stored bars of `symbol`, memory-mapped, or None."""
+        path = self.root / "prices" / f"{self._symbol(symbol)}.npy"
+        try:
+            return PriceSeries(np.load(path, mmap_mode="r"))
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _covered_from(stored: PriceSeries, meta: Dict[str, Any]) -> float:
+        """First day the stored bars answer for: a weekend or holiday before the first bar has no bars to fetch."""
+        first = int(stored.column("date")[0])
+        # "earliest" marks the first bar the source has at all (listing date or data horizon)
+        if meta.get("earliest") == first:
+            return float("-inf")
+        return min(first, meta.get("from", first))
+
+    def _missing_ranges(self, stored: Optional[PriceSeries], meta: Dict[str, Any], start: date, end: date):
+        if stored is None or len(stored) == 0:
+            return [(start, end)]
+        first, last = int(stored.column("date")[0]), int(stored.column("date")[-1])
+        covered_from = self._covered_from(stored, meta)
+        ranges = []
+        if _day(start) < covered_from:
+            ranges.append((start, _from_day(covered_from - 1)))
+        # The newest stored bar may be an intraday partial; refresh it once it is old enough
+        if _day(end) >= last and time.time() - meta.get("refreshed_at", 0) > self.refresh_after:
+            ranges.append((_from_day(last), end))
+        return ranges
+
+    def history(self, symbol: str, start: date, end: Optional[date] = None) -> PriceSeries:
+        """Daily bars for [start, end], fetching only what the store does not have yet."""
+        symbol = self._symbol(symbol)
+        end = end or datetime.now(timezone.utc).date()
+        started = time.monotonic()
+        with self._lock(symbol):
+            stored = self.load(symbol)
+            meta = self._read_meta(symbol)
+            ranges = self._missing_ranges(stored, meta, start, end)
+            if ranges and self._reload():
+                # The warm-up job or another container may have fetched it already
+                stored = self.load(symbol)
+                meta = self._read_meta(symbol)
+                ranges = self._missing_ranges(stored, meta, start, end)
+            if ranges:
+                try:
+                    stored = self._update(symbol, stored, meta, ranges)
+                except Exception as e:
+                    if stored is None or len(stored.between(start, end)) == 0:
+                        raise
+                    # Yahoo is unreachable: the stored bars are better than no answer
+                    log_event("market_data.stale", symbol=symbol, error=str(e))
+        source = "network" if ranges else "local"
+        self.reads.inc(kind="prices", source=source)
+        self.latency.observe(time.monotonic() - started, kind="prices", source=source)
+        return stored.between(start, end)
+
+    def _update(self, symbol: str, stored: Optional[PriceSeries], meta: Dict[str, Any], ranges) -> PriceSeries:
+        parts = [] if stored is None else [np.asarray(stored.data)]
+        for range_start, range_end in ranges:
+            fetched = self.source.history(symbol, range_start, range_end)
+            self.rows_fetched.inc(fetched.shape[1], symbol=symbol)
+            parts.append(fetched)
+            if stored is None or range_end < _from_day(stored.column("date")[0]):
+                meta["from"] = min(meta.get("from", _day(range_start)), _day(range_start))
+                # Nothing within a week of the requested start: the source has no older data
+                known = [p[0, 0] for p in parts if p.shape[1]]
+                first_fetched = fetched[0, 0] if fetched.shape[1] else _day(range_end) + 1
+                if known and first_fetched > _day(range_start) + 7:
+                    meta["earliest"] = int(min(known))
+
+        merged = np.concatenate(parts, axis=1)
+        # Later fetches win for the same day (the refreshed partial bar); keep days sorted
+        _, last_index = np.unique(merged[0][::-1], return_index=True)
+        merged = np.ascontiguousarray(merged[:, merged.shape[1] - 1 - last_index])
+
+        meta["refreshed_at"] = time.time()
+        self._write(self.root / "prices" / f"{symbol}.npy", lambda f: np.save(f, merged))
+        self._write(self.root / "prices" / f"{symbol}.json", lambda f: json.dump(meta, f), mode="w")
+        if self.commit is not None:
+            self.commit()
+        log_event("market_data.updated", symbol=symbol, rows=merged.shape[1], ranges=[[str(a), str(b)] for a, b in ranges])
+        return self.load(symbol)
+
+    def fundamentals(self, symbol: str, function_name: str, fetch: Optional[Callable[[], str]] = None) -> str:
+        """A fundamentals tool result from the store, or fetched and stored when missing or older than the TTL.
+
+        `fetch` produces the tool result on a miss; by default the source is asked.
+        """
+        symbol = self._symbol(symbol)
+        path = self.root / "fundamentals" / f"{symbol}.json"
+        started = time.monotonic()
+        with self._lock(symbol):
+            entries = self._read_fundamentals(path)
+            entry = entries.get(function_name)
+            if not self._fresh(entry) and self._reload():
+                entries = self._read_fundamentals(path)
+                entry = entries.get(function_name)
+            if self._fresh(entry):
+                source = "local"
+                result = entry["result"]
+            else:
+                source = "network"
+                result = fetch() if fetch is not None else self.source.fundamentals(symbol, function_name)
+                # Only real data is stored; error messages are returned once
+                if isinstance(result, str) and not result.startswith(("Error", "Could not")):
+                    entries[function_name] = {"fetched_at": time.time(), "result": result}
+                    self._write(path, lambda f: json.dump(entries, f), mode="w")
+                    if self.commit is not None:
+                        self.commit()
+        self.reads.inc(kind="fundamentals", source=source)
+        self.latency.observe(time.monotonic() - started, kind="fundamentals", source=source)
+        return result
+
+    @staticmethod
+    def _read_fundamentals(path: Path) -> Dict[str, Any]:
+        try:
+            return json.loads(path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _fresh(self, entry: Optional[Dict[str, Any]]) -> bool:
+        return entry is not None and time.time() - entry["fetched_at"] <= self.fundamentals_ttl
+
+    def covers(self, symbol: str, function_name: str, start: Optional[date] = None) -> bool:
+        """Whether a read would be served without downloading more than the newest bars.
+
+        Price functions need stored bars back to `start` (or to the first bar
+        the source has); fundamentals need an entry younger than the TTL.
+        """
+        symbol = self._symbol(symbol)
+        if function_name in FUNDAMENTAL_FUNCTIONS:
+            return self._fresh(self._read_fundamentals(self.root / "fundamentals" / f"{symbol}.json").get(function_name))
+        stored = self.load(symbol)
+        if stored is None or len(stored) == 0:
+            return False
+        return start is None or _day(start) >= self._covered_from(stored, self._read_meta(symbol))
+
+    def hook(self, function_name: str, function_call: Callable, arguments: Dict[str, Any]):
+        symbol = arguments.get("symbol")
+        if not isinstance(symbol, str):
+            return function_call(**arguments)
+        try:
+            if function_name in PRICE_FUNCTIONS and arguments.get("interval", "1d") == "1d":
+                today = datetime.now(timezone.utc).date()
+                start, rows = period_start(arguments.get("period", PRICE_FUNCTIONS[function_name]), today)
+                if start is not None:
+                    series = self.history(symbol, start, today)
+                    if len(series):
+                        return (series.tail(rows) if rows else series).to_json()
+            if function_name in FUNDAMENTAL_FUNCTIONS and len(arguments) == 1:
+                return self.fundamentals(symbol, function_name, lambda: function_call(**arguments))
+        except Exception as e:
+            # The store must never break a tool call; fall back to the network
+            log_event("market_data.error", function=function_name, symbol=symbol, error=str(e))
+        return function_call(**arguments)
+
+
+def apply_market_data_store(agents: Iterable[Any], store: MarketDataStore) -> int:
+    """Serve YFinanceTools reads from `store` for every agent that has them; returns how many agents."""
+    served = 0
+    for agent in iter_agents(agents):
+        if any(type(t).__module__ == "agno.tools.yfinance" for t in getattr(agent, "tools", None) or []):
+            # Innermost hook: compaction and the circuit breaker see the stored results like network ones
+            agent.tool_hooks = list(agent.tool_hooks or []) + [store.hook]
+            served += 1
+    return served
@@ -0,0 +1,297 @@
+"""
+Memory profiling of live containers with tracemalloc.
+
+Container RSS that grows over hours is hard to explain from the outside.
+MemoryProfiler lets an operator start tracemalloc in a running container,
+take snapshots, diff them and see the top allocation sites, both per source
+line and grouped by module:
+
+- agno, pandas, numpy, yfinance, openai, httpx, ...: the installed package
+  the allocating line belongs to (its top-level name in site-packages);
+- app: our own code, i.e. agno_deploy and the deployed agent module
+  (the directory holding agno_deploy, plus any `app_roots`), reported per
+  top-level module as app:<name>;
+- stdlib: the Python standard library.
+
+tracemalloc only sees allocations made after start() and slows allocation
+down while it runs (more with more `frames`), so it is off until started
+and should be stopped after the investigation. Snapshots live in the
+container that took them; every response names the container, since Modal
+may route the next request to another one.
+
+mount_memory_profiler adds the admin endpoints (token-protected, see
+agno_deploy.admin):
+
+    GET  /admin/memory                      tracing state, traced and RSS bytes, snapshots
+    POST /admin/memory/start?frames=1       start tracing
+    POST /admin/memory/stop                 stop tracing (drops the traces)
+    POST /admin/memory/snapshots            take a snapshot, returns its id and top sites
+    GET  /admin/memory/snapshots/{id}       top sites of a snapshot
+    GET  /admin/memory/diff?base=&target=   growth between two snapshots (default: target is the
+                                            latest, base the one taken before target)
+
+Usage:
+    profiler = MemoryProfiler()
+    mount_memory_profiler(app, profiler, token=os.getenv("AUTH_TOKEN"))
+"""
+
+import asyncio
+import itertools
+import os
+import sysconfig
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+from agno_deploy.admin import admin_guard, container_id
+from agno_deploy.logs import log_event
+
+_STDLIB = os.path.realpath(sysconfig.get_paths()["stdlib"])
+# Allocations made by the profiler itself
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux), or None."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+class MemoryProfiler:
+    """tracemalloc control, snapshots and module-grouped reports for one container."""
+
+    def __init__(self, app_roots: Iterable[str] = (), max_snapshots: int = 5, max_frames: int = 25):
+        # The directory holding agno_deploy also holds the deploy scripts and agent modules
+        deploy_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.app_roots = [os.path.realpath(p) for p in [*app_roots, deploy_root]]
+        self.max_snapshots = max_snapshots
+        self.max_frames = max_frames
+        self._snapshots: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._groups: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def group(self, filename: str) -> str:
+        """Module group of a source file: a package name, app:<module>, stdlib or other."""
+        group = self._groups.get(filename)
+        if group is None:
+            group = self._groups[filename] = self._classify(filename)
+        return group
+
+    def _classify(self, filename: str) -> str:
+        if filename.startswith("<"):
+            return "other"  # <frozen ...>, <string>: no file to attribute
+        path = os.path.realpath(filename)
+        for marker in ("site-packages" + os.sep, "dist-packages" + os.sep):
+            if marker in path:
+                return os.path.splitext(path.split(marker, 1)[1].split(os.sep)[0])[0]
+        for root in self.app_roots:
+            if path.startswith(root + os.sep):
+                return "app:" + os.path.splitext(os.path.relpath(path, root).split(os.sep)[0])[0]
+        return "stdlib" if path.startswith(_STDLIB) else "other"
+
+    def start(self, frames: int = 1) -> Dict[str, Any]:
+        frames = max(1, min(frames, self.max_frames))
+        if tracemalloc.is_tracing():
+            return dict(self.status(), started=False)
+        tracemalloc.start(frames)
+        log_event("memory_profiler.started", frames=frames)
+        return dict(self.status(), started=True)
+
+    def stop(self) -> Dict[str, Any]:
+        was_tracing = tracemalloc.is_tracing()
+        tracemalloc.stop()
+        if was_tracing:
+            log_event("memory_profiler.stopped")
+        return dict(self.status(), stopped=was_tracing)
+
+    def status(self) -> Dict[str, Any]:
+        tracing = tracemalloc.is_tracing()
+        traced, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        with self._lock:
+            snapshots = [{k: v for k, v in s.items() if k != "snapshot"} for s in self._snapshots.values()]
+        return {
+            "container": container_id(),
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else None,
+            "traced_bytes": traced,
+            "traced_peak_bytes": peak,
+            "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory() if tracing else 0,
+            "rss_bytes": rss_bytes(),
+            "snapshots": snapshots,
+        }
+
+    def snapshot(self, label: str = "") -> Dict[str, Any]:
+        """Take a snapshot; the oldest is dropped beyond `max_snapshots`."""
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not running: POST /admin/memory/start first")
+        started = time.monotonic()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        entry = {
+            "id": next(self._ids),
+            "label": label,
+            "taken_at": time.time(),
+            "traced_bytes": sum(t.size for t in snapshot.traces),
+            "rss_bytes": rss_bytes(),
+            "snapshot": snapshot,
+        }
+        with self._lock:
+            self._snapshots[entry["id"]] = entry
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        log_event("memory_profiler.snapshot", id=entry["id"], traced_bytes=entry["traced_bytes"],
+                  duration_ms=round((time.monotonic() - started) * 1000, 1))
+        return entry
+
+    def get(self, snapshot_id: Optional[int] = None, offset: int = 1) -> Dict[str, Any]:
+        """Snapshot `snapshot_id`, or the `offset`-th most recent one."""
+        with self._lock:
+            if snapshot_id is None:
+                ids = list(self._snapshots)
+                if len(ids) < offset:
+                    raise KeyError(f"{offset} snapshot(s) needed in this container, {len(ids)} taken")
+                snapshot_id = ids[-offset]
+            if snapshot_id not in self._snapshots:
+                raise KeyError(f"Snapshot {snapshot_id} is not in this container (known: {list(self._snapshots)})")
+            return self._snapshots[snapshot_id]
+
+    def previous(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """The snapshot taken just before `entry`."""
+        with self._lock:
+            older = [snapshot_id for snapshot_id in self._snapshots if snapshot_id < entry["id"]]
+            if not older:
+                raise KeyError(f"No snapshot older than {entry['id']} in this container "
+                               f"(known: {list(self._snapshots)})")
+            return self._snapshots[older[-1]]
+
+    def _site(self, frame) -> str:
+        return f"{frame.filename}:{frame.lineno}"
+
+    def top(self, entry: Dict[str, Any], limit: int = 20) -> Dict[str, Any]:
+        """Largest allocation sites of a snapshot, and bytes per module group."""
+        stats = entry["snapshot"].statistics("lineno")
+        groups: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+        for stat in stats:
+            totals = groups[self.group(stat.traceback[0].filename)]
+            totals[0] += stat.size
+            totals[1] += stat.count
+        return {
+            "container": container_id(),
+            "snapshot": {k: v for k, v in entry.items() if k != "snapshot"},
+            "modules": [
+                {"module": name, "bytes": size, "blocks": count}
+                for name, (size, count) in sorted(groups.items(), key=lambda g: -g[1][0])[:limit]
+            ],
+            "sites": [
+                {
+                    "site": self._site(stat.traceback[0]),
+                    "module": self.group(stat.traceback[0].filename),
+                    "bytes": stat.size,
+                    "blocks": stat.count,
+                }
+                for stat in stats[:limit]
+            ],
+        }
+
+    def diff(self, base: Dict[str, Any], target: Dict[str, Any], limit: int = 20) -> Dict[str, Any]:
+        """Allocation growth from `base` to `target`, per site and per module group (largest growth first)."""
+        stats = target["snapshot"].compare_to(base["snapshot"], "lineno")
+        groups: Dict[str, List[int]] = defaultdict(lambda: [0, 0, 0])
+        for stat in stats:
+            totals = groups[self.group(stat.traceback[0].filename)]
+            totals[0] += stat.size_diff
+            totals[1] += stat.count_diff
+            totals[2] += stat.size
+        return {
+            "container": container_id(),
+            "base": {k: v for k, v in base.items() if k != "snapshot"},
+            "target": {k: v for k, v in target.items() if k != "snapshot"},
+            "seconds": round(target["taken_at"] - base["taken_at"], 1),
+            "modules": [
+                {"module": name, "bytes_diff": diff, "blocks_diff": count, "bytes": size}
+                for name, (diff, count, size) in sorted(groups.items(), key=lambda g: -g[1][0])[:limit]
+            ],
+            "sites": [
+                {
+                    "site": self._site(stat.traceback[0]),
+                    "module": self.group(stat.traceback[0].filename),
+                    "bytes_diff": stat.size_diff,
+                    "blocks_diff": stat.count_diff,
+                    "bytes": stat.size,
+                }
+                for stat in stats[:limit]
+            ],
+        }
+
+
+def mount_memory_profiler(app, profiler: MemoryProfiler, token: Optional[str]) -> None:
+    """Add the token-protected /admin/memory endpoints to a FastAPI app."""
+    from fastapi import Depends, HTTPException, Query
+
+    admin = [Depends(admin_guard(token))]
+
+    async def status():
+        return profiler.status()
+
+    async def start(frames: int = Query(1, ge=1, le=profiler.max_frames, description="Stack frames kept per allocation")):
+        return profiler.start(frames)
+
+    async def stop():
+        return profiler.stop()
+
+    async def take_snapshot(
+        label: str = Query("", description="Free-text label, e.g. 'after 100 requests'"),
+        limit: int = Query(20, ge=1, le=200),
+    ):
+        try:
+            # Snapshots of a large heap take a while; keep the event loop serving requests
+            entry = await asyncio.to_thread(profiler.snapshot, label)
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        return await asyncio.to_thread(profiler.top, entry, limit)
+
+    async def show_snapshot(snapshot_id: int, limit: int = Query(20, ge=1, le=200)):
+        try:
+            entry = profiler.get(snapshot_id)
+        except KeyError as e:
+            raise HTTPException(status_code=404, detail=str(e.args[0]))
+        return await asyncio.to_thread(profiler.top, entry, limit)
+
+    async def diff(
+        base: Optional[int] = Query(None, description="Snapshot id; the one taken before target when omitted"),
+        target: Optional[int] = Query(None, description="Snapshot id; the most recent when omitted"),
+        limit: int = Query(20, ge=1, le=200),
+    ):
+        try:
+            target_entry = profiler.get(target)
+            base_entry = profiler.get(base) if base is not None else profiler.previous(target_entry)
+        except KeyError as e:
+            raise HTTPException(status_code=404, detail=str(e.args[0]))
+        if base_entry["id"] >= target_entry["id"]:
+            raise HTTPException(
+                status_code=422, detail=f"base ({base_entry['id']}) must be older than target ({target_entry['id']})"
+            )
+        return await asyncio.to_thread(profiler.diff, base_entry, target_entry, limit)
+
+    for path, handler, method in (
+        ("/admin/memory", status, "GET"),
+        ("/admin/memory/start", start, "POST"),
+        ("/admin/memory/stop", stop, "POST"),
+        ("/admin/memory/snapshots", take_snapshot, "POST"),
+        ("/admin/memory/snapshots/{snapshot_id}", show_snapshot, "GET"),
+        ("/admin/memory/diff", diff, "GET"),
+    ):
+        app.add_api_route(path, handler, methods=[method], dependencies=admin, tags=["Admin"])
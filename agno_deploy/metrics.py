@@ -0,0 +1,222 @@
+"""
+In-process metrics for Agno Modal deployments.
+
+A small registry of counters, gauges and histograms shared by the runtime
+helpers in this package. Each container keeps its own registry; the values
+are served from GET /metrics as JSON (default) or in the Prometheus text
+format (?format=prometheus).
+
+Usage:
+    from agno_deploy.metrics import REGISTRY
+
+    requests = REGISTRY.counter("requests_total", "Requests served")
+    requests.inc(agent_id="financial-analysis-agent")
+
+    latency = REGISTRY.histogram("request_seconds", "Request latency")
+    latency.observe(0.42, agent_id="financial-analysis-agent")
+"""
+
+import bisect
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from 1 ms up to the 300 s Modal TIMEOUT
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Dict[str, str]] = None) -> str:
+    items = list(key) + sorted((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class Counter:
+    """Monotonically increasing value, one series per label set."""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str = ""):
+        self.name = name
+        self.help = help
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def total(self) -> float:
+        return sum(self._values.values())
+
+    def snapshot(self) -> List[dict]:
+        return [{"labels": dict(k), "value": v} for k, v in list(self._values.items())]
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(k)} {v}" for k, v in list(self._values.items())]
+
+
+class Gauge(Counter):
+    """Value that can go up and down, one series per label set."""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = float(value)
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """
+    Bucketed distribution of observed values, one series per label set.
+
+    Quantiles are estimated by linear interpolation inside the bucket that
+    contains them, which is accurate enough for p50/p95 dashboards.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, dict] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {"counts": [0] * (len(self.buckets) + 1), "count": 0, "sum": 0.0, "max": 0.0}
+                self._series[key] = series
+            series["counts"][index] += 1
+            series["count"] += 1
+            series["sum"] += value
+            series["max"] = max(series["max"], value)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(_label_key(labels))
+        return series["count"] if series else 0
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        series = self._series.get(_label_key(labels))
+        if not series or not series["count"]:
+            return None
+        return self._quantile(series, q)
+
+    def _quantile(self, series: dict, q: float) -> float:
+        target = q * series["count"]
+        cumulative = 0
+        for i, count in enumerate(series["counts"]):
+            if count and cumulative + count >= target:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else series["max"]
+                return lower + (upper - lower) * ((target - cumulative) / count)
+            cumulative += count
+        return series["max"]
+
+    def snapshot(self) -> List[dict]:
+        result = []
+        for key, series in list(self._series.items()):
+            result.append({
+                "labels": dict(key),
+                "count": series["count"],
+                "sum": round(series["sum"], 6),
+                "max": round(series["max"], 6),
+                "p50": round(self._quantile(series, 0.5), 6),
+                "p95": round(self._quantile(series, 0.95), 6),
+                "p99": round(self._quantile(series, 0.99), 6),
+                "buckets": {str(b): c for b, c in zip(self.buckets + ("+Inf",), series["counts"]) if c},
+            })
+        return result
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, series in list(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series["counts"]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': str(bound)})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series['sum']}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of metrics; asking twice for a name returns the same metric."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, help, **kwargs)
+                self._metrics[name] = metric
+            elif type(metric) is not cls:
+                raise ValueError(f"❌ Metric '{name}' already registered as {metric.type}")
+            return metric
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get_or_create(Counter, name, help)
+
+    def gauge(self, name: str, help: str = "") -> Gauge:
+        return self._get_or_create(Gauge, name, help)
+
+    def histogram(self, name: str, help: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, buckets=buckets)
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def snapshot(self) -> dict:
+        return {
+            name: {"type": metric.type, "help": metric.help, "series": metric.snapshot()}
+            for name, metric in sorted(self._metrics.items())
+        }
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            if metric.help:
+                lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry used by every runtime helper
+REGISTRY = MetricsRegistry()
+
+
+def mount_metrics(app, path: str = "/metrics", registry: MetricsRegistry = REGISTRY) -> None:
+    """Add a GET route serving the registry as JSON or Prometheus text."""
+    from fastapi import Query
+    from fastapi.responses import PlainTextResponse
+
+    async def metrics(format: str = Query("json", description="json or prometheus")):
+        if format == "prometheus":
+            return PlainTextResponse(registry.render_prometheus(), media_type="text/plain; version=0.0.4")
+        return registry.snapshot()
+
+    app.add_api_route(path, metrics, methods=["GET"], tags=["Metrics"])
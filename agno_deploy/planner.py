@@ -0,0 +1,188 @@
+"""
+Capacity planner for Agno Modal deployments.
+
+Derives the @app.function settings (MAX_CONCURRENT, MIN_CONTAINERS,
+MAX_CONTAINERS, TIMEOUT, CPU and memory) from benchmark measurements and a
+target traffic profile, and prints the expected p95 latency and cost.
+
+Benchmark file (JSON):
+    {
+      "cpu_seconds_per_request": 0.15,      # CPU time spent in the container per request
+      "memory_mb_per_session": 4.0,         # Memory held per live session
+      "base_memory_mb": 400,                # Container memory with agents loaded and idle
+      "latency": [                          # Latency (seconds) measured at each per-container concurrency
+        {"concurrency": 1, "mean": 5.2, "p95": 8.1, "max": 41.0},   # "max" is optional
+        {"concurrency": 50, "mean": 5.9, "p95": 9.4}
+      ]
+    }
+
+Usage:
+    python -m agno_deploy.planner benchmarks/capacity_profile.example.json --peak-rps 20 --p95-slo 15
+    python -m agno_deploy.planner bench.json --peak-rps 20 --write deploy_config.json
+"""
+
+import argparse
+import json
+import math
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+from agno_deploy.config import write_deploy_config
+
+# Modal list prices (USD per second); override with --cpu-price / --memory-price
+DEFAULT_CPU_PRICE = 0.0000131      # per physical core-second
+DEFAULT_MEMORY_PRICE = 0.00000222  # per GiB-second
+
+
+def _ceil_to(value: float, step: float) -> float:
+    return math.ceil(value / step - 1e-9) * step
+
+
+def load_benchmark(path: Path) -> Dict[str, Any]:
+    """Load and validate a benchmark file."""
+    with open(path, "r") as f:
+        benchmark = json.load(f)
+    for key in ("cpu_seconds_per_request", "memory_mb_per_session", "base_memory_mb", "latency"):
+        if key not in benchmark:
+            raise ValueError(f"❌ Benchmark file {path} is missing '{key}'")
+    points = benchmark["latency"]
+    if not points or any({"concurrency", "mean", "p95"} - set(p) for p in points):
+        raise ValueError(f"❌ Every latency point in {path} needs 'concurrency', 'mean' and 'p95'")
+    benchmark["latency"] = sorted(points, key=lambda p: p["concurrency"])
+    return benchmark
+
+
+def plan_capacity(
+    benchmark: Dict[str, Any],
+    peak_rps: float,
+    p95_slo: float,
+    baseline_rps: float = 0.0,
+    max_cpu: float = 4.0,
+    target_cpu_util: float = 0.7,
+    headroom: float = 1.3,
+    peak_hours: float = 8.0,
+    cpu_price: float = DEFAULT_CPU_PRICE,
+    memory_price: float = DEFAULT_MEMORY_PRICE,
+) -> Dict[str, Any]:
+    """
+    Pick the highest per-container concurrency that meets the p95 SLO within the CPU limit.
+
+    Containers are sized with Little's law: in-flight requests = rate x mean
+    latency. Returns the recommended settings plus the expected p95 and cost.
+    """
+    cpu_per_request = benchmark["cpu_seconds_per_request"]
+    rejected: List[str] = []
+    chosen = None
+    for point in benchmark["latency"]:
+        concurrency, mean = point["concurrency"], point["mean"]
+        busy_cores = concurrency * cpu_per_request / mean
+        if point["p95"] > p95_slo:
+            rejected.append(f"concurrency {concurrency}: p95 {point['p95']:.1f}s > SLO {p95_slo:.1f}s")
+        elif busy_cores / target_cpu_util > max_cpu:
+            rejected.append(f"concurrency {concurrency}: needs {busy_cores / target_cpu_util:.2f} cores > {max_cpu}")
+        else:
+            chosen = (point, busy_cores)
+    if chosen is None:
+        raise ValueError("❌ No benchmarked concurrency meets the targets:\n   " + "\n   ".join(rejected))
+
+    point, busy_cores = chosen
+    concurrency, mean = point["concurrency"], point["mean"]
+    cpu = max(0.25, _ceil_to(busy_cores / target_cpu_util, 0.25))
+    memory = int(_ceil_to(benchmark["base_memory_mb"] + concurrency * benchmark["memory_mb_per_session"] * 1.25, 128))
+
+    peak_containers = math.ceil(peak_rps * mean / concurrency)
+    baseline_containers = max(1, math.ceil(baseline_rps * mean / concurrency))
+    max_containers = max(baseline_containers, math.ceil(peak_containers * headroom))
+    # Leave room for the slowest runs (deep multi-ticker analyses), not just the p95
+    slowest = point.get("max", point["p95"] * 2)
+    timeout = int(_ceil_to(max(120.0, slowest * 2), 30))
+
+    container_hour = (cpu * cpu_price + memory / 1024 * memory_price) * 3600
+    # MIN_CONTAINERS stay billed at peak too, even when the peak needs fewer busy containers
+    billed_at_peak = max(peak_containers, baseline_containers)
+    daily_cost = container_hour * (peak_hours * billed_at_peak + (24 - peak_hours) * baseline_containers)
+    requests_per_container_hour = concurrency / mean * 3600
+
+    return {
+        "settings": {
+            "max_concurrent": concurrency,
+            "min_containers": baseline_containers,
+            "max_containers": max_containers,
+            "timeout": timeout,
+            "cpu": cpu,
+            "memory": memory,
+        },
+        "expected": {
+            "p95_seconds": point["p95"],
+            "mean_seconds": mean,
+            "peak_containers": peak_containers,
+            "cpu_utilization": round(busy_cores / cpu, 2),
+            "cost_per_container_hour": round(container_hour, 4),
+            "cost_per_1k_requests": round(container_hour / requests_per_container_hour * 1000, 4),
+            "daily_cost": round(daily_cost, 2),
+        },
+        "rejected": rejected,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recommend Modal settings from benchmark results")
+    parser.add_argument("benchmark", type=Path, help="Benchmark JSON file")
+    parser.add_argument("--peak-rps", type=float, required=True, help="Peak requests per second")
+    parser.add_argument("--baseline-rps", type=float, default=0.0, help="Off-peak requests per second")
+    parser.add_argument("--p95-slo", type=float, default=30.0, help="Target p95 latency in seconds")
+    parser.add_argument("--peak-hours", type=float, default=8.0, help="Hours per day at peak traffic")
+    parser.add_argument("--max-cpu", type=float, default=4.0, help="Largest CPU request per container")
+    parser.add_argument("--target-cpu-util", type=float, default=0.7, help="CPU utilization to size for")
+    parser.add_argument("--headroom", type=float, default=1.3, help="MAX_CONTAINERS multiplier over peak")
+    parser.add_argument("--cpu-price", type=float, default=DEFAULT_CPU_PRICE, help="USD per core-second")
+    parser.add_argument("--memory-price", type=float, default=DEFAULT_MEMORY_PRICE, help="USD per GiB-second")
+    parser.add_argument("--write", type=Path, metavar="CONFIG", help="Write settings to this deploy_config.json")
+    parser.add_argument("--json", action="store_true", help="Print the plan as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        plan = plan_capacity(
+            load_benchmark(args.benchmark),
+            peak_rps=args.peak_rps,
+            p95_slo=args.p95_slo,
+            baseline_rps=args.baseline_rps,
+            max_cpu=args.max_cpu,
+            target_cpu_util=args.target_cpu_util,
+            headroom=args.headroom,
+            peak_hours=args.peak_hours,
+            cpu_price=args.cpu_price,
+            memory_price=args.memory_price,
+        )
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(plan, indent=2))
+    else:
+        settings, expected = plan["settings"], plan["expected"]
+        print("📐 Recommended @app.function settings")
+        print(f"   MAX_CONCURRENT: {settings['max_concurrent']}")
+        print(f"   MIN_CONTAINERS: {settings['min_containers']}")
+        print(f"   MAX_CONTAINERS: {settings['max_containers']}")
+        print(f"   TIMEOUT:        {settings['timeout']} s")
+        print(f"   CPU:            {settings['cpu']} cores")
+        print(f"   MEMORY:         {settings['memory']} MB")
+        print("📊 Expected at peak")
+        print(f"   p95 latency:    {expected['p95_seconds']:.1f} s (mean {expected['mean_seconds']:.1f} s)")
+        print(f"   containers:     {expected['peak_containers']} busy, CPU {expected['cpu_utilization']:.0%}")
+        print(f"💰 Cost: ${expected['cost_per_container_hour']}/container-hour, "
+              f"${expected['cost_per_1k_requests']}/1k requests, ~${expected['daily_cost']}/day")
+        for reason in plan["rejected"]:
+            print(f"   ⚠️  Skipped {reason}")
+
+    if args.write:
+        write_deploy_config(args.write, dict(plan["settings"], _planner=plan["expected"]))
+        print(f"✅ Wrote {args.write}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
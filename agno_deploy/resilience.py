@@ -0,0 +1,293 @@
+"""
+Hedged requests and latency-aware retries for model API calls.
+
+Most of the tail latency of an agent run is a slow model response: one call
+in twenty takes several times longer than the rest, for reasons on the
+provider's side. HedgingTransport sits under the pooled model client (see
+http_pool.HTTPClientPool) and handles every chat completion request:
+
+- hedging: when the first attempt has not produced its first byte (the first
+  token of a streamed completion) within the recent p95 time-to-first-token,
+  an identical second request is sent. The first response to arrive wins and
+  the other request is cancelled, so a slow upstream replica costs at most
+  p95 plus one normal response time;
+- retries: connection errors and 429/5xx responses are retried with jittered
+  exponential backoff (a Retry-After header is honoured up to the cap);
+- retry budget: each request may make at most `max_attempts` attempts,
+  hedges included, and no new attempt is started after `budget_s` seconds,
+  so a struggling provider is not flooded with extra traffic.
+
+The p95 is tracked per model and per streaming/non-streaming call from the
+last `window` successful attempts; hedging starts once `min_samples` have
+been seen. Hedges, retries, wins and time to first byte are reported in
+/metrics. apply_shared_clients() turns the OpenAI SDK's own retries off for
+models behind this transport, so attempts are not multiplied.
+
+Usage:
+    policy = ResiliencePolicy(max_attempts=3)
+    pool = HTTPClientPool(wrap_transport=policy.wrap)
+
+Try it against the local mock model server (benchmarks/mock_model_server.py):
+    python -m benchmarks.hedging
+"""
+
+import asyncio
+import collections
+import json
+import random
+import threading
+import time
+from typing import Deque, Dict, Optional, Tuple
+
+import httpx
+
+from agno_deploy.metrics import REGISTRY, MetricsRegistry
+
+# Responses worth another attempt: rate limited, overloaded or failing upstream
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# Only model calls are hedged and retried; everything else passes through
+DEFAULT_PATHS = ("/chat/completions", "/completions", "/responses")
+
+
+class LatencyTracker:
+    """Rolling time-to-first-byte samples per key, with a p95 estimate."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[Tuple[str, bool], Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, key: Tuple[str, bool], seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = collections.deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def quantile(self, key: Tuple[str, bool], q: float, min_samples: int) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class ResiliencePolicy:
+    """Settings and shared state for HedgingTransport; `wrap` plugs into HTTPClientPool."""
+
+    def __init__(
+        self,
+        hedge: bool = True,
+        hedge_quantile: float = 0.95,
+        min_hedge_delay: float = 0.05,
+        max_hedge_delay: float = 10.0,
+        min_samples: int = 20,
+        window: int = 200,
+        max_attempts: int = 3,
+        budget_s: float = 60.0,
+        backoff_base: float = 0.25,
+        backoff_cap: float = 8.0,
+        paths: Tuple[str, ...] = DEFAULT_PATHS,
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.min_samples = min_samples
+        self.max_attempts = max(1, max_attempts)
+        self.budget_s = budget_s
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.paths = paths
+        self.latency = LatencyTracker(window)
+
+        self.attempts = registry.counter("model_attempts_total", "Model API attempts by kind (primary, hedge, retry)")
+        self.outcomes = registry.counter("model_requests_total", "Model API requests by outcome")
+        self.ttfb = registry.histogram("model_ttfb_seconds", "Time to first byte (first token when streaming) of model calls")
+        self.hedge_delay = registry.gauge("model_hedge_delay_seconds", "Current hedging threshold (p95 time to first byte)")
+
+    def wrap(self, transport: httpx.AsyncBaseTransport, upstream: str) -> "HedgingTransport":
+        return HedgingTransport(transport, self, upstream)
+
+    def hedge_after(self, key: Tuple[str, bool]) -> Optional[float]:
+        """Seconds to wait before hedging a request, or None while there are too few samples."""
+        if not self.hedge:
+            return None
+        p95 = self.latency.quantile(key, self.hedge_quantile, self.min_samples)
+        if p95 is None:
+            return None
+        return min(self.max_hedge_delay, max(self.min_hedge_delay, p95))
+
+    def backoff(self, retry: int, response: Optional[httpx.Response] = None) -> float:
+        """Full-jitter exponential backoff; a numeric Retry-After within the cap wins."""
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(self.backoff_cap, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** retry))
+
+
+class _PrefetchedStream(httpx.AsyncByteStream):
+    """Response body whose first chunk was already read while racing attempts."""
+
+    def __init__(self, first: bytes, chunks, response: httpx.Response):
+        self._first = first
+        self._chunks = chunks
+        self._response = response
+
+    async def __aiter__(self):
+        if self._first:
+            yield self._first
+        async for chunk in self._chunks:
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self._response.aclose()
+
+
+class HedgingTransport(httpx.AsyncBaseTransport):
+    """httpx transport that hedges slow model calls and retries failed ones within a budget."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, policy: ResiliencePolicy, upstream: str):
+        self.transport = transport
+        self.policy = policy
+        self.upstream = upstream
+
+    def _applies(self, request: httpx.Request) -> bool:
+        return request.method == "POST" and request.url.path.endswith(self.policy.paths)
+
+    @staticmethod
+    def _key(request: httpx.Request) -> Tuple[str, bool]:
+        try:
+            body = json.loads(request.content or b"{}")
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            body = {}
+        return str(body.get("model", "")), bool(body.get("stream"))
+
+    async def _attempt(self, request: httpx.Request) -> Tuple[httpx.Response, float]:
+        """Send one attempt and wait for its first body chunk; returns the response and that delay."""
+        started = time.monotonic()
+        response = await self.transport.handle_async_request(request)
+        try:
+            chunks = response.stream.__aiter__()
+            try:
+                first = await chunks.__anext__()
+            except StopAsyncIteration:
+                first = b""
+        except BaseException:
+            await response.aclose()
+            raise
+        prefetched = httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_PrefetchedStream(first, chunks, response),
+            extensions=response.extensions,
+        )
+        return prefetched, time.monotonic() - started
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not self._applies(request):
+            return await self.transport.handle_async_request(request)
+
+        policy = self.policy
+        await request.aread()  # Attempts re-send the same body
+        key = self._key(request)
+        started = time.monotonic()
+        hedge_delay = policy.hedge_after(key)
+        if hedge_delay is not None:
+            policy.hedge_delay.set(hedge_delay, upstream=self.upstream, model=key[0], stream=key[1])
+
+        pending: Dict[asyncio.Task, str] = {}
+        attempts = retries = 0
+        hedged = False
+        retry_at: Optional[float] = None
+        last_response: Optional[httpx.Response] = None
+        last_error: Optional[Exception] = None
+
+        def launch(kind: str) -> None:
+            nonlocal attempts
+            attempts += 1
+            policy.attempts.inc(upstream=self.upstream, kind=kind)
+            pending[asyncio.ensure_future(self._attempt(request))] = kind
+
+        launch("primary")
+        try:
+            while pending or retry_at is not None:
+                now = time.monotonic()
+                # Next moment something has to happen without an attempt finishing
+                wake_at = retry_at
+                if pending and not hedged and hedge_delay is not None and attempts < policy.max_attempts:
+                    wake_at = started + hedge_delay
+                if retry_at is not None and now >= retry_at:
+                    retry_at = None
+                    launch("retry")
+                    continue
+                if not pending:
+                    await asyncio.sleep(max(0.0, wake_at - now))
+                    continue
+
+                timeout = None if wake_at is None else max(0.0, wake_at - now)
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    # Past the time budget the running attempt is left to finish on its own
+                    if time.monotonic() - started < policy.budget_s:
+                        launch("hedge")
+                    continue
+
+                for task in done:
+                    kind = pending.pop(task)
+                    try:
+                        response, ttfb = task.result()
+                    except httpx.TransportError as e:
+                        last_error = e
+                        continue
+                    if response.status_code in RETRY_STATUSES:
+                        if last_response is not None:
+                            await last_response.aclose()
+                        last_response = response
+                        continue
+
+                    # The winner: record its latency and drop everything else
+                    policy.latency.observe(key, ttfb)
+                    policy.ttfb.observe(ttfb, upstream=self.upstream, model=key[0])
+                    outcome = "hedge_won" if kind == "hedge" else ("retried" if kind == "retry" else "ok")
+                    policy.outcomes.inc(upstream=self.upstream, outcome=outcome)
+                    if last_response is not None:
+                        await last_response.aclose()
+                    return response
+
+                if pending:
+                    continue
+                # Every attempt so far failed: retry if the budget allows
+                delay = policy.backoff(retries, last_response)
+                if attempts < policy.max_attempts and time.monotonic() + delay - started < policy.budget_s:
+                    retries += 1
+                    retry_at = time.monotonic() + delay
+                    hedged = True  # Retries are not hedged; the hedge threshold counts from the first attempt
+        finally:
+            for task in pending:
+                task.cancel()
+                task.add_done_callback(_close_response)
+
+        policy.outcomes.inc(upstream=self.upstream, outcome="failed")
+        if last_response is not None:
+            return last_response
+        raise last_error
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def _close_response(task: asyncio.Task) -> None:
+    # A cancelled attempt that still produced a response must release its connection
+    if not task.cancelled() and task.exception() is None:
+        response, _ = task.result()
+        asyncio.ensure_future(response.aclose())
+
@@ -0,0 +1,180 @@
+"""
+Zero-LLM intent router for multi-agent deployments.
+
+Clients of a multi-agent app have to know which agent_id to call. POST /route
+picks the agent locally, in well under a millisecond, and forwards the
+request to it, with no extra LLM round trip:
+
+- keyword rules: phrases per agent_id ("stop loss", "income statement", ...);
+  each matching phrase adds `rule_weight` to that agent's score;
+- TF-IDF similarity between the message and a profile built from each
+  agent's name, role, description and instructions.
+
+The highest score wins. When nothing scores above `min_score` the default
+agent (the first deployed one unless configured) is used. Every decision is
+logged as a "route.decision" event with the scores, latency and a hash and
+length of the message (never its text), and counted in /metrics, so rules
+can be tuned from production traffic.
+GET /route/explain?message=... shows the decision without running the agent;
+explain calls are not logged or counted, so they never skew the metrics.
+"""
+
+import hashlib
+import math
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from agno_deploy.logs import log_event
+from agno_deploy.metrics import REGISTRY, MetricsRegistry
+
+STOPWORDS = {
+    "a", "about", "and", "any", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "give", "how",
+    "i", "in", "is", "it", "its", "me", "my", "of", "on", "or", "should", "tell", "that", "the", "this", "to",
+    "what", "when", "which", "with", "you", "your",
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _stem(word: str) -> str:
+    # Just enough stemming to match "strategies"/"strategy" and "trading"/"trade"
+    if len(word) > 4 and word.endswith("ies"):
+        word = word[:-3] + "y"
+    elif len(word) > 5 and word.endswith("ing"):
+        word = word[:-3]
+    elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    if len(word) > 4 and word.endswith("e"):
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(w) for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+
+
+def agent_profile(agent) -> str:
+    """Text describing what an agent is for: name, role, description and instructions."""
+    parts = [getattr(agent, field, None) for field in ("name", "role", "description")]
+    instructions = getattr(agent, "instructions", None)
+    if isinstance(instructions, str):
+        parts.append(instructions)
+    elif isinstance(instructions, (list, tuple)):
+        parts.extend(str(line) for line in instructions)
+    return "\n".join(p for p in parts if p)
+
+
+class IntentRouter:
+    """Score each agent for a message with keyword rules plus TF-IDF over agent profiles."""
+
+    def __init__(
+        self,
+        agents: Iterable[Any],
+        rules: Optional[Dict[str, List[str]]] = None,
+        default_agent_id: Optional[str] = None,
+        rule_weight: float = 0.5,
+        min_score: float = 0.05,
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.agents = {agent.agent_id: agent for agent in agents if getattr(agent, "agent_id", None)}
+        if not self.agents:
+            raise ValueError("❌ The intent router needs at least one agent with an agent_id")
+        self.default_agent_id = default_agent_id or next(iter(self.agents))
+        if self.default_agent_id not in self.agents:
+            raise ValueError(f"❌ Default agent '{self.default_agent_id}' is not deployed. Available: {sorted(self.agents)}")
+        self.rule_weight = rule_weight
+        self.min_score = min_score
+
+        # Rules for agents that are not part of this deployment are ignored
+        self.rules = {
+            agent_id: [re.compile(r"\b" + re.escape(phrase.lower()) + r"\b") for phrase in phrases]
+            for agent_id, phrases in (rules or {}).items()
+            if agent_id in self.agents
+        }
+
+        profiles = {agent_id: Counter(tokenize(agent_profile(agent))) for agent_id, agent in self.agents.items()}
+        document_frequency = Counter(term for terms in profiles.values() for term in terms)
+        n = len(profiles)
+        self.idf = {term: math.log((1 + n) / (1 + df)) + 1 for term, df in document_frequency.items()}
+        self.vectors = {agent_id: self._vector(terms) for agent_id, terms in profiles.items()}
+
+        self.decisions = registry.counter("routing_decisions_total", "Intent router decisions by agent and method")
+        self.latency = registry.histogram("routing_seconds", "Time spent choosing an agent")
+
+    def _vector(self, terms: Counter) -> Dict[str, float]:
+        vector = {term: (1 + math.log(count)) * self.idf[term] for term, count in terms.items() if term in self.idf}
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {term: v / norm for term, v in vector.items()}
+
+    def scores(self, message: str) -> Dict[str, Dict[str, float]]:
+        """Per-agent TF-IDF similarity, rule score and total for `message`."""
+        query = self._vector(Counter(tokenize(message)))
+        text = message.lower()
+        result = {}
+        for agent_id, vector in self.vectors.items():
+            similarity = sum(weight * vector.get(term, 0.0) for term, weight in query.items())
+            matches = sum(1 for pattern in self.rules.get(agent_id, []) if pattern.search(text))
+            rule_score = matches * self.rule_weight
+            result[agent_id] = {"tfidf": round(similarity, 4), "rules": rule_score, "total": round(similarity + rule_score, 4)}
+        return result
+
+    def route(self, message: str, record: bool = True) -> Dict[str, Any]:
+        """
+        Choose the agent for `message`; returns the agent_id, method, scores and latency.
+
+        With `record=False` (GET /route/explain) the decision is not logged or counted.
+        """
+        started = time.perf_counter()
+        scores = self.scores(message)
+        agent_id = max(scores, key=lambda a: scores[a]["total"])
+        if scores[agent_id]["total"] < self.min_score:
+            agent_id, method = self.default_agent_id, "default"
+        else:
+            method = "rules" if scores[agent_id]["rules"] else "tfidf"
+        latency = time.perf_counter() - started
+
+        decision = {"agent_id": agent_id, "method": method, "scores": scores, "latency_ms": round(latency * 1000, 3)}
+        if record:
+            self.decisions.inc(agent_id=agent_id, method=method)
+            self.latency.observe(latency)
+            log_event(
+                "route.decision",
+                message_hash=hashlib.sha256(message.encode()).hexdigest()[:12],
+                message_chars=len(message),
+                **decision,
+            )
+        return decision
+
+
+def mount_router(app, router: IntentRouter) -> None:
+    """Add POST /route (route and run) and GET /route/explain (route only) to a FastAPI app."""
+    from agno.app.fastapi.async_router import agent_chat_response_streamer
+    from fastapi import Form, Query
+    from fastapi.responses import JSONResponse, StreamingResponse
+
+    @app.post("/route")
+    async def route_run(
+        message: str = Form(...),
+        stream: bool = Form(False),
+        session_id: Optional[str] = Form(None),
+        user_id: Optional[str] = Form(None),
+    ):
+        decision = router.route(message)
+        agent = router.agents[decision["agent_id"]]
+        headers = {"X-Routed-Agent-Id": decision["agent_id"], "X-Routing-Method": decision["method"]}
+
+        # Same response format as POST /runs for the chosen agent
+        if stream:
+            return StreamingResponse(
+                agent_chat_response_streamer(agent, message, session_id=session_id, user_id=user_id),
+                media_type="text/event-stream",
+                headers=headers,
+            )
+        run_response = await agent.arun(message, session_id=session_id, user_id=user_id, stream=False)
+        return JSONResponse(content=run_response.to_dict(), headers=headers)
+
+    @app.get("/route/explain")
+    async def route_explain(message: str = Query(...)):
+        return router.route(message, record=False)
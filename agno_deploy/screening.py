@@ -0,0 +1,309 @@
+"""
+Vectorised multi-ticker screening tool for the financial agents.
+
+"Which of these 30 tech stocks has the best P/E and margins" otherwise takes
+30+ get_key_financial_ratios / get_stock_fundamentals calls, each result
+parsed by the model. ScreeningTools is an Agno toolkit with one function,
+screen_stocks, that does the whole screen in a single tool call:
+
+- load: Yahoo's info dict for every ticker, concurrently, from the market
+  data store's fundamentals cache when one is given (the same entry that
+  get_key_financial_ratios uses) or from the network;
+- compute: one pandas frame with a column per metric (valuation ratios,
+  margins, returns, growth, leverage, 52-week and 50/200-day trend,
+  free-cash-flow yield, analyst upside), all computed column-wise;
+- filter and rank: filters such as "pe<30, profit_margin>=15%,
+  sector=Technology" become boolean masks; the score is the mean
+  percentile rank over the ranking metrics (each in its "better" direction);
+- result: only the top-N rows as a compact CSV table, plus which tickers
+  had no data.
+
+Loaded and missing tickers are reported in /metrics.
+
+Usage:
+    screening = ScreeningTools(store=market_data_store)
+    apply_screening(deployed_agents, screening)
+"""
+
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from agno.tools import Toolkit
+
+from agno_deploy.compaction import format_number
+from agno_deploy.logs import iter_agents, log_event
+from agno_deploy.market_data import YFinanceSource, _SYMBOL
+from agno_deploy.metrics import REGISTRY, MetricsRegistry
+
+# Fundamentals entry holding Yahoo's full info dict
+INFO_FUNCTION = "get_key_financial_ratios"
+
+# metric -> (info field, True if higher is better); None fields are computed from other columns
+METRICS: Dict[str, Tuple[Optional[str], bool]] = {
+    "market_cap": ("marketCap", True),
+    "pe": ("trailingPE", False),
+    "forward_pe": ("forwardPE", False),
+    "peg": ("trailingPegRatio", False),
+    "pb": ("priceToBook", False),
+    "ps": ("priceToSalesTrailing12Months", False),
+    "ev_ebitda": ("enterpriseToEbitda", False),
+    "gross_margin": ("grossMargins", True),
+    "operating_margin": ("operatingMargins", True),
+    "profit_margin": ("profitMargins", True),
+    "roe": ("returnOnEquity", True),
+    "roa": ("returnOnAssets", True),
+    "revenue_growth": ("revenueGrowth", True),
+    "earnings_growth": ("earningsGrowth", True),
+    "debt_to_equity": ("debtToEquity", False),
+    "current_ratio": ("currentRatio", True),
+    "dividend_yield": ("dividendYield", True),
+    "beta": ("beta", False),
+    "fcf_yield": (None, True),
+    "from_52w_high": (None, True),
+    "trend_50_200": (None, True),
+    "analyst_upside": (None, True),
+}
+# Valuation multiples are meaningless when negative (losses) and are left out of ranks
+POSITIVE_ONLY = ("pe", "forward_pe", "peg", "ev_ebitda", "ps", "pb")
+# Shown as percentages
+PERCENT_METRICS = {
+    "gross_margin", "operating_margin", "profit_margin", "roe", "roa", "revenue_growth", "earnings_growth",
+    "fcf_yield", "from_52w_high", "trend_50_200", "analyst_upside",
+}
+INFO_FIELDS = [field for field, _ in METRICS.values() if field] + [
+    "shortName", "longName", "sector", "industry", "currentPrice", "regularMarketPrice", "freeCashflow",
+    "fiftyTwoWeekHigh", "fiftyDayAverage", "twoHundredDayAverage", "targetMeanPrice", "pegRatio",
+]
+
+_FILTER = re.compile(r"^\s*([A-Za-z_0-9]+)\s*(<=|>=|!=|==|<|>|=)\s*(.+?)\s*$")
+TEXT_COLUMNS = ("name", "sector", "industry")
+
+
+def build_frame(infos: Dict[str, Dict[str, Any]]) -> pd.DataFrame:
+    """One row per ticker with a numeric column per metric, plus name, sector and industry."""
+    raw = pd.DataFrame.from_records(
+        [{field: info.get(field) for field in INFO_FIELDS} for info in infos.values()],
+        index=pd.Index(list(infos), name="symbol"),
+        columns=INFO_FIELDS,
+    )
+    text = raw[["shortName", "longName", "sector", "industry"]].astype("string")
+    numeric = raw.drop(columns=text.columns).apply(pd.to_numeric, errors="coerce")
+
+    frame = pd.DataFrame(index=raw.index)
+    for metric, (field, _) in METRICS.items():
+        if field:
+            frame[metric] = numeric[field]
+    price = numeric["currentPrice"].fillna(numeric["regularMarketPrice"])
+    frame["peg"] = frame["peg"].fillna(numeric["pegRatio"])
+    frame["fcf_yield"] = numeric["freeCashflow"] / frame["market_cap"]
+    frame["from_52w_high"] = price / numeric["fiftyTwoWeekHigh"] - 1
+    frame["trend_50_200"] = numeric["fiftyDayAverage"] / numeric["twoHundredDayAverage"] - 1
+    frame["analyst_upside"] = numeric["targetMeanPrice"] / price - 1
+    frame[list(POSITIVE_ONLY)] = frame[list(POSITIVE_ONLY)].where(frame[list(POSITIVE_ONLY)] > 0)
+    frame = frame.replace([np.inf, -np.inf], np.nan)
+    frame.insert(0, "price", price)
+    names = text["shortName"].fillna(text["longName"]).rename("name")
+    return pd.concat([names, text[["sector", "industry"]], frame], axis=1)
+
+
+def parse_filters(filters: str) -> List[Tuple[str, str, Any]]:
+    """ "pe<30, profit_margin>=15%, sector=Technology" -> [(metric, operator, value), ...]."""
+    parsed = []
+    for part in filter(None, (p.strip() for p in re.split(r"[,;]", filters or ""))):
+        match = _FILTER.match(part)
+        if match is None:
+            raise ValueError(f"Cannot parse filter '{part}'. Use e.g. 'pe<30' or 'sector=Technology'.")
+        metric, operator, value = match.groups()
+        metric = metric.lower()
+        operator = "==" if operator == "=" else operator
+        if metric in ("sector", "industry"):
+            if operator not in ("==", "!="):
+                raise ValueError(f"Filter '{part}': {metric} supports only = and !=.")
+            parsed.append((metric, operator, value.strip("'\"")))
+            continue
+        if metric not in METRICS and metric != "price":
+            raise ValueError(f"Unknown metric '{metric}' in filter '{part}'. Known: {', '.join(METRICS)}.")
+        try:
+            number = float(value[:-1]) / 100 if value.endswith("%") else float(value)
+        except ValueError:
+            raise ValueError(f"Filter '{part}' needs a number, e.g. {metric}>0.15 or {metric}>15%.")
+        if metric in PERCENT_METRICS and not value.endswith("%") and abs(number) > 1:
+            number /= 100  # "profit_margin>15" means 15%
+        parsed.append((metric, operator, number))
+    return parsed
+
+
+def apply_filters(frame: pd.DataFrame, filters: List[Tuple[str, str, Any]]) -> pd.DataFrame:
+    mask = pd.Series(True, index=frame.index)
+    for metric, operator, value in filters:
+        column = frame[metric]
+        if isinstance(value, str):
+            matches = column.str.lower() == value.lower()
+            mask &= matches.fillna(False) if operator == "==" else ~matches.fillna(False)
+            continue
+        # Missing values never pass a numeric filter
+        mask &= {
+            "<": column < value, "<=": column <= value, ">": column > value,
+            ">=": column >= value, "==": column == value, "!=": column != value,
+        }[operator].fillna(False)
+    return frame[mask]
+
+
+def rank(frame: pd.DataFrame, rank_by: List[str]) -> pd.DataFrame:
+    """Add a 0-100 score: mean percentile rank over `rank_by`, each in its better direction; sorted best first."""
+    ranks = pd.DataFrame(
+        {metric: frame[metric].rank(pct=True, ascending=METRICS[metric][1]) for metric in rank_by}, index=frame.index
+    )
+    # A ticker missing some ranking metrics is scored on the ones it has
+    scored = frame.assign(score=(ranks.mean(axis=1, skipna=True) * 100).round(0))
+    return scored[ranks.notna().any(axis=1)].sort_values(["score", rank_by[0]], ascending=[False, not METRICS[rank_by[0]][1]])
+
+
+def format_table(frame: pd.DataFrame, columns: List[str]) -> List[str]:
+    lines = [",".join(["rank", "symbol", "score"] + columns)]
+    for position, (symbol, row) in enumerate(frame.iterrows(), start=1):
+        cells = [str(position), str(symbol), format_number(row["score"])]
+        for column in columns:
+            value = row[column]
+            if pd.isna(value):
+                cells.append("")
+            elif column in PERCENT_METRICS:
+                cells.append(f"{value * 100:.1f}%")
+            else:
+                cells.append(format_number(value if column in TEXT_COLUMNS else float(value)).replace(",", ";"))
+        lines.append(",".join(cells))
+    return lines
+
+
+class ScreeningTools(Toolkit):
+    """Agno toolkit: screen and rank many tickers by fundamentals in one call."""
+
+    def __init__(
+        self,
+        store: Any = None,
+        source: Any = None,
+        max_symbols: int = 100,
+        max_workers: int = 8,
+        registry: MetricsRegistry = REGISTRY,
+        **kwargs,
+    ):
+        # The store's fundamentals cache if given, else the network (or a stand-in source)
+        self.store = store
+        self.source = source or YFinanceSource()
+        self.max_symbols = max_symbols
+        self.max_workers = max_workers
+        self.tickers = registry.counter("screening_tickers_total", "Tickers screened by outcome (loaded, missing)")
+        super().__init__(name="screening_tools", tools=[self.screen_stocks], **kwargs)
+
+    def __deepcopy__(self, memo):
+        # Agent.deep_copy() copies tools; the store, source and metrics are shared
+        return self
+
+    def _info(self, symbol: str) -> Optional[Dict[str, Any]]:
+        try:
+            if self.store is not None:
+                result = self.store.fundamentals(symbol, INFO_FUNCTION)
+            else:
+                result = self.source.fundamentals(symbol, INFO_FUNCTION)
+            info = json.loads(result)
+        except Exception:
+            return None
+        return info if isinstance(info, dict) and info else None
+
+    def load(self, symbols: List[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """Info dicts of `symbols` loaded concurrently; returns (loaded, missing)."""
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(symbols)), thread_name_prefix="screening") as pool:
+            infos = dict(zip(symbols, pool.map(self._info, symbols)))
+        loaded = {s: info for s, info in infos.items() if info is not None}
+        missing = [s for s, info in infos.items() if info is None]
+        self.tickers.inc(len(loaded), outcome="loaded")
+        self.tickers.inc(len(missing), outcome="missing")
+        return loaded, missing
+
+    def screen_stocks(
+        self,
+        symbols: str,
+        rank_by: str = "pe,profit_margin",
+        filters: str = "",
+        top_n: int = 10,
+        columns: str = "",
+    ) -> str:
+        """Use this function to compare, screen and rank many stocks by fundamentals in ONE call, instead of
+        calling the fundamentals or ratio tools once per ticker.
+
+        Metrics: market_cap, price, pe (trailing P/E), forward_pe, peg, pb, ps, ev_ebitda, gross_margin,
+        operating_margin, profit_margin, roe, roa, revenue_growth, earnings_growth, debt_to_equity,
+        current_ratio, dividend_yield, beta, fcf_yield (free cash flow / market cap), from_52w_high
+        (price vs 52-week high), trend_50_200 (50-day vs 200-day average), analyst_upside (mean target vs price).
+
+        Args:
+            symbols (str): Comma-separated ticker symbols, e.g. "AAPL,MSFT,NVDA".
+            rank_by (str): Comma-separated metrics to rank by; each is ranked in its better direction
+                (low P/E, high margins, ...) and the score is the average percentile (0-100).
+            filters (str): Optional comma-separated conditions, e.g. "pe<30, profit_margin>15%, sector=Technology".
+            top_n (int): Number of rows to return.
+            columns (str): Optional comma-separated metrics to show in addition to the ranking metrics.
+
+        Returns:
+            str: The top rows as a CSV table (best first), or an error message.
+        """
+        try:
+            universe = list(dict.fromkeys(s.strip().upper() for s in re.split(r"[,\s]+", symbols or "") if s.strip()))
+            invalid = [s for s in universe if not _SYMBOL.match(s)]
+            if invalid:
+                raise ValueError(f"Invalid ticker symbol(s): {', '.join(invalid)}.")
+            if not universe:
+                raise ValueError("No ticker symbols given.")
+            if len(universe) > self.max_symbols:
+                raise ValueError(f"At most {self.max_symbols} tickers per screen ({len(universe)} given).")
+            ranking = [m.strip().lower() for m in rank_by.split(",") if m.strip()] or ["pe", "profit_margin"]
+            shown = [m.strip().lower() for m in columns.split(",") if m.strip()]
+            unknown = [m for m in ranking if m not in METRICS] + [
+                m for m in shown if m not in METRICS and m not in ("price",) + TEXT_COLUMNS
+            ]
+            if unknown:
+                raise ValueError(f"Unknown metric(s) {', '.join(unknown)}. Known: {', '.join(METRICS)}.")
+            conditions = parse_filters(filters)
+        except ValueError as e:
+            return f"Error screening stocks: {e}"
+
+        infos, missing = self.load(universe)
+        if not infos:
+            return f"Error screening stocks: no data for {', '.join(missing)}."
+        frame = build_frame(infos)
+        passed = apply_filters(frame, conditions)
+        ranked = rank(passed, ranking) if len(passed) else passed
+        top = ranked.head(max(1, int(top_n)))
+
+        filter_columns = [m for m, _, _ in conditions if m not in ranking]
+        table_columns = list(dict.fromkeys(["name"] + ranking + filter_columns + shown))
+        summary = f"Screened {len(infos)} of {len(universe)} tickers"
+        if missing:
+            summary += f" (no data: {', '.join(missing)})"
+        if conditions:
+            summary += f"; {len(passed)} passed {filters.strip()}"
+        log_event("screening.done", symbols=len(universe), missing=len(missing), passed=len(passed), returned=len(top))
+        if passed.empty:
+            return summary + ".\nNo ticker passed the filters."
+        if ranked.empty:
+            metrics = ", ".join(ranking)
+            return summary + f"; none has data for {metrics}, so nothing could be ranked. Rank by other metrics."
+        summary += f"; top {len(top)} by {', '.join(ranking)} (score = average percentile, 100 = best)"
+        if len(ranked) < len(passed):
+            summary += f"; {len(passed) - len(ranked)} without data for {', '.join(ranking)} left out"
+        return "\n".join([summary + "."] + format_table(top, table_columns))
+
+
+def apply_screening(agents: Iterable[Any], screening: ScreeningTools) -> int:
+    """Give every agent with YFinanceTools the screening toolkit; returns how many agents."""
+    equipped = 0
+    for agent in iter_agents(agents):
+        tools = list(getattr(agent, "tools", None) or [])
+        if any(type(t).__module__ == "agno.tools.yfinance" for t in tools) and screening not in tools:
+            agent.tools = tools + [screening]
+            equipped += 1
+    return equipped
@@ -0,0 +1,434 @@
+"""
+Semantic response cache: answers paraphrased questions from earlier answers.
+
+"How's Nvidia doing" and "NVDA performance today" are the same question to
+the financial agent, but an exact-match cache (agno_deploy.cache) misses
+one after the other. SemanticCache embeds each stand-alone question and
+keeps the recent answers of every agent in a vector index:
+
+- embedding: a small local CPU model. With fastembed installed
+  (`pip install fastembed`), BAAI/bge-small-en-v1.5 on ONNX Runtime; without
+  it, HashingEmbedder, which needs nothing beyond NumPy: company names are
+  mapped to tickers, finance synonyms to one term ("quote", "trading at" ->
+  price), and words, word pairs and character trigrams are hashed into a
+  normalized 512-dimension vector;
+- index: VectorIndex, NumPy only. Up to `exact_below` entries every search
+  is one matrix-vector product; above that, random-hyperplane LSH tables
+  pick the candidates that are then scored exactly. The index is a ring of
+  `max_entries` slots, so the oldest answer is replaced first;
+- reuse: the best match is returned when its cosine similarity reaches
+  `threshold`, it is younger than `freshness` seconds and it names exactly
+  the same tickers, numbers and periods (AAPL vs MSFT, 5 vs 30 days, this
+  vs last year, Q1 vs Q2 never match, however similar the wording).
+
+Similarities depend on the embedding model, so a threshold only holds for
+the embedder it was tuned for. Without an explicit `threshold` the cache
+uses the one in TUNED_THRESHOLDS for its embedder; for other embedders it
+falls back to FALLBACK_THRESHOLD and `threshold_tuned` is False. Tune one
+with `python -m benchmarks.semantic_cache --embedder <model>`.
+
+SemanticResponseCache wraps an agent's arun() with the same rules as the
+exact response cache (no conversation history, no media). Put the exact
+cache in front of it. Lookups by outcome, the similarity of the best match
+and the entries per agent are reported in /metrics; benchmarks/semantic_cache.py
+reports precision and recall on labelled paraphrase sets.
+
+Usage:
+    semantic = SemanticCache(load_embedder("auto"), freshness=300)
+    apply_semantic_cache(deployed_agents, semantic)
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from agno_deploy.cache import ResponseCache
+from agno_deploy.logs import log_event
+from agno_deploy.metrics import REGISTRY, MetricsRegistry
+from agno_deploy.tiering import NOT_TICKERS
+
+DEFAULT_MODEL = "BAAI/bge-small-en-v1.5"
+# Lowest similarity reused, per embedder, tuned with benchmarks/semantic_cache.py on benchmarks/paraphrases.json
+TUNED_THRESHOLDS = {"hashing": 0.85}
+FALLBACK_THRESHOLD = 0.85
+
+COMPANY_ALIASES = {
+    "apple": "AAPL", "microsoft": "MSFT", "nvidia": "NVDA", "google": "GOOGL", "alphabet": "GOOGL",
+    "amazon": "AMZN", "meta": "META", "facebook": "META", "tesla": "TSLA", "netflix": "NFLX", "intel": "INTC",
+    "berkshire": "BRK-B", "jpmorgan": "JPM", "jp morgan": "JPM", "visa": "V", "mastercard": "MA",
+    "walmart": "WMT", "coca cola": "KO", "coca-cola": "KO", "disney": "DIS", "exxon": "XOM", "palantir": "PLTR",
+    "broadcom": "AVGO", "salesforce": "CRM", "oracle": "ORCL", "adobe": "ADBE", "boeing": "BA", "pfizer": "PFE",
+    "costco": "COST", "mcdonald's": "MCD", "mcdonalds": "MCD", "starbucks": "SBUX", "nike": "NKE", "uber": "UBER",
+    "paypal": "PYPL", "shopify": "SHOP", "spotify": "SPOT", "qualcomm": "QCOM", "micron": "MU",
+    "s&p 500": "SPY", "s&p": "SPY", "nasdaq 100": "QQQ", "nasdaq": "QQQ",
+}
+# Phrase -> canonical term; longer phrases are replaced first
+SYNONYMS = {
+    "price": ("share price", "stock price", "trading at", "quote", "priced", "worth", "how much is"),
+    "performance": ("doing", "performing", "perform", "moving", "move", "going", "up or down", "holding up"),
+    "news": ("headlines", "latest stories", "stories", "happening with", "going on with"),
+    "pe": ("p/e ratio", "p/e", "pe ratio", "price to earnings", "price-to-earnings", "earnings multiple"),
+    "analysts": ("analyst recommendations", "analyst ratings", "analysts say", "analysts think", "recommendations",
+                 "consensus", "ratings", "analyst"),
+    "income": ("income statements", "income statement", "profit and loss", "p&l", "earnings report"),
+    "history": ("historical prices", "price history", "chart", "historical"),
+    "marketcap": ("market capitalization", "market cap", "market value"),
+    "dividend": ("dividend yield", "dividends", "payout"),
+    "compare": ("compared to", "compared with", "versus", "vs", "against", "comparison"),
+    "fundamentals": ("fundamental data", "financials", "fundamental"),
+    "revenue": ("top line", "sales", "revenues"),
+    "now": ("right now", "at the moment", "currently", "current", "this morning", "today", "as of now"),
+    "ytd": ("year to date", "year-to-date"),
+    "week": ("weeks", "weekly", "7 days", "seven days"),
+    "month": ("months", "monthly", "30 days"),
+    "year": ("years", "yearly", "annual", "12 months"),
+}
+STOPWORDS = frozenset(
+    "a an the is are was be of for to in on at me my i you your please can could would tell show give what whats "
+    "what's how hows how's s about with and or do does stock stocks share shares company its it's it this that "
+    "get find look up check latest any explain mean means ratio much big make makes".split()
+)
+# Terms that carry little meaning on their own and weigh less
+LIGHT_TERMS = frozenset({"now", "performance"})
+
+# Upper-case words that name a metric or a period, not a ticker
+_NOT_TICKERS = NOT_TICKERS | {"YTD", "MTD", "QTD", "FY", "TTM"}
+_RATIO = re.compile(r"\bP/E\b", re.IGNORECASE)
+_WORD = re.compile(r"[a-z0-9][a-z0-9&/\-.']*")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_TICKER = re.compile(r"\$?\b[A-Z]{1,5}(?:[.\-][A-Z])?\b")
+# Periods are part of the guard: "last year" and "this year" have different answers
+_PERIOD_UNITS = r"(day|week|month|quarter|year)s?"
+_COUNTED_PERIOD = re.compile(rf"\b(?:(next|coming)\s+)?(\d+)\s+{_PERIOD_UNITS}\b")
+_RELATIVE_PERIOD = re.compile(rf"\b(this|current|last|previous|prior|past|trailing|next|coming)\s+{_PERIOD_UNITS}\b")
+_FISCAL_PERIOD = re.compile(r"\b(q[1-4]|h[12]|fy)\s*'?(\d{4}|\d{2})?\b")
+_YEAR = re.compile(r"\b(?:19|20)\d{2}\b")
+_QUALIFIERS = {"current": "this", "previous": "last", "prior": "last", "trailing": "past", "coming": "next"}
+_NAMED_PERIODS = {
+    "yesterday": "last day", "tomorrow": "next day", "ytd": "ytd", "year to date": "ytd", "year-to-date": "ytd",
+    "mtd": "mtd", "month to date": "mtd", "month-to-date": "mtd", "qtd": "qtd", "quarter to date": "qtd",
+    "quarter-to-date": "qtd", "all time": "all time", "all-time": "all time", "since ipo": "all time",
+}
+_ALIASES = sorted(COMPANY_ALIASES.items(), key=lambda a: -len(a[0]))
+_PHRASES = sorted(
+    ((phrase, term) for term, phrases in SYNONYMS.items() for phrase in phrases), key=lambda p: -len(p[0])
+)
+
+
+def _without_companies(text: str) -> Tuple[str, set]:
+    """`text` with company names cut out, and the tickers of those names."""
+    tickers = set()
+    for name, ticker in _ALIASES:
+        text, found = re.subn(rf"(?<![a-z0-9]){re.escape(name)}(?![a-z0-9])", " ", text, flags=re.IGNORECASE)
+        if found:
+            tickers.add(ticker)
+    return text, tickers
+
+
+def extract_tickers(text: str) -> FrozenSet[str]:
+    """Tickers named in `text`: upper-case symbols (not common acronyms), $symbols and company names."""
+    rest, found = _without_companies(_RATIO.sub(" ", text))
+    found |= {m.group().lstrip("$") for m in _TICKER.finditer(rest) if m.group().lstrip("$") not in _NOT_TICKERS}
+    return frozenset(found)
+
+
+def extract_numbers(text: str) -> FrozenSet[str]:
+    """Numbers in `text` outside company names ("S&P 500"): periods, counts, prices."""
+    return frozenset(_NUMBER.findall(_without_companies(text)[0]))
+
+
+def extract_periods(text: str) -> FrozenSet[str]:
+    """Time expressions in `text`, normalised: "last 5 day", "last year", "ytd", "q1 2024", "2023"."""
+    lowered = text.lower().replace("’", "'")
+    found = set()
+    for match in _COUNTED_PERIOD.finditer(lowered):
+        # "last 5 days", "past 5 days" and "5 days" are the same window; "next 5 days" is not
+        found.add(" ".join(p for p in ("next" if match.group(1) else "", match.group(2), match.group(3)) if p))
+    lowered = _COUNTED_PERIOD.sub(" ", lowered)
+    for match in _RELATIVE_PERIOD.finditer(lowered):
+        found.add(f"{_QUALIFIERS.get(match.group(1), match.group(1))} {match.group(2)}")
+    for match in _FISCAL_PERIOD.finditer(lowered):
+        found.add(" ".join(p for p in match.groups() if p))
+    found |= set(_YEAR.findall(lowered))
+    for name, period in _NAMED_PERIODS.items():
+        if re.search(rf"(?<![a-z0-9]){re.escape(name)}(?![a-z0-9])", lowered):
+            found.add(period)
+    return frozenset(found)
+
+
+def canonical_terms(text: str) -> List[str]:
+    """`text` as canonical terms: tickers for company names, one term per synonym group, no stopwords."""
+    lowered = " " + text.lower().replace("’", "'") + " "
+    for name, ticker in _ALIASES:
+        lowered = re.sub(rf"(?<![a-z0-9]){re.escape(name)}(?![a-z0-9])", f" {ticker.lower()} ", lowered)
+    lowered = re.sub(r"\$([a-z]{1,5})\b", r"\1", lowered)
+    for phrase, term in _PHRASES:
+        lowered = re.sub(rf"(?<![a-z0-9]){re.escape(phrase)}(?![a-z0-9])", f" {term} ", lowered)
+    words = [w.strip(".'-") for w in _WORD.findall(lowered)]
+    return [w[:-2] if w.endswith("'s") else w for w in words if w and w not in STOPWORDS]
+
+
+def _digest(text: str) -> str:
+    """Short stable hash of a prompt, so logs can correlate prompts without holding user text."""
+    return hashlib.sha256(text.encode()).hexdigest()[:12]
+
+
+class HashingEmbedder:
+    """Dependency-free text embedding: hashed canonical terms, term pairs and character trigrams."""
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def _add(self, vector: np.ndarray, feature: str, weight: float) -> None:
+        h = zlib.crc32(feature.encode())
+        vector[h % self.dim] += weight if (h >> 16) & 1 else -weight
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            terms = canonical_terms(text)
+            for term in terms:
+                weight = 0.4 if term in LIGHT_TERMS else 1.0
+                self._add(vectors[row], "w:" + term, weight)
+                # Trigrams make near-spellings ("nvdia") land close together
+                padded = f"#{term}#"
+                grams = [padded[i:i + 3] for i in range(len(padded) - 2)]
+                for gram in grams:
+                    self._add(vectors[row], "c:" + gram, 0.5 * weight / len(grams))
+            for first, second in zip(terms, terms[1:]):
+                self._add(vectors[row], f"b:{first} {second}", 0.5)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+class FastEmbedEmbedder:
+    """Small ONNX sentence-embedding model on the CPU via fastembed."""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL):
+        from fastembed import TextEmbedding
+
+        self.name = model_name
+        self._model = TextEmbedding(model_name=model_name)
+        self.dim = len(next(iter(self._model.embed(["warm-up"]))))
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        # Company names as tickers, so "Nvidia" and "NVDA" embed alike
+        prepared = [" ".join(canonical_terms(t)) or t for t in texts]
+        vectors = np.asarray(list(self._model.embed(prepared)), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+
+def load_embedder(name: str = "auto"):
+    """ "hashing", a fastembed model name, or "auto" (the default fastembed model if installed, else hashing)."""
+    if name == "hashing":
+        return HashingEmbedder()
+    try:
+        return FastEmbedEmbedder(DEFAULT_MODEL if name == "auto" else name)
+    except ImportError:
+        if name != "auto":
+            raise ValueError(f"❌ Embedding model '{name}' needs fastembed: pip install fastembed")
+        return HashingEmbedder()
+
+
+class VectorIndex:
+    """Fixed-capacity cosine index over unit vectors: exact below `exact_below` entries, LSH candidates above."""
+
+    def __init__(self, dim: int, max_entries: int = 5000, exact_below: int = 2048, tables: int = 16, bits: int = 8, seed: int = 0):
+        self.dim = dim
+        self.max_entries = max_entries
+        self.exact_below = exact_below
+        self.vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self.used = np.zeros(max_entries, dtype=bool)
+        self._next = 0
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((tables, bits, dim)).astype(np.float32)
+        self._weights = 1 << np.arange(bits)
+        self._buckets: List[Dict[int, set]] = [{} for _ in range(tables)]
+        self._codes = np.zeros((max_entries, tables), dtype=np.int64)
+
+    def __len__(self) -> int:
+        return int(self.used.sum())
+
+    def _hash(self, vector: np.ndarray) -> np.ndarray:
+        return ((self._planes @ vector) > 0) @ self._weights
+
+    def add(self, vector: np.ndarray) -> int:
+        """Store `vector` in the next slot (replacing the oldest entry when full); returns the slot."""
+        slot = self._next
+        self._next = (self._next + 1) % self.max_entries
+        if self.used[slot]:
+            self.remove(slot)
+        self.vectors[slot] = vector
+        self.used[slot] = True
+        self._codes[slot] = self._hash(vector)
+        for table, code in enumerate(self._codes[slot]):
+            self._buckets[table].setdefault(int(code), set()).add(slot)
+        return slot
+
+    def remove(self, slot: int) -> None:
+        if not self.used[slot]:
+            return
+        self.used[slot] = False
+        for table, code in enumerate(self._codes[slot]):
+            bucket = self._buckets[table].get(int(code))
+            if bucket is not None:
+                bucket.discard(slot)
+
+    def search(self, vector: np.ndarray, k: int = 5) -> List[Tuple[int, float]]:
+        """The `k` most similar slots as (slot, cosine similarity), best first."""
+        if len(self) <= self.exact_below:
+            candidates = np.flatnonzero(self.used)
+        else:
+            found = set()
+            for table, code in enumerate(self._hash(vector)):
+                found |= self._buckets[table].get(int(code), set())
+            candidates = np.fromiter(found, dtype=np.int64, count=len(found))
+        if candidates.size == 0:
+            return []
+        scores = self.vectors[candidates] @ vector
+        top = np.argsort(-scores)[:k]
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+
+
+class SemanticCache:
+    """Recent answers per agent, found again by the meaning of the question."""
+
+    def __init__(
+        self,
+        embedder: Any = None,
+        threshold: Optional[float] = None,
+        freshness: float = 300.0,
+        max_entries: int = 5000,
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.embedder = embedder or HashingEmbedder()
+        self.threshold_tuned = threshold is not None or self.embedder.name in TUNED_THRESHOLDS
+        if threshold is None:
+            threshold = TUNED_THRESHOLDS.get(self.embedder.name, FALLBACK_THRESHOLD)
+        self.threshold = threshold
+        self.freshness = freshness
+        self.max_entries = max_entries
+        self._indexes: Dict[str, VectorIndex] = {}
+        self._entries: Dict[str, Dict[int, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+        self.lookups = registry.counter("semantic_cache_lookups_total", "Semantic cache lookups by outcome (hit, miss, rejected)")
+        self.similarity = registry.histogram(
+            "semantic_cache_similarity", "Similarity of the best match per lookup",
+            buckets=(0.5, 0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 0.98, 1.0),
+        )
+        self.embed_seconds = registry.histogram("semantic_cache_embed_seconds", "Prompt embedding latency")
+        self.size = registry.gauge("semantic_cache_entries", "Answers held per agent")
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def _embed(self, text: str) -> np.ndarray:
+        started = time.monotonic()
+        vector = self.embedder.embed([text])[0]
+        self.embed_seconds.observe(time.monotonic() - started)
+        return vector
+
+    @staticmethod
+    def _guard(text: str) -> Tuple[FrozenSet[str], FrozenSet[str], FrozenSet[str]]:
+        return extract_tickers(text), extract_numbers(text), extract_periods(text)
+
+    def lookup(self, namespace: str, prompt: str, context: str = "") -> Optional[Tuple[Dict[str, Any], float]]:
+        """The freshest answer to a question like `prompt` in `namespace` with the same `context`, and its similarity."""
+        vector = self._embed(prompt)
+        guard = self._guard(prompt)
+        now = time.time()
+        with self._lock:
+            index = self._indexes.get(namespace)
+            matches = index.search(vector, k=5) if index is not None else []
+            best, best_score, outcome = None, 0.0, "miss"
+            for slot, score in matches:
+                entry = self._entries[namespace].get(slot)
+                if entry is None or now - entry["created_at"] > self.freshness:
+                    if entry is not None:
+                        index.remove(slot)
+                        del self._entries[namespace][slot]
+                    continue
+                best_score = max(best_score, score)
+                if score < self.threshold:
+                    break
+                if entry["guard"] != guard or entry["context"] != context:
+                    outcome = "rejected"
+                    continue
+                best, outcome = entry, "hit"
+                break
+        if matches:
+            self.similarity.observe(round(best_score, 4))
+        self.lookups.inc(outcome=outcome)
+        if best is None:
+            return None
+        log_event(
+            "semantic_cache.hit",
+            namespace=namespace,
+            similarity=round(best_score, 3),
+            prompt_hash=_digest(prompt),
+            cached_prompt_hash=_digest(best["prompt"]),
+            prompt_chars=len(prompt),
+        )
+        return best, best_score
+
+    def store(self, namespace: str, prompt: str, value: Dict[str, Any], context: str = "") -> None:
+        vector = self._embed(prompt)
+        with self._lock:
+            index = self._indexes.get(namespace)
+            if index is None:
+                index = self._indexes[namespace] = VectorIndex(vector.shape[0], max_entries=self.max_entries)
+                self._entries[namespace] = {}
+            slot = index.add(vector)
+            self._entries[namespace][slot] = {
+                "prompt": prompt,
+                "value": value,
+                "guard": self._guard(prompt),
+                "context": context,
+                "created_at": time.time(),
+            }
+            self.size.set(len(index), namespace=namespace)
+
+
+class SemanticResponseCache(ResponseCache):
+    """ResponseCache variant that finds earlier answers by question similarity."""
+
+    def __init__(self, entity, semantic: SemanticCache):
+        super().__init__(entity, cache=None, ttl=semantic.freshness)
+        self.semantic = semantic
+
+    @staticmethod
+    def _context(key: str) -> str:
+        # Everything the exact key holds besides the message (model, user for personal memories)
+        return json.dumps({k: v for k, v in json.loads(key).items() if k != "message"}, sort_keys=True)
+
+    async def _lookup(self, message: str, key: str) -> Optional[Dict[str, Any]]:
+        found = await asyncio.to_thread(self.semantic.lookup, self.entity_id, message, self._context(key))
+        return found[0]["value"] if found else None
+
+    async def _remember(self, message: str, key: str, value: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self.semantic.store, self.entity_id, message, value, self._context(key))
+
+
+def apply_semantic_cache(agents: Iterable[Any], semantic: SemanticCache) -> int:
+    """Answer paraphrased questions of the deployed agents and teams from `semantic`; returns how many."""
+    cached = 0
+    for entity in agents or []:
+        if entity is None or not (getattr(entity, "agent_id", None) or getattr(entity, "team_id", None)):
+            continue
+        SemanticResponseCache(entity, semantic).install()
+        cached += 1
+    return cached
@@ -0,0 +1,244 @@
+"""
+Bounded in-memory session history for agents and teams without storage.
+
+With `add_history_to_messages=True` and no storage configured, Agno keeps
+every run of every session in `agent.memory.runs` for the life of the
+container, and each run also holds a copy of the history it was given, the
+raw tool results and the system prompt. A `min_containers=1` container grows
+until it is recycled. SessionMemoryBudget bounds that memory per container:
+
+- compact storage: runs are stored without what later runs never read back:
+  history copies, system prompts, tool calls and their raw payloads, media,
+  extra data and team member responses. Questions and answers stay, so
+  follow-up questions keep working;
+- byte budget: the size of every stored session is tracked (its compact
+  JSON size); when the total exceeds `max_bytes`, the least recently used
+  sessions are evicted. A single session never holds more than
+  `max_session_bytes`: its oldest runs are dropped first;
+- idle expiry: sessions without a run for `idle_ttl` seconds are evicted,
+  by every run and by a sweep every `sweep_interval` seconds (start() and
+  stop() run it with the app's lifespan), so a quiet container frees them
+  too.
+
+The run returned to the client is not changed, only the copy Agno keeps.
+Live sessions and bytes held are reported as gauges, evictions by reason
+as a counter (/metrics).
+
+Usage:
+    budget = SessionMemoryBudget(max_bytes=256 * 1024 * 1024, idle_ttl=3600)
+    apply_session_memory_budget(deployed_agents, budget)
+    app.add_event_handler("startup", budget.start)
+    app.add_event_handler("shutdown", budget.stop)
+"""
+
+import asyncio
+import dataclasses
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from agno_deploy.logs import iter_agents, log, log_event
+from agno_deploy.metrics import REGISTRY, MetricsRegistry
+
+# Run fields no later run reads back from memory
+DROPPED_RUN_FIELDS = ("tools", "formatted_tool_calls", "extra_data", "images", "videos", "audio", "response_audio", "citations")
+DROPPED_MESSAGE_FIELDS = ("images", "audio", "videos", "files", "audio_output", "image_output", "references")
+
+
+def compact_messages(messages: Optional[List[Any]]) -> List[Any]:
+    """The messages of one run that later runs use as history: user questions and assistant answers."""
+    compact = []
+    for message in messages or []:
+        if getattr(message, "from_history", False) or message.role in ("system", "developer", "tool"):
+            continue
+        update = {name: None for name in DROPPED_MESSAGE_FIELDS if getattr(message, name, None) is not None}
+        if message.role == "assistant" and message.tool_calls:
+            if not message.content:
+                continue  # Only asked for tools; the answer follows in a later message
+            update["tool_calls"] = None
+        compact.append(message.model_copy(update=update) if update else message)
+    return compact
+
+
+def compact_run(run: Any) -> Any:
+    """A copy of `run` holding only what conversation history needs."""
+    update = {name: None for name in DROPPED_RUN_FIELDS if getattr(run, name, None) is not None}
+    update["messages"] = compact_messages(run.messages)
+    if getattr(run, "member_responses", None):
+        update["member_responses"] = []
+    return dataclasses.replace(run, **update)
+
+
+def run_size(run: Any) -> int:
+    """Approximate bytes a stored run holds (its JSON size)."""
+    try:
+        return len(json.dumps(run.to_dict(), default=str))
+    except Exception:
+        return len(str(run))
+
+
+class SessionMemoryBudget:
+    """Per-container byte budget over the session history of all agents and teams."""
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_session_bytes: Optional[int] = None,
+        idle_ttl: Optional[float] = 3600.0,
+        compact: bool = True,
+        sweep_interval: float = 60.0,
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.max_bytes = max_bytes
+        self.max_session_bytes = max_session_bytes or max(1, max_bytes // 10)
+        self.idle_ttl = idle_ttl
+        self.compact = compact
+        self.sweep_interval = sweep_interval
+        self.bytes_held = 0
+        # (id(memory), session_id) -> [memory, session_id, bytes, last used, run sizes], least recently used first
+        self._sessions: "OrderedDict[Tuple[int, str], List[Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._sweeper: Optional[asyncio.Task] = None
+
+        self.sessions_gauge = registry.gauge("session_memory_sessions", "Conversation sessions held in container memory")
+        self.bytes_gauge = registry.gauge("session_memory_bytes", "Bytes of conversation history held in container memory")
+        self.evictions = registry.counter("session_memory_evictions_total", "Session history evicted by reason (budget, idle, trim)")
+        self.saved = registry.counter("session_memory_compacted_bytes_total", "Bytes not stored thanks to run compaction")
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def install(self, memory: Any) -> None:
+        """Route `memory.add_run` through the budget (once per Memory, even when agents share one)."""
+        if getattr(memory, "_session_budget", None) is self:
+            return
+        memory._session_budget = self
+        full_add_run = memory.add_run
+
+        def add_run(session_id: str, run: Any) -> None:
+            self.add_run(memory, full_add_run, session_id, run)
+
+        memory.add_run = add_run
+
+    def add_run(self, memory: Any, full_add_run, session_id: str, run: Any) -> None:
+        stored = run
+        if self.compact:
+            stored = compact_run(run)
+            self.saved.inc(max(0, run_size(run) - run_size(stored)))
+        full_add_run(session_id, stored)
+        self.track(memory, session_id)
+
+    def track(self, memory: Any, session_id: str) -> None:
+        """Re-measure a session after a run and enforce the budget."""
+        runs = (memory.runs or {}).get(session_id, [])
+        key = (id(memory), session_id)
+        with self._lock:
+            entry = self._sessions.pop(key, None)
+            if entry is not None:
+                self.bytes_held -= entry[2]
+            if entry is not None and len(runs) == len(entry[4]) + 1:
+                sizes = entry[4] + [run_size(runs[-1])]  # The usual case: one run appended
+            else:
+                sizes = [run_size(run) for run in runs]
+            # The oldest runs of an oversized session go first (keep at least the latest)
+            while len(sizes) > 1 and sum(sizes) > self.max_session_bytes:
+                runs.pop(0)
+                sizes.pop(0)
+                self.evictions.inc(reason="trim")
+            self._sessions[key] = [memory, session_id, sum(sizes), time.monotonic(), sizes]
+            self.bytes_held += sum(sizes)
+            self._evict(keep=key)
+            self._report()
+
+    def sweep(self) -> int:
+        """Evict idle sessions; returns how many."""
+        with self._lock:
+            evicted = self._evict()
+            self._report()
+        return evicted
+
+    async def start(self) -> None:
+        """Sweep idle sessions every `sweep_interval` seconds; call from inside the running loop (app startup)."""
+        if self._sweeper is None and self.idle_ttl is not None:
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_loop())
+
+    async def stop(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                log(f"⚠️  Session memory sweep failed: {e}", level=logging.WARNING)
+
+    def _evict(self, keep: Optional[Tuple[int, str]] = None) -> int:
+        evicted = 0
+        now = time.monotonic()
+        for key in list(self._sessions):
+            memory, session_id, size, last_used, _ = self._sessions[key]
+            if key == keep:
+                continue
+            if self.idle_ttl is not None and now - last_used > self.idle_ttl:
+                reason = "idle"
+            elif self.bytes_held > self.max_bytes:
+                reason = "budget"
+            else:
+                break  # Ordered by last use: the rest are newer
+            self._drop(key)
+            self.evictions.inc(reason=reason)
+            log_event("session_memory.evicted", session_id=session_id, reason=reason, bytes=size)
+            evicted += 1
+        return evicted
+
+    def _drop(self, key: Tuple[int, str]) -> None:
+        memory, session_id, size, _, _ = self._sessions.pop(key)
+        self.bytes_held -= size
+        if memory.runs:
+            memory.runs.pop(session_id, None)
+        if getattr(memory, "team_context", None):
+            memory.team_context.pop(session_id, None)
+        for summaries in (getattr(memory, "summaries", None) or {}).values():
+            summaries.pop(session_id, None)
+
+    def _report(self) -> None:
+        self.sessions_gauge.set(len(self._sessions))
+        self.bytes_gauge.set(self.bytes_held)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self.bytes_held,
+                "max_bytes": self.max_bytes,
+                "max_session_bytes": self.max_session_bytes,
+                "idle_ttl": self.idle_ttl,
+            }
+
+
+def apply_session_memory_budget(agents: Iterable[Any], budget: SessionMemoryBudget) -> int:
+    """Bound the in-memory session history of every agent and team (members included); returns how many."""
+    from agno.memory.v2.memory import Memory
+
+    bounded = 0
+    for agent in iter_agents(agents):
+        if getattr(agent, "storage", None) is not None:
+            continue  # History is read back from storage, not kept in memory
+        if getattr(agent, "memory", None) is None:
+            agent.memory = Memory()  # What Agno would create on the first run
+        if not isinstance(agent.memory, Memory):
+            name = getattr(agent, "name", None) or type(agent).__name__
+            log(f"⚠️  Session memory budget: {name} uses {type(agent.memory).__name__}, left unbounded", level=logging.WARNING)
+            continue
+        budget.install(agent.memory)
+        bounded += 1
+    return bounded
@@ -0,0 +1,275 @@
+"""
+Streaming-first run endpoint: SSE or NDJSON, unbuffered, with backpressure.
+
+Streamed runs from POST /runs arrive at many clients in one piece: the
+events are concatenated pretty-printed JSON without delimiters, and nothing
+tells proxies and CDNs not to buffer or compress the response. POST /stream
+serves the same agent and team runs as a proper stream:
+
+- format: Server-Sent Events (`event: <RunEvent>`, `id:` and one line of
+  compact JSON per event) or NDJSON (one compact JSON object per line),
+  chosen with `format=` or `Accept: application/x-ndjson`;
+- no buffering: `Cache-Control: no-cache, no-transform` and
+  `X-Accel-Buffering: no`. The headers (plus an SSE comment) are sent
+  before the run starts, and every event is written as soon as it
+  arrives. Comment or blank-line heartbeats keep intermediaries from
+  timing out during long tool calls;
+- backpressure: the run feeds a bounded queue. When the client reads more
+  slowly than the model writes, the queue fills and the run waits instead
+  of piling events up in memory. A client that reads nothing for
+  `slow_client_timeout` seconds has its run cancelled;
+- timing: time to first byte (headers and the first body bytes), time to
+  the first content token and total duration are recorded separately
+  (stream_ttfb_seconds, stream_first_token_seconds,
+  stream_duration_seconds), along with events, bytes and the time the
+  run waited on slow clients.
+
+Usage:
+    mount_streaming(app, agents, teams, default_format="sse")
+    curl -N -X POST "$URL/stream?agent_id=financial-analysis-agent" -F "message=How is NVDA doing?"
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from starlette.responses import Response
+
+from agno_deploy.logs import log_event
+from agno_deploy.metrics import REGISTRY, MetricsRegistry
+
+FORMATS = {"sse": "text/event-stream", "ndjson": "application/x-ndjson"}
+STREAM_HEADERS = {
+    "Cache-Control": "no-cache, no-transform",
+    "X-Accel-Buffering": "no",  # nginx and compatible proxies
+}
+_END = object()
+
+
+def negotiate_format(requested: Optional[str], accept: str, default: str = "sse") -> str:
+    """Stream format from `format=`, else the Accept header, else `default`."""
+    if requested:
+        if requested not in FORMATS:
+            raise ValueError(f"Unknown stream format '{requested}'. Expected one of: {', '.join(FORMATS)}")
+        return requested
+    if "application/x-ndjson" in accept or "application/jsonl" in accept:
+        return "ndjson"
+    if "text/event-stream" in accept:
+        return "sse"
+    return default
+
+
+def encode_event(chunk: Any, fmt: str, event_id: int) -> bytes:
+    """One run event as an SSE message or an NDJSON line (compact JSON)."""
+    payload = chunk.to_dict() if hasattr(chunk, "to_dict") else chunk
+    data = json.dumps(payload, separators=(",", ":"), default=str)
+    if fmt == "ndjson":
+        return (data + "\n").encode("utf-8")
+    event = payload.get("event") or "message"
+    return f"event: {event}\nid: {event_id}\ndata: {data}\n\n".encode("utf-8")
+
+
+class StreamMetrics:
+    """Stream timing and flow metrics shared by all streamed runs."""
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY):
+        self.ttfb = registry.histogram("stream_ttfb_seconds", "Request to first body bytes of a streamed run")
+        self.first_token = registry.histogram("stream_first_token_seconds", "Request to first content token of a streamed run")
+        self.duration = registry.histogram("stream_duration_seconds", "Request to end of a streamed run")
+        self.events = registry.counter("stream_events_total", "Run events streamed by format")
+        self.bytes = registry.counter("stream_bytes_total", "Bytes streamed by format")
+        self.backpressure = registry.counter("stream_backpressure_seconds_total", "Time runs waited for slow clients to read")
+        self.outcomes = registry.counter("stream_runs_total", "Streamed runs by outcome (completed, error, disconnected, slow_client)")
+        self.active = registry.gauge("stream_active", "Runs streaming right now")
+
+
+class RunStreamResponse(Response):
+    """Response streaming one run through a bounded queue."""
+
+    def __init__(
+        self,
+        entity: Any,
+        run_kwargs: Dict[str, Any],
+        fmt: str,
+        metrics: StreamMetrics,
+        started: float,
+        queue_size: int = 64,
+        heartbeat: float = 15.0,
+        slow_client_timeout: float = 60.0,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        super().__init__(media_type=FORMATS[fmt])
+        self.entity = entity
+        self.run_kwargs = run_kwargs
+        self.fmt = fmt
+        self.metrics = metrics
+        self.started = started
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.heartbeat = heartbeat
+        self.slow_client_timeout = slow_client_timeout
+        self.stream_headers = dict(STREAM_HEADERS, **(headers or {}))
+        self.waited = 0.0
+
+    async def _produce(self) -> None:
+        from agno.run.response import RunEvent
+
+        try:
+            stream = await self.entity.arun(stream=True, stream_intermediate_steps=True, **self.run_kwargs)
+            async for chunk in stream:
+                if self.queue.full():
+                    # The client is behind: hold the run here instead of buffering its events
+                    waiting = time.perf_counter()
+                    await self.queue.put(chunk)
+                    self.waited += time.perf_counter() - waiting
+                else:
+                    self.queue.put_nowait(chunk)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self.queue.put({"event": RunEvent.run_error.value, "content": str(e)})
+        finally:
+            await self.queue.put(_END)
+
+    async def __call__(self, scope, receive, send) -> None:
+        from agno.run.response import RunEvent
+
+        headers = [(b"content-type", FORMATS[self.fmt].encode("latin-1"))]
+        headers += [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in self.stream_headers.items()]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        if self.fmt == "sse":
+            # Some proxies hold the headers back until body bytes follow
+            await send({"type": "http.response.body", "body": b": stream open\n\n", "more_body": True})
+            self.metrics.ttfb.observe(time.perf_counter() - self.started, format=self.fmt)
+
+        producer = asyncio.create_task(self._produce())
+        heartbeat = b": ping\n\n" if self.fmt == "sse" else b"\n"
+        event_id, sent_bytes, first_token, outcome = 0, 0, None, "completed"
+        self.metrics.active.inc()
+        try:
+            while True:
+                try:
+                    item = self.queue.get_nowait()  # Fast path while the run is ahead of the client
+                except asyncio.QueueEmpty:
+                    try:
+                        async with asyncio.timeout(self.heartbeat):
+                            item = await self.queue.get()
+                    except TimeoutError:
+                        item = None
+                if item is _END:
+                    break
+                if item is None:
+                    body = heartbeat
+                else:
+                    event_id += 1
+                    body = encode_event(item, self.fmt, event_id)
+                    event = item.get("event") if isinstance(item, dict) else getattr(item, "event", None)
+                    if event == RunEvent.run_error.value:
+                        outcome = "error"
+                    elif first_token is None and event == RunEvent.run_response.value and getattr(item, "content", None):
+                        first_token = time.perf_counter() - self.started
+                        self.metrics.first_token.observe(first_token, format=self.fmt)
+                try:
+                    async with asyncio.timeout(self.slow_client_timeout):
+                        await send({"type": "http.response.body", "body": body, "more_body": True})
+                except TimeoutError:
+                    outcome = "slow_client"
+                    break
+                if not sent_bytes and self.fmt == "ndjson":
+                    self.metrics.ttfb.observe(time.perf_counter() - self.started, format=self.fmt)
+                sent_bytes += len(body)
+            if outcome == "slow_client":
+                # End the response so the server closes it instead of holding a half-sent body open;
+                # the client is not read from, so this last write is bounded too
+                try:
+                    async with asyncio.timeout(self.slow_client_timeout):
+                        await send({"type": "http.response.body", "body": b"", "more_body": False})
+                except TimeoutError:
+                    pass
+            else:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        except (asyncio.CancelledError, OSError):
+            outcome = "disconnected"
+            raise
+        finally:
+            if not producer.done():
+                producer.cancel()
+            duration = time.perf_counter() - self.started
+            self.metrics.active.dec()
+            self.metrics.duration.observe(duration, format=self.fmt)
+            self.metrics.events.inc(event_id, format=self.fmt)
+            self.metrics.bytes.inc(sent_bytes, format=self.fmt)
+            self.metrics.backpressure.inc(self.waited)
+            self.metrics.outcomes.inc(outcome=outcome)
+            log_event(
+                "stream.finished",
+                entity_id=getattr(self.entity, "agent_id", None) or getattr(self.entity, "team_id", None),
+                format=self.fmt,
+                outcome=outcome,
+                events=event_id,
+                bytes=sent_bytes,
+                first_token_ms=round(first_token * 1000, 1) if first_token is not None else None,
+                duration_ms=round(duration * 1000, 1),
+                backpressure_ms=round(self.waited * 1000, 1),
+            )
+
+
+def mount_streaming(
+    app,
+    agents: List[Any],
+    teams: Optional[List[Any]] = None,
+    default_format: str = "sse",
+    queue_size: int = 64,
+    heartbeat: float = 15.0,
+    slow_client_timeout: float = 60.0,
+    registry: MetricsRegistry = REGISTRY,
+) -> None:
+    """Add POST /stream (streamed agent or team runs as SSE or NDJSON) to a FastAPI app."""
+    from fastapi import Form, HTTPException, Query, Request
+
+    if default_format not in FORMATS:
+        raise ValueError(f"❌ Unknown STREAM_FORMAT '{default_format}'. Expected one of: {', '.join(FORMATS)}")
+    metrics = StreamMetrics(registry)
+    agents_by_id = {a.agent_id: a for a in agents or [] if getattr(a, "agent_id", None)}
+    teams_by_id = {t.team_id: t for t in teams or [] if getattr(t, "team_id", None)}
+
+    async def stream_run(
+        request: Request,
+        message: str = Form(...),
+        session_id: Optional[str] = Form(None),
+        user_id: Optional[str] = Form(None),
+        agent_id: Optional[str] = Query(None),
+        team_id: Optional[str] = Query(None),
+        format: Optional[str] = Query(None, description="sse or ndjson; defaults to the Accept header"),
+    ):
+        started = time.perf_counter()
+        if bool(agent_id) == bool(team_id):
+            raise HTTPException(status_code=400, detail="Exactly one of agent_id or team_id must be provided")
+        entity = agents_by_id.get(agent_id) if agent_id else teams_by_id.get(team_id)
+        if entity is None:
+            raise HTTPException(status_code=404, detail=f"{'Agent' if agent_id else 'Team'} not found")
+        try:
+            fmt = negotiate_format(format, request.headers.get("accept", ""), default_format)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return RunStreamResponse(
+            entity,
+            # A new session per request without one, as POST /runs does
+            {"message": message, "session_id": session_id or str(uuid4()), "user_id": user_id},
+            fmt,
+            metrics,
+            started,
+            queue_size=queue_size,
+            heartbeat=heartbeat,
+            slow_client_timeout=slow_client_timeout,
+        )
+
+    app.add_api_route(
+        "/stream",
+        stream_run,
+        methods=["POST"],
+        response_class=Response,
+        tags=["Streaming"],
+        summary="Stream an agent or team run as SSE or NDJSON",
+    )
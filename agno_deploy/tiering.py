@@ -0,0 +1,203 @@
+"""
+Model tiering for Agno agents: a cheaper, faster model for simple lookups.
+
+Every example agent uses GPT-4o, even for "what's AAPL's price right now".
+apply_model_tiering() gives each agent a light twin that runs on a smaller
+model (gpt-4o-mini by default) and shares the agent's memory, then routes
+every run:
+
+- classify(): a query with a lookup term (price, quote, market cap), at most
+  one ticker, no analysis terms and a short length goes to the light tier;
+  everything else stays on the agent's own model;
+- cascade (non-streaming runs): the light answer is checked and the run is
+  repeated on the full model when the light model made more than
+  `max_light_tool_calls` tool calls, answered empty, hedged ("I'm not sure",
+  "unable to") or failed. The discarded light run is removed from memory.
+
+Streaming runs cannot be checked after the fact, so they are routed by
+classification alone. Per-tier request counts, latency, token cost and
+escalation reasons are reported in /metrics.
+
+Usage:
+    apply_model_tiering(deployed_agents, light_model_id="gpt-4o-mini")
+"""
+
+import logging
+import re
+import time
+from copy import deepcopy
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from agno_deploy.logs import iter_agents, log
+from agno_deploy.metrics import REGISTRY, MetricsRegistry
+
+# USD per 1M tokens: (input, output)
+DEFAULT_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+
+COMPLEX_TERMS = re.compile(
+    r"\b(analy[sz]\w*|compar\w*|income statements?|balance sheet|ratios?|fundamentals?|strateg\w*|outlook|"
+    r"forecast\w*|valuation|news|risks?|portfolio|recommend\w*|why|should|explain|versus|vs)\b",
+    re.IGNORECASE,
+)
+LOOKUP_TERMS = re.compile(
+    r"\b(price|quote|trading at|market cap|worth|close|closing|open|opening|volume|52[- ]week|right now|today)\b",
+    re.IGNORECASE,
+)
+TICKER = re.compile(r"\$?\b[A-Z]{1,5}\b")
+NOT_TICKERS = {"I", "A", "AI", "CEO", "CFO", "EPS", "ETF", "IPO", "PE", "US", "USA", "USD", "EU", "UK", "OK"}
+HEDGES = re.compile(
+    r"(I'm not sure|I am not sure|I cannot|I can't|unable to|I don't have|I do not have|not able to)", re.IGNORECASE
+)
+
+
+def classify(message: Any, max_words: int = 25) -> Tuple[str, str]:
+    """Return ("light" | "full", reason) for a run's input message."""
+    if not isinstance(message, str) or not message.strip():
+        return "full", "non_text"
+    if COMPLEX_TERMS.search(message):
+        return "full", "complex_terms"
+    if len(message.split()) > max_words:
+        return "full", "long_query"
+    tickers = {t.lstrip("$") for t in TICKER.findall(message)} - NOT_TICKERS
+    if len(tickers) > 1:
+        return "full", "multiple_tickers"
+    if LOOKUP_TERMS.search(message):
+        return "light", "lookup"
+    return "full", "default"
+
+
+def _tokens(metrics: Optional[Dict[str, Any]], key: str) -> int:
+    value = (metrics or {}).get(key, 0)
+    return sum(value) if isinstance(value, list) else int(value or 0)
+
+
+def _forget_run(memory, response) -> None:
+    """Drop a discarded run from agent memory (agno Memory keeps runs per session)."""
+    runs = getattr(memory, "runs", None)
+    if isinstance(runs, dict) and response.session_id in runs:
+        runs[response.session_id] = [r for r in runs[response.session_id] if r.run_id != response.run_id]
+
+
+class ModelTiering:
+    """Routes one agent's runs between its own model and a light twin."""
+
+    def __init__(
+        self,
+        agent,
+        light_model_id: str,
+        cascade: bool = True,
+        max_light_tool_calls: int = 1,
+        prices: Optional[Dict[str, Tuple[float, float]]] = None,
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.agent = agent
+        self.full_arun = agent.arun
+        self.full_model_id = agent.model.id
+        self.light_model_id = light_model_id
+        self.cascade = cascade
+        self.max_light_tool_calls = max_light_tool_calls
+        self.prices = dict(DEFAULT_PRICES, **(prices or {}))
+
+        light_model = deepcopy(agent.model)
+        light_model.id = light_model_id
+        if agent.memory is None:
+            from agno.memory.v2.memory import Memory
+
+            # What Agno would create on the first run; created now so both tiers get the same one
+            agent.memory = Memory()
+        # Share memory so a conversation keeps its history when it moves between tiers
+        self.light_agent = agent.deep_copy(update={"model": light_model, "memory": agent.memory})
+
+        self.requests = registry.counter("tier_requests_total", "Agent runs routed to each model tier, by reason")
+        self.latency = registry.histogram("tier_run_seconds", "Agent run latency per model tier")
+        self.cost = registry.counter("tier_cost_usd_total", "Estimated model cost per tier in USD")
+        self.escalations = registry.counter("tier_escalations_total", "Light-tier runs repeated on the full model, by reason")
+
+    def install(self) -> None:
+        self.agent.arun = self.arun
+
+    async def arun(self, message=None, **kwargs):
+        tier, reason = classify(message)
+        self.requests.inc(tier=tier, reason=reason)
+        stream = kwargs.get("stream")
+        if stream is None:
+            stream = bool(self.agent.stream)
+
+        if tier == "full":
+            return await self._run("full", self.full_arun, message, stream, kwargs)
+        if stream or not self.cascade:
+            return await self._run("light", self.light_agent.arun, message, stream, kwargs)
+
+        try:
+            response = await self._run("light", self.light_agent.arun, message, False, kwargs)
+            escalate = self._escalation_reason(response)
+        except Exception as e:
+            response, escalate = None, "error"
+            log(f"⚠️  Light model run failed, escalating: {e}", level=logging.WARNING)
+        if escalate is None:
+            return response
+
+        self.escalations.inc(reason=escalate)
+        if response is not None:
+            _forget_run(self.agent.memory, response)
+        return await self._run("full", self.full_arun, message, False, kwargs)
+
+    async def _run(self, tier: str, arun, message, stream: bool, kwargs):
+        started = time.monotonic()
+        if not stream:
+            response = await arun(message, **kwargs)
+            self._observe(tier, started, response)
+            return response
+
+        response_stream = await arun(message, **kwargs)
+
+        async def timed_stream():
+            async for chunk in response_stream:
+                yield chunk
+            self.latency.observe(time.monotonic() - started, tier=tier)
+
+        return timed_stream()
+
+    def _observe(self, tier: str, started: float, response) -> None:
+        self.latency.observe(time.monotonic() - started, tier=tier)
+        model_id = self.light_model_id if tier == "light" else self.full_model_id
+        input_price, output_price = self.prices.get(model_id, (0.0, 0.0))
+        metrics = getattr(response, "metrics", None)
+        cost = (_tokens(metrics, "input_tokens") * input_price + _tokens(metrics, "output_tokens") * output_price) / 1e6
+        self.cost.inc(cost, tier=tier)
+
+    def _escalation_reason(self, response) -> Optional[str]:
+        """Why a light-tier answer should not be trusted, or None to accept it."""
+        if len(response.tools or []) > self.max_light_tool_calls:
+            return "tool_calls"
+        content = response.content
+        if not content or (isinstance(content, str) and not content.strip()):
+            return "empty"
+        if isinstance(content, str) and HEDGES.search(content):
+            return "low_confidence"
+        return None
+
+
+def apply_model_tiering(
+    agents: Iterable[Any],
+    light_model_id: str = "gpt-4o-mini",
+    cascade: bool = True,
+    max_light_tool_calls: int = 1,
+    prices: Optional[Dict[str, Tuple[float, float]]] = None,
+) -> int:
+    """Install model tiering on every agent (team members included); returns how many were tiered."""
+    tiered = 0
+    for agent in iter_agents(agents):
+        model = getattr(agent, "model", None)
+        # Teams and agents without a model, or already on the light model, are left alone
+        if not hasattr(agent, "agent_id") or model is None or model.id == light_model_id:
+            continue
+        ModelTiering(agent, light_model_id, cascade, max_light_tool_calls, prices).install()
+        tiered += 1
+    return tiered
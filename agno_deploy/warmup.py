@@ -0,0 +1,317 @@
+"""
+Warm-up of the market data store for the most-requested tickers.
+
+The first question about a ticker after the store's TTLs have run out pays
+for several Yahoo Finance round trips (price history, company info, ratios,
+statements, recommendations). A scheduled job fetches those ahead of the
+traffic, for a configured ticker list plus the tickers users asked about
+most in the last week:
+
+- TickerDemand is an Agno tool hook that counts the symbols of YFinance tool
+  calls per container and writes the counts to <root>/demand/ every
+  `flush_interval` seconds; top() adds up the files of all containers;
+- warm_up() fetches price history and fundamentals for a ticker list into a
+  MarketDataStore and reports coverage (share of ticker/dataset pairs the
+  store can answer locally) and the expected hit rate (the same, weighted by
+  demand) before and after;
+- SyntheticSource is a stand-in data source with deterministic prices and
+  fundamentals, for running the warm-up locally without network access.
+
+Usage:
+    demand = TickerDemand("/market-data", commit=volume.commit)
+    apply_demand_tracking(deployed_agents, demand)
+    report = warm_up(store, ["AAPL", "MSFT"] + demand.top(50), demand=demand.totals())
+
+    python -m agno_deploy.warmup --root /tmp/market-data --synthetic --tickers AAPL,MSFT,NVDA
+"""
+
+import argparse
+import collections
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+from agno_deploy.logs import iter_agents, log_event
+from agno_deploy.market_data import _SYMBOL, FUNDAMENTAL_FUNCTIONS, MarketDataStore, _day, period_start
+
+PRICES = "prices"
+
+
+def _instance_id() -> str:
+    # One demand file per container; MODAL_TASK_ID is set inside Modal containers
+    return os.environ.get("MODAL_TASK_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+
+class SyntheticSource:
+    """Stand-in for YFinanceSource: deterministic per-symbol prices and fundamentals, optional latency."""
+
+    def __init__(self, latency: float = 0.0, listed: date = date(2015, 1, 2)):
+        self.latency = latency
+        self.listed = listed
+        self.calls = collections.Counter()
+
+    @staticmethod
+    def _seed(symbol: str) -> int:
+        return zlib.crc32(symbol.encode())
+
+    def history(self, symbol: str, start: date, end: date) -> np.ndarray:
+        self.calls[PRICES] += 1
+        time.sleep(self.latency)
+        # Generate from the listing date so overlapping fetches agree on every bar
+        days = np.arange(_day(self.listed), _day(end) + 1, dtype=np.float64)
+        days = days[(days + 3) % 7 < 5]  # 1970-01-01 was a Thursday: keep Monday to Friday
+        rng = np.random.default_rng(self._seed(symbol))
+        close = 20 + self._seed(symbol) % 300 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, len(days))))
+        high, low = close * 1.01, close * 0.99
+        volume = rng.integers(1_000_000, 50_000_000, len(days)).astype(np.float64)
+        data = np.vstack([days, close, high, low, close, volume])  # COLUMNS order
+        return data[:, data[0] >= _day(max(start, self.listed))]
+
+    def fundamentals(self, symbol: str, function_name: str) -> str:
+        self.calls[function_name] += 1
+        time.sleep(self.latency)
+        rng = np.random.default_rng(self._seed(symbol))
+        info = {
+            "symbol": symbol,
+            "longName": f"{symbol} Corporation",
+            "sector": ["Technology", "Healthcare", "Financial Services", "Energy", "Consumer Cyclical"][self._seed(symbol) % 5],
+            "marketCap": int(rng.uniform(1e9, 3e12)),
+            "forwardPE": round(float(rng.uniform(5, 60)), 2),
+            "trailingPE": round(float(rng.uniform(5, 80)), 2),
+            "priceToBook": round(float(rng.uniform(0.5, 40)), 2),
+            "dividendYield": round(float(rng.uniform(0, 0.05)), 4),
+            "trailingEps": round(float(rng.uniform(-2, 20)), 2),
+            "beta": round(float(rng.uniform(0.3, 2.0)), 2),
+            "returnOnEquity": round(float(rng.uniform(-0.2, 0.6)), 4),
+            "debtToEquity": round(float(rng.uniform(0, 250)), 2),
+            "profitMargins": round(float(rng.uniform(-0.1, 0.4)), 4),
+            "revenueGrowth": round(float(rng.uniform(-0.2, 0.5)), 4),
+            "recommendationKey": ["strong_buy", "buy", "hold", "sell"][self._seed(symbol) % 4],
+        }
+        if function_name == "get_analyst_recommendations":
+            counts = rng.integers(0, 20, (4, 5))
+            keys = ("strongBuy", "buy", "hold", "sell", "strongSell")
+            return json.dumps({str(i): {"period": f"-{i}m", **dict(zip(keys, map(int, row)))} for i, row in enumerate(counts)})
+        if function_name == "get_income_statements":
+            return json.dumps({"Total Revenue": int(info["marketCap"] * 0.2), "Net Income": int(info["marketCap"] * 0.02)})
+        return json.dumps(info, indent=2)
+
+
+class TickerDemand:
+    """Per-container counts of the tickers in YFinance tool calls, shared through the store directory."""
+
+    def __init__(
+        self,
+        root: str,
+        commit: Optional[Callable[[], None]] = None,
+        flush_interval: float = 60.0,
+        max_age: float = 7 * 86400,
+    ):
+        self.directory = Path(root) / "demand"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.commit = commit
+        self.flush_interval = flush_interval
+        # Files not updated for this long (containers that are gone) no longer count
+        self.max_age = max_age
+        self.path = self.directory / f"{_instance_id()}.json"
+
+        self.counts: "collections.Counter[str]" = collections.Counter()
+        self._dirty = False
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def record(self, symbol: str) -> None:
+        symbol = symbol.strip().upper()
+        if not _SYMBOL.match(symbol):
+            return
+        with self._lock:
+            self.counts[symbol] += 1
+            self._dirty = True
+            due = time.monotonic() - self._flushed_at >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write this container's counts (and commit them) if they changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {"updated_at": time.time(), "counts": dict(self.counts)}
+            self._dirty = False
+            self._flushed_at = time.monotonic()
+        try:
+            tmp = self.path.with_name(f".{self.path.name}.tmp")
+            tmp.write_text(json.dumps(payload))
+            os.replace(tmp, self.path)
+            if self.commit is not None:
+                self.commit()
+        except Exception as e:
+            log_event("warmup.demand_flush_failed", error=str(e))
+
+    def totals(self) -> Dict[str, int]:
+        """Recent request counts per ticker, summed over all containers' files."""
+        totals: "collections.Counter[str]" = collections.Counter()
+        cutoff = time.time() - self.max_age
+        for path in self.directory.glob("*.json"):
+            try:
+                payload = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            if payload.get("updated_at", 0) >= cutoff:
+                totals.update(payload.get("counts", {}))
+        return dict(totals)
+
+    def top(self, n: int) -> List[str]:
+        """The `n` most-requested tickers of the last `max_age` seconds."""
+        return [symbol for symbol, _ in collections.Counter(self.totals()).most_common(n)]
+
+    def hook(self, function_name: str, function_call: Callable, arguments: Dict[str, Any]):
+        symbol = arguments.get("symbol")
+        if isinstance(symbol, str):
+            self.record(symbol)
+        return function_call(**arguments)
+
+
+def apply_demand_tracking(agents: Iterable[Any], demand: TickerDemand) -> int:
+    """Count the tickers in YFinanceTools calls of every agent that has them; returns how many agents."""
+    tracked = 0
+    for agent in iter_agents(agents):
+        if any(type(t).__module__ == "agno.tools.yfinance" for t in getattr(agent, "tools", None) or []):
+            # Outermost: every call is demand, including those answered by the breaker, caches and store
+            agent.tool_hooks = [demand.hook] + list(agent.tool_hooks or [])
+            tracked += 1
+    return tracked
+
+
+def _coverage(store: MarketDataStore, symbols: List[str], datasets: List[str], start: date, weights: Mapping[str, float]):
+    """Coverage of the warmed `symbols`, and the hit rate expected for the demand in `weights`."""
+    covered = {
+        (symbol, dataset): store.covers(symbol, dataset if dataset != PRICES else "get_historical_stock_prices", start)
+        for symbol in dict.fromkeys([*symbols, *weights])
+        for dataset in datasets
+    }
+    return {
+        "coverage": sum(covered[s, d] for s in symbols for d in datasets) / (len(symbols) * len(datasets)),
+        "expected_hit_rate": sum(weights[s] for (s, _), ok in covered.items() if ok and s in weights)
+        / (sum(weights.values()) * len(datasets)),
+        "datasets": {d: sum(covered[s, d] for s in symbols) / len(symbols) for d in datasets},
+    }
+
+
+def warm_up(
+    store: MarketDataStore,
+    symbols: Iterable[str],
+    functions: Optional[Iterable[str]] = None,
+    period: str = "1y",
+    demand: Optional[Mapping[str, int]] = None,
+    max_workers: int = 8,
+) -> Dict[str, Any]:
+    """Fetch price history for `period` and the fundamentals `functions` of every ticker into `store`.
+
+    Returns a report with the coverage of these tickers and the hit rate
+    expected for `demand` (request counts per ticker, including tickers that
+    are not warmed) before and after, per dataset, plus the failures. Without
+    `demand`, every warmed ticker weighs as one request.
+    """
+    symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if _SYMBOL.match(s.strip().upper())))
+    functions = sorted(FUNDAMENTAL_FUNCTIONS if functions is None else functions)
+    if not symbols:
+        return {"symbols": 0, "coverage": {}, "expected_hit_rate": {}, "datasets": {}, "errors": []}
+    today = datetime.now(timezone.utc).date()
+    start, _ = period_start(period, today)
+    if start is None:
+        raise ValueError(f"❌ Unsupported warm-up period '{period}'. Use e.g. '1y', '6mo' or 'ytd'.")
+    datasets = [PRICES] + functions
+    weights = {s.upper(): float(n) for s, n in (demand or {}).items() if n > 0 and _SYMBOL.match(s.upper())}
+    weights = weights or {s: 1.0 for s in symbols}
+
+    before = _coverage(store, symbols, datasets, start, weights)
+    errors: List[Dict[str, str]] = []
+    started = time.monotonic()
+
+    def fetch(symbol: str) -> None:
+        try:
+            store.history(symbol, start, today)
+        except Exception as e:
+            errors.append({"symbol": symbol, "dataset": PRICES, "error": str(e)})
+        for function_name in functions:
+            try:
+                store.fundamentals(symbol, function_name)
+            except Exception as e:
+                errors.append({"symbol": symbol, "dataset": function_name, "error": str(e)})
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="warmup") as pool:
+        list(pool.map(fetch, symbols))
+
+    after = _coverage(store, symbols, datasets, start, weights)
+    report = {
+        "symbols": len(symbols),
+        "period": period,
+        "duration_s": round(time.monotonic() - started, 2),
+        "coverage": {"before": round(before["coverage"], 4), "after": round(after["coverage"], 4)},
+        "expected_hit_rate": {
+            "before": round(before["expected_hit_rate"], 4),
+            "after": round(after["expected_hit_rate"], 4),
+        },
+        "datasets": {
+            d: {"before": round(before["datasets"][d], 4), "after": round(after["datasets"][d], 4)} for d in datasets
+        },
+        "errors": errors,
+    }
+    log_event("warmup.done", **{k: v for k, v in report.items() if k != "datasets"})
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prefetch market data for the most-requested tickers")
+    parser.add_argument("--root", required=True, help="Market data store directory")
+    parser.add_argument("--tickers", default="", help="Comma-separated tickers to warm in any case")
+    parser.add_argument("--top", type=int, default=50, help="Also warm the N most-requested tickers (demand files)")
+    parser.add_argument("--period", default="1y", help="Price history to prefetch (yfinance period)")
+    parser.add_argument("--synthetic", action="store_true", help="Use the synthetic stand-in source instead of Yahoo")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated latency per synthetic fetch, seconds")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    source = SyntheticSource(latency=args.latency) if args.synthetic else None
+    store = MarketDataStore(args.root, source=source)
+    demand = TickerDemand(args.root)
+    symbols = [t for t in args.tickers.split(",") if t.strip()] + demand.top(args.top)
+    try:
+        report = warm_up(store, symbols, period=args.period, demand=demand.totals())
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    print(f"🔥 Warmed {report['symbols']} ticker(s) in {report.get('duration_s', 0)} s")
+    for key, label in (("coverage", "Coverage"), ("expected_hit_rate", "Expected hit rate")):
+        if report[key]:
+            print(f"   {label + ':':19}{report[key]['before']:.0%} -> {report[key]['after']:.0%}")
+    for dataset, values in report["datasets"].items():
+        print(f"   {dataset:32} {values['before']:.0%} -> {values['after']:.0%}")
+    for error in report["errors"]:
+        print(f"   ⚠️  {error['symbol']} {error['dataset']}: {error['error']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Event-loop stall detector for Agno Modal deployments.
+
+With @modal.concurrent(max_inputs=100) every request in a container shares a
+single event loop, so one blocking tool call (yfinance, pandas, JSON work)
+delays every concurrent stream. The watchdog has two parts:
+
+- a heartbeat task on the event loop that sleeps for a short interval and
+  records how late it woke up in the event_loop_lag_seconds histogram;
+- a monitor thread that notices when the heartbeat has been silent for longer
+  than the threshold and captures the event-loop thread's stack while it is
+  still blocked, attributing the stall to the innermost tool/agent frame.
+
+Stalls are counted in event_loop_stalls_total{culprit=...}, logged as
+"loop.stall" warnings and the most recent stacks are served from
+GET /metrics/stalls.
+"""
+
+import asyncio
+import collections
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import List, Optional
+
+from agno_deploy.logs import log_event
+from agno_deploy.metrics import REGISTRY, MetricsRegistry
+
+# Lag buckets in seconds; finer than request latency buckets
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Path fragments used to attribute a stall, most specific first
+CULPRIT_PATHS = (
+    "agno_agents/",
+    "agno_deploy/",
+    "agno/tools/",
+    "yfinance/",
+    "pandas/",
+    "agno/",
+)
+
+
+def find_culprit(stack: traceback.StackSummary) -> str:
+    """Return "module:function" for the innermost frame in agent, tool or data code."""
+    for fragment in CULPRIT_PATHS:
+        for frame in reversed(stack):
+            path = frame.filename.replace("\\", "/")
+            if fragment in path:
+                module = path.split(fragment, 1)[1].rsplit(".py", 1)[0].replace("/", ".")
+                return f"{fragment.rstrip('/').replace('/', '.')}.{module}:{frame.name}"
+    if stack:
+        return f"{stack[-1].filename.rsplit('/', 1)[-1]}:{stack[-1].name}"
+    return "unknown"
+
+
+class LoopWatchdog:
+    """
+    Detect event-loop lag above a threshold and capture the blocking stack.
+
+    Call start() from inside the running loop (e.g. an ASGI startup handler)
+    and stop() on shutdown.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.1,
+        interval: float = 0.05,
+        max_stalls: int = 50,
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls = collections.deque(maxlen=max_stalls)
+        self.lag = registry.histogram(
+            "event_loop_lag_seconds", "Delay of the event-loop heartbeat beyond its interval", buckets=LAG_BUCKETS
+        )
+        self.stall_count = registry.counter(
+            "event_loop_stalls_total", "Event-loop stalls above the threshold, by culprit frame"
+        )
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = time.monotonic()
+        self._pending: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._monitor, name="agno-deploy-loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    async def _heartbeat(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            previous = self._last_beat
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self._last_beat = time.monotonic()
+            self.lag.observe(lag)
+            # Every beat consumes the capture, so a short block never leaves its stack to the next stall
+            pending, self._pending = self._pending, None
+            if pending is not None and pending["beat"] != previous:
+                pending = None  # Captured during an earlier silence
+            if lag >= self.threshold:
+                self._finish_stall(lag, pending)
+
+    def _finish_stall(self, lag: float, pending: Optional[dict]) -> None:
+        stall = pending or {"culprit": "unknown", "stack": [], "captured_at": time.time()}
+        stall.pop("beat", None)
+        stall["lag_ms"] = round(lag * 1000, 1)
+        self.stalls.append(stall)
+        self.stall_count.inc(culprit=stall["culprit"])
+        log_event("loop.stall", level=logging.WARNING, culprit=stall["culprit"], lag_ms=stall["lag_ms"],
+                  stack=stall["stack"][-8:])
+
+    def _monitor(self) -> None:
+        while not self._stop.wait(self.interval):
+            beat = self._last_beat
+            # The same quantity the heartbeat measures: silence beyond the heartbeat interval
+            lag = time.monotonic() - beat - self.interval
+            if lag < self.threshold or (self._pending is not None and self._pending["beat"] == beat):
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            self._pending = {
+                "culprit": find_culprit(stack),
+                "stack": [f"{f.filename}:{f.lineno} in {f.name}" for f in stack],
+                "captured_at": time.time(),
+                "beat": beat,
+            }
+
+    def recent_stalls(self) -> List[dict]:
+        return list(self.stalls)
+
+
+def install_watchdog(app, threshold: float = 0.1, interval: float = 0.05) -> LoopWatchdog:
+    """Start a LoopWatchdog with the app's lifespan and serve recent stalls from /metrics/stalls."""
+    watchdog = LoopWatchdog(threshold=threshold, interval=interval)
+    app.add_event_handler("startup", watchdog.start)
+    app.add_event_handler("shutdown", watchdog.stop)
+
+    async def stalls():
+        return {"threshold_ms": threshold * 1000, "stalls": watchdog.recent_stalls()}
+
+    app.add_api_route("/metrics/stalls", stalls, methods=["GET"], tags=["Metrics"])
+    return watchdog
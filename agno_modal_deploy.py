@@ -16,6 +16,29 @@ Features:
 - Optional token-based authentication
 - Auto-scaling and production-ready configuration
 - Flexible agent detection with multiple patterns
+- Production logging mode (async structured logs, no agent debug output)
+- Metrics endpoint with event-loop stall detection
+- Capacity settings from the planner's deploy_config.json
+- Admission control with load shedding (429 + Retry-After)
+- Fair, priority-aware scheduling of agent runs across tenants
+- Cancellation of in-flight agent runs when the client disconnects
+- Shared keep-alive HTTP clients for model and market-data traffic
+- Hedged model requests and jittered retries within a per-request budget
+- Circuit breaker with stale-cache fallback for Yahoo Finance outages
+- Token-budgeted compaction of YFinance tool outputs
+- Local market-data store on a Modal Volume (incremental price history)
+- Scheduled pre-market warm-up of the store for the most-requested tickers
+- One-call vectorised screening and ranking of many tickers
+- Two-tier response and tool-result cache shared across containers
+- Semantic cache answering paraphrased questions (local CPU embeddings)
+- Bounded per-container session history (byte budget, LRU eviction)
+- Admin memory and CPU profiling endpoints (tracemalloc diffs, flamegraph stacks)
+- Streaming-first POST /stream (unbuffered SSE or NDJSON, backpressure, TTFB metrics)
+- Asynchronous job API for long-running analyses (submit, poll or stream)
+- Batch endpoint running many prompts concurrently (NDJSON results)
+- Fan-out endpoint asking several agents at once with a merged answer
+- Zero-LLM intent router that picks the agent for each request
+- Optional model tiering: a cheaper model for simple lookups
 
 Usage:
     1. Edit AGENT_FILE variable below
@@ -23,10 +46,14 @@ Usage:
     3. modal deploy agno_modal_deploy.py
 """
 
+import logging
 import modal
 import os
 from pathlib import Path
 
+from agno_deploy.config import get_setting, load_deploy_config
+from agno_deploy.logs import apply_log_mode, configure_logging, log
+
 # ============================================================================
 # CONFIGURATION 
 # ============================================================================
@@ -35,8 +62,123 @@ AGENT_FILE = "agno_agents/multi_agent_app_function_fastapi.py"
 # Authentication Configuration
 ENABLE_AUTH = True   # Set to False to disable authentication
 PROTECT_DOCS = False  # Set to False to make /docs publicly accessible
+# Logging Configuration
+LOG_MODE = "production"  # "production" (async structured logs, no agent debug output) or "debug"
+# Observability Configuration
+ENABLE_METRICS = False         # Opt in: serve GET /metrics with runtime counters and histograms
+LOOP_STALL_THRESHOLD_MS = 100  # Event-loop lag reported as a stall (0 disables the watchdog)
+ENABLE_MEMORY_PROFILER = False  # Opt in: serve /admin/memory (needs AUTH_TOKEN; tracemalloc stays off until started)
+ENABLE_CPU_PROFILER = False    # Opt in: serve POST /admin/profile (needs AUTH_TOKEN; samples only while a profile runs)
+# Capacity Configuration (written by: python -m agno_deploy.planner --write deploy_config.json)
+DEPLOY_CONFIG_FILE = "deploy_config.json"  # Environment variables override values from this file
+# Admission Control Configuration (fast 429 + Retry-After instead of waiting for TIMEOUT)
+ENABLE_ADMISSION_CONTROL = False  # Opt in: shed load with 429 + Retry-After and schedule runs fairly
+MAX_IN_FLIGHT = None          # Agent runs executing at once per container (None: the planner's MAX_CONCURRENT)
+MAX_QUEUE = 50                # Requests allowed to wait for a free slot
+QUEUE_TIMEOUT_S = 10          # Longest wait for a slot before shedding with 429
+RATE_LIMIT_PER_TOKEN = 0      # Sustained requests/second per API token (0 disables; with one shared AUTH_TOKEN this caps all clients together)
+RATE_LIMIT_BURST = 20         # Requests a token may send in a burst
+PRIORITY_CLASSES = {"interactive": 4, "batch": 1}  # Weighted fair queuing weights
+DEFAULT_PRIORITY_CLASS = "interactive"              # Class of callers without a mapped token
+TENANT_TOKENS = {}            # .env variable holding a client's own token -> (tenant, priority class), e.g. {"NIGHTLY_REVIEW_TOKEN": ("nightly-review", "batch")}
+TRUST_TENANT_HEADERS = False  # Honour client-sent X-Tenant-ID / X-Priority-Class (only behind a gateway that sets them)
+# Cancellation Configuration
+CANCEL_ON_DISCONNECT = False  # Opt in: stop model and tool work when the client goes away
+# HTTP Client Configuration
+ENABLE_SHARED_HTTP_CLIENTS = False  # Opt in: one pooled keep-alive (HTTP/2) client per upstream per container
+# Model Call Resilience (needs ENABLE_SHARED_HTTP_CLIENTS)
+ENABLE_MODEL_RESILIENCE = False  # Opt in: hedge slow model calls and retry failed ones
+MODEL_HEDGING = True            # Duplicate a call that is past the p95 time to first token (costs ~5% extra calls)
+MODEL_MAX_ATTEMPTS = 3          # Attempts per model call, hedges and retries included
+MODEL_RETRY_BUDGET_S = 60       # No new attempt after this many seconds
+# Tool Output Compaction Configuration (smaller YFinance results in the model context)
+ENABLE_TOOL_COMPACTION = False  # Opt in: trim YFinance results before they reach the model
+TOOL_TOKEN_BUDGETS = {}         # Per-tool token budget overrides, e.g. {"get_income_statements": 800}
+# Market Data Store Configuration (price history and fundamentals on a Modal Volume)
+ENABLE_MARKET_DATA_STORE = False  # Opt in: create and mount a Modal Volume for price history and fundamentals
+MARKET_DATA_DIR = "/market-data"  # Volume mount path inside the container
+MARKET_DATA_REFRESH_S = 900       # Re-fetch the newest bars after this many seconds
+FUNDAMENTALS_TTL_S = 21600        # Keep company info, ratios and statements this long
+# Market Data Warm-up Configuration (scheduled prefetch into the store; needs ENABLE_MARKET_DATA_STORE)
+ENABLE_WARMUP = False  # Opt in: deploy a scheduled warm-up function (needs ENABLE_MARKET_DATA_STORE)
+WARMUP_SCHEDULE = "15 13 * * 1-5"  # Cron, UTC: weekdays 9:15 New York summer time, before the open
+WARMUP_TICKERS = ["AAPL", "MSFT", "NVDA", "AMZN", "GOOGL", "META", "TSLA"]  # Always warmed
+WARMUP_TOP_N = 50                 # Plus the most-requested tickers of the last 7 days
+WARMUP_PERIOD = "1y"              # Price history prefetched per ticker
+# YFinance Circuit Breaker Configuration (fail fast and serve cached data while Yahoo is down)
+ENABLE_YFINANCE_BREAKER = False  # Opt in: fail fast and serve stale data while Yahoo is down
+BREAKER_FAILURE_THRESHOLD = 5   # Failed tool calls in a row that open the circuit
+BREAKER_PROBE_INTERVAL_S = 15   # Background recovery check interval while open
+BREAKER_STALE_TTL_S = 86400     # Oldest cached result served as stale data
+# Screening Tool Configuration (screen_stocks ranks many tickers in one tool call)
+ENABLE_SCREENING = False  # Opt in: add the screen_stocks tool to agents with YFinanceTools
+SCREENING_MAX_TICKERS = 100     # Largest universe per screen
+# Two-Tier Cache Configuration (in-process LRU in front of a modal.Dict shared by all containers)
+ENABLE_CACHE = False  # Opt in: reuse answers and tool results across requests and containers
+CACHE_BACKEND = "modal"         # "modal" (shared across containers) or "local" (in-process stand-in for testing)
+CACHE_L1_ENTRIES = 2048         # In-process entries per cache and container
+CACHE_L1_MAX_MB = 64            # In-process memory per cache and container
+RESPONSE_CACHE_TTL_S = 300      # Answers to identical questions asked outside a conversation (0 disables)
+TOOL_CACHE_TTLS = {}            # Per-tool TTL overrides in seconds, e.g. {"get_current_stock_price": 30}
+# Semantic Cache Configuration (answers paraphrases: "How's Nvidia doing?" ~ "NVDA performance today")
+ENABLE_SEMANTIC_CACHE = False  # Opt in: answer paraphrases with earlier answers
+SEMANTIC_CACHE_EMBEDDER = "auto"      # "auto" (fastembed bge-small if installed, else hashing), "hashing" or a fastembed model
+SEMANTIC_CACHE_THRESHOLD = None       # Lowest cosine similarity reused; None: the one tuned for the embedder
+SEMANTIC_CACHE_FRESHNESS_S = 300      # Oldest answer reused for a paraphrase
+SEMANTIC_CACHE_MAX_ENTRIES = 5000     # Answers kept per agent and container
+# Session Memory Configuration (conversation history kept in container memory when agents have no storage)
+ENABLE_SESSION_MEMORY_LIMIT = False  # Opt in: evict and compact in-memory conversation history
+SESSION_MEMORY_MAX_MB = 256     # Budget for all sessions of a container; least recently used sessions are evicted
+SESSION_MAX_MB = 8              # Largest single session; its oldest runs are dropped first
+SESSION_IDLE_TTL_S = 3600       # Sessions without a run for this long are evicted (None keeps them)
+SESSION_COMPACT_RUNS = True     # Store runs without tool payloads, history copies and media
+# Job API Configuration (POST /jobs returns a job id at once; the run happens on a worker)
+ENABLE_JOBS = False  # Opt in: deploys a job worker function and a modal.Dict
+JOB_WORKER = "modal"          # "modal" (separate worker function) or "local" (in-process stand-in for testing)
+JOB_RETENTION_S = 3600        # How long finished jobs and their results are kept
+JOB_TIMEOUT = 1800            # Longest job run on the worker, in seconds
+JOB_MAX_CONTAINERS = 5        # Worker containers running jobs at once
+JOB_MAX_CONCURRENT = 10       # Jobs per worker container
+JOB_SWEEP_SCHEDULE = "0 * * * *"  # Cron schedule (UTC) of the sweep that drops expired jobs from the modal.Dict
+# Streaming Configuration (POST /stream serves runs as unbuffered SSE or NDJSON)
+ENABLE_STREAMING = False  # Opt in: serve POST /stream
+STREAM_FORMAT = "sse"              # "sse" or "ndjson"; clients can override with ?format= or the Accept header
+STREAM_QUEUE_EVENTS = 64           # Events buffered per run before the run waits for a slow client
+STREAM_HEARTBEAT_S = 15            # Keep-alive comment/blank line while no event arrives
+STREAM_SLOW_CLIENT_TIMEOUT_S = 60  # Cancel the run when the client reads nothing for this long
+# Batch Configuration (POST /batch runs a list of prompts for one agent)
+ENABLE_BATCH = False  # Opt in: serve POST /batch
+BATCH_PARALLELISM = 8         # Prompts running at once when the request does not say
+BATCH_MAX_PARALLELISM = 32    # Upper bound for the request's "parallelism"
+BATCH_MAX_PROMPTS = 500       # Largest batch accepted
+# Fan-out Configuration (POST /fanout asks several agents the same question concurrently)
+ENABLE_FANOUT = False  # Opt in: serve POST /fanout
+FANOUT_AGENT_TIMEOUT_S = 120  # An agent still running after this long is stopped and reported as failed
+# Intent Router Configuration (POST /route picks the agent locally, no LLM call)
+ENABLE_ROUTER = False  # Opt in: serve POST /route and GET /route/explain
+ROUTING_RULES = {             # Keyword phrases per agent_id; rules for agents that are not deployed are ignored
+    "trading-strategy-agent": ["buy", "sell", "entry", "exit", "stop loss", "take profit", "position size", "trade"],
+    "financial-analysis-agent": ["income statement", "fundamentals", "ratios", "news", "analyst", "valuation", "earnings"],
+}
+ROUTING_DEFAULT_AGENT = None  # agent_id used when nothing matches (None: the first deployed agent)
+# Model Tiering Configuration (simple lookups go to a cheaper, faster model)
+ENABLE_MODEL_TIERING = False  # Opt in: changes which model answers simple questions
+LIGHT_MODEL_ID = "gpt-4o-mini"  # Same provider as the agents' own model
+TIER_CASCADE = True           # Re-run on the agent's own model when the light answer looks unreliable
 # ============================================================================
 
+configure_logging(LOG_MODE)
+
+# Load capacity settings recommended by the planner (empty if the file is absent)
+DEPLOY_CONFIG = load_deploy_config(Path(__file__).parent / DEPLOY_CONFIG_FILE)
+MAX_CONCURRENT = get_setting(DEPLOY_CONFIG, "max_concurrent", 100)
+if ENABLE_ADMISSION_CONTROL:
+    # The admission gate runs MAX_CONCURRENT requests at once; Modal delivers MAX_QUEUE more to wait in its queue
+    MAX_IN_FLIGHT = MAX_IN_FLIGHT or MAX_CONCURRENT
+    MAX_INPUTS = MAX_IN_FLIGHT + MAX_QUEUE
+else:
+    MAX_INPUTS = MAX_CONCURRENT
+
 # Sensitive authentication data (keep in .env file)
 # Note: AUTH_TOKEN validation happens inside fastapi_app() where .env is loaded
 AUTH_TOKEN = None  # Will be loaded from environment when needed
@@ -60,13 +202,13 @@ else:
     # File is in root directory
     AGENT_MODULE = APP_NAME
 
-print(f"🤖 Agent file: {agent_file_path}")
-print(f"📦 Modal app name: {APP_NAME}")
+log(f"🤖 Agent file: {agent_file_path}")
+log(f"📦 Modal app name: {APP_NAME}")
 if ENABLE_AUTH:
-    print(f"🔒 Authentication: ENABLED (token will be validated from .env)")
-    print(f"📚 Docs protection: {'ENABLED' if PROTECT_DOCS else 'DISABLED'}")
+    log(f"🔒 Authentication: ENABLED (token will be validated from .env)")
+    log(f"📚 Docs protection: {'ENABLED' if PROTECT_DOCS else 'DISABLED'}")
 else:
-    print(f"🔓 Authentication: DISABLED (public access)")
+    log(f"🔓 Authentication: DISABLED (public access)")
 
 def validate_auth_configuration():
     """
@@ -108,7 +250,7 @@ def validate_auth_configuration():
             "   Or set ENABLE_AUTH=False to disable authentication."
         )
     
-    print(f"✅ Authentication configuration validated successfully")
+    log(f"✅ Authentication configuration validated successfully")
 
 # Run validation at deployment time
 validate_auth_configuration()
@@ -120,11 +262,11 @@ def load_env_file():
     env_file_path = Path(__file__).parent / ".env"
     
     if env_file_path.exists():
-        print(f"📄 Found .env file at {env_file_path}")
+        log(f"📄 Found .env file at {env_file_path}")
         return True
     else:
-        print(f"📄 No .env file found at {env_file_path}")
-        print(f"   Create a .env file with your API keys for automatic secret injection")
+        log(f"📄 No .env file found at {env_file_path}")
+        log(f"   Create a .env file with your API keys for automatic secret injection")
         return False
 
 # Check if .env file exists
@@ -148,7 +290,7 @@ def load_requirements():
             f"   Create one with: pip freeze > requirements.txt"
         )
     
-    print(f"📦 Loading dependencies from {requirements_file}")
+    log(f"📦 Loading dependencies from {requirements_file}")
     try:
         with open(requirements_file, 'r') as f:
             for line_num, line in enumerate(f, 1):
@@ -160,12 +302,12 @@ def load_requirements():
                 
                 # Handle -e editable installs (skip them)
                 if line.startswith('-e '):
-                    print(f"  ⚠️  Line {line_num}: Skipping editable install: {line}")
+                    log(f"  ⚠️  Line {line_num}: Skipping editable install: {line}")
                     continue
                 
                 # Handle -r recursive requirements (skip them for now)
                 if line.startswith('-r '):
-                    print(f"  ⚠️  Line {line_num}: Skipping recursive requirement: {line}")
+                    log(f"  ⚠️  Line {line_num}: Skipping recursive requirement: {line}")
                     continue
                 
                 # Clean up the dependency line
@@ -175,7 +317,7 @@ def load_requirements():
                 
                 if line:
                     dependencies.add(line)
-                    print(f"  📋 Added: {line}")
+                    log(f"  📋 Added: {line}")
     
     except Exception as e:
         raise RuntimeError(
@@ -191,7 +333,7 @@ def load_requirements():
     
     # Convert to sorted list for consistent builds
     deps_list = sorted(list(dependencies))
-    print(f"📦 Total dependencies: {len(deps_list)}")
+    log(f"📦 Total dependencies: {len(deps_list)}")
     return deps_list
 
 # Load dependencies dynamically
@@ -209,6 +351,11 @@ image = (
     .add_local_dir(".", remote_path="/root")  # Include local files
 )
 
+# Persistent market data shared by all containers (see agno_deploy.market_data)
+market_data_volume = (
+    modal.Volume.from_name(f"{APP_NAME}-market-data", create_if_missing=True) if ENABLE_MARKET_DATA_STORE else None
+)
+
 def detect_agent_pattern(agent_module):
     """
     Detect and validate agent patterns in the module with priority-based selection.
@@ -230,7 +377,7 @@ def detect_agent_pattern(agent_module):
     # Get explicitly exported items if __all__ is defined
     if hasattr(agent_module, '__all__'):
         available_names = agent_module.__all__
-        print(f"🔍 Found __all__ export list: {available_names}")
+        log(f"🔍 Found __all__ export list: {available_names}")
     else:
         # Get all non-private attributes
         available_names = [name for name in dir(agent_module) if not name.startswith('_')]
@@ -270,18 +417,18 @@ def detect_agent_pattern(agent_module):
                 
         except Exception as e:
             # Skip any attributes that can't be accessed
-            print(f"  ⚠️  Skipping {name}: {e}")
+            log(f"  ⚠️  Skipping {name}: {e}")
             continue
     
     # Report findings
     if fastapi_functions:
-        print(f"🎯 Found FastAPIApp functions: {[name for name, _ in fastapi_functions]}")
+        log(f"🎯 Found FastAPIApp functions: {[name for name, _ in fastapi_functions]}")
     if agent_functions:
-        print(f"🤖 Found Agent functions: {[name for name, _ in agent_functions]}")
+        log(f"🤖 Found Agent functions: {[name for name, _ in agent_functions]}")
     if fastapi_variables:
-        print(f"📱 Found FastAPIApp variables: {[name for name, _ in fastapi_variables]}")
+        log(f"📱 Found FastAPIApp variables: {[name for name, _ in fastapi_variables]}")
     if agent_variables:
-        print(f"🔧 Found Agent variables: {[name for name, _ in agent_variables]}")
+        log(f"🔧 Found Agent variables: {[name for name, _ in agent_variables]}")
     
     # Priority-based selection
     # 1. Function returning FastAPIApp (highest priority)
@@ -326,18 +473,179 @@ def detect_agent_pattern(agent_module):
         f"   Use __all__ = ['function_or_variable_name'] to specify which to use if multiple exist."
     )
 
+def load_fastapi_app_instance():
+    """
+    Import the agent module and build the FastAPIApp for the detected pattern.
+    
+    Shared by the web endpoint and the job worker so both serve the same agents.
+    """
+    import importlib
+    from agno.agent import Agent
+    from agno.app.fastapi.app import FastAPIApp
+    
+    # Dynamically import the agent module
+    agent_module = importlib.import_module(AGENT_MODULE)
+    
+    # Detect the agent pattern
+    pattern_type, pattern_object, pattern_name = detect_agent_pattern(agent_module)
+    log(f"🎯 Detected pattern: {pattern_type} ({pattern_name})")
+    
+    # Handle different patterns
+    if pattern_type == 'fastapi_function':
+        # Function returning FastAPIApp
+        log(f"🚀 Loading FastAPIApp from {AGENT_MODULE}.{pattern_name}()")
+        fastapi_app_instance = pattern_object()
+        
+        if not isinstance(fastapi_app_instance, FastAPIApp):
+            raise TypeError(f"{pattern_name}() must return a FastAPIApp instance, got {type(fastapi_app_instance)}")
+        
+    elif pattern_type == 'agent_function':
+        # Function returning Agent
+        log(f"🚀 Loading Agent from {AGENT_MODULE}.{pattern_name}() and wrapping in FastAPIApp")
+        agent_instance = pattern_object()
+        
+        if not isinstance(agent_instance, Agent):
+            raise TypeError(f"{pattern_name}() must return an Agent instance, got {type(agent_instance)}")
+        
+        # Wrap agent in FastAPIApp - Updated for new Agno version
+        fastapi_app_instance = FastAPIApp(agents=[agent_instance])
+        
+    elif pattern_type == 'fastapi_variable':
+        # Direct FastAPIApp variable
+        log(f"🚀 Loading FastAPIApp from {AGENT_MODULE}.{pattern_name}")
+        fastapi_app_instance = pattern_object
+        
+    elif pattern_type == 'agent_variable':
+        # Direct Agent variable
+        log(f"🚀 Loading Agent from {AGENT_MODULE}.{pattern_name} and wrapping in FastAPIApp")
+        agent_instance = pattern_object
+        
+        # Wrap agent in FastAPIApp - Updated for new Agno version
+        fastapi_app_instance = FastAPIApp(agents=[agent_instance])
+        
+    else:
+        raise ValueError(f"Unknown pattern type: {pattern_type}")
+    
+    return fastapi_app_instance
+
+def create_cache(name: str):
+    """
+    Create a two-tier cache (in-process LRU plus a tier shared by all containers).
+    
+    With the Modal backend, the shared tier is a modal.Dict named after the app
+    (one Dict for all caches, keys are prefixed with the cache name); the local
+    stand-in keeps it in memory.
+    """
+    from agno_deploy.cache import TwoTierCache
+    
+    if CACHE_BACKEND not in ("modal", "local"):
+        raise ValueError(f"❌ Unknown CACHE_BACKEND '{CACHE_BACKEND}'. Expected 'modal' or 'local'.")
+    backend = None if CACHE_BACKEND == "local" else modal.Dict.from_name(f"{APP_NAME}-cache", create_if_missing=True)
+    return TwoTierCache(name, backend, l1_entries=CACHE_L1_ENTRIES, l1_max_bytes=CACHE_L1_MAX_MB * 1024 * 1024)
+
+def create_job_store():
+    """
+    Create the job store shared by the web endpoint and the job worker.
+    
+    With the Modal worker, job records live in a modal.Dict named after the app;
+    the local stand-in keeps them in memory.
+    """
+    from agno_deploy.jobs import JobStore
+    
+    if JOB_WORKER not in ("modal", "local"):
+        raise ValueError(f"❌ Unknown JOB_WORKER '{JOB_WORKER}'. Expected 'modal' or 'local'.")
+    backend = None if JOB_WORKER == "local" else modal.Dict.from_name(f"{APP_NAME}-jobs", create_if_missing=True)
+    return JobStore(backend, retention=JOB_RETENTION_S, max_runtime=JOB_TIMEOUT)
+
+if ENABLE_JOBS and JOB_WORKER == "modal":
+    @app.function(
+        image=image,
+        max_containers=JOB_MAX_CONTAINERS,
+        timeout=JOB_TIMEOUT,
+        secrets=[
+            modal.Secret.from_dotenv()
+        ] if has_env_file else [],
+    )
+    @modal.concurrent(max_inputs=JOB_MAX_CONCURRENT)
+    async def run_agent_job(job_id: str):
+        """
+        Job worker: runs one submitted analysis outside the interactive containers.
+        
+        Spawned by POST /jobs. Reads the job from the shared store and writes the
+        result back, so clients can poll or stream it from any web container.
+        """
+        from agno_deploy.jobs import run_job
+        
+        fastapi_app_instance = load_fastapi_app_instance()
+        deployed_agents = list(fastapi_app_instance.agents or []) + list(fastapi_app_instance.teams or [])
+        apply_log_mode(deployed_agents)
+        await run_job(create_job_store(), job_id, deployed_agents)
+
+    @app.function(image=image, schedule=modal.Cron(JOB_SWEEP_SCHEDULE), timeout=600)
+    async def purge_expired_jobs():
+        """
+        Scheduled sweep: drops expired jobs from the shared modal.Dict.
+        
+        Reads drop expired jobs too, but a job nobody polls again would stay
+        in the Dict forever without this sweep.
+        """
+        purged = await create_job_store().purge_expired()
+        if purged:
+            log(f"🧹 Job sweep: dropped {purged} expired job(s)")
+        return purged
+
+if ENABLE_WARMUP and market_data_volume is not None:
+    @app.function(
+        image=image,
+        schedule=modal.Cron(WARMUP_SCHEDULE),
+        timeout=1800,
+        secrets=[
+            modal.Secret.from_dotenv()
+        ] if has_env_file else [],
+        volumes={MARKET_DATA_DIR: market_data_volume},
+    )
+    def warm_up_market_data():
+        """
+        Scheduled warm-up: prefetches market data before traffic arrives.
+        
+        Warms WARMUP_TICKERS plus the WARMUP_TOP_N tickers the web containers
+        saw most often, then commits the Volume once. Run it by hand with
+        `modal run agno_modal_deploy.py::warm_up_market_data`, or locally with
+        `python -m agno_deploy.warmup --root <dir> --synthetic`.
+        """
+        from agno_deploy.market_data import MarketDataStore
+        from agno_deploy.warmup import TickerDemand, warm_up
+        
+        # Writes are committed once at the end instead of after every ticker
+        store = MarketDataStore(MARKET_DATA_DIR, refresh_after=MARKET_DATA_REFRESH_S, fundamentals_ttl=FUNDAMENTALS_TTL_S)
+        demand = TickerDemand(MARKET_DATA_DIR)
+        symbols = WARMUP_TICKERS + demand.top(WARMUP_TOP_N)
+        report = warm_up(store, symbols, period=WARMUP_PERIOD, demand=demand.totals())
+        market_data_volume.commit()
+        if report["symbols"]:
+            log(
+                f"🔥 Warm-up: {report['symbols']} ticker(s) in {report['duration_s']} s, "
+                f"coverage {report['coverage']['before']:.0%} -> {report['coverage']['after']:.0%}, "
+                f"expected hit rate {report['expected_hit_rate']['before']:.0%} -> {report['expected_hit_rate']['after']:.0%}"
+                + (f", {len(report['errors'])} failed fetch(es)" if report["errors"] else "")
+            )
+        return report
+
 @app.function(
     image=image,
     # Deployment configuration - adjust based on your needs
-    max_containers=int(os.getenv("MAX_CONTAINERS", "10")),
-    min_containers=int(os.getenv("MIN_CONTAINERS", "1")),
-    timeout=int(os.getenv("TIMEOUT", "300")),
+    max_containers=get_setting(DEPLOY_CONFIG, "max_containers", 10),
+    min_containers=get_setting(DEPLOY_CONFIG, "min_containers", 1),
+    timeout=get_setting(DEPLOY_CONFIG, "timeout", 300),
+    cpu=get_setting(DEPLOY_CONFIG, "cpu", None, cast=float),
+    memory=get_setting(DEPLOY_CONFIG, "memory", None),
     # Use Modal's built-in from_dotenv() to automatically load .env file
     secrets=[
         modal.Secret.from_dotenv()
     ] if has_env_file else [],
+    volumes={MARKET_DATA_DIR: market_data_volume} if market_data_volume else {},
 )
-@modal.concurrent(max_inputs=int(os.getenv("MAX_CONCURRENT", "100")))
+@modal.concurrent(max_inputs=MAX_INPUTS)
 @modal.asgi_app()
 def fastapi_app():
     """
@@ -350,15 +658,11 @@ def fastapi_app():
     3. Direct FastAPIApp variable export
     4. Direct Agent variable export
     """
-    import importlib
-    from agno.agent import Agent
-    from agno.app.fastapi.app import FastAPIApp
-    
     # Warn if secrets weren't available during deployment
     if not has_env_file:
-        print(f"⚠️  Warning: No .env file found during deployment.")
-        print(f"   Your agent may not work properly without API keys.")
-        print(f"   Create a .env file with your API keys and redeploy.")
+        log(f"⚠️  Warning: No .env file found during deployment.", level=logging.WARNING)
+        log(f"   Your agent may not work properly without API keys.", level=logging.WARNING)
+        log(f"   Create a .env file with your API keys and redeploy.", level=logging.WARNING)
     
     # Only define middleware class if authentication is enabled
     if ENABLE_AUTH:
@@ -369,9 +673,11 @@ def fastapi_app():
         class TokenAuthMiddleware:
             """Token-based authentication middleware using ASGI interface"""
             
-            def __init__(self, app, token: str, protect_docs: bool = True):
+            def __init__(self, app, token: str, protect_docs: bool = True, extra_tokens=()):
                 self.app = app
                 self.token = token
+                # AUTH_TOKEN plus the clients' own tokens from TENANT_TOKENS
+                self.tokens = {token, *extra_tokens}
                 self.protect_docs = protect_docs
                 
                 # Endpoints that are always public (no auth required)
@@ -410,7 +716,7 @@ def fastapi_app():
                 
                 # Extract and validate token
                 provided_token = auth_str[7:]  # Remove "Bearer " prefix
-                if provided_token != self.token:
+                if provided_token not in self.tokens:
                     await self._send_auth_error(send, "Invalid authentication token")
                     return
                 
@@ -441,60 +747,249 @@ def fastapi_app():
                 })
     
     try:
-        # Dynamically import the agent module
-        agent_module = importlib.import_module(AGENT_MODULE)
+        # Import the agent module and build the FastAPIApp for the detected pattern
+        fastapi_app_instance = load_fastapi_app_instance()
+        app_instance = fastapi_app_instance.get_app()
+        
+        # Collect every deployed agent/team for the runtime features below
+        deployed_agents = list(fastapi_app_instance.agents or []) + list(fastapi_app_instance.teams or [])
+        
+        # Switch off agent debug output in production logging mode
+        apply_log_mode(deployed_agents)
+        log(f"📝 Log mode: {LOG_MODE}")
+        
+        # Bound the conversation history held in this container
+        if ENABLE_SESSION_MEMORY_LIMIT:
+            from agno_deploy.session_memory import SessionMemoryBudget, apply_session_memory_budget
+            
+            session_budget = SessionMemoryBudget(
+                max_bytes=SESSION_MEMORY_MAX_MB * 1024 * 1024,
+                max_session_bytes=SESSION_MAX_MB * 1024 * 1024,
+                idle_ttl=SESSION_IDLE_TTL_S,
+                compact=SESSION_COMPACT_RUNS,
+            )
+            bounded = apply_session_memory_budget(deployed_agents, session_budget)
+            # Idle sessions are also swept in the background, not only when the next run arrives
+            app_instance.add_event_handler("startup", session_budget.start)
+            app_instance.add_event_handler("shutdown", session_budget.stop)
+            log(f"🧹 Session memory: {bounded} agent(s)/team(s), {SESSION_MEMORY_MAX_MB} MB budget, "
+                f"idle TTL {SESSION_IDLE_TTL_S}s")
+        
+        # Share one pooled HTTP client per upstream (before tiering, so light models share it too)
+        if ENABLE_SHARED_HTTP_CLIENTS:
+            from agno_deploy.http_pool import HTTPClientPool, apply_shared_clients
+            
+            resilience = None
+            if ENABLE_MODEL_RESILIENCE:
+                from agno_deploy.resilience import ResiliencePolicy
+                
+                resilience = ResiliencePolicy(
+                    hedge=MODEL_HEDGING, max_attempts=MODEL_MAX_ATTEMPTS, budget_s=MODEL_RETRY_BUDGET_S
+                )
+            http_pool = HTTPClientPool(wrap_transport=resilience.wrap if resilience else None)
+            wired = apply_shared_clients(deployed_agents, http_pool)
+            app_instance.add_event_handler("shutdown", http_pool.aclose)
+            log(f"🔌 Shared HTTP clients: {wired['models']} model(s), {wired['yfinance_toolkits']} YFinance toolkit(s), HTTP/2 {'on' if http_pool.http2 else 'off'}")
+            if resilience:
+                log(f"🛡️  Model calls: hedging {'on' if MODEL_HEDGING else 'off'}, up to {MODEL_MAX_ATTEMPTS} attempts within {MODEL_RETRY_BUDGET_S}s")
+        
+        # Shape YFinance results before the model sees them (installed first: innermost hook)
+        if ENABLE_TOOL_COMPACTION:
+            from agno_deploy.compaction import ToolOutputCompactor, apply_tool_compaction
+            
+            compacted = apply_tool_compaction(deployed_agents, ToolOutputCompactor(budgets=TOOL_TOKEN_BUDGETS))
+            log(f"🗜️  Tool output compaction: {compacted} agent(s)")
+        
+        # Serve price history and fundamentals from the Volume; fetch only what is missing
+        if ENABLE_MARKET_DATA_STORE:
+            from agno_deploy.market_data import MarketDataStore, apply_market_data_store
+            
+            market_data = MarketDataStore(
+                MARKET_DATA_DIR,
+                commit=market_data_volume.commit,
+                reload=market_data_volume.reload,
+                refresh_after=MARKET_DATA_REFRESH_S,
+                fundamentals_ttl=FUNDAMENTALS_TTL_S,
+            )
+            served = apply_market_data_store(deployed_agents, market_data)
+            log(f"💾 Market data store: {MARKET_DATA_DIR} ({served} agent(s))")
+        
+        # One tool call for multi-ticker comparisons (reads fundamentals through the store when enabled)
+        if ENABLE_SCREENING:
+            from agno_deploy.screening import ScreeningTools, apply_screening
+            
+            screening = ScreeningTools(
+                store=market_data if ENABLE_MARKET_DATA_STORE else None, max_symbols=SCREENING_MAX_TICKERS
+            )
+            equipped = apply_screening(deployed_agents, screening)
+            log(f"🔎 Screening tool: {equipped} agent(s), up to {SCREENING_MAX_TICKERS} tickers per screen")
+        
+        # Share YFinance results across containers (inside the breaker: stale answers are never cached)
+        caches = []
+        if ENABLE_CACHE:
+            from agno_deploy.cache import ToolResultCache, apply_tool_cache
+            
+            tool_cache = create_cache("tools")
+            cached_agents = apply_tool_cache(deployed_agents, ToolResultCache(tool_cache, ttls=TOOL_CACHE_TTLS))
+            caches.append(tool_cache)
+            log(f"🗃️  Tool result cache: {cached_agents} agent(s), shared tier {CACHE_BACKEND}")
+        
+        # Fail fast with stale data instead of waiting on every failing Yahoo Finance call
+        if ENABLE_YFINANCE_BREAKER:
+            from agno_deploy.circuit_breaker import CircuitBreaker, apply_circuit_breaker
+            
+            breaker = CircuitBreaker(
+                "yahoo",
+                failure_threshold=BREAKER_FAILURE_THRESHOLD,
+                probe_interval=BREAKER_PROBE_INTERVAL_S,
+                stale_ttl=BREAKER_STALE_TTL_S,
+            )
+            guarded = apply_circuit_breaker(deployed_agents, breaker)
+            log(f"🧯 YFinance circuit breaker: {guarded} agent(s) guarded")
         
-        # Detect the agent pattern
-        pattern_type, pattern_object, pattern_name = detect_agent_pattern(agent_module)
-        print(f"🎯 Detected pattern: {pattern_type} ({pattern_name})")
+        # Count requested tickers for the scheduled warm-up (outermost: store and cache hits are demand too)
+        if ENABLE_MARKET_DATA_STORE and ENABLE_WARMUP:
+            from agno_deploy.warmup import TickerDemand, apply_demand_tracking
+            
+            ticker_demand = TickerDemand(MARKET_DATA_DIR, commit=market_data_volume.commit)
+            apply_demand_tracking(deployed_agents, ticker_demand)
+            app_instance.add_event_handler("shutdown", ticker_demand.flush)
+            log(f"🔥 Warm-up: {len(WARMUP_TICKERS)} configured + top {WARMUP_TOP_N} requested ticker(s), schedule '{WARMUP_SCHEDULE}' (UTC)")
         
-        # Handle different patterns
-        if pattern_type == 'fastapi_function':
-            # Function returning FastAPIApp
-            print(f"🚀 Loading FastAPIApp from {AGENT_MODULE}.{pattern_name}()")
-            fastapi_app_instance = pattern_object()
+        # Route simple lookups to the light model
+        if ENABLE_MODEL_TIERING:
+            from agno_deploy.tiering import apply_model_tiering
             
-            if not isinstance(fastapi_app_instance, FastAPIApp):
-                raise TypeError(f"{pattern_name}() must return a FastAPIApp instance, got {type(fastapi_app_instance)}")
+            tiered = apply_model_tiering(deployed_agents, light_model_id=LIGHT_MODEL_ID, cascade=TIER_CASCADE)
+            log(f"🪜 Model tiering: ENABLED ({tiered} agent(s), light model {LIGHT_MODEL_ID})")
+        
+        # Answer paraphrases of recent stand-alone questions (inside the exact cache, which is cheaper)
+        if ENABLE_SEMANTIC_CACHE:
+            from agno_deploy.semantic_cache import SemanticCache, apply_semantic_cache, load_embedder
             
-            app_instance = fastapi_app_instance.get_app()
+            semantic_cache = SemanticCache(
+                load_embedder(SEMANTIC_CACHE_EMBEDDER),
+                threshold=SEMANTIC_CACHE_THRESHOLD,
+                freshness=SEMANTIC_CACHE_FRESHNESS_S,
+                max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+            )
+            cached_agents = apply_semantic_cache(deployed_agents, semantic_cache)
+            embedder_name = semantic_cache.embedder.name
+            log(f"🧠 Semantic cache: {cached_agents} agent(s), {embedder_name} embeddings, "
+                f"threshold {semantic_cache.threshold}, fresh for {SEMANTIC_CACHE_FRESHNESS_S}s")
+            if not semantic_cache.threshold_tuned:
+                log(f"⚠️  Semantic cache threshold {semantic_cache.threshold} is not tuned for {embedder_name}: run "
+                    f"python -m benchmarks.semantic_cache --embedder {embedder_name} and set SEMANTIC_CACHE_THRESHOLD",
+                    level=logging.WARNING)
+        
+        # Answer repeated stand-alone questions from the cache (outermost: a hit skips tiering and the model)
+        if ENABLE_CACHE and RESPONSE_CACHE_TTL_S:
+            from agno_deploy.cache import apply_response_cache
             
-        elif pattern_type == 'agent_function':
-            # Function returning Agent
-            print(f"🚀 Loading Agent from {AGENT_MODULE}.{pattern_name}() and wrapping in FastAPIApp")
-            agent_instance = pattern_object()
+            response_cache = create_cache("responses")
+            cached_agents = apply_response_cache(deployed_agents, response_cache, ttl=RESPONSE_CACHE_TTL_S)
+            caches.append(response_cache)
+            log(f"🗃️  Response cache: {cached_agents} agent(s), TTL {RESPONSE_CACHE_TTL_S}s")
+        if caches and not os.getenv("AUTH_TOKEN"):
+            log("⚠️  Cache endpoints: DISABLED (no AUTH_TOKEN to protect /cache)", level=logging.WARNING)
+        elif caches:
+            from agno_deploy.cache import mount_cache
             
-            if not isinstance(agent_instance, Agent):
-                raise TypeError(f"{pattern_name}() must return an Agent instance, got {type(agent_instance)}")
+            mount_cache(app_instance, caches, token=os.getenv("AUTH_TOKEN"))
+        
+        # Mount the metrics surface and the event-loop stall watchdog
+        if ENABLE_METRICS:
+            from agno_deploy.metrics import mount_metrics
+            from agno_deploy.watchdog import install_watchdog
             
-            # Wrap agent in FastAPIApp - Updated for new Agno version
-            fastapi_app_instance = FastAPIApp(agents=[agent_instance])
-            app_instance = fastapi_app_instance.get_app()
+            mount_metrics(app_instance)
+            if LOOP_STALL_THRESHOLD_MS:
+                install_watchdog(app_instance, threshold=LOOP_STALL_THRESHOLD_MS / 1000)
+            log(f"📈 Metrics: ENABLED (GET /metrics, stall threshold {LOOP_STALL_THRESHOLD_MS} ms)")
+        
+        # Admin endpoints for memory and CPU profiling (always token-protected, even without ENABLE_AUTH)
+        cpu_profiler = None
+        if (ENABLE_MEMORY_PROFILER or ENABLE_CPU_PROFILER) and not os.getenv("AUTH_TOKEN"):
+            log("⚠️  Profiling endpoints: DISABLED (no AUTH_TOKEN to protect /admin)", level=logging.WARNING)
+        elif ENABLE_MEMORY_PROFILER or ENABLE_CPU_PROFILER:
+            if ENABLE_MEMORY_PROFILER:
+                from agno_deploy.memory_profiler import MemoryProfiler, mount_memory_profiler
+                
+                mount_memory_profiler(app_instance, MemoryProfiler(), token=os.getenv("AUTH_TOKEN"))
+                log("🔬 Memory profiler: ENABLED (/admin/memory, tracemalloc off until started)")
+            if ENABLE_CPU_PROFILER:
+                from agno_deploy.cpu_profiler import SamplingProfiler, mount_cpu_profiler
+                
+                cpu_profiler = SamplingProfiler()
+                mount_cpu_profiler(app_instance, cpu_profiler, token=os.getenv("AUTH_TOKEN"))
+                log("🔥 CPU profiler: ENABLED (POST /admin/profile, collapsed stacks for flamegraphs)")
+        
+        # Serve the asynchronous job API (before auth, so the added routes are protected too)
+        if ENABLE_JOBS:
+            from agno_deploy.jobs import LocalJobRunner, mount_jobs
+            
+            job_store = create_job_store()
+            if JOB_WORKER == "local":
+                submit_job = LocalJobRunner(job_store, deployed_agents).submit
+            else:
+                async def submit_job(job_id: str):
+                    await run_agent_job.spawn.aio(job_id)
+            mount_jobs(app_instance, deployed_agents, job_store, submit_job)
+            log(f"📮 Job API: ENABLED (POST /jobs, worker: {JOB_WORKER}, retention {JOB_RETENTION_S} s)")
+        
+        # Serve streamed runs without buffering
+        if ENABLE_STREAMING:
+            from agno_deploy.streaming import mount_streaming
             
-        elif pattern_type == 'fastapi_variable':
-            # Direct FastAPIApp variable
-            print(f"🚀 Loading FastAPIApp from {AGENT_MODULE}.{pattern_name}")
-            fastapi_app_instance = pattern_object
-            app_instance = fastapi_app_instance.get_app()
+            mount_streaming(
+                app_instance,
+                list(fastapi_app_instance.agents or []),
+                list(fastapi_app_instance.teams or []),
+                default_format=STREAM_FORMAT,
+                queue_size=STREAM_QUEUE_EVENTS,
+                heartbeat=STREAM_HEARTBEAT_S,
+                slow_client_timeout=STREAM_SLOW_CLIENT_TIMEOUT_S,
+            )
+            log(f"🌊 Streaming: ENABLED (POST /stream, {STREAM_FORMAT} by default, {STREAM_QUEUE_EVENTS}-event buffer)")
+        
+        # Serve the batch endpoint
+        if ENABLE_BATCH:
+            from agno_deploy.batch import mount_batch
             
-        elif pattern_type == 'agent_variable':
-            # Direct Agent variable
-            print(f"🚀 Loading Agent from {AGENT_MODULE}.{pattern_name} and wrapping in FastAPIApp")
-            agent_instance = pattern_object
+            mount_batch(
+                app_instance,
+                list(fastapi_app_instance.agents or []),
+                default_parallelism=BATCH_PARALLELISM,
+                max_parallelism=BATCH_MAX_PARALLELISM,
+                max_prompts=BATCH_MAX_PROMPTS,
+            )
+            log(f"📦 Batch API: ENABLED (POST /batch, parallelism {BATCH_PARALLELISM}, max {BATCH_MAX_PROMPTS} prompts)")
+        
+        # Serve the fan-out endpoint
+        if ENABLE_FANOUT:
+            from agno_deploy.fanout import mount_fanout
             
-            # Wrap agent in FastAPIApp - Updated for new Agno version
-            fastapi_app_instance = FastAPIApp(agents=[agent_instance])
-            app_instance = fastapi_app_instance.get_app()
+            mount_fanout(app_instance, list(fastapi_app_instance.agents or []), agent_timeout=FANOUT_AGENT_TIMEOUT_S)
+            log(f"🔀 Fan-out API: ENABLED (POST /fanout, {FANOUT_AGENT_TIMEOUT_S}s per agent)")
+        
+        # Serve the intent router (needs at least one agent to route to)
+        if ENABLE_ROUTER and fastapi_app_instance.agents:
+            from agno_deploy.routing import IntentRouter, mount_router
             
-        else:
-            raise ValueError(f"Unknown pattern type: {pattern_type}")
+            intent_router = IntentRouter(
+                fastapi_app_instance.agents,
+                rules=ROUTING_RULES,
+                default_agent_id=ROUTING_DEFAULT_AGENT,
+            )
+            mount_router(app_instance, intent_router)
+            log(f"🧭 Intent router: ENABLED (POST /route across {sorted(intent_router.agents)})")
         
         # Apply token-based authentication if enabled
         if ENABLE_AUTH:
             # Load AUTH_TOKEN from environment (validated at deployment time)
             AUTH_TOKEN = os.getenv("AUTH_TOKEN")
             
-            print(f"🔒 Adding authentication middleware")
+            log(f"🔒 Adding authentication middleware")
             
             # Add security scheme to show lock symbol in docs
             from fastapi.security import HTTPBearer
@@ -528,15 +1023,56 @@ def fastapi_app():
             # Force regenerate OpenAPI schema to include the security scheme
             app_instance.openapi_schema = None
             
-            # Wrap the app with ASGI middleware (this does the actual auth)
-            app_instance = TokenAuthMiddleware(app_instance, token=AUTH_TOKEN, protect_docs=PROTECT_DOCS)
+        # Wrap the app with ASGI middleware, innermost first
+        if cpu_profiler is not None:
+            from agno_deploy.cpu_profiler import CPUProfileMiddleware
+            
+            # Innermost: counts requests that reached the app, for request-bounded profiles
+            app_instance = CPUProfileMiddleware(app_instance, cpu_profiler)
+        
+        if CANCEL_ON_DISCONNECT:
+            from agno_deploy.cancellation import DisconnectCancellationMiddleware
+            
+            # Inside admission control, so a cancelled run releases its slot right away
+            log("✂️  Adding client-disconnect cancellation middleware")
+            app_instance = DisconnectCancellationMiddleware(app_instance)
+        
+        # Clients' own tokens: each names a tenant and priority class, and is accepted by the auth middleware
+        tenant_tokens = {}
+        for env_name, (tenant, priority_class) in TENANT_TOKENS.items():
+            if not os.getenv(env_name):
+                raise ValueError(f"❌ TENANT_TOKENS names {env_name}, which is not set in .env")
+            tenant_tokens[os.getenv(env_name)] = (tenant, priority_class)
+        
+        if ENABLE_ADMISSION_CONTROL:
+            from agno_deploy.admission import AdmissionControlMiddleware
+            
+            log(f"🚦 Adding admission control middleware (max in-flight: {MAX_IN_FLIGHT})")
+            app_instance = AdmissionControlMiddleware(
+                app_instance,
+                max_in_flight=MAX_IN_FLIGHT,
+                max_queue=MAX_QUEUE,
+                queue_timeout=QUEUE_TIMEOUT_S,
+                rate_per_token=RATE_LIMIT_PER_TOKEN,
+                burst=RATE_LIMIT_BURST,
+                priority_classes=PRIORITY_CLASSES,
+                default_priority_class=DEFAULT_PRIORITY_CLASS,
+                tenants=tenant_tokens,
+                trust_headers=TRUST_TENANT_HEADERS,
+            )
+        
+        if ENABLE_AUTH:
+            # Outermost, so unauthenticated requests never take an admission slot (this does the actual auth)
+            app_instance = TokenAuthMiddleware(
+                app_instance, token=AUTH_TOKEN, protect_docs=PROTECT_DOCS, extra_tokens=tenant_tokens
+            )
         
         return app_instance
         
     except ImportError as e:
-        print(f"❌ Failed to import agent module '{AGENT_MODULE}': {e}")
-        print(f"   Make sure the file '{AGENT_MODULE}.py' exists and has a valid agent pattern")
+        log(f"❌ Failed to import agent module '{AGENT_MODULE}': {e}", level=logging.ERROR)
+        log(f"   Make sure the file '{AGENT_MODULE}.py' exists and has a valid agent pattern")
         raise
     except Exception as e:
-        print(f"❌ Error creating FastAPI app: {e}")
+        log(f"❌ Error creating FastAPI app: {e}", level=logging.ERROR)
         raise 
\ No newline at end of file
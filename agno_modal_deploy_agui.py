@@ -19,6 +19,22 @@ Features:
 - Optional environment variable injection from .env
 - Auto-scaling and production-ready configuration
 - Flexible agent/team detection with multiple patterns
+- Production logging mode (async structured logs, no agent debug output)
+- Metrics endpoint with event-loop stall detection
+- Capacity settings from the planner's deploy_config.json
+- Cancellation of in-flight agent runs when the client disconnects
+- Shared keep-alive HTTP clients for model and market-data traffic
+- Hedged model requests and jittered retries within a per-request budget
+- Circuit breaker with stale-cache fallback for Yahoo Finance outages
+- Token-budgeted compaction of YFinance tool outputs
+- Local market-data store on a Modal Volume (incremental price history)
+- One-call vectorised screening and ranking of many tickers
+- Two-tier response and tool-result cache shared across containers
+- Semantic cache answering paraphrased questions (local CPU embeddings)
+- Bounded per-container session history (byte budget, LRU eviction)
+- Admin memory and CPU profiling endpoints (tracemalloc diffs, flamegraph stacks)
+- Coalesced AG-UI text deltas (fewer, larger events at high token rates)
+- Optional model tiering: a cheaper model for simple lookups
 - Single agent OR single team deployment (AG-UI protocol requirement)
 
 Usage:
@@ -27,17 +43,86 @@ Usage:
     3. modal deploy agno_modal_deploy_agui.py
 """
 
+import logging
 import modal
 import os
 from pathlib import Path
 
+from agno_deploy.config import get_setting, load_deploy_config
+from agno_deploy.logs import apply_log_mode, configure_logging, log
+
 # ============================================================================
 # CONFIGURATION 
 # ============================================================================
 # Edit this to point to your agent or team implementation file
 AGENT_FILE = "agno_agents/financial_agent_agui_app.py"
+# Logging Configuration
+LOG_MODE = "production"  # "production" (async structured logs, no agent debug output) or "debug"
+# Observability Configuration
+ENABLE_METRICS = False         # Opt in: serve GET /metrics with runtime counters and histograms
+LOOP_STALL_THRESHOLD_MS = 100  # Event-loop lag reported as a stall (0 disables the watchdog)
+ENABLE_MEMORY_PROFILER = False  # Opt in: serve /admin/memory (needs AUTH_TOKEN; tracemalloc stays off until started)
+ENABLE_CPU_PROFILER = False    # Opt in: serve POST /admin/profile (needs AUTH_TOKEN; samples only while a profile runs)
+# Capacity Configuration (written by: python -m agno_deploy.planner --write deploy_config.json)
+DEPLOY_CONFIG_FILE = "deploy_config.json"  # Environment variables override values from this file
+# AG-UI Event Coalescing (consecutive text deltas merged; tool-call and lifecycle events are sent at once)
+ENABLE_AGUI_COALESCING = False  # Opt in: merge consecutive text deltas into fewer events
+AGUI_COALESCE_MS = 30           # Longest a text delta waits for more tokens of the same message
+AGUI_COALESCE_MAX_BYTES = 1024  # Merged delta sent as soon as it reaches this size
+# Cancellation Configuration
+CANCEL_ON_DISCONNECT = False  # Opt in: stop model and tool work when the browser tab closes
+# HTTP Client Configuration
+ENABLE_SHARED_HTTP_CLIENTS = False  # Opt in: one pooled keep-alive (HTTP/2) client per upstream per container
+# Model Call Resilience (needs ENABLE_SHARED_HTTP_CLIENTS)
+ENABLE_MODEL_RESILIENCE = False  # Opt in: hedge slow model calls and retry failed ones
+MODEL_HEDGING = True            # Duplicate a call that is past the p95 time to first token (costs ~5% extra calls)
+MODEL_MAX_ATTEMPTS = 3          # Attempts per model call, hedges and retries included
+MODEL_RETRY_BUDGET_S = 60       # No new attempt after this many seconds
+# Tool Output Compaction Configuration (smaller YFinance results in the model context)
+ENABLE_TOOL_COMPACTION = False  # Opt in: trim YFinance results before they reach the model
+TOOL_TOKEN_BUDGETS = {}         # Per-tool token budget overrides, e.g. {"get_income_statements": 800}
+# Market Data Store Configuration (price history and fundamentals on a Modal Volume)
+ENABLE_MARKET_DATA_STORE = False  # Opt in: create and mount a Modal Volume for price history and fundamentals
+MARKET_DATA_DIR = "/market-data"  # Volume mount path inside the container
+MARKET_DATA_REFRESH_S = 900       # Re-fetch the newest bars after this many seconds
+FUNDAMENTALS_TTL_S = 21600        # Keep company info, ratios and statements this long
+# YFinance Circuit Breaker Configuration (fail fast and serve cached data while Yahoo is down)
+ENABLE_YFINANCE_BREAKER = False  # Opt in: fail fast and serve stale data while Yahoo is down
+BREAKER_FAILURE_THRESHOLD = 5   # Failed tool calls in a row that open the circuit
+BREAKER_PROBE_INTERVAL_S = 15   # Background recovery check interval while open
+BREAKER_STALE_TTL_S = 86400     # Oldest cached result served as stale data
+# Screening Tool Configuration (screen_stocks ranks many tickers in one tool call)
+ENABLE_SCREENING = False  # Opt in: add the screen_stocks tool to agents with YFinanceTools
+SCREENING_MAX_TICKERS = 100     # Largest universe per screen
+# Two-Tier Cache Configuration (in-process LRU in front of a modal.Dict shared by all containers)
+ENABLE_CACHE = False  # Opt in: reuse answers and tool results across requests and containers
+CACHE_BACKEND = "modal"         # "modal" (shared across containers) or "local" (in-process stand-in for testing)
+CACHE_L1_ENTRIES = 2048         # In-process entries per cache and container
+CACHE_L1_MAX_MB = 64            # In-process memory per cache and container
+RESPONSE_CACHE_TTL_S = 300      # Answers to identical questions asked outside a conversation (0 disables)
+TOOL_CACHE_TTLS = {}            # Per-tool TTL overrides in seconds, e.g. {"get_current_stock_price": 30}
+# Semantic Cache Configuration (answers paraphrases: "How's Nvidia doing?" ~ "NVDA performance today")
+ENABLE_SEMANTIC_CACHE = False  # Opt in: answer paraphrases with earlier answers
+SEMANTIC_CACHE_EMBEDDER = "auto"      # "auto" (fastembed bge-small if installed, else hashing), "hashing" or a fastembed model
+SEMANTIC_CACHE_THRESHOLD = None       # Lowest cosine similarity reused; None: the one tuned for the embedder
+SEMANTIC_CACHE_FRESHNESS_S = 300      # Oldest answer reused for a paraphrase
+SEMANTIC_CACHE_MAX_ENTRIES = 5000     # Answers kept per agent and container
+# Session Memory Configuration (conversation history kept in container memory when agents have no storage)
+ENABLE_SESSION_MEMORY_LIMIT = False  # Opt in: evict and compact in-memory conversation history
+SESSION_MEMORY_MAX_MB = 256     # Budget for all sessions of a container; least recently used sessions are evicted
+SESSION_MAX_MB = 8              # Largest single session; its oldest runs are dropped first
+SESSION_IDLE_TTL_S = 3600       # Sessions without a run for this long are evicted (None keeps them)
+SESSION_COMPACT_RUNS = True     # Store runs without tool payloads, history copies and media
+# Model Tiering Configuration (simple lookups go to a cheaper, faster model)
+ENABLE_MODEL_TIERING = False  # Opt in: changes which model answers simple questions
+LIGHT_MODEL_ID = "gpt-4o-mini"  # Same provider as the agent's own model
 # ============================================================================
 
+configure_logging(LOG_MODE)
+
+# Load capacity settings recommended by the planner (empty if the file is absent)
+DEPLOY_CONFIG = load_deploy_config(Path(__file__).parent / DEPLOY_CONFIG_FILE)
+
 agent_file_path = Path(AGENT_FILE)
 
 # Validate the agent file exists
@@ -56,10 +141,10 @@ else:
     # File is in root directory
     AGENT_MODULE = agent_file_path.stem
 
-print(f"🤖 Agent/Team file: {agent_file_path}")
-print(f"📦 Modal app name: {APP_NAME}")
-print(f"🎨 Protocol: AG-UI (standardized front-end integration)")
-print(f"🚫 Authentication: DISABLED (AG-UI optimized for front-end use)")
+log(f"🤖 Agent/Team file: {agent_file_path}")
+log(f"📦 Modal app name: {APP_NAME}")
+log(f"🎨 Protocol: AG-UI (standardized front-end integration)")
+log(f"🚫 Authentication: DISABLED (AG-UI optimized for front-end use)")
 
 def load_env_file():
     """
@@ -68,11 +153,11 @@ def load_env_file():
     env_file_path = Path(__file__).parent / ".env"
     
     if env_file_path.exists():
-        print(f"📄 Found .env file at {env_file_path}")
+        log(f"📄 Found .env file at {env_file_path}")
         return True
     else:
-        print(f"📄 No .env file found at {env_file_path}")
-        print(f"   Create a .env file with your API keys for automatic secret injection")
+        log(f"📄 No .env file found at {env_file_path}")
+        log(f"   Create a .env file with your API keys for automatic secret injection")
         return False
 
 # Check if .env file exists
@@ -98,7 +183,7 @@ def load_requirements():
             f"   Make sure to include 'ag-ui-protocol' for AG-UI support."
         )
     
-    print(f"📦 Loading dependencies from {requirements_file}")
+    log(f"📦 Loading dependencies from {requirements_file}")
     try:
         with open(requirements_file, 'r') as f:
             for line_num, line in enumerate(f, 1):
@@ -110,12 +195,12 @@ def load_requirements():
                 
                 # Handle -e editable installs (skip them)
                 if line.startswith('-e '):
-                    print(f"  ⚠️  Line {line_num}: Skipping editable install: {line}")
+                    log(f"  ⚠️  Line {line_num}: Skipping editable install: {line}")
                     continue
                 
                 # Handle -r recursive requirements (skip them for now)
                 if line.startswith('-r '):
-                    print(f"  ⚠️  Line {line_num}: Skipping recursive requirement: {line}")
+                    log(f"  ⚠️  Line {line_num}: Skipping recursive requirement: {line}")
                     continue
                 
                 # Clean up the dependency line
@@ -125,7 +210,7 @@ def load_requirements():
                 
                 if line:
                     dependencies.add(line)
-                    print(f"  📋 Added: {line}")
+                    log(f"  📋 Added: {line}")
     
     except Exception as e:
         raise RuntimeError(
@@ -142,7 +227,7 @@ def load_requirements():
     
     # Convert to sorted list for consistent builds
     deps_list = sorted(list(dependencies))
-    print(f"📦 Total dependencies: {len(deps_list)}")
+    log(f"📦 Total dependencies: {len(deps_list)}")
     return deps_list
 
 # Load dependencies dynamically
@@ -160,6 +245,26 @@ image = (
     .add_local_dir(".", remote_path="/root")  # Include local files
 )
 
+# Persistent market data shared by all containers (see agno_deploy.market_data)
+market_data_volume = (
+    modal.Volume.from_name(f"{APP_NAME}-market-data", create_if_missing=True) if ENABLE_MARKET_DATA_STORE else None
+)
+
+def create_cache(name: str):
+    """
+    Create a two-tier cache (in-process LRU plus a tier shared by all containers).
+    
+    With the Modal backend, the shared tier is a modal.Dict named after the app
+    (one Dict for all caches, keys are prefixed with the cache name); the local
+    stand-in keeps it in memory.
+    """
+    from agno_deploy.cache import TwoTierCache
+    
+    if CACHE_BACKEND not in ("modal", "local"):
+        raise ValueError(f"❌ Unknown CACHE_BACKEND '{CACHE_BACKEND}'. Expected 'modal' or 'local'.")
+    backend = None if CACHE_BACKEND == "local" else modal.Dict.from_name(f"{APP_NAME}-cache", create_if_missing=True)
+    return TwoTierCache(name, backend, l1_entries=CACHE_L1_ENTRIES, l1_max_bytes=CACHE_L1_MAX_MB * 1024 * 1024)
+
 def detect_agui_pattern(agent_module):
     """
     Detect and validate AG-UI patterns in the module with priority-based selection.
@@ -193,7 +298,7 @@ def detect_agui_pattern(agent_module):
     # Get explicitly exported items if __all__ is defined
     if hasattr(agent_module, '__all__'):
         available_names = agent_module.__all__
-        print(f"🔍 Found __all__ export list: {available_names}")
+        log(f"🔍 Found __all__ export list: {available_names}")
     else:
         # Get all non-private attributes
         available_names = [name for name in dir(agent_module) if not name.startswith('_')]
@@ -242,22 +347,22 @@ def detect_agui_pattern(agent_module):
                 
         except Exception as e:
             # Skip any attributes that can't be accessed
-            print(f"  ⚠️  Skipping {name}: {e}")
+            log(f"  ⚠️  Skipping {name}: {e}")
             continue
     
     # Report findings
     if agui_functions:
-        print(f"🎯 Found AGUIApp functions: {[name for name, _ in agui_functions]}")
+        log(f"🎯 Found AGUIApp functions: {[name for name, _ in agui_functions]}")
     if agent_functions:
-        print(f"🤖 Found Agent functions: {[name for name, _ in agent_functions]}")
+        log(f"🤖 Found Agent functions: {[name for name, _ in agent_functions]}")
     if team_functions:
-        print(f"👥 Found Team functions: {[name for name, _ in team_functions]}")
+        log(f"👥 Found Team functions: {[name for name, _ in team_functions]}")
     if agui_variables:
-        print(f"📱 Found AGUIApp variables: {[name for name, _ in agui_variables]}")
+        log(f"📱 Found AGUIApp variables: {[name for name, _ in agui_variables]}")
     if agent_variables:
-        print(f"🔧 Found Agent variables: {[name for name, _ in agent_variables]}")
+        log(f"🔧 Found Agent variables: {[name for name, _ in agent_variables]}")
     if team_variables:
-        print(f"⚡ Found Team variables: {[name for name, _ in team_variables]}")
+        log(f"⚡ Found Team variables: {[name for name, _ in team_variables]}")
     
     # Priority-based selection
     # 1. Function returning AGUIApp (highest priority)
@@ -323,15 +428,18 @@ def detect_agui_pattern(agent_module):
 @app.function(
     image=image,
     # Deployment configuration - adjust based on your needs
-    max_containers=int(os.getenv("MAX_CONTAINERS", "10")),
-    min_containers=int(os.getenv("MIN_CONTAINERS", "1")),
-    timeout=int(os.getenv("TIMEOUT", "300")),
+    max_containers=get_setting(DEPLOY_CONFIG, "max_containers", 10),
+    min_containers=get_setting(DEPLOY_CONFIG, "min_containers", 1),
+    timeout=get_setting(DEPLOY_CONFIG, "timeout", 300),
+    cpu=get_setting(DEPLOY_CONFIG, "cpu", None, cast=float),
+    memory=get_setting(DEPLOY_CONFIG, "memory", None),
     # Use Modal's built-in from_dotenv() to automatically load .env file
     secrets=[
         modal.Secret.from_dotenv()
     ] if has_env_file else [],
+    volumes={MARKET_DATA_DIR: market_data_volume} if market_data_volume else {},
 )
-@modal.concurrent(max_inputs=int(os.getenv("MAX_CONCURRENT", "100")))
+@modal.concurrent(max_inputs=get_setting(DEPLOY_CONFIG, "max_concurrent", 100))
 @modal.asgi_app()
 def agui_app():
     """
@@ -361,9 +469,9 @@ def agui_app():
     
     # Warn if secrets weren't available during deployment
     if not has_env_file:
-        print(f"⚠️  Warning: No .env file found during deployment.")
-        print(f"   Your agent/team may not work properly without API keys.")
-        print(f"   Create a .env file with your API keys and redeploy.")
+        log(f"⚠️  Warning: No .env file found during deployment.", level=logging.WARNING)
+        log(f"   Your agent/team may not work properly without API keys.", level=logging.WARNING)
+        log(f"   Create a .env file with your API keys and redeploy.", level=logging.WARNING)
     
     try:
         # Dynamically import the agent module
@@ -371,12 +479,12 @@ def agui_app():
         
         # Detect the AG-UI pattern
         pattern_type, pattern_object, pattern_name = detect_agui_pattern(agent_module)
-        print(f"🎯 Detected pattern: {pattern_type} ({pattern_name})")
+        log(f"🎯 Detected pattern: {pattern_type} ({pattern_name})")
         
         # Handle different patterns
         if pattern_type == 'agui_function':
             # Function returning AGUIApp
-            print(f"🚀 Loading AGUIApp from {AGENT_MODULE}.{pattern_name}()")
+            log(f"🚀 Loading AGUIApp from {AGENT_MODULE}.{pattern_name}()")
             agui_app_instance = pattern_object()
             
             if not isinstance(agui_app_instance, AGUIApp):
@@ -386,7 +494,7 @@ def agui_app():
             
         elif pattern_type == 'agent_function':
             # Function returning Agent
-            print(f"🚀 Loading Agent from {AGENT_MODULE}.{pattern_name}() and wrapping in AGUIApp")
+            log(f"🚀 Loading Agent from {AGENT_MODULE}.{pattern_name}() and wrapping in AGUIApp")
             agent_instance = pattern_object()
             
             if not isinstance(agent_instance, Agent):
@@ -398,7 +506,7 @@ def agui_app():
             
         elif pattern_type == 'team_function':
             # Function returning Team
-            print(f"🚀 Loading Team from {AGENT_MODULE}.{pattern_name}() and wrapping in AGUIApp")
+            log(f"🚀 Loading Team from {AGENT_MODULE}.{pattern_name}() and wrapping in AGUIApp")
             team_instance = pattern_object()
             
             if not isinstance(team_instance, Team):
@@ -410,13 +518,13 @@ def agui_app():
             
         elif pattern_type == 'agui_variable':
             # Direct AGUIApp variable
-            print(f"🚀 Loading AGUIApp from {AGENT_MODULE}.{pattern_name}")
+            log(f"🚀 Loading AGUIApp from {AGENT_MODULE}.{pattern_name}")
             agui_app_instance = pattern_object
             app_instance = agui_app_instance.get_app()
             
         elif pattern_type == 'agent_variable':
             # Direct Agent variable
-            print(f"🚀 Loading Agent from {AGENT_MODULE}.{pattern_name} and wrapping in AGUIApp")
+            log(f"🚀 Loading Agent from {AGENT_MODULE}.{pattern_name} and wrapping in AGUIApp")
             agent_instance = pattern_object
             
             # Wrap agent in AGUIApp
@@ -425,7 +533,7 @@ def agui_app():
             
         elif pattern_type == 'team_variable':
             # Direct Team variable
-            print(f"🚀 Loading Team from {AGENT_MODULE}.{pattern_name} and wrapping in AGUIApp")
+            log(f"🚀 Loading Team from {AGENT_MODULE}.{pattern_name} and wrapping in AGUIApp")
             team_instance = pattern_object
             
             # Wrap team in AGUIApp
@@ -435,16 +543,200 @@ def agui_app():
         else:
             raise ValueError(f"Unknown pattern type: {pattern_type}")
         
-        print(f"✅ AG-UI app successfully configured")
-        print(f"🎨 Protocol: AG-UI standardized (POST /agui endpoint)")
-        print(f"🔓 Authentication: DISABLED (optimized for front-end integration)")
+        # Collect the deployed agent/team for the runtime features below
+        deployed_agents = [agui_app_instance.agent or agui_app_instance.team]
+        
+        # Switch off agent debug output in production logging mode
+        apply_log_mode(deployed_agents)
+        log(f"📝 Log mode: {LOG_MODE}")
+        
+        # Bound the conversation history held in this container
+        if ENABLE_SESSION_MEMORY_LIMIT:
+            from agno_deploy.session_memory import SessionMemoryBudget, apply_session_memory_budget
+            
+            session_budget = SessionMemoryBudget(
+                max_bytes=SESSION_MEMORY_MAX_MB * 1024 * 1024,
+                max_session_bytes=SESSION_MAX_MB * 1024 * 1024,
+                idle_ttl=SESSION_IDLE_TTL_S,
+                compact=SESSION_COMPACT_RUNS,
+            )
+            bounded = apply_session_memory_budget(deployed_agents, session_budget)
+            # Idle sessions are also swept in the background, not only when the next run arrives
+            app_instance.add_event_handler("startup", session_budget.start)
+            app_instance.add_event_handler("shutdown", session_budget.stop)
+            log(f"🧹 Session memory: {bounded} agent(s)/team(s), {SESSION_MEMORY_MAX_MB} MB budget, "
+                f"idle TTL {SESSION_IDLE_TTL_S}s")
+        
+        # Share one pooled HTTP client per upstream (before tiering, so light models share it too)
+        if ENABLE_SHARED_HTTP_CLIENTS:
+            from agno_deploy.http_pool import HTTPClientPool, apply_shared_clients
+            
+            resilience = None
+            if ENABLE_MODEL_RESILIENCE:
+                from agno_deploy.resilience import ResiliencePolicy
+                
+                resilience = ResiliencePolicy(
+                    hedge=MODEL_HEDGING, max_attempts=MODEL_MAX_ATTEMPTS, budget_s=MODEL_RETRY_BUDGET_S
+                )
+            http_pool = HTTPClientPool(wrap_transport=resilience.wrap if resilience else None)
+            wired = apply_shared_clients(deployed_agents, http_pool)
+            app_instance.add_event_handler("shutdown", http_pool.aclose)
+            log(f"🔌 Shared HTTP clients: {wired['models']} model(s), {wired['yfinance_toolkits']} YFinance toolkit(s), HTTP/2 {'on' if http_pool.http2 else 'off'}")
+            if resilience:
+                log(f"🛡️  Model calls: hedging {'on' if MODEL_HEDGING else 'off'}, up to {MODEL_MAX_ATTEMPTS} attempts within {MODEL_RETRY_BUDGET_S}s")
+        
+        # Shape YFinance results before the model sees them (installed first: innermost hook)
+        if ENABLE_TOOL_COMPACTION:
+            from agno_deploy.compaction import ToolOutputCompactor, apply_tool_compaction
+            
+            compacted = apply_tool_compaction(deployed_agents, ToolOutputCompactor(budgets=TOOL_TOKEN_BUDGETS))
+            log(f"🗜️  Tool output compaction: {compacted} agent(s)")
+        
+        # Serve price history and fundamentals from the Volume; fetch only what is missing
+        if ENABLE_MARKET_DATA_STORE:
+            from agno_deploy.market_data import MarketDataStore, apply_market_data_store
+            
+            market_data = MarketDataStore(
+                MARKET_DATA_DIR,
+                commit=market_data_volume.commit,
+                reload=market_data_volume.reload,
+                refresh_after=MARKET_DATA_REFRESH_S,
+                fundamentals_ttl=FUNDAMENTALS_TTL_S,
+            )
+            served = apply_market_data_store(deployed_agents, market_data)
+            log(f"💾 Market data store: {MARKET_DATA_DIR} ({served} agent(s))")
+        
+        # One tool call for multi-ticker comparisons (reads fundamentals through the store when enabled)
+        if ENABLE_SCREENING:
+            from agno_deploy.screening import ScreeningTools, apply_screening
+            
+            screening = ScreeningTools(
+                store=market_data if ENABLE_MARKET_DATA_STORE else None, max_symbols=SCREENING_MAX_TICKERS
+            )
+            equipped = apply_screening(deployed_agents, screening)
+            log(f"🔎 Screening tool: {equipped} agent(s), up to {SCREENING_MAX_TICKERS} tickers per screen")
+        
+        # Share YFinance results across containers (inside the breaker: stale answers are never cached)
+        caches = []
+        if ENABLE_CACHE:
+            from agno_deploy.cache import ToolResultCache, apply_tool_cache
+            
+            tool_cache = create_cache("tools")
+            cached_agents = apply_tool_cache(deployed_agents, ToolResultCache(tool_cache, ttls=TOOL_CACHE_TTLS))
+            caches.append(tool_cache)
+            log(f"🗃️  Tool result cache: {cached_agents} agent(s), shared tier {CACHE_BACKEND}")
+        
+        # Fail fast with stale data instead of waiting on every failing Yahoo Finance call
+        if ENABLE_YFINANCE_BREAKER:
+            from agno_deploy.circuit_breaker import CircuitBreaker, apply_circuit_breaker
+            
+            breaker = CircuitBreaker(
+                "yahoo",
+                failure_threshold=BREAKER_FAILURE_THRESHOLD,
+                probe_interval=BREAKER_PROBE_INTERVAL_S,
+                stale_ttl=BREAKER_STALE_TTL_S,
+            )
+            guarded = apply_circuit_breaker(deployed_agents, breaker)
+            log(f"🧯 YFinance circuit breaker: {guarded} agent(s) guarded")
+        
+        # Route simple lookups to the light model
+        if ENABLE_MODEL_TIERING:
+            from agno_deploy.tiering import apply_model_tiering
+            
+            tiered = apply_model_tiering(deployed_agents, light_model_id=LIGHT_MODEL_ID, cascade=False)
+            log(f"🪜 Model tiering: ENABLED ({tiered} agent(s), light model {LIGHT_MODEL_ID})")
+        
+        # Answer paraphrases of recent stand-alone questions (inside the exact cache, which is cheaper)
+        if ENABLE_SEMANTIC_CACHE:
+            from agno_deploy.semantic_cache import SemanticCache, apply_semantic_cache, load_embedder
+            
+            semantic_cache = SemanticCache(
+                load_embedder(SEMANTIC_CACHE_EMBEDDER),
+                threshold=SEMANTIC_CACHE_THRESHOLD,
+                freshness=SEMANTIC_CACHE_FRESHNESS_S,
+                max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+            )
+            cached_agents = apply_semantic_cache(deployed_agents, semantic_cache)
+            embedder_name = semantic_cache.embedder.name
+            log(f"🧠 Semantic cache: {cached_agents} agent(s), {embedder_name} embeddings, "
+                f"threshold {semantic_cache.threshold}, fresh for {SEMANTIC_CACHE_FRESHNESS_S}s")
+            if not semantic_cache.threshold_tuned:
+                log(f"⚠️  Semantic cache threshold {semantic_cache.threshold} is not tuned for {embedder_name}: run "
+                    f"python -m benchmarks.semantic_cache --embedder {embedder_name} and set SEMANTIC_CACHE_THRESHOLD",
+                    level=logging.WARNING)
+        
+        # Answer repeated stand-alone questions from the cache (outermost: a hit skips tiering and the model)
+        if ENABLE_CACHE and RESPONSE_CACHE_TTL_S:
+            from agno_deploy.cache import apply_response_cache
+            
+            response_cache = create_cache("responses")
+            cached_agents = apply_response_cache(deployed_agents, response_cache, ttl=RESPONSE_CACHE_TTL_S)
+            caches.append(response_cache)
+            log(f"🗃️  Response cache: {cached_agents} agent(s), TTL {RESPONSE_CACHE_TTL_S}s")
+        if caches and not os.getenv("AUTH_TOKEN"):
+            log("⚠️  Cache endpoints: DISABLED (no AUTH_TOKEN to protect /cache)", level=logging.WARNING)
+        elif caches:
+            from agno_deploy.cache import mount_cache
+            
+            mount_cache(app_instance, caches, token=os.getenv("AUTH_TOKEN"))
+        
+        # Mount the metrics surface and the event-loop stall watchdog
+        if ENABLE_METRICS:
+            from agno_deploy.metrics import mount_metrics
+            from agno_deploy.watchdog import install_watchdog
+            
+            mount_metrics(app_instance)
+            if LOOP_STALL_THRESHOLD_MS:
+                install_watchdog(app_instance, threshold=LOOP_STALL_THRESHOLD_MS / 1000)
+            log(f"📈 Metrics: ENABLED (GET /metrics, stall threshold {LOOP_STALL_THRESHOLD_MS} ms)")
+        
+        # Admin endpoints for memory and CPU profiling (always token-protected, even without ENABLE_AUTH)
+        cpu_profiler = None
+        if (ENABLE_MEMORY_PROFILER or ENABLE_CPU_PROFILER) and not os.getenv("AUTH_TOKEN"):
+            log("⚠️  Profiling endpoints: DISABLED (no AUTH_TOKEN to protect /admin)", level=logging.WARNING)
+        elif ENABLE_MEMORY_PROFILER or ENABLE_CPU_PROFILER:
+            if ENABLE_MEMORY_PROFILER:
+                from agno_deploy.memory_profiler import MemoryProfiler, mount_memory_profiler
+                
+                mount_memory_profiler(app_instance, MemoryProfiler(), token=os.getenv("AUTH_TOKEN"))
+                log("🔬 Memory profiler: ENABLED (/admin/memory, tracemalloc off until started)")
+            if ENABLE_CPU_PROFILER:
+                from agno_deploy.cpu_profiler import SamplingProfiler, mount_cpu_profiler
+                
+                cpu_profiler = SamplingProfiler()
+                mount_cpu_profiler(app_instance, cpu_profiler, token=os.getenv("AUTH_TOKEN"))
+                log("🔥 CPU profiler: ENABLED (POST /admin/profile, collapsed stacks for flamegraphs)")
+        
+        if cpu_profiler is not None:
+            from agno_deploy.cpu_profiler import CPUProfileMiddleware
+            
+            # Innermost: counts requests that reached the app, for request-bounded profiles
+            app_instance = CPUProfileMiddleware(app_instance, cpu_profiler)
+        
+        if ENABLE_AGUI_COALESCING:
+            from agno_deploy.agui_coalescing import AGUICoalescingMiddleware
+            
+            app_instance = AGUICoalescingMiddleware(
+                app_instance, max_delay=AGUI_COALESCE_MS / 1000, max_bytes=AGUI_COALESCE_MAX_BYTES
+            )
+            log(f"🧩 AG-UI coalescing: ENABLED (text deltas merged within {AGUI_COALESCE_MS} ms / {AGUI_COALESCE_MAX_BYTES} bytes)")
+        
+        if CANCEL_ON_DISCONNECT:
+            from agno_deploy.cancellation import DisconnectCancellationMiddleware
+            
+            log("✂️  Adding client-disconnect cancellation middleware")
+            app_instance = DisconnectCancellationMiddleware(app_instance)
+        
+        log(f"✅ AG-UI app successfully configured")
+        log(f"🎨 Protocol: AG-UI standardized (POST /agui endpoint)")
+        log(f"🔓 Authentication: DISABLED (optimized for front-end integration)")
         
         return app_instance
         
     except ImportError as e:
-        print(f"❌ Failed to import agent/team module '{AGENT_MODULE}': {e}")
-        print(f"   Make sure the file '{AGENT_MODULE}.py' exists and has a valid AG-UI pattern")
+        log(f"❌ Failed to import agent/team module '{AGENT_MODULE}': {e}", level=logging.ERROR)
+        log(f"   Make sure the file '{AGENT_MODULE}.py' exists and has a valid AG-UI pattern")
         raise
     except Exception as e:
-        print(f"❌ Error creating AG-UI app: {e}")
+        log(f"❌ Error creating AG-UI app: {e}", level=logging.ERROR)
         raise 
\ No newline at end of file
@@ -0,0 +1,126 @@
+"""
+Hedging Benchmark
+
+Sends the same load of model calls to the mock model server twice: once
+through a plain pooled client and once through the pooled client with
+agno_deploy.resilience (hedged requests, jittered retries, retry budget).
+Prints p50/p95/p99 latency and how many extra attempts hedging cost.
+
+The mock server runs in its own process on a free local port with injected slow
+(and optionally failing) responses; see benchmarks/mock_model_server.py.
+
+Usage:
+    python -m benchmarks.hedging
+    python -m benchmarks.hedging --requests 400 --slow-rate 0.05 --slow-delay 2 --error-rate 0.02
+"""
+
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+from typing import List
+
+
+def start_mock_server(slow_rate: float, slow_delay: float, error_rate: float) -> "tuple[subprocess.Popen, str]":
+    """Start the mock model server in its own process; returns the process and its base URL."""
+    import httpx
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.mock_model_server", "--port", str(port),
+            "--slow-rate", str(slow_rate), "--slow-delay", str(slow_delay), "--error-rate", str(error_rate),
+        ],
+        stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}/v1"
+    for _ in range(200):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/stats")
+            return process, base_url
+        except httpx.TransportError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("Mock model server did not start")
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def run_load(base_url: str, hedged: bool, requests: int, concurrency: int, stream: bool):
+    from openai import AsyncOpenAI
+
+    from agno_deploy.http_pool import HTTPClientPool
+    from agno_deploy.metrics import MetricsRegistry
+    from agno_deploy.resilience import ResiliencePolicy
+
+    registry = MetricsRegistry()
+    policy = ResiliencePolicy(registry=registry) if hedged else None
+    pool = HTTPClientPool(wrap_transport=policy.wrap if policy else None, registry=registry)
+    client = AsyncOpenAI(base_url=base_url, api_key="mock", http_client=pool.async_client(base_url), max_retries=0)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    failures = 0
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                messages = [{"role": "user", "content": "What's AAPL trading at?"}]
+                if stream:
+                    async for _ in await client.chat.completions.create(model="gpt-4o", messages=messages, stream=True):
+                        pass
+                else:
+                    await client.chat.completions.create(model="gpt-4o", messages=messages)
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                failures += 1
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    await pool.aclose()
+    attempts = registry.counter("model_attempts_total").total() if hedged else requests
+    return latencies, failures, attempts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare model-call tail latency with and without hedging")
+    parser.add_argument("--requests", type=int, default=300, help="Model calls per mode")
+    parser.add_argument("--concurrency", type=int, default=5, help="Concurrent calls (keep the client below CPU saturation)")
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Share of slow mock responses")
+    parser.add_argument("--slow-delay", type=float, default=2.0, help="Time to first token of slow responses (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of failing mock responses (503)")
+    parser.add_argument("--no-stream", action="store_true", help="Use non-streaming completions")
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(args.slow_rate, args.slow_delay, args.error_rate)
+    stream = not args.no_stream
+
+    print(f"📊 Model calls ({args.requests} per mode, concurrency {args.concurrency}, "
+          f"{args.slow_rate:.0%} slow at {args.slow_delay}s, {args.error_rate:.0%} errors, stream={stream})")
+    try:
+        for label, hedged in (("plain pooled client", False), ("hedged + retries", True)):
+            latencies, failures, attempts = asyncio.run(
+                run_load(base_url, hedged, args.requests, args.concurrency, stream)
+            )
+            if not latencies:
+                print(f"   {label:20s} every request failed")
+                continue
+            print(
+                f"   {label:20s} p50 {percentile(latencies, 0.5) * 1000:7.0f} ms   "
+                f"p95 {percentile(latencies, 0.95) * 1000:7.0f} ms   p99 {percentile(latencies, 0.99) * 1000:7.0f} ms   "
+                f"failed {failures:4d}   attempts/request {attempts / args.requests:.2f}"
+            )
+    finally:
+        server.terminate()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
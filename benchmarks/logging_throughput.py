@@ -0,0 +1,115 @@
+"""
+Logging Throughput Benchmark
+
+Measures how many simulated agent runs per second a single container event
+loop completes with Agno's rich console handler (what debug_mode=True writes
+through) versus the production writer from agno_deploy.logs.
+
+Both writers get the same records at the same level: every simulated run
+logs one request event plus a ~2 KB prompt/tool payload per streamed chunk at
+DEBUG, with no sampling. The record count per mode is printed to show the
+volume is equal (records the production queue dropped are subtracted), so
+the difference is the cost of the writer alone. A third line shows
+production mode at its defaults (INFO level, sampling), which is what a
+deployment actually logs; it writes far fewer records and is not a writer
+comparison. Output goes to /dev/null in every mode so terminal speed is not
+measured.
+
+Usage:
+    python -m benchmarks.logging_throughput
+    python -m benchmarks.logging_throughput --concurrency 100 --runs 500
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import sys
+import time
+
+# Roughly one prompt/tool payload (~2 KB) as logged by debug_mode
+PAYLOAD = " ".join(f'{{"symbol": "AAPL", "date": "2025-05-{d:02d}", "close": {180 + d}.25}}' for d in range(1, 31))
+
+
+class RecordCounter(logging.Filter):
+    """Count the records a logger accepts, to check both writers see the same volume."""
+
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        self.count += 1
+        return True
+
+
+async def simulated_run(chunks: int) -> None:
+    from agno.utils.log import log_debug
+    from agno_deploy.logs import log_event
+
+    log_event("http.request", level=logging.DEBUG, path="/runs", agent_id="financial-analysis-agent")
+    for i in range(chunks):
+        log_debug(f"Chunk {i}: {PAYLOAD}")
+        await asyncio.sleep(0)
+
+
+async def run_load(runs: int, concurrency: int, chunks: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await simulated_run(chunks)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(runs)))
+    return runs / (time.perf_counter() - start)
+
+
+def measure(mode: str, runs: int, concurrency: int, chunks: int):
+    """Runs per second and chunk records accepted for "rich", "production" or "production-default"."""
+    from agno.utils.log import logger as agno_logger
+    from agno.utils.log import set_log_level_to_debug, set_log_level_to_info
+    from agno_deploy import logs
+
+    counter = RecordCounter()
+    agno_logger.addFilter(counter)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            if mode == "rich":
+                set_log_level_to_debug()  # What debug_mode=True does on every run
+            elif mode == "production":
+                logs.configure_logging("production", sample_rates={}, level="DEBUG", stream=devnull)
+            else:
+                logs.configure_logging("production", stream=devnull)
+                set_log_level_to_info()
+            throughput = asyncio.run(run_load(runs, concurrency, chunks))
+            # Records dropped on a full queue were not written, so they do not count as equal volume
+            dropped = logs._writer.dropped if logs._writer is not None else 0
+            logs.flush_logs()
+    finally:
+        agno_logger.removeFilter(counter)
+    return throughput, counter.count - dropped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the rich console and production log writers")
+    parser.add_argument("--runs", type=int, default=200, help="Simulated agent runs per mode")
+    parser.add_argument("--concurrency", type=int, default=100, help="Concurrent runs (MAX_CONCURRENT)")
+    parser.add_argument("--chunks", type=int, default=10, help="Streamed chunks per run")
+    args = parser.parse_args()
+
+    rich, rich_records = measure("rich", args.runs, args.concurrency, args.chunks)
+    production, production_records = measure("production", args.runs, args.concurrency, args.chunks)
+    default, default_records = measure("production-default", args.runs, args.concurrency, args.chunks)
+
+    print(f"📊 Logging throughput ({args.runs} runs, concurrency {args.concurrency}, {args.chunks} chunks/run)")
+    print(f"   rich console writer:  {rich:10.1f} runs/s  ({rich_records} chunk records)")
+    print(f"   production writer:    {production:10.1f} runs/s  ({production_records} chunk records)")
+    print(f"   writer speedup:       {production / rich:10.1f}x  (same records, DEBUG, no sampling)")
+    print(f"   production defaults:  {default:10.1f} runs/s  ({default_records} chunk records at INFO)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
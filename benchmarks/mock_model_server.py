@@ -0,0 +1,151 @@
+"""
+Mock Model Server
+
+A local OpenAI-compatible chat completions endpoint with injected latency,
+for testing model-call resilience (hedging, retries) without calling or
+paying for the real API. Streaming and non-streaming completions are
+supported; the answer is a fixed sentence split into word tokens.
+
+Injected behaviour, per request:
+- every response waits `--ttft` seconds before the first token;
+- with probability `--slow-rate` it waits `--slow-delay` seconds instead,
+  like an overloaded upstream replica;
+- with probability `--error-rate` it answers 503 (or 429 with --rate-limit).
+
+Point an agent at it with OpenAIChat(id="gpt-4o", base_url="http://127.0.0.1:8399/v1", api_key="mock").
+
+Usage:
+    python -m benchmarks.mock_model_server
+    python -m benchmarks.mock_model_server --port 8399 --slow-rate 0.05 --slow-delay 3
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+
+ANSWER = "AAPL is trading at 198.50 USD, up 1.2% today on strong services revenue."
+
+
+def create_app(
+    ttft: float = 0.05,
+    token_interval: float = 0.005,
+    slow_rate: float = 0.05,
+    slow_delay: float = 2.0,
+    error_rate: float = 0.0,
+    error_status: int = 503,
+    seed=None,
+):
+    """Build the mock server's FastAPI app; `app.state.stats` counts requests, slow and failed ones."""
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse, Response, StreamingResponse
+    from starlette.requests import ClientDisconnect
+
+    app = FastAPI(title="Mock model server")
+    app.state.stats = {"requests": 0, "slow": 0, "errors": 0, "cancelled": 0}
+    rng = random.Random(seed)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        stats = app.state.stats
+        stats["requests"] += 1
+        try:
+            body = await request.json()
+        except ClientDisconnect:
+            # A hedged duplicate was cancelled before its body arrived
+            stats["cancelled"] += 1
+            return Response(status_code=499)
+        if rng.random() < error_rate:
+            stats["errors"] += 1
+            return JSONResponse(
+                {"error": {"message": "Injected failure", "type": "server_error"}},
+                status_code=error_status,
+                headers={"Retry-After": "0.1"} if error_status == 429 else None,
+            )
+
+        delay = ttft
+        if rng.random() < slow_rate:
+            stats["slow"] += 1
+            delay = slow_delay
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "mock")
+        created = int(time.time())
+        tokens = [word + " " for word in ANSWER.split()]
+
+        if not body.get("stream"):
+            await asyncio.sleep(delay + token_interval * len(tokens))
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": ANSWER}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 20, "completion_tokens": len(tokens), "total_tokens": 20 + len(tokens)},
+            }
+
+        def chunk(delta, finish_reason=None):
+            data = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(data)}\n\n"
+
+        async def events():
+            try:
+                # Headers go out at once; the first token is what the delay holds back
+                await asyncio.sleep(delay)
+                yield chunk({"role": "assistant", "content": ""})
+                for token in tokens:
+                    yield chunk({"content": token})
+                    await asyncio.sleep(token_interval)
+                yield chunk({}, "stop")
+                yield "data: [DONE]\n\n"
+            except asyncio.CancelledError:
+                stats["cancelled"] += 1
+                raise
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def get_stats():
+        return app.state.stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock model server with injected latency")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8399)
+    parser.add_argument("--ttft", type=float, default=0.05, help="Normal time to first token (s)")
+    parser.add_argument("--token-interval", type=float, default=0.005, help="Delay between streamed tokens (s)")
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Share of requests that are slow")
+    parser.add_argument("--slow-delay", type=float, default=2.0, help="Time to first token of slow requests (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail")
+    parser.add_argument("--rate-limit", action="store_true", help="Fail with 429 + Retry-After instead of 503")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    app = create_app(
+        ttft=args.ttft,
+        token_interval=args.token_interval,
+        slow_rate=args.slow_rate,
+        slow_delay=args.slow_delay,
+        error_rate=args.error_rate,
+        error_status=429 if args.rate_limit else 503,
+    )
+    print(f"🧪 Mock model server on http://{args.host}:{args.port}/v1 (slow rate {args.slow_rate:.0%}, error rate {args.error_rate:.0%})")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
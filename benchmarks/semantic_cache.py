@@ -0,0 +1,107 @@
+"""
+Semantic Cache Benchmark
+
+Measures how well agno_deploy.semantic_cache tells paraphrases from different
+questions. The labelled sets in benchmarks/paraphrases.json group questions
+that have the same answer; the first question of every group is answered
+(stored), every other question is then looked up, as are the negatives,
+which have no stored answer but are close in wording (another ticker, period
+or metric). Per similarity threshold it prints:
+
+- precision: share of cache hits that returned the right group's answer;
+- recall: share of paraphrases that were answered from the cache;
+- false hits on the negatives.
+
+With --filler the index is padded with that many unrelated questions first,
+so the LSH candidate search (rather than the exact scan) is measured, and
+the lookup latency is printed.
+
+Usage:
+    python -m benchmarks.semantic_cache
+    python -m benchmarks.semantic_cache --embedder hashing --thresholds 0.75,0.8,0.85,0.9 --filler 5000
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import time
+from typing import Any, Dict, List
+
+from agno_deploy.metrics import MetricsRegistry
+from agno_deploy.semantic_cache import SemanticCache, load_embedder
+
+DATA = os.path.join(os.path.dirname(__file__), "paraphrases.json")
+FILLER_WORDS = ("revenue", "price", "news", "dividend", "analysts", "history", "pe", "compare", "outlook", "risk")
+
+
+def filler(count: int, seed: int = 0) -> List[str]:
+    """Unrelated questions about made-up tickers, to grow the index."""
+    rng = random.Random(seed)
+    symbols = ("".join(rng.choice(string.ascii_uppercase) for _ in range(5)) for _ in range(count))
+    return [f"{rng.choice(FILLER_WORDS)} {rng.choice(FILLER_WORDS)} for {symbol}" for symbol in symbols]
+
+
+def evaluate(embedder: Any, data: Dict[str, Any], threshold: float, filler_count: int) -> Dict[str, float]:
+    cache = SemanticCache(embedder, threshold=threshold, freshness=float("inf"),
+                          max_entries=max(5000, filler_count + 1000), registry=MetricsRegistry())
+    for i, question in enumerate(filler(filler_count)):
+        cache.store("agent", question, {"group": -1 - i})
+    for group, questions in enumerate(data["groups"]):
+        cache.store("agent", questions[0], {"group": group})
+
+    hits = correct = paraphrases = false_hits = 0
+    latencies = []
+    queries = [(g, q) for g, questions in enumerate(data["groups"]) for q in questions[1:]]
+    queries += [(None, q) for q in data["negatives"]]
+    for group, question in queries:
+        started = time.perf_counter()
+        found = cache.lookup("agent", question)
+        latencies.append(time.perf_counter() - started)
+        if group is not None:
+            paraphrases += 1
+        if found is None:
+            continue
+        if group is None:
+            false_hits += 1
+        else:
+            hits += 1
+            correct += found[0]["value"]["group"] == group
+    answered = hits + false_hits
+    latencies.sort()
+    return {
+        "precision": correct / answered if answered else 1.0,
+        "recall": correct / paraphrases,
+        "false_hits": false_hits,
+        "negatives": len(data["negatives"]),
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precision and recall of the semantic cache on labelled paraphrases")
+    parser.add_argument("--embedder", default="auto", help='"auto", "hashing" or a fastembed model name')
+    parser.add_argument("--thresholds", default="0.7,0.75,0.8,0.85,0.9,0.95", help="Comma-separated similarity thresholds")
+    parser.add_argument("--filler", type=int, default=0, help="Unrelated entries added to the index first")
+    parser.add_argument("--data", default=DATA, help="Labelled paraphrase sets (JSON)")
+    args = parser.parse_args()
+
+    with open(args.data) as f:
+        data = json.load(f)
+    embedder = load_embedder(args.embedder)
+    paraphrases = sum(len(g) - 1 for g in data["groups"])
+    print(f"📊 Semantic cache ({embedder.name} embedder, {len(data['groups'])} groups, {paraphrases} paraphrases, "
+          f"{len(data['negatives'])} negatives, {args.filler} filler entries)")
+    for threshold in (float(t) for t in args.thresholds.split(",")):
+        result = evaluate(embedder, data, threshold, args.filler)
+        print(f"   threshold {threshold:.2f}   precision {result['precision']:6.1%}   recall {result['recall']:6.1%}   "
+              f"false hits {result['false_hits']}/{result['negatives']}   "
+              f"lookup p50 {result['p50_ms']:.2f} ms   p95 {result['p95_ms']:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
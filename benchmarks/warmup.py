@@ -0,0 +1,100 @@
+"""
+Warm-up Benchmark
+
+Replays a morning of YFinance tool calls against the market data store twice:
+once starting cold, once after agno_deploy.warmup prefetched the configured
+tickers plus the most-requested ones of the previous day. Ticker popularity
+follows a Zipf distribution; the data comes from the synthetic stand-in
+source with a simulated network latency, so no Yahoo Finance access is needed.
+Prints the warm-up's coverage report and, per run, the share of tool calls
+served without a network fetch and the tool latency.
+
+Usage:
+    python -m benchmarks.warmup
+    python -m benchmarks.warmup --universe 200 --calls 2000 --top 50 --latency 0.2
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from agno_deploy.market_data import FUNDAMENTAL_FUNCTIONS, MarketDataStore
+from agno_deploy.metrics import MetricsRegistry
+from agno_deploy.warmup import SyntheticSource, TickerDemand, warm_up
+
+FUNCTIONS = ["get_historical_stock_prices", "get_technical_indicators"] + sorted(FUNDAMENTAL_FUNCTIONS)
+
+
+def traffic(universe: List[str], calls: int, zipf: float, seed: int) -> List[Dict[str, str]]:
+    """Tool calls with Zipf-distributed tickers and uniformly chosen functions."""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** zipf for rank in range(len(universe))]
+    symbols = rng.choices(universe, weights=weights, k=calls)
+    return [{"function": rng.choice(FUNCTIONS), "symbol": symbol} for symbol in symbols]
+
+
+def replay(store: MarketDataStore, source: SyntheticSource, calls: List[Dict[str, str]]):
+    """Run `calls` through the store's tool hook; returns (local share, latencies)."""
+    local, latencies = 0, []
+    for call in calls:
+        fetches = sum(source.calls.values())
+        started = time.perf_counter()
+
+        # Price calls the store cannot serve fall through to here like fundamentals misses
+        def network(symbol: str) -> str:
+            return source.fundamentals(symbol, call["function"])
+
+        store.hook(call["function"], network, {"symbol": call["symbol"]})
+        latencies.append(time.perf_counter() - started)
+        local += sum(source.calls.values()) == fetches
+    return local / len(calls), latencies
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare store hit rate with and without the scheduled warm-up")
+    parser.add_argument("--universe", type=int, default=100, help="Tickers users ask about")
+    parser.add_argument("--calls", type=int, default=1000, help="Tool calls per replayed day")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Popularity skew (higher: fewer hot tickers)")
+    parser.add_argument("--top", type=int, default=30, help="Most-requested tickers the warm-up prefetches")
+    parser.add_argument("--tickers", default="", help="Comma-separated tickers always warmed")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated network latency per fetch (s)")
+    args = parser.parse_args()
+
+    universe = [f"T{i:03d}" for i in range(args.universe)]
+    yesterday = traffic(universe, args.calls, args.zipf, seed=1)
+    today = traffic(universe, args.calls, args.zipf, seed=2)
+
+    print(f"📊 Tool calls ({args.calls} per day, {args.universe} tickers, zipf {args.zipf}, "
+          f"{args.latency * 1000:.0f} ms per network fetch)")
+    for label, warmed in (("cold store", False), ("after warm-up", True)):
+        with tempfile.TemporaryDirectory() as root:
+            source = SyntheticSource(latency=args.latency)
+            store = MarketDataStore(root, source=source, registry=MetricsRegistry())
+            if warmed:
+                # Yesterday's demand, as the web containers would have written it
+                demand = TickerDemand(root, flush_interval=0)
+                for call in yesterday:
+                    demand.record(call["symbol"])
+                symbols = [t for t in args.tickers.split(",") if t.strip()] + demand.top(args.top)
+                report = warm_up(store, symbols, demand=demand.totals())
+                print(f"   🔥 warm-up: {report['symbols']} tickers in {report['duration_s']} s, "
+                      f"coverage {report['coverage']['before']:.0%} -> {report['coverage']['after']:.0%}, "
+                      f"expected hit rate {report['expected_hit_rate']['before']:.0%} -> "
+                      f"{report['expected_hit_rate']['after']:.0%}")
+            hit_rate, latencies = replay(store, source, today)
+            print(f"   {label:15s} served locally {hit_rate:6.1%}   "
+                  f"p50 {percentile(latencies, 0.5) * 1000:6.1f} ms   p95 {percentile(latencies, 0.95) * 1000:6.1f} ms   "
+                  f"mean {sum(latencies) / len(latencies) * 1000:6.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""Test doubles shared by the test modules."""
+
+from typing import Any, List
+
+from agno.models.base import Model
+from agno.models.response import ModelResponse
+
+
+class CountingModel(Model):
+    """Model answering every request with the same text, counting the calls."""
+
+    def __init__(self):
+        super().__init__(id="counting-model", name="CountingModel", provider="Test")
+        self.calls: List[Any] = []
+
+    def invoke(self, messages, **kwargs):
+        self.calls.append(messages)
+        return "NVDA is trading at 100 USD."
+
+    async def ainvoke(self, messages, **kwargs):
+        return self.invoke(messages, **kwargs)
+
+    def invoke_stream(self, messages, **kwargs):
+        yield self.invoke(messages, **kwargs)
+
+    async def ainvoke_stream(self, messages, **kwargs):
+        yield self.invoke(messages, **kwargs)
+
+    def parse_provider_response(self, response, **kwargs):
+        return ModelResponse(role="assistant", content=response)
+
+    def parse_provider_response_delta(self, response):
+        return ModelResponse(role="assistant", content=response)
+
+
+def post_run(client, message, session_id=None, agent_id="test-agent"):
+    """POST /runs (not streamed) through the Agno FastAPI router; returns the run response."""
+    data = {"message": message, "stream": "false"}
+    if session_id:
+        data["session_id"] = session_id
+    response = client.post("/runs", params={"agent_id": agent_id}, data=data)
+    assert response.status_code == 200, response.text
+    return response.json()
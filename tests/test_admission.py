@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from agno_deploy.admission import AdmissionControlMiddleware, client_key, token_key
+from agno_deploy.metrics import MetricsRegistry
+
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def scope(token=None, **headers):
+    raw = [(k.replace("_", "-").lower().encode(), v.encode()) for k, v in headers.items()]
+    if token:
+        raw.append((b"authorization", f"Bearer {token}".encode()))
+    return {"type": "http", "path": "/runs", "headers": raw, "client": ("10.0.0.1", 1234)}
+
+
+def middleware(**kwargs):
+    return AdmissionControlMiddleware(ok_app, registry=MetricsRegistry(), **kwargs)
+
+
+def identify(admission, request):
+    return admission._identify(request, client_key(request))
+
+
+def test_tenant_and_class_come_from_the_token_map():
+    admission = middleware(tenants={"batch-secret": ("nightly-review", "batch")})
+    assert identify(admission, scope("batch-secret")) == ("nightly-review", "batch")
+    # The shared token cannot claim another tenant or class with headers
+    shared = scope("shared-secret", x_tenant_id="nightly-review", x_priority_class="batch")
+    assert identify(admission, shared) == (token_key("shared-secret"), "interactive")
+
+
+def test_headers_are_honoured_only_when_trusted():
+    trusted = middleware(trust_headers=True)
+    request = scope("shared-secret", x_tenant_id="acme", x_priority_class="batch")
+    assert identify(trusted, request) == ("acme", "batch")
+    assert identify(middleware(), request) == (token_key("shared-secret"), "interactive")
+
+
+def test_mapped_token_wins_over_trusted_headers():
+    admission = middleware(tenants={"batch-secret": ("nightly-review", "batch")}, trust_headers=True)
+    request = scope("batch-secret", x_tenant_id="acme", x_priority_class="interactive")
+    assert identify(admission, request) == ("nightly-review", "batch")
+
+
+def test_unauthenticated_callers_are_keyed_by_address():
+    assert identify(middleware(), scope()) == ("addr:10.0.0.1", "interactive")
+
+
+@pytest.mark.parametrize("rate, statuses", [(0.0, [200] * 5), (0.001, [200, 200, 429, 429, 429])])
+def test_rate_limit_per_token(rate, statuses):
+    admission = middleware(rate_per_token=rate, burst=2)
+
+    async def call():
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await admission(scope("shared-secret"), None, send)
+        return sent[0]["status"]
+
+    assert [asyncio.run(call()) for _ in range(5)] == statuses
@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from agno_deploy.agui_coalescing import AGUICoalescingMiddleware
+from agno_deploy.metrics import MetricsRegistry
+
+TOKENS = [f"tok{i} " for i in range(50)]
+
+
+def frame(event):
+    return ("data: " + json.dumps(event) + "\n\n").encode()
+
+
+def text(message_id, delta):
+    return frame({"type": "TEXT_MESSAGE_CONTENT", "messageId": message_id, "delta": delta})
+
+
+async def agent_stream():
+    yield frame({"type": "RUN_STARTED", "threadId": "t", "runId": "r"})
+    yield frame({"type": "TEXT_MESSAGE_START", "messageId": "m1", "role": "assistant"})
+    for i, token in enumerate(TOKENS):
+        yield text("m1", token)
+        if i == 20:
+            await asyncio.sleep(0.06)  # Longer than max_delay: the pending text is flushed by the timer
+    yield frame({"type": "TOOL_CALL_START", "toolCallId": "c", "toolCallName": "get_price"})
+    for _ in range(5):
+        yield text("m1", "é")
+    yield frame({"type": "TEXT_MESSAGE_END", "messageId": "m1"})
+    yield frame({"type": "RUN_FINISHED", "threadId": "t", "runId": "r"})
+
+
+async def agui(request):
+    return StreamingResponse(agent_stream(), media_type="text/event-stream")
+
+
+async def status(request):
+    return JSONResponse({"ok": True})
+
+
+def client(registry, max_bytes=64):
+    app = Starlette(routes=[Route("/agui", agui, methods=["POST"]), Route("/status", status)])
+    return TestClient(AGUICoalescingMiddleware(app, max_delay=0.03, max_bytes=max_bytes, registry=registry))
+
+
+def events(response):
+    return [json.loads(f[6:]) for f in response.text.split("\n\n") if f]
+
+
+def test_text_is_kept_and_events_are_merged():
+    registry = MetricsRegistry()
+    with client(registry) as c:
+        received = events(c.post("/agui"))
+
+    deltas = [e["delta"] for e in received if e["type"] == "TEXT_MESSAGE_CONTENT"]
+    assert "".join(deltas) == "".join(TOKENS) + "ééééé"
+    assert 1 < len(deltas) < len(TOKENS)
+    assert all(len(d.encode()) < 64 + len("tok49 ") for d in deltas)
+    events_total = registry.counter("agui_events_total")
+    assert events_total.value(direction="out") < events_total.value(direction="in") == 60
+
+
+def test_lifecycle_and_tool_events_keep_their_order():
+    with client(MetricsRegistry(), max_bytes=10_000) as c:
+        types = [e["type"] for e in events(c.post("/agui"))]
+
+    # Text before the tool call is flushed ahead of it, text after it is merged into one event
+    assert types[:2] == ["RUN_STARTED", "TEXT_MESSAGE_START"]
+    assert types[-4:] == ["TOOL_CALL_START", "TEXT_MESSAGE_CONTENT", "TEXT_MESSAGE_END", "RUN_FINISHED"]
+    assert set(types[2:-4]) == {"TEXT_MESSAGE_CONTENT"}
+
+
+def test_other_responses_pass_through():
+    registry = MetricsRegistry()
+    with client(registry) as c:
+        assert c.get("/status").json() == {"ok": True}
+    assert registry.counter("agui_events_total").total() == 0
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import threading
+import time
+
+from agno.run.response import RunResponse
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from agno_deploy.batch import SharedToolCache, mount_batch, run_batch
+from agno_deploy.metrics import MetricsRegistry
+
+
+class Yahoo:
+    """A slow synchronous price tool that counts how often it really runs."""
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get_current_stock_price(self, symbol):
+        with self._lock:
+            self.calls += 1
+        time.sleep(0.05)
+        return f"{symbol}: 100.00"
+
+
+class StubAgent:
+    """Looks up the price named in the prompt through its tool hooks, in a worker thread as Agno does."""
+
+    agent_id = "finance"
+
+    def __init__(self, yahoo, tool_hooks=None, delays=None):
+        self.yahoo = yahoo
+        self.tool_hooks = tool_hooks
+        self.delays = delays or {}
+        self.active = 0
+        self.peak = 0
+
+    def deep_copy(self, update):
+        copy = StubAgent(self.yahoo, update["tool_hooks"], self.delays)
+        copy.parent = self
+        return copy
+
+    async def arun(self, prompt, session_id=None, user_id=None):
+        parent = self.parent
+        parent.active += 1
+        parent.peak = max(parent.peak, parent.active)
+        try:
+            await asyncio.sleep(self.delays.get(prompt, 0.01))
+            if prompt == "fail":
+                raise RuntimeError("model overloaded")
+            hook, tool = self.tool_hooks[0], self.yahoo.get_current_stock_price
+            price = await asyncio.to_thread(hook, "get_current_stock_price", tool, {"symbol": "NVDA"})
+            return RunResponse(content=f"{prompt} -> {price}", run_id=session_id)
+        finally:
+            parent.active -= 1
+
+
+async def collect(agent, prompts, parallelism, registry):
+    return [result async for result in run_batch(agent, prompts, parallelism, registry=registry)]
+
+
+def test_parallelism_stays_within_the_bound():
+    agent = StubAgent(Yahoo())
+    results = asyncio.run(collect(agent, [f"p{i}" for i in range(12)], 3, MetricsRegistry()))
+    assert agent.peak == 3
+    assert results[-1]["summary"]["ok"] == 12
+
+
+def test_concurrent_identical_tool_calls_run_once():
+    yahoo, registry = Yahoo(), MetricsRegistry()
+    results = asyncio.run(collect(StubAgent(yahoo), [f"p{i}" for i in range(8)], 8, registry))
+
+    # Eight runs asked for the same quote at once: one fetched it, seven waited for its result
+    assert yahoo.calls == 1
+    summary = results[-1]["summary"]
+    assert (summary["tool_cache_misses"], summary["tool_cache_hits"]) == (1, 7)
+    assert all(r["content"].endswith("NVDA: 100.00") for r in results[:-1])
+    assert registry.counter("batch_tool_cache_total").value(result="hit") == 7
+
+
+def test_failed_first_call_is_retried_by_the_waiters():
+    cache, calls = SharedToolCache(), []
+
+    def flaky(symbol):
+        calls.append(symbol)
+        time.sleep(0.05)
+        if len(calls) == 1:
+            raise ConnectionError("reset")
+        return "100.00"
+
+    results = []
+
+    def call():
+        try:
+            results.append(cache.hook("get_current_stock_price", flaky, {"symbol": "NVDA"}))
+        except ConnectionError as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    assert isinstance(results[0], ConnectionError) and results[1] == "100.00"
+    assert len(calls) == 2
+
+
+def test_lines_stream_in_completion_order_and_failures_do_not_abort():
+    agent = StubAgent(Yahoo(), delays={"slow": 0.3, "fail": 0.15})
+    app = FastAPI()
+    mount_batch(app, [agent])
+
+    request = {"prompts": ["slow", "fail", "fast"]}
+    with TestClient(app).stream("POST", "/batch?agent_id=finance", json=request) as response:
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.iter_lines() if line]
+
+    *items, summary = lines
+    assert [(item["index"], item["status"]) for item in items] == [(2, "ok"), (1, "error"), (0, "ok")]
+    assert items[1]["error"] == "model overloaded" and items[1]["prompt"] == "fail"
+    assert items[2]["content"] == "slow -> NVDA: 100.00"
+    assert (summary["summary"]["ok"], summary["summary"]["failed"]) == (2, 1)
@@ -0,0 +1,125 @@
+import time
+
+import pytest
+from agno.agent import Agent
+from agno.app.fastapi.app import FastAPIApp
+from fastapi.testclient import TestClient
+
+from agno_deploy.cache import ResponseCache, TwoTierCache, apply_response_cache
+from agno_deploy.metrics import MetricsRegistry
+from tests.helpers import CountingModel, post_run
+
+
+@pytest.fixture
+def agent():
+    agent = Agent(agent_id="test-agent", model=CountingModel(), add_history_to_messages=True, telemetry=False)
+    apply_response_cache([agent], TwoTierCache("responses", registry=MetricsRegistry()), ttl=60)
+    return agent
+
+
+@pytest.fixture
+def client(agent):
+    return TestClient(FastAPIApp(agents=[agent]).get_app())
+
+
+def test_runs_endpoint_answers_repeated_question_from_cache(agent, client):
+    first = post_run(client, "What is the price of NVDA?")
+    second = post_run(client, "what is the price of  NVDA?")
+    assert len(agent.model.calls) == 1
+    assert second["content"] == first["content"]
+    assert second["metrics"]["cache_hit"] == [True]
+
+
+def test_follow_up_in_a_session_with_runs_goes_to_the_model(agent, client):
+    first = post_run(client, "What is the price of NVDA?")
+    post_run(client, "What is the price of NVDA?", session_id=first["session_id"])
+    assert len(agent.model.calls) == 2
+
+
+def test_media_and_empty_messages_have_no_key(agent):
+    cache = ResponseCache(agent, TwoTierCache("responses", registry=MetricsRegistry()))
+    assert cache._key("  ", {}) is None
+    assert cache._key("Describe this chart", {"images": ["chart.png"]}) is None
+    assert cache._key("What is the price of NVDA?", {}) == cache._key(" what is the PRICE of NVDA? ", {})
+
+
+def test_cache_endpoints_require_the_admin_token():
+    from fastapi import FastAPI
+
+    from agno_deploy.cache import mount_cache
+
+    app = FastAPI()
+    cache = TwoTierCache("responses", registry=MetricsRegistry())
+    mount_cache(app, [cache], token="secret")
+    client = TestClient(app)
+    assert client.post("/cache/invalidate").status_code == 401
+    assert client.get("/cache", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.post("/cache/invalidate", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200 and response.json()["invalidated"] == ["responses"]
+    with pytest.raises(ValueError):
+        mount_cache(FastAPI(), [cache], token=None)
+
+
+def containers(l1_ttl=0.2):
+    """Two containers' caches on one shared tier (the plain-dict stand-in for the modal.Dict)."""
+    backend = {}
+    options = dict(backend=backend, l1_ttl=l1_ttl, generation_ttl=0.1, compress_over=256)
+    a = TwoTierCache("responses", registry=MetricsRegistry(), **options)
+    b = TwoTierCache("responses", registry=MetricsRegistry(), **options)
+    return backend, a, b
+
+
+def test_two_containers_share_the_l2_tier():
+    _, a, b = containers()
+    a.set("tool:AAPL", "price", "182.5000", ttl=60)
+
+    assert b.get("tool:AAPL", "price") == "182.5000"  # L2 hit, copied to b's L1
+    assert b.get("tool:AAPL", "price") == "182.5000"  # L1 hit
+    assert b.get("tool:AAPL", "price") == "182.5000"
+    assert b.get("tool:MSFT", "price") is None
+    stats = b.stats()
+    assert (stats["l1_hits"], stats["l2_hits"], stats["misses"], stats["l1_entries"]) == (2, 1, 1, 1)
+    assert (stats["l1_hit_ratio"], stats["l2_hit_ratio"], stats["hit_ratio"]) == (0.5, 0.5, 0.75)
+    assert b.hit_ratio.value(cache="responses", tier="l2") == 0.5  # Of the two L1 misses
+    assert a.stats()["lookups"] == 0
+
+
+def test_l1_copy_expires_after_l1_ttl():
+    _, a, b = containers()
+    a.set("tool:AAPL", "price", "182.5000", ttl=60)
+    assert b.get("tool:AAPL", "price") == "182.5000"
+
+    a.delete("tool:AAPL", "price")
+    # b keeps its L1 copy at most l1_ttl, not the 60 s the entry was stored for
+    assert b.get("tool:AAPL", "price") == "182.5000"
+    time.sleep(0.25)
+    assert b.get("tool:AAPL", "price") is None
+
+
+def test_invalidation_reaches_the_other_container_within_generation_ttl():
+    _, a, b = containers(l1_ttl=60)
+    a.set("tool:MSFT", "price", "410.2000", ttl=60)
+    a.set("tool:AAPL", "price", "182.5000", ttl=60)
+    assert b.get("tool:MSFT", "price") == "410.2000"
+
+    a.invalidate("tool:MSFT")
+    assert a.get("tool:MSFT", "price") is None
+    # b's L1 copy outlives the invalidation only until b re-reads the generations
+    assert b.get("tool:MSFT", "price") == "410.2000"
+    time.sleep(0.15)
+    assert b.get("tool:MSFT", "price") is None
+    assert b.get("tool:AAPL", "price") == "182.5000"
+
+
+def test_large_values_are_compressed_in_l2():
+    backend, a, b = containers()
+    value = {"content": "Revenue grew 8% year over year. " * 40, "model": "gpt-4o"}
+    a.set("agent:finance", "long", value, ttl=60)
+    a.set("agent:finance", "short", {"content": "ok"}, ttl=60)
+
+    stored = {key.rsplit("|", 1)[1]: entry for key, entry in backend.items() if "|gen|" not in key}
+    by_size = sorted(stored.values(), key=lambda entry: len(entry[2]))
+    assert [compressed for _, compressed, _ in by_size] == [False, True]
+    assert len(by_size[1][2]) < len(value["content"]) / 4
+    assert b.get("agent:finance", "long") == value
+    assert b.get("agent:finance", "short") == {"content": "ok"}
@@ -0,0 +1,92 @@
+import asyncio
+
+from agno_deploy.cancellation import DisconnectCancellationMiddleware
+from agno_deploy.metrics import MetricsRegistry
+
+CHUNK = b"x" * 400_000
+
+
+def request(body_size=None):
+    headers = [] if body_size is None else [(b"content-length", str(body_size).encode())]
+    return {"type": "http", "method": "POST", "path": "/runs", "headers": headers}
+
+
+def client(chunks, log):
+    """An ASGI receive() sending `chunks` as the body, then waiting for a disconnect that never comes."""
+    messages = [{"type": "http.request", "body": c, "more_body": i < len(chunks) - 1} for i, c in enumerate(chunks)]
+
+    async def receive():
+        if messages:
+            log.append("client")
+            return messages.pop(0)
+        await asyncio.Event().wait()
+
+    return receive
+
+
+def echo_app(log):
+    async def app(scope, receive, send):
+        log.append("app")
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": str(len(body)).encode()})
+
+    return app
+
+
+def run(middleware, scope, receive):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+
+
+def test_small_body_is_buffered_and_supervised():
+    log = []
+    middleware = DisconnectCancellationMiddleware(echo_app(log), registry=MetricsRegistry())
+    assert run(middleware, request(2), client([b"h", b"i"], log)) == b"2"
+    assert log == ["client", "client", "app"]
+
+
+def test_large_declared_body_passes_through():
+    log = []
+    middleware = DisconnectCancellationMiddleware(echo_app(log), max_body_bytes=1_000_000, registry=MetricsRegistry())
+    assert run(middleware, request(3 * len(CHUNK)), client([CHUNK] * 3, log)) == str(3 * len(CHUNK)).encode()
+    assert log[0] == "app"
+
+
+def test_chunked_body_past_the_limit_is_replayed_then_streamed():
+    log = []
+    middleware = DisconnectCancellationMiddleware(echo_app(log), max_body_bytes=1_000_000, registry=MetricsRegistry())
+    assert run(middleware, request(), client([CHUNK] * 4, log)) == str(4 * len(CHUNK)).encode()
+    assert log == ["client", "client", "client", "app", "client"]
+
+
+def test_disconnect_cancels_the_run():
+    registry = MetricsRegistry()
+    started = asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        await receive()
+        started.set()
+        await asyncio.sleep(10)
+
+    messages = [{"type": "http.request", "body": b"hi", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await started.wait()
+        return {"type": "http.disconnect"}
+
+    middleware = DisconnectCancellationMiddleware(slow_app, registry=registry)
+    assert run(middleware, request(2), receive) == b""
+    assert registry.counter("disconnect_cancelled_runs_total").total() == 1
@@ -0,0 +1,82 @@
+import time
+
+from agno_deploy.circuit_breaker import CLOSED, OPEN, CircuitBreaker
+from agno_deploy.metrics import MetricsRegistry
+
+
+class Yahoo:
+    """get_current_stock_price as YFinanceTools returns it, with a switchable outage."""
+
+    def __init__(self):
+        self.down = False
+        self.calls = 0
+
+    def get_current_stock_price(self, symbol):
+        self.calls += 1
+        if self.down:
+            # What YFinanceTools returns when Yahoo answers a 429 with an empty info dict
+            return f"Could not fetch current price for {symbol}"
+        return "182.5000"
+
+
+def breaker(**kwargs):
+    return CircuitBreaker("yahoo", failure_threshold=3, registry=MetricsRegistry(), **kwargs)
+
+
+def call(circuit, yahoo, symbol="AAPL"):
+    return circuit.hook("get_current_stock_price", yahoo.get_current_stock_price, {"symbol": symbol})
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_empty_yahoo_replies_open_the_circuit():
+    circuit, yahoo = breaker(probe_interval=60), Yahoo()
+    yahoo.down = True
+    for _ in range(3):
+        assert call(circuit, yahoo, "MSFT").startswith("Could not")
+    assert circuit.state == OPEN
+
+    # Open: fail fast without calling Yahoo
+    assert "temporarily unavailable" in call(circuit, yahoo, "MSFT")
+    assert yahoo.calls == 3
+    assert circuit.calls.value(circuit="yahoo", outcome="rejected") == 1
+
+
+def test_open_circuit_serves_stale_data():
+    circuit, yahoo = breaker(probe_interval=60), Yahoo()
+    assert call(circuit, yahoo) == "182.5000"
+    yahoo.down = True
+
+    # A failure while closed already falls back to the last good result
+    first = call(circuit, yahoo)
+    assert first.startswith("[STALE DATA: get_current_stock_price failed") and first.endswith("182.5000")
+    call(circuit, yahoo)
+    call(circuit, yahoo)
+    assert circuit.state == OPEN
+
+    stale = call(circuit, yahoo)
+    assert stale.startswith("[STALE DATA: yahoo is unavailable") and stale.endswith("182.5000")
+    assert yahoo.calls == 4
+
+
+def test_half_open_probe_closes_the_circuit():
+    circuit, yahoo = breaker(probe_interval=0.02), Yahoo()
+    yahoo.down = True
+    for _ in range(3):
+        call(circuit, yahoo)
+    assert circuit.state == OPEN
+
+    # Probes keep failing while Yahoo is down, and keep the circuit open
+    wait_for(lambda: yahoo.calls >= 5)
+    assert circuit.state != CLOSED
+
+    yahoo.down = False
+    wait_for(lambda: circuit.state == CLOSED)
+    assert circuit.failures == 0
+    assert circuit.transitions.value(circuit="yahoo", state="half_open") >= 1
+    assert call(circuit, yahoo) == "182.5000"
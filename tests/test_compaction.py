@@ -0,0 +1,89 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from agno_deploy.compaction import ToolOutputCompactor, count_tokens
+from agno_deploy.metrics import MetricsRegistry
+
+# YFinanceTools outputs for AAPL, produced by the toolkit itself from Yahoo-shaped data
+OUTPUTS = json.loads((Path(__file__).parent / "fixtures" / "yfinance_aapl.json").read_text())
+
+KEY_FIELDS = {
+    "get_current_stock_price": ["200.0300"],
+    "get_company_info": ["Name: Apple Inc.", "Sector: Technology", "P/E Ratio: 31.30", "EPS: 6.39", "Free Cash flow: 97.3B"],
+    "get_stock_fundamentals": ["market_cap: 3.0T", "pe_ratio: 24.10", "eps: 6.39", "52_week_high: 260.10"],
+    "get_key_financial_ratios": ["trailingPE: 31.30", "forwardPE: 24.10", "debtToEquity: 146.99", "freeCashflow: 97.3B"],
+    "get_income_statements": [
+        "Item,2024-09-30,2023-09-30", "Total Revenue,391.0B,383.3B", "Net Income,93.7B", "Diluted EPS,6.08",
+    ],
+    "get_analyst_recommendations": ["period,strongBuy,buy,hold,sell,strongSell", "0m,5,24,15,1,3"],
+    "get_company_news": ["Reuters | Apple unveils redesigned software at WWDC", "Motley Fool | Is Apple stock a buy"],
+    "get_historical_stock_prices": [
+        "Date,Open,High,Low,Close,Volume", "2025-05-15,", "2025-06-12,200.08,201.73,198.53,200.03,59.6M",
+    ],
+    "get_technical_indicators": ["Date,Open,High,Low,Close,Volume", "2025-06-12,"],
+}
+
+NOISE = {
+    "get_company_info": ["Address", "Website", "Zip"],
+    "get_key_financial_ratios": ["companyOfficers", "messageBoardId", "longBusinessSummary"],
+    "get_income_statements": ["Tax Effect Of Unusual Items", "Normalized EBITDA"],
+    "get_company_news": ["s.yimg.com", "thumbnail", ".tsrc=rss"],
+    "get_historical_stock_prices": ["Dividends", "Stock Splits"],
+}
+
+
+def compactor(**budgets):
+    return ToolOutputCompactor(budgets=budgets, registry=MetricsRegistry())
+
+
+def run(compaction, function_name, output):
+    return compaction.hook(function_name, lambda symbol: output, {"symbol": "AAPL"})
+
+
+@pytest.mark.parametrize("function_name", sorted(OUTPUTS))
+def test_recorded_output_fits_its_budget_and_keeps_key_fields(function_name):
+    compaction = compactor()
+    compacted = run(compaction, function_name, OUTPUTS[function_name])
+
+    assert count_tokens(compacted) <= compaction.budgets[function_name]
+    for field in KEY_FIELDS[function_name]:
+        assert field in compacted
+    for field in NOISE.get(function_name, []):
+        assert field not in compacted
+    tokens = compaction.tokens
+    assert tokens.value(function=function_name, stage="after") <= tokens.value(function=function_name, stage="before")
+
+
+def test_duplicate_news_story_is_dropped():
+    compacted = run(compactor(), "get_company_news", OUTPUTS["get_company_news"])
+    assert len(compacted.splitlines()) == 2
+
+
+def test_long_table_keeps_first_and_last_rows_within_a_tight_budget():
+    compaction = compactor(get_technical_indicators=200)
+    compacted = run(compaction, "get_technical_indicators", OUTPUTS["get_technical_indicators"])
+    rows = compacted.splitlines()
+
+    assert count_tokens(compacted) <= 200
+    assert rows[0] == "Date,Open,High,Low,Close,Volume"
+    assert rows[1].startswith("2025-03-18,") and rows[-2].startswith("2025-06-12,")
+    assert rows[-1].endswith("of 63 rows omitted to fit the token budget]")
+
+
+@pytest.mark.parametrize(
+    "function_name, error",
+    [
+        ("get_current_stock_price", "Could not fetch current price for AAPL"),
+        ("get_company_info", "Could not fetch company info for AAPL"),
+        # Long enough to be truncated if it were held to the budget
+        ("get_current_stock_price", "Error fetching current price for AAPL: 429 Client Error: Too Many Requests " * 10),
+        ("get_income_statements", "Error fetching income statements for AAPL: Expecting value: line 1 column 1 (char 0)"),
+    ],
+    ids=["empty_price", "empty_info", "long_error", "parse_error"],
+)
+def test_error_strings_pass_through_unchanged(function_name, error):
+    compaction = compactor()
+    assert run(compaction, function_name, error) == error
+    assert compaction.calls.total() == 0
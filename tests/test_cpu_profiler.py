@@ -0,0 +1,100 @@
+import asyncio
+import re
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from agno_deploy.cpu_profiler import CPUProfileMiddleware, SamplingProfiler, mount_cpu_profiler
+
+AUTH = {"Authorization": "Bearer admin-secret"}
+COLLAPSED_LINE = re.compile(r"^thread:[^;]+(;[^;]+)+ \d+$")
+
+
+def crunch(seconds):
+    """Busy loop standing in for pandas and JSON work on the event loop."""
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(i * i for i in range(200))
+    return total
+
+
+def profiled_app():
+    profiler = SamplingProfiler(interval=0.002)
+    app = FastAPI()
+    mount_cpu_profiler(app, profiler, token="admin-secret")
+
+    async def work():
+        return {"total": crunch(0.05)}
+
+    app.add_api_route("/work", work, methods=["GET"])
+    return profiler, CPUProfileMiddleware(app, profiler)
+
+
+async def until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.005)
+
+
+def test_request_bounded_profile_ignores_admin_paths():
+    profiler, app = profiled_app()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            params = {"requests": 3, "max_seconds": 10}
+            profile = asyncio.create_task(client.post("/admin/profile", params=params, headers=AUTH))
+            await until(lambda: profiler.running)
+
+            # One profile per container: a second one is refused, and the refusal is not counted
+            busy = await client.post("/admin/profile", params={"seconds": 1}, headers=AUTH)
+            assert busy.status_code == 409
+            await client.get("/admin/anything-else")
+
+            await client.get("/work")
+            await client.get("/work")
+            assert profiler._active["requests_seen"] == 2 and not profile.done()
+            await client.get("/work")
+            return await asyncio.wait_for(profile, 5)
+
+    started = time.monotonic()
+    response = asyncio.run(scenario())
+    assert time.monotonic() - started < 5  # Ended by the third request, not by max_seconds
+    assert response.status_code == 200 and not profiler.running
+    assert response.headers["x-profile-requests"] == "3"
+    assert int(response.headers["x-profile-samples"]) > 0
+
+    lines = response.text.splitlines()
+    assert lines and all(COLLAPSED_LINE.match(line) for line in lines)
+    counts = [int(line.rsplit(" ", 1)[1]) for line in lines]
+    assert counts == sorted(counts, reverse=True)
+    # The busy loop shows up under the event loop thread with its source location
+    assert any(
+        line.startswith("thread:MainThread;") and "crunch (tests/test_cpu_profiler.py:" in line for line in lines
+    )
+
+
+def test_json_summary_and_argument_checks():
+    profiler, app = profiled_app()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            both = await client.post("/admin/profile", params={"seconds": 1, "requests": 1}, headers=AUTH)
+            unauthorised = await client.post("/admin/profile", params={"seconds": 0.1})
+            profile = asyncio.create_task(
+                client.post("/admin/profile", params={"seconds": 0.3, "format": "json"}, headers=AUTH)
+            )
+            await until(lambda: profiler.running)
+            await client.get("/work")
+            return both, unauthorised, await profile
+
+    both, unauthorised, response = asyncio.run(scenario())
+    assert both.status_code == 422 and unauthorised.status_code == 401
+    summary = response.json()
+    assert summary["samples"] > 0 and summary["requests"] is None
+    # The busy loop's generator is on top of the stack; its callers share its count in "total"
+    assert any(entry["function"].startswith("crunch.<locals>.<genexpr> (") for entry in summary["self"])
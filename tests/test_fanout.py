@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+from agno.run.response import RunResponse
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from agno_deploy.fanout import mount_fanout
+
+
+class StreamingAgent:
+    """Streams `chunks` as RunResponse content events, pausing `delay` seconds before each one."""
+
+    def __init__(self, agent_id, name, chunks=(), delay=0.0, error=None):
+        self.agent_id, self.name = agent_id, name
+        self.chunks, self.delay, self.error = chunks, delay, error
+        self.closed = False
+        self.tool_hooks = None
+
+    def deep_copy(self, update):
+        return self
+
+    async def arun(self, message, session_id=None, user_id=None, stream=False):
+        async def chunks():
+            try:
+                for chunk in self.chunks:
+                    await asyncio.sleep(self.delay)
+                    yield RunResponse(content=chunk)
+                if self.error:
+                    raise self.error
+            finally:
+                self.closed = True
+
+        return chunks()
+
+
+def agents():
+    return [
+        StreamingAgent("analysis", "Analysis", ["NVDA earnings ", "beat estimates."]),
+        StreamingAgent("trading", "Trading", ["Wait for ", "a pullback."], delay=5.0),
+        StreamingAgent("news", "News", ["Reading the wire"], error=RuntimeError("rate limited")),
+    ]
+
+
+def client(deployed, agent_timeout=0.2):
+    app = FastAPI()
+    mount_fanout(app, deployed, agent_timeout=agent_timeout)
+    return TestClient(app)
+
+
+def test_merged_answer_survives_a_slow_and_a_failing_agent():
+    deployed = agents()
+    response = client(deployed).post("/fanout", json={"message": "Should I buy NVDA?"})
+    assert response.status_code == 200
+    body = response.json()
+
+    results = {r["agent_id"]: r for r in body["responses"]}
+    assert results["analysis"]["status"] == "ok"
+    assert results["analysis"]["content"] == "NVDA earnings beat estimates."
+    assert (results["trading"]["status"], results["trading"]["error"]) == ("error", "Timed out after 0.2s")
+    assert results["trading"]["duration_s"] < 1
+    assert results["news"]["error"] == "rate limited"
+    # Request order, each failure shown in place
+    assert body["merged"] == (
+        "## Analysis\n\nNVDA earnings beat estimates.\n\n"
+        "## Trading\n\n_Failed: Timed out after 0.2s_\n\n"
+        "## News\n\n_Failed: rate limited_"
+    )
+    # The timed-out agent's stream was closed, not left suspended
+    assert all(agent.closed for agent in deployed)
+
+
+def test_stream_tags_deltas_and_ends_with_the_merged_result():
+    request = {"message": "Should I buy NVDA?", "agent_ids": ["analysis", "trading"], "stream": True}
+    with client(agents(), agent_timeout=0.2).stream("POST", "/fanout", json=request) as response:
+        lines = [json.loads(line) for line in response.iter_lines() if line]
+
+    deltas = [(line["agent_id"], line["content"]) for line in lines if "content" in line and "status" not in line]
+    assert ("analysis", "NVDA earnings ") in deltas and ("trading", "Wait for ") not in deltas
+    done = [line["agent_id"] for line in lines if "status" in line]
+    assert done == ["analysis", "trading"]
+    assert [r["agent_id"] for r in lines[-1]["responses"]] == ["analysis", "trading"]
+
+
+def test_unknown_agent_is_rejected():
+    response = client(agents()).post("/fanout", json={"message": "hi", "agent_ids": ["analysis", "macro"]})
+    assert response.status_code == 404
+    assert "macro" in response.json()["detail"]
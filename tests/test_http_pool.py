@@ -0,0 +1,51 @@
+import copy
+
+import httpx
+from agno.agent import Agent
+from agno.models.openai import OpenAIChat
+from openai import OpenAI
+
+from agno_deploy.http_pool import HTTPClientPool, apply_shared_clients
+from agno_deploy.metrics import MetricsRegistry
+
+
+def wired_agent():
+    agent = Agent(model=OpenAIChat(id="gpt-4o", api_key="test-key"), telemetry=False)
+    pool = HTTPClientPool(registry=MetricsRegistry())
+    assert apply_shared_clients([agent], pool)["models"] == 1
+    return agent, pool
+
+
+def test_async_client_uses_the_shared_pool():
+    agent, pool = wired_agent()
+    shared = pool.async_client("https://api.openai.com/v1")
+    assert agent.model.get_async_client()._client is shared
+    assert agent.model.get_async_client()._client is shared
+
+
+def test_sync_client_keeps_working_with_its_own_client():
+    agent, _ = wired_agent()
+    assert agent.model.http_client is None
+    # Raised TypeError when the shared AsyncClient was injected into http_client
+    assert isinstance(agent.model.get_client(), OpenAI)
+
+
+def test_copies_share_the_pool():
+    agent, pool = wired_agent()
+    model = copy.deepcopy(agent.model)
+    assert model.get_async_client()._client is pool.async_client("https://api.openai.com/v1")
+    assert model.get_async_client.__self__ is model
+
+
+def test_models_with_their_own_client_are_left_alone():
+    own = httpx.AsyncClient()
+    agent = Agent(model=OpenAIChat(id="gpt-4o", api_key="test-key", http_client=own), telemetry=False)
+    assert apply_shared_clients([agent], HTTPClientPool(registry=MetricsRegistry()))["models"] == 0
+    assert agent.model.http_client is own
+
+
+def test_sdk_retries_are_off_only_on_the_wrapped_async_path():
+    agent = Agent(model=OpenAIChat(id="gpt-4o", api_key="test-key", max_retries=2), telemetry=False)
+    apply_shared_clients([agent], HTTPClientPool(wrap_transport=lambda transport, upstream: transport, registry=MetricsRegistry()))
+    assert agent.model.get_async_client().max_retries == 0
+    assert agent.model.get_client().max_retries == 2
@@ -0,0 +1,107 @@
+import asyncio
+import time
+
+from agno.run.response import RunResponse
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from agno_deploy.jobs import JobStore, LocalJobRunner, mount_jobs
+
+
+class RemoteDict(dict):
+    """Stands in for a modal.Dict: not a plain dict, so the store goes through worker threads."""
+
+    def pop(self, key):
+        # Like modal.Dict.pop: no default, KeyError when missing
+        return super().pop(key)
+
+
+class StubAgent:
+    agent_id = "finance"
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = []
+
+    async def arun(self, message, session_id=None, user_id=None):
+        self.calls.append((message, session_id, user_id))
+        await asyncio.sleep(0.01)
+        if self.error:
+            raise self.error
+        return RunResponse(content=f"Done: {message}", agent_id=self.agent_id)
+
+
+async def submit_and_wait(store, agent, message="Analyse NVDA"):
+    runner = LocalJobRunner(store, [agent])
+    job = await store.create(agent.agent_id, message, "s1", "u1")
+    await runner.submit(job["job_id"])
+    for _ in range(200):
+        job = await store.get(job["job_id"])
+        if job["status"] in ("completed", "failed"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job stuck in {job['status']}")
+
+
+def test_job_runs_to_completion():
+    store = JobStore(RemoteDict())
+    agent = StubAgent()
+    job = asyncio.run(submit_and_wait(store, agent))
+
+    assert job["status"] == "completed" and job["error"] is None
+    assert job["result"]["content"] == "Done: Analyse NVDA"
+    assert job["started_at"] <= job["finished_at"]
+    assert job["expires_at"] == job["finished_at"] + store.retention
+    assert agent.calls == [("Analyse NVDA", "s1", "u1")]
+
+
+def test_failing_agent_fails_the_job():
+    job = asyncio.run(submit_and_wait(JobStore(RemoteDict()), StubAgent(error=RuntimeError("rate limited"))))
+    assert job["status"] == "failed"
+    assert job["error"] == "rate limited" and job["result"] is None
+
+
+def test_failed_spawn_marks_job_failed():
+    store = JobStore()
+
+    async def spawn(job_id):
+        raise ConnectionError("worker unavailable")
+
+    app = FastAPI()
+    mount_jobs(app, [type("Agent", (), {"agent_id": "finance"})()], store, spawn)
+    client = TestClient(app)
+
+    response = client.post("/jobs?agent_id=finance", data={"message": "Analyse NVDA"})
+    assert response.status_code == 503
+    job = client.get(f"/jobs/{response.json()['job_id']}").json()
+    assert job["status"] == "failed"
+    assert "worker unavailable" in job["error"] and job["finished_at"] is not None
+
+
+def test_sweep_drops_expired_jobs_from_remote_store():
+    backend = RemoteDict()
+    store = JobStore(backend, retention=60, max_runtime=60)
+
+    async def scenario():
+        old = await store.create("finance", "old", None, None)
+        fresh = await store.create("finance", "fresh", None, None)
+        backend[old["job_id"]] = dict(old, expires_at=time.time() - 1)
+        assert await store.purge_expired() == 1
+        return old, fresh
+
+    old, fresh = asyncio.run(scenario())
+    assert old["job_id"] not in backend and fresh["job_id"] in backend
+
+
+def test_reading_an_expired_job_drops_it_from_remote_store():
+    backend = RemoteDict()
+    store = JobStore(backend)
+
+    async def scenario():
+        job = await store.create("finance", "old", None, None)
+        backend[job["job_id"]] = dict(job, expires_at=time.time() - 1)
+        assert await store.get(job["job_id"]) is None
+        assert await store.get(job["job_id"]) is None  # Already gone: no KeyError
+        return job
+
+    assert asyncio.run(scenario())["job_id"] not in backend
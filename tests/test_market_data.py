@@ -0,0 +1,99 @@
+import time
+from datetime import date
+
+import numpy as np
+
+from agno_deploy.market_data import MarketDataStore
+from agno_deploy.metrics import MetricsRegistry
+from agno_deploy.warmup import SyntheticSource
+
+
+class RecordingSource(SyntheticSource):
+    """Synthetic Yahoo that records every date range and fundamentals call it serves."""
+
+    def __init__(self, listed=date(2015, 1, 2)):
+        super().__init__(listed=listed)
+        self.ranges = []
+
+    def history(self, symbol, start, end):
+        self.ranges.append((start, end))
+        return super().history(symbol, start, end)
+
+
+def store(tmp_path, source, **kwargs):
+    return MarketDataStore(str(tmp_path), source=source, registry=MetricsRegistry(), **kwargs)
+
+
+def test_second_call_fetches_only_the_older_range(tmp_path):
+    source = RecordingSource()
+    market = store(tmp_path, source)
+    first = market.history("AAPL", date(2024, 3, 1), date(2024, 6, 28))
+    assert source.ranges == [(date(2024, 3, 1), date(2024, 6, 28))]
+
+    # Inside the stored range (and the last bar is fresh): no network
+    market.history("AAPL", date(2024, 4, 1), date(2024, 6, 28))
+    assert len(source.ranges) == 1
+
+    wider = market.history("AAPL", date(2024, 1, 2), date(2024, 6, 28))
+    assert source.ranges[1] == (date(2024, 1, 2), date(2024, 2, 29))
+    assert len(source.ranges) == 2
+    assert np.array_equal(wider.between(date(2024, 3, 1)).data, first.data)
+
+
+def test_newer_bars_extend_the_stored_series(tmp_path):
+    source = RecordingSource()
+    market = store(tmp_path, source, refresh_after=0)
+    market.history("MSFT", date(2024, 1, 2), date(2024, 3, 28))
+    before = market.load("MSFT")
+    assert isinstance(before.data, np.memmap)
+    old = np.array(before.data)
+
+    after = market.history("MSFT", date(2024, 1, 2), date(2024, 6, 28))
+    # Only the last stored bar (possibly partial) onwards was fetched
+    assert source.ranges[1:] == [(date(2024, 3, 28), date(2024, 6, 28))]
+    stored = market.load("MSFT")
+    assert isinstance(stored.data, np.memmap) and len(stored) > len(old[0])
+    # Stored bars are kept as they were; only the refreshed last bar may change
+    assert np.array_equal(np.asarray(stored.data)[:, : old.shape[1] - 1], old[:, :-1])
+    assert stored.data[0, old.shape[1] - 1] == old[0, -1]
+    assert np.array_equal(after.data, stored.data)
+    # The file was replaced atomically: a mapping opened before the update still reads the old bars
+    assert np.array_equal(np.asarray(before.data), old)
+
+
+def test_earliest_bar_is_not_refetched(tmp_path):
+    source = RecordingSource(listed=date(2020, 6, 1))
+    market = store(tmp_path, source)
+    series = market.history("NEWCO", date(2019, 1, 2), date(2020, 12, 31))
+    assert date.fromordinal(date(1970, 1, 1).toordinal() + int(series.column("date")[0])) == date(2020, 6, 1)
+
+    # Before the listing there is nothing to fetch, however early the request starts
+    market.history("NEWCO", date(2010, 1, 4), date(2020, 12, 31))
+    assert len(source.ranges) == 1
+    assert market.covers("NEWCO", "get_historical_stock_prices", date(2005, 1, 3))
+
+
+def test_fundamentals_expire_after_their_ttl(tmp_path):
+    source = RecordingSource()
+    market = store(tmp_path, source, fundamentals_ttl=0.05)
+    first = market.fundamentals("AAPL", "get_company_info")
+    assert market.fundamentals("AAPL", "get_company_info") == first
+    assert source.calls["get_company_info"] == 1
+
+    time.sleep(0.06)
+    assert not market.covers("AAPL", "get_company_info")
+    market.fundamentals("AAPL", "get_company_info")
+    assert source.calls["get_company_info"] == 2
+
+
+def test_error_results_are_not_stored(tmp_path):
+    market = store(tmp_path, RecordingSource())
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return "Could not fetch company info for AAPL"
+
+    market.fundamentals("AAPL", "get_company_info", fetch)
+    market.fundamentals("AAPL", "get_company_info", fetch)
+    assert len(calls) == 2
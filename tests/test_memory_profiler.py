@@ -0,0 +1,93 @@
+import json
+import os
+import tracemalloc
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from agno_deploy import memory_profiler
+from agno_deploy.memory_profiler import MemoryProfiler, mount_memory_profiler
+
+AUTH = {"Authorization": "Bearer admin-secret"}
+HELD = []
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    mount_memory_profiler(app, MemoryProfiler(), token="admin-secret")
+    yield TestClient(app)
+    HELD.clear()
+    tracemalloc.stop()
+
+
+def grow(blocks):
+    for _ in range(blocks):
+        HELD.append(bytearray(64 * 1024))
+
+
+def snapshot(client, label):
+    response = client.post("/admin/memory/snapshots", params={"label": label}, headers=AUTH)
+    assert response.status_code == 200
+    return response.json()["snapshot"]["id"]
+
+
+def test_snapshot_without_tracing_is_a_conflict(client):
+    response = client.post("/admin/memory/snapshots", headers=AUTH)
+    assert response.status_code == 409
+    assert "/admin/memory/start" in response.json()["detail"]
+
+
+def test_start_snapshot_diff_stop(client):
+    assert client.post("/admin/memory/start", headers=AUTH).json()["started"] is True
+    assert client.get("/admin/memory", headers=AUTH).json()["tracing"] is True
+
+    first = snapshot(client, "empty")
+    grow(16)
+    second = snapshot(client, "1 MiB")
+    grow(4)
+    third = snapshot(client, "1.25 MiB")
+
+    latest = client.get("/admin/memory/diff", headers=AUTH).json()
+    assert (latest["base"]["id"], latest["target"]["id"]) == (second, third)
+
+    # With only target given, base is the snapshot taken just before it, not the second most recent
+    growth = client.get("/admin/memory/diff", params={"target": second}, headers=AUTH).json()
+    assert (growth["base"]["id"], growth["target"]["id"]) == (first, second)
+    ours = next(m for m in growth["modules"] if m["module"] == "app:tests")
+    assert ours["bytes_diff"] >= 16 * 64 * 1024
+    assert growth["sites"][0]["site"].startswith(__file__ + ":")
+
+    stopped = client.post("/admin/memory/stop", headers=AUTH).json()
+    assert stopped["stopped"] is True and stopped["tracing"] is False
+    assert [s["id"] for s in stopped["snapshots"]] == [first, second, third]
+    json.dumps(stopped)
+
+
+def test_diff_needs_an_older_base(client):
+    client.post("/admin/memory/start", headers=AUTH)
+    first, second = snapshot(client, "a"), snapshot(client, "b")
+
+    for params in ({"base": second, "target": first}, {"base": second, "target": second}):
+        assert client.get("/admin/memory/diff", params=params, headers=AUTH).status_code == 422
+    # Nothing was taken before the first snapshot
+    assert client.get("/admin/memory/diff", params={"target": first}, headers=AUTH).status_code == 404
+    assert client.get("/admin/memory/diff", params={"base": 99}, headers=AUTH).status_code == 404
+
+
+def test_admin_token_is_required(client):
+    assert client.post("/admin/memory/start").status_code == 401
+    assert not tracemalloc.is_tracing()
+
+
+def test_module_grouping():
+    profiler = MemoryProfiler(app_roots=["/srv/agents"])
+    site_packages = os.path.join(os.sep, "usr", "lib", "python3.13", "site-packages")
+    assert profiler.group(os.path.join(site_packages, "pandas", "core", "frame.py")) == "pandas"
+    assert profiler.group(os.path.join(site_packages, "six.py")) == "six"
+    assert profiler.group(os.path.join(os.sep, "srv", "agents", "finance_agent.py")) == "app:finance_agent"
+    assert profiler.group(memory_profiler.__file__) == "app:agno_deploy"
+    assert profiler.group(__file__) == "app:tests"
+    assert profiler.group(json.__file__) == "stdlib"
+    assert profiler.group("<frozen importlib._bootstrap>") == "other"
@@ -0,0 +1,32 @@
+from pathlib import Path
+
+import pytest
+
+from agno_deploy.planner import load_benchmark, plan_capacity
+
+BENCHMARK = load_benchmark(Path(__file__).parent.parent / "benchmarks" / "capacity_profile.example.json")
+
+
+def test_picks_highest_concurrency_within_slo():
+    plan = plan_capacity(BENCHMARK, peak_rps=20, p95_slo=20)
+    assert plan["settings"]["max_concurrent"] == 50
+    assert any("concurrency 100" in reason for reason in plan["rejected"])
+
+
+def test_idle_peak_still_bills_min_containers():
+    plan = plan_capacity(BENCHMARK, peak_rps=0, baseline_rps=0, p95_slo=20)
+    expected = plan["expected"]
+    assert expected["peak_containers"] == 0
+    assert plan["settings"]["min_containers"] == 1
+    assert expected["daily_cost"] == pytest.approx(expected["cost_per_container_hour"] * 24, abs=0.01)
+
+
+def test_peak_below_baseline_bills_baseline():
+    low_peak = plan_capacity(BENCHMARK, peak_rps=1, baseline_rps=20, p95_slo=20)
+    flat = plan_capacity(BENCHMARK, peak_rps=20, baseline_rps=20, p95_slo=20)
+    assert low_peak["expected"]["daily_cost"] == flat["expected"]["daily_cost"]
+
+
+def test_no_point_meets_slo():
+    with pytest.raises(ValueError, match="No benchmarked concurrency"):
+        plan_capacity(BENCHMARK, peak_rps=20, p95_slo=5)
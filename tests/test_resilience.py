@@ -0,0 +1,112 @@
+import asyncio
+
+import httpx
+
+from agno_deploy.metrics import MetricsRegistry
+from agno_deploy.resilience import ResiliencePolicy
+
+URL = "https://api.openai.com/v1/chat/completions"
+KEY = ("gpt-4o", False)
+
+
+class Upstream:
+    """Model API double: each attempt takes the next (delay, status) from `script`, then answers 200 at once."""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.attempts = 0
+
+    async def __call__(self, request):
+        self.attempts += 1
+        attempt = self.attempts
+        delay, status = self.script.pop(0) if self.script else (0.0, 200)
+        await asyncio.sleep(delay)
+        return httpx.Response(status, json={"attempt": attempt})
+
+
+def policy(**kwargs):
+    settings = dict(min_samples=1, min_hedge_delay=0.05, backoff_base=0.001, registry=MetricsRegistry())
+    return ResiliencePolicy(**dict(settings, **kwargs))
+
+
+def post(policy, upstream, url=URL, method="POST"):
+    async def request():
+        transport = policy.wrap(httpx.MockTransport(upstream), "openai")
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.request(method, url, json={"model": "gpt-4o", "messages": []})
+
+    return asyncio.run(request())
+
+
+def outcomes(policy, outcome):
+    return policy.outcomes.value(upstream="openai", outcome=outcome)
+
+
+def test_slow_first_attempt_is_hedged_and_the_first_response_wins():
+    resilience = policy()
+    resilience.latency.observe(KEY, 0.05)  # Recent p95 time to first byte: 50 ms
+    upstream = Upstream((2.0, 200))
+
+    response = post(resilience, upstream)
+    assert response.status_code == 200 and response.json() == {"attempt": 2}
+    assert upstream.attempts == 2
+    assert resilience.attempts.value(upstream="openai", kind="hedge") == 1
+    assert outcomes(resilience, "hedge_won") == 1
+
+
+def test_no_hedge_before_enough_samples():
+    upstream = Upstream((0.2, 200))
+    response = post(policy(min_samples=20), upstream)
+    assert response.json() == {"attempt": 1} and upstream.attempts == 1
+
+
+def test_5xx_is_retried_within_the_attempt_budget():
+    resilience = policy(max_attempts=3)
+    upstream = Upstream((0.0, 503), (0.0, 502))
+    response = post(resilience, upstream)
+    assert response.status_code == 200 and upstream.attempts == 3
+    assert outcomes(resilience, "retried") == 1
+
+    # Never more than max_attempts, however long the outage
+    resilience = policy(max_attempts=3)
+    upstream = Upstream(*[(0.0, 503)] * 10)
+    response = post(resilience, upstream)
+    assert response.status_code == 503 and upstream.attempts == 3
+    assert outcomes(resilience, "failed") == 1
+
+
+def test_no_retry_past_the_time_budget():
+    attempts = []
+
+    async def rate_limited(request):
+        attempts.append(request)
+        return httpx.Response(429, headers={"retry-after": "1"})
+
+    # Waiting out a one-second Retry-After would end past the 100 ms budget
+    response = post(policy(budget_s=0.1), rate_limited)
+    assert response.status_code == 429 and len(attempts) == 1
+
+
+def test_over_budget_request_is_not_hedged():
+    resilience = policy(budget_s=0.02)  # Spent before the 50 ms hedge threshold is reached
+    resilience.latency.observe(KEY, 0.05)
+    upstream = Upstream((0.2, 200))
+
+    response = post(resilience, upstream)
+    assert response.json() == {"attempt": 1} and upstream.attempts == 1
+    assert resilience.attempts.value(upstream="openai", kind="hedge") == 0
+
+
+def test_non_model_calls_are_not_hedged_or_retried():
+    resilience = policy()
+    resilience.latency.observe(KEY, 0.05)
+
+    # Uploading a file is not idempotent: a hedge or a retry would create a second one
+    upstream = Upstream((0.2, 503))
+    response = post(resilience, upstream, url="https://api.openai.com/v1/files")
+    assert response.status_code == 503 and upstream.attempts == 1
+
+    upstream = Upstream((0.2, 200))
+    post(resilience, upstream, method="GET", url="https://api.openai.com/v1/models")
+    assert upstream.attempts == 1
+    assert resilience.attempts.total() == 0
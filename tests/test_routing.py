@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from agno_deploy import routing
+from agno_deploy.metrics import MetricsRegistry
+from agno_deploy.routing import IntentRouter, mount_router
+
+AGENTS = [
+    SimpleNamespace(agent_id="finance", name="Finance Agent", role="Stock prices and fundamentals"),
+    SimpleNamespace(agent_id="trading", name="Trading Agent", role="Entries, exits and stop losses"),
+]
+MESSAGE = "Where should I put a stop loss on my NVDA position?"
+
+
+def router(registry):
+    return IntentRouter(AGENTS, rules={"trading": ["stop loss"]}, registry=registry)
+
+
+def decisions(registry):
+    return registry.counter("routing_decisions_total").total()
+
+
+def test_decision_log_has_no_message_text(monkeypatch):
+    events = []
+    monkeypatch.setattr(routing, "log_event", lambda event, **fields: events.append((event, fields)))
+    decision = router(MetricsRegistry()).route(MESSAGE)
+
+    assert decision["agent_id"] == "trading" and decision["method"] == "rules"
+    (event, fields), = events
+    assert event == "route.decision"
+    assert "message" not in fields and fields["message_chars"] == len(MESSAGE)
+    assert MESSAGE not in str(fields) and "NVDA" not in str(fields)
+
+
+def test_explain_is_not_counted(monkeypatch):
+    events = []
+    monkeypatch.setattr(routing, "log_event", lambda event, **fields: events.append(event))
+    registry = MetricsRegistry()
+    app = FastAPI()
+    mount_router(app, router(registry))
+
+    response = TestClient(app).get("/route/explain", params={"message": MESSAGE})
+    assert response.status_code == 200
+    assert response.json()["agent_id"] == "trading"
+    assert decisions(registry) == 0 and events == []
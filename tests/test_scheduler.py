@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from agno_deploy.scheduler import FairScheduler
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def queue(scheduler, order, runs, timeout=None):
+    """Start one waiting run per (tenant, class) in `runs`; each appends its tenant to `order` once granted."""
+
+    async def run(tenant, priority_class):
+        await scheduler.acquire(tenant, priority_class, timeout)
+        order.append(tenant)
+
+    tasks = []
+    for tenant, priority_class in runs:
+        tasks.append(asyncio.create_task(run(tenant, priority_class)))
+        await settle()
+    return tasks
+
+
+async def grant(scheduler, count):
+    """Finish `count` running runs, one at a time, letting each handed-on slot be taken."""
+    for _ in range(count):
+        scheduler.release()
+        await settle()
+
+
+def test_heavy_tenant_cannot_starve_a_light_one():
+    async def scenario():
+        scheduler, order = FairScheduler(1), []
+        await scheduler.acquire("heavy", "interactive")
+        await queue(scheduler, order, [("heavy", "interactive")] * 10)
+        await queue(scheduler, order, [("light", "interactive")])
+        await grant(scheduler, 11)
+        return order
+
+    order = asyncio.run(scenario())
+    # The light tenant queued behind ten heavy runs but is served after the first of them
+    assert order.index("light") == 1
+    assert len(order) == 11
+
+
+def test_slots_are_shared_by_weight():
+    async def scenario():
+        scheduler, order = FairScheduler(2, {"interactive": 4, "batch": 1}), []
+        await scheduler.acquire("web", "interactive")
+        await scheduler.acquire("nightly", "batch")
+        await queue(scheduler, order, [("web", "interactive"), ("nightly", "batch")] * 20)
+        await grant(scheduler, 10)
+        return order
+
+    order = asyncio.run(scenario())
+    # Both flows stay backlogged: interactive gets four slots for every batch one, and batch still moves
+    assert (order.count("web"), order.count("nightly")) == (8, 2)
+
+
+def test_timed_out_waiter_gives_back_its_virtual_time_and_slot():
+    async def scenario():
+        scheduler, order = FairScheduler(1), []
+        await scheduler.acquire("busy", "interactive")
+        with pytest.raises(asyncio.TimeoutError):
+            await scheduler.acquire("a", "interactive", timeout=0.01)
+        assert scheduler.waiting == 0
+
+        # Without the refund "a" would queue one slot behind "b"
+        await queue(scheduler, order, [("a", "interactive"), ("b", "interactive")])
+        await grant(scheduler, 2)
+        scheduler.release()
+        return scheduler, order
+
+    scheduler, order = asyncio.run(scenario())
+    assert order == ["a", "b"]
+    assert scheduler.in_use == 0 and scheduler.waiting == 0 and not scheduler.is_saturated()
+
+
+def test_cancelled_waiter_hands_on_a_slot_granted_as_it_gave_up():
+    async def scenario():
+        scheduler, order = FairScheduler(1), []
+        await scheduler.acquire("busy", "interactive")
+        first, _ = await queue(scheduler, order, [("a", "interactive"), ("b", "interactive")])
+        scheduler.release()  # Grants "a" ...
+        first.cancel()  # ... which is cancelled before it gets to run
+        await settle()
+        return scheduler, order
+
+    scheduler, order = asyncio.run(scenario())
+    assert order == ["b"]
+    assert scheduler.in_use == 1 and scheduler.waiting == 0
@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from agno_deploy.metrics import MetricsRegistry
+from agno_deploy.screening import INFO_FUNCTION, ScreeningTools
+from agno_deploy.warmup import SyntheticSource
+
+SYMBOLS = ["AAPL", "MSFT", "NVDA", "AMZN", "GOOG", "META", "TSLA", "JPM", "XOM", "UNH"]
+
+
+def infos():
+    source = SyntheticSource()
+    return {symbol: json.loads(source.fundamentals(symbol, INFO_FUNCTION)) for symbol in SYMBOLS}
+
+
+def screen(**kwargs):
+    screening = ScreeningTools(source=SyntheticSource(), registry=MetricsRegistry())
+    return screening.screen_stocks(",".join(SYMBOLS), **kwargs).splitlines()
+
+
+def ranked_symbols(lines):
+    header = lines[1].split(",")
+    assert header[:3] == ["rank", "symbol", "score"]
+    return [line.split(",")[1] for line in lines[2:]]
+
+
+def test_ranks_in_each_metrics_better_direction():
+    data = infos()
+    cheapest = sorted(SYMBOLS, key=lambda s: data[s]["trailingPE"])
+    assert ranked_symbols(screen(rank_by="pe", top_n=3)) == cheapest[:3]
+
+    widest = sorted(SYMBOLS, key=lambda s: -data[s]["profitMargins"])
+    lines = screen(rank_by="profit_margin", top_n=3)
+    assert ranked_symbols(lines) == widest[:3]
+    assert lines[2].split(",")[2] == "100"
+    assert lines[0].startswith("Screened 10 of 10 tickers; top 3 by profit_margin")
+
+
+def test_percent_filter():
+    data = infos()
+    expected = {s for s in SYMBOLS if data[s]["profitMargins"] > 0.15}
+    for condition in ("profit_margin>15%", "profit_margin>15", "profit_margin>0.15"):
+        lines = screen(rank_by="pe", filters=condition)
+        assert set(ranked_symbols(lines)) == expected
+        assert f"; {len(expected)} passed {condition};" in lines[0]
+    # The table shows the filtered metric as a percentage
+    assert lines[1].endswith(",pe,profit_margin") and lines[2].endswith("%")
+
+
+def test_sector_filter():
+    data = infos()
+    healthcare = {s for s in SYMBOLS if data[s]["sector"] == "Healthcare"}
+    assert set(ranked_symbols(screen(rank_by="pe", filters="sector=healthcare"))) == healthcare
+    assert set(ranked_symbols(screen(rank_by="pe", filters="sector!=Healthcare"))) == set(SYMBOLS) - healthcare
+    assert screen(rank_by="pe", filters="sector=Utilities")[-1] == "No ticker passed the filters."
+
+
+def test_metric_without_data_is_reported():
+    # Yahoo's info from the synthetic source has no free cash flow for any ticker
+    (line,) = screen(rank_by="fcf_yield")
+    assert "none has data for fcf_yield" in line
+    assert "top 0" not in line
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [
+        ({"rank_by": "moat"}, "Unknown metric(s) moat."),
+        ({"columns": "moat"}, "Unknown metric(s) moat."),
+        ({"filters": "moat>3"}, "Unknown metric 'moat' in filter 'moat>3'."),
+        ({"filters": "sector>Tech"}, "sector supports only = and !=."),
+    ],
+)
+def test_unknown_metric_is_an_error(kwargs, message):
+    (line,) = screen(**kwargs)
+    assert line.startswith("Error screening stocks:") and message in line
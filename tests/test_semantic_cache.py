@@ -0,0 +1,104 @@
+import pytest
+from agno.agent import Agent
+from agno.app.fastapi.app import FastAPIApp
+from fastapi.testclient import TestClient
+
+from agno_deploy.metrics import MetricsRegistry
+from agno_deploy.semantic_cache import (
+    DEFAULT_MODEL,
+    FALLBACK_THRESHOLD,
+    HashingEmbedder,
+    SemanticCache,
+    apply_semantic_cache,
+    extract_periods,
+    extract_tickers,
+)
+from tests.helpers import CountingModel, post_run
+
+
+@pytest.fixture
+def cache():
+    return SemanticCache(threshold=0.85, freshness=300, registry=MetricsRegistry())
+
+
+@pytest.mark.parametrize(
+    "text, periods",
+    [
+        ("How did MSFT perform last year?", {"last year"}),
+        ("How did MSFT perform in the current year?", {"this year"}),
+        ("AAPL price history for the last 5 days", {"5 day"}),
+        ("AAPL price history for 5 days", {"5 day"}),
+        ("What was Apple's price yesterday?", {"last day"}),
+        ("Tesla YTD performance", {"ytd"}),
+        ("NVDA revenue in Q1 2024", {"q1 2024", "2024"}),
+        ("How is NVDA doing today?", set()),
+    ],
+)
+def test_extract_periods(text, periods):
+    assert extract_periods(text) == periods
+
+
+def test_ratio_and_period_acronyms_are_not_tickers():
+    assert extract_tickers("What is the P/E ratio of GOOGL?") == {"GOOGL"}
+    assert extract_tickers("TSLA performance YTD") == {"TSLA"}
+
+
+@pytest.mark.parametrize(
+    "stored, asked",
+    [
+        ("How did MSFT perform this year?", "How did MSFT perform last year?"),
+        ("What was AAPL price this week?", "What was AAPL price last week?"),
+        ("What was NVDA revenue in Q1 2024?", "What was NVDA revenue in Q2 2024?"),
+        ("Show the price history of AAPL for the last 5 days", "Show the price history of AAPL for the last 30 days"),
+        ("What is the current price of MSFT?", "What is the current price of AAPL?"),
+    ],
+)
+def test_guard_rejects_other_tickers_numbers_and_periods(cache, stored, asked):
+    cache.store("agent", stored, {"content": "answer"})
+    assert cache.lookup("agent", asked) is None
+
+
+@pytest.mark.parametrize(
+    "stored, asked",
+    [
+        ("How did MSFT perform this year?", "How did Microsoft perform this year?"),
+        ("What is the current price of MSFT?", "Give me a quote for MSFT"),
+        ("How is TSLA doing year to date?", "TSLA performance YTD"),
+    ],
+)
+def test_paraphrases_hit(cache, stored, asked):
+    cache.store("agent", stored, {"content": "answer"})
+    found = cache.lookup("agent", asked)
+    assert found is not None and found[0]["value"] == {"content": "answer"}
+
+
+def test_context_must_match(cache):
+    cache.store("agent", "What is the current price of MSFT?", {"content": "answer"}, context="gpt-4o")
+    assert cache.lookup("agent", "What is the current price of MSFT?", context="gpt-4o-mini") is None
+
+
+class BgeSmall(HashingEmbedder):
+    """Stands in for FastEmbedEmbedder: only the name matters for the threshold."""
+
+    name = DEFAULT_MODEL
+
+
+def test_threshold_defaults_to_the_one_tuned_for_the_embedder():
+    hashing = SemanticCache(HashingEmbedder(), registry=MetricsRegistry())
+    assert hashing.threshold == 0.85 and hashing.threshold_tuned
+
+    untuned = SemanticCache(BgeSmall(), registry=MetricsRegistry())
+    assert untuned.threshold == FALLBACK_THRESHOLD and not untuned.threshold_tuned
+
+    configured = SemanticCache(BgeSmall(), threshold=0.93, registry=MetricsRegistry())
+    assert configured.threshold == 0.93 and configured.threshold_tuned
+
+
+def test_runs_endpoint_answers_paraphrase_from_semantic_cache():
+    agent = Agent(agent_id="test-agent", model=CountingModel(), add_history_to_messages=True, telemetry=False)
+    apply_semantic_cache([agent], SemanticCache(registry=MetricsRegistry()))
+    client = TestClient(FastAPIApp(agents=[agent]).get_app())
+    post_run(client, "What is the current price of MSFT?")
+    second = post_run(client, "Give me a quote for MSFT")
+    assert len(agent.model.calls) == 1
+    assert second["metrics"]["cache_hit"] == [True]
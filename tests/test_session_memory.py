@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+from agno.memory.v2.memory import Memory
+from agno.models.message import Message
+from agno.run.response import RunResponse
+
+from agno_deploy.metrics import MetricsRegistry
+from agno_deploy.session_memory import SessionMemoryBudget, compact_run, run_size
+
+
+def run(question, answer="NVDA is trading at 100 USD.", run_id=None):
+    """A finance run as Agno stores it: prompt, replayed history, a tool round trip and the answer."""
+    tool_call = {"id": "c1", "type": "function", "function": {"name": "get_current_stock_price", "arguments": "{}"}}
+    return RunResponse(
+        run_id=run_id or question,
+        content=answer,
+        messages=[
+            Message(role="system", content="You are a financial analyst. " * 20),
+            Message(role="user", content="Earlier question", from_history=True),
+            Message(role="user", content=question),
+            Message(role="assistant", content=None, tool_calls=[tool_call]),
+            Message(role="tool", content='{"price": 100.0, "raw": "' + "x" * 500 + '"}', tool_call_id="c1"),
+            Message(role="assistant", content=answer),
+        ],
+        tools=[{"tool_name": "get_current_stock_price", "content": "x" * 500}],
+    )
+
+
+def bounded_memory(**kwargs):
+    budget = SessionMemoryBudget(registry=MetricsRegistry(), **kwargs)
+    memory = Memory()
+    budget.install(memory)
+    return budget, memory
+
+
+def test_compaction_keeps_questions_and_answers():
+    original = run("What's NVDA at?")
+    stored = compact_run(original)
+
+    assert [(m.role, m.content) for m in stored.messages] == [
+        ("user", "What's NVDA at?"),
+        ("assistant", "NVDA is trading at 100 USD."),
+    ]
+    assert stored.tools is None and stored.content == original.content
+    assert run_size(stored) < run_size(original) / 3
+    # The response the client gets is untouched
+    assert len(original.messages) == 6 and original.tools
+
+
+def test_oversized_session_drops_its_oldest_runs():
+    size = run_size(compact_run(run("Question 0")))
+    budget, memory = bounded_memory(max_bytes=100 * size, max_session_bytes=int(3.5 * size))
+    for i in range(6):
+        memory.add_run("s1", run(f"Question {i}"))
+
+    assert [r.run_id for r in memory.runs["s1"]] == ["Question 3", "Question 4", "Question 5"]
+    assert budget.evictions.value(reason="trim") == 3
+    assert budget.bytes_held == sum(run_size(r) for r in memory.runs["s1"])
+
+
+def test_least_recently_used_session_is_evicted_over_budget():
+    size = run_size(compact_run(run("Question")))
+    budget, memory = bounded_memory(max_bytes=int(2.5 * size), max_session_bytes=size * 2)
+    memory.add_run("s1", run("Question", run_id="1"))
+    memory.add_run("s2", run("Question", run_id="2"))
+    memory.add_run("s1", run("Question", run_id="3"))  # s1 is now the most recently used
+    assert set(memory.runs) == {"s1"}  # Two runs of s1 plus s2 exceed the budget
+
+    memory.add_run("s3", run("Question", run_id="4"))
+    assert set(memory.runs) == {"s3"}
+    assert budget.evictions.value(reason="budget") == 2
+
+
+def test_gauges_follow_the_sessions_held():
+    budget, memory = bounded_memory(max_bytes=10_000_000)
+    for session_id in ("s1", "s2", "s3"):
+        memory.add_run(session_id, run("Question", run_id=session_id))
+
+    held = sum(run_size(r) for runs in memory.runs.values() for r in runs)
+    assert budget.sessions_gauge.value() == 3
+    assert budget.bytes_gauge.value() == budget.bytes_held == held
+    assert budget.saved.total() > 0
+
+
+def test_background_sweep_evicts_idle_sessions():
+    budget, memory = bounded_memory(idle_ttl=0.05, sweep_interval=0.02)
+
+    async def scenario():
+        await budget.start()
+        memory.add_run("s1", run("Question"))
+        assert budget.sessions_gauge.value() == 1
+        deadline = time.monotonic() + 2
+        while memory.runs.get("s1") and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        await budget.stop()
+
+    asyncio.run(scenario())
+    assert "s1" not in memory.runs
+    assert budget.evictions.value(reason="idle") == 1
+    assert budget.sessions_gauge.value() == 0 and budget.bytes_gauge.value() == 0
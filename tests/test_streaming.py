@@ -0,0 +1,141 @@
+import asyncio
+import json
+
+import pytest
+from agno.run.response import RunResponse
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from agno_deploy.metrics import MetricsRegistry
+from agno_deploy.streaming import RunStreamResponse, StreamMetrics, mount_streaming, negotiate_format
+
+
+class StreamingAgent:
+    """Streams `count` content events as fast as it can, optionally failing after them."""
+
+    agent_id = "finance"
+
+    def __init__(self, count=3, error=None):
+        self.count = count
+        self.error = error
+        self.produced = 0
+        self.finished = False
+
+    async def arun(self, message, stream=False, stream_intermediate_steps=False, session_id=None, user_id=None):
+        async def events():
+            try:
+                for i in range(self.count):
+                    self.produced += 1
+                    yield RunResponse(content=f"token{i} ", run_id="r1", session_id=session_id)
+                    await asyncio.sleep(0)
+                if self.error:
+                    raise self.error
+            finally:
+                self.finished = True
+
+        return events()
+
+
+def client(agent, registry=None, **kwargs):
+    app = FastAPI()
+    mount_streaming(app, [agent], registry=registry or MetricsRegistry(), **kwargs)
+    return TestClient(app)
+
+
+def post(c, params=None, **kwargs):
+    params = dict(params or {}, agent_id="finance")
+    return c.post("/stream", params=params, data={"message": "How is NVDA doing?"}, **kwargs)
+
+
+@pytest.mark.parametrize(
+    "requested, accept, expected",
+    [
+        (None, "application/x-ndjson", "ndjson"),
+        (None, "application/jsonl", "ndjson"),
+        (None, "text/event-stream", "sse"),
+        (None, "*/*", "sse"),
+        ("ndjson", "text/event-stream", "ndjson"),  # format= wins over Accept
+        ("sse", "application/x-ndjson", "sse"),
+    ],
+)
+def test_negotiate_format(requested, accept, expected):
+    assert negotiate_format(requested, accept) == expected
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        negotiate_format("xml", "")
+    assert post(client(StreamingAgent()), params={"format": "xml"}).status_code == 400
+
+
+def test_sse_stream_headers_and_events():
+    response = post(client(StreamingAgent()), headers={"Accept": "text/event-stream"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache, no-transform"
+    assert response.headers["x-accel-buffering"] == "no"
+    opening, *messages = [m for m in response.text.split("\n\n") if m]
+    assert opening == ": stream open"
+    assert [m.split("\n")[:2] for m in messages] == [["event: RunResponse", f"id: {i}"] for i in (1, 2, 3)]
+    assert json.loads(messages[0].split("\n")[2][len("data: "):])["content"] == "token0 "
+
+
+def test_ndjson_stream_has_one_compact_event_per_line():
+    response = post(client(StreamingAgent()), headers={"Accept": "application/x-ndjson"})
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["x-accel-buffering"] == "no"
+    lines = response.text.splitlines()
+    assert [json.loads(line)["content"] for line in lines] == ["token0 ", "token1 ", "token2 "]
+    assert all(": " not in line and ", " not in line for line in lines)
+
+
+def test_run_error_becomes_a_run_error_event():
+    registry = MetricsRegistry()
+    agent = StreamingAgent(error=RuntimeError("model overloaded"))
+    response = post(client(agent, registry), params={"format": "ndjson"})
+
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [e["event"] for e in events] == ["RunResponse"] * 3 + ["RunError"]
+    assert events[-1]["content"] == "model overloaded"
+    assert registry.counter("stream_runs_total").value(outcome="error") == 1
+
+
+def response_for(agent, metrics, **kwargs):
+    run_kwargs = {"message": "How is NVDA doing?", "session_id": "s1", "user_id": None}
+    return RunStreamResponse(agent, run_kwargs, "ndjson", metrics, started=0.0, **kwargs)
+
+
+def test_slow_reader_makes_the_run_wait_on_the_bounded_queue():
+    agent, metrics = StreamingAgent(count=20), StreamMetrics(MetricsRegistry())
+    ahead = []
+
+    async def slow_send(message):
+        if message.get("body"):
+            # How far the run got ahead of what the client has read
+            ahead.append(agent.produced - len(ahead))
+            await asyncio.sleep(0.01)
+
+    asyncio.run(response_for(agent, metrics, queue_size=2)({"type": "http"}, None, slow_send))
+
+    assert len(ahead) == 20 and agent.finished
+    assert max(ahead) <= 2 + 2  # The queue, plus the event in hand and the one being put
+    assert metrics.backpressure.total() > 0
+    assert metrics.outcomes.value(outcome="completed") == 1
+
+
+def test_client_reading_nothing_gets_its_run_cancelled_and_the_response_ended():
+    agent, metrics = StreamingAgent(count=50), StreamMetrics(MetricsRegistry())
+    sent = []
+
+    async def stuck_send(message):
+        sent.append(message)
+        if message.get("body") and len(sent) > 2:
+            await asyncio.sleep(10)  # The client stopped reading: the write never completes
+
+    response = response_for(agent, metrics, queue_size=2, slow_client_timeout=0.05)
+    asyncio.run(response({"type": "http"}, None, stuck_send))
+
+    assert metrics.outcomes.value(outcome="slow_client") == 1
+    assert sent[-1] == {"type": "http.response.body", "body": b"", "more_body": False}
+    assert agent.finished and agent.produced < 50
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+from agno.agent import Agent
+
+from agno_deploy.metrics import MetricsRegistry
+from agno_deploy.tiering import ModelTiering, classify
+from tests.helpers import CountingModel
+
+LIGHT = "gpt-4o-mini"
+
+
+class TieredModel(CountingModel):
+    """Answers per model id, so the light twin (a copy with another id) can be scripted separately."""
+
+    light_reply = "NVDA is trading at 100 USD."
+
+    def invoke(self, messages, **kwargs):
+        self.calls.append(messages)
+        if self.id == LIGHT:
+            if isinstance(self.light_reply, Exception):
+                raise self.light_reply
+            return self.light_reply
+        return "NVDA last traded at 100.12 USD."
+
+
+def tiered_agent(light_reply, registry):
+    TieredModel.light_reply = light_reply
+    agent = Agent(agent_id="finance", model=TieredModel(), add_history_to_messages=True)
+    ModelTiering(agent, LIGHT, registry=registry).install()
+    return agent
+
+
+def session_runs(agent, session_id="s1"):
+    return agent.memory.runs.get(session_id, [])
+
+
+@pytest.mark.parametrize(
+    "message, expected",
+    [
+        ("What's NVDA trading at right now?", ("light", "lookup")),
+        ("$TSLA price today", ("light", "lookup")),
+        ("What's the market cap of the USD ETF?", ("light", "lookup")),  # Acronyms are not tickers
+        ("Analyze NVDA's price action", ("full", "complex_terms")),
+        ("NVDA vs AMD price", ("full", "complex_terms")),
+        ("Should I sell my shares at this price?", ("full", "complex_terms")),
+        ("Price of NVDA and AMD", ("full", "multiple_tickers")),
+        ("Tell me a joke", ("full", "default")),
+        ("", ("full", "non_text")),
+        (None, ("full", "non_text")),
+    ],
+)
+def test_classify(message, expected):
+    assert classify(message) == expected
+
+
+def test_classify_word_count_cutoff():
+    words = "what is the closing price of NVDA".split()
+    padding = ["please"] * (25 - len(words))
+    assert classify(" ".join(words + padding)) == ("light", "lookup")
+    assert classify(" ".join(words + padding + ["please"])) == ("full", "long_query")
+    assert classify(" ".join(words + padding), max_words=24) == ("full", "long_query")
+
+
+def test_accepted_light_answer_is_kept():
+    registry = MetricsRegistry()
+    agent = tiered_agent("NVDA is trading at 100 USD.", registry)
+    response = asyncio.run(agent.arun("What's NVDA's price?", session_id="s1"))
+
+    assert response.model == LIGHT and response.content == "NVDA is trading at 100 USD."
+    assert [run.run_id for run in session_runs(agent)] == [response.run_id]
+    assert registry.counter("tier_escalations_total").total() == 0
+
+
+@pytest.mark.parametrize(
+    "light_reply, reason",
+    [("I'm not sure what the current price is.", "low_confidence"), ("", "empty"), (RuntimeError("429"), "error")],
+)
+def test_failed_light_answer_escalates_to_the_full_model(light_reply, reason):
+    registry = MetricsRegistry()
+    agent = tiered_agent(light_reply, registry)
+    response = asyncio.run(agent.arun("What's NVDA's price?", session_id="s1"))
+
+    assert response.model == "counting-model" and response.content == "NVDA last traded at 100.12 USD."
+    assert registry.counter("tier_escalations_total").value(reason=reason) == 1
+    assert registry.counter("tier_requests_total").value(tier="light", reason="lookup") == 1
+    # The discarded light run is gone from the shared memory: history holds the full run only
+    assert [run.run_id for run in session_runs(agent)] == [response.run_id]
+
+
+def test_tiers_share_one_conversation_history():
+    agent = tiered_agent("NVDA is trading at 100 USD.", MetricsRegistry())
+    asyncio.run(agent.arun("What's NVDA's price?", session_id="s1"))
+    asyncio.run(agent.arun("Explain the move", session_id="s1"))
+
+    assert [run.model for run in session_runs(agent)] == [LIGHT, "counting-model"]
+    # The full model saw the light tier's turn as history
+    history = [m.content for m in agent.model.calls[-1]]
+    assert "What's NVDA's price?" in history and "NVDA is trading at 100 USD." in history
@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+from agno.tools.function import Function, FunctionCall
+from agno.tools.yfinance import YFinanceTools
+
+from agno_deploy.cache import ToolResultCache, TwoTierCache, apply_tool_cache
+from agno_deploy.metrics import MetricsRegistry
+from agno_deploy.warmup import TickerDemand, apply_demand_tracking
+
+
+def call_tool(agent, symbol, fetches):
+    def get_current_stock_price(symbol: str) -> str:
+        fetches.append(symbol)
+        return "189.5"
+
+    function = Function.from_callable(get_current_stock_price)
+    function.tool_hooks = agent.tool_hooks
+    return FunctionCall(function=function, arguments={"symbol": symbol}).execute().result
+
+
+def test_demand_counts_calls_answered_by_the_tool_cache(tmp_path):
+    agent = SimpleNamespace(tools=[YFinanceTools()], tool_hooks=None)
+    demand = TickerDemand(str(tmp_path))
+    # The deploy order: caches (and the store) first, demand tracking last and outermost
+    apply_tool_cache([agent], ToolResultCache(TwoTierCache("tools", registry=MetricsRegistry())))
+    apply_demand_tracking([agent], demand)
+    assert agent.tool_hooks[0] == demand.hook
+
+    fetches = []
+    for _ in range(5):
+        assert call_tool(agent, "aapl", fetches) == "189.5"
+    assert fetches == ["aapl"]
+    assert demand.counts["AAPL"] == 5
+
+
+def test_top_ranks_tickers_by_requests(tmp_path):
+    demand = TickerDemand(str(tmp_path))
+    for symbol in ["MSFT", "AAPL", "AAPL", "NVDA", "AAPL", "MSFT"]:
+        demand.record(symbol)
+    demand.flush()
+    assert demand.top(2) == ["AAPL", "MSFT"]
@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+from agno_deploy.metrics import MetricsRegistry
+from agno_deploy.watchdog import LoopWatchdog
+
+
+def long_block():
+    time.sleep(0.4)
+
+
+async def watch(block, stale_capture: bool = False):
+    watchdog = LoopWatchdog(threshold=0.1, interval=0.02, registry=MetricsRegistry())
+    await watchdog.start()
+    try:
+        await asyncio.sleep(0.1)
+        if stale_capture:
+            # What the monitor leaves behind after a block above the threshold in silence but not in lag
+            watchdog._pending = {"culprit": "test:short_block", "stack": [], "captured_at": time.time(),
+                                 "beat": watchdog._last_beat}
+            await asyncio.sleep(0.1)
+        block()
+        await asyncio.sleep(0.1)
+    finally:
+        await watchdog.stop()
+    return watchdog.recent_stalls()
+
+
+def test_stall_is_attributed_to_the_blocking_function():
+    stalls = asyncio.run(watch(long_block))
+    assert len(stalls) == 1
+    assert stalls[0]["culprit"].endswith(":long_block")
+    assert stalls[0]["lag_ms"] >= 300
+
+
+def test_capture_without_a_stall_does_not_leak_into_the_next_stall():
+    stalls = asyncio.run(watch(long_block, stale_capture=True))
+    assert len(stalls) == 1
+    assert stalls[0]["culprit"].endswith(":long_block")
+    assert "beat" not in stalls[0]